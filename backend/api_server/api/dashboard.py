@@ -4,9 +4,10 @@ Implements dashboard and system monitoring endpoints from OpenAPI specification
 """
 
 import logging
+import time
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from fastapi.responses import JSONResponse
 
 from ..models.model_models import SystemStatus
@@ -16,11 +17,15 @@ from ..core.drone_manager import DroneManager
 from ..core.vision_service import VisionService
 from ..core.model_service import ModelService
 from ..core.dataset_service import DatasetService
+from ..core.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 概要のシステム指標（CPU・メモリ等）を再取得する間隔（秒）
+OVERVIEW_REFRESH_SECONDS = 5.0
+
 # Global service instances (will be injected)
 system_service: SystemService = None
 drone_manager: DroneManager = None
@@ -174,6 +179,7 @@ async def get_performance_metrics(
 
 @router.get("/dashboard/overview")
 async def get_dashboard_overview(
+    request: Request,
     system_svc: SystemService = Depends(get_system_service),
     drone_mgr: DroneManager = Depends(get_drone_manager),
     vision_svc: VisionService = Depends(get_vision_service),
@@ -183,9 +189,18 @@ async def get_dashboard_overview(
     """
     ダッシュボード概要取得
     
-    ダッシュボード用の概要情報を取得します。
+    ダッシュボード用の概要情報を取得します。モデル・データセット・追跡・接続数が変わらず、
+    システム指標の更新間隔内であれば同じ内容を返し、If-None-Match が一致すれば 304 を返します。
     """
-    try:
+    version = (
+        model_svc.version,
+        dataset_svc.version,
+        vision_svc.is_tracking_active,
+        len(drone_mgr.connected_drones),
+        int(time.monotonic() // OVERVIEW_REFRESH_SECONDS)
+    )
+    
+    async def build():
         # Get system status
         system_status = await system_svc.get_system_status(drone_mgr, vision_svc, model_svc)
         
@@ -225,7 +240,10 @@ async def get_dashboard_overview(
         
         logger.debug("Retrieved dashboard overview")
         return overview
-        
+    
+    try:
+        return await response_cache.respond(request, "dashboard_overview", version, build,
+                                            owner=(model_svc, dataset_svc, vision_svc, drone_mgr))
     except Exception as e:
         logger.error(f"Error getting dashboard overview: {str(e)}")
         raise HTTPException(status_code=500, detail="ダッシュボード概要の取得に失敗しました")
@@ -9,7 +9,10 @@ from typing import List
 from fastapi import APIRouter, HTTPException, Depends, Path
 from fastapi.responses import JSONResponse
 
-from ..models.drone_models import Drone, DroneStatus, MoveCommand, RotateCommand, Photo
+from ..models.drone_models import (
+    Drone, DroneStatus, MoveCommand, RotateCommand, Photo,
+    BulkCommandRequest, BulkCommandResponse
+)
 from ..models.common_models import SuccessResponse
 from ..core.drone_manager import DroneManager
 
@@ -42,6 +45,33 @@ async def get_drones(
         raise HTTPException(status_code=500, detail="ドローン一覧の取得に失敗しました")
 
 
+@router.post("/drones/bulk/command", response_model=BulkCommandResponse)
+async def execute_bulk_command(
+    request: BulkCommandRequest,
+    drone_manager: DroneManager = Depends(get_drone_manager)
+) -> BulkCommandResponse:
+    """
+    一括コマンド実行
+    
+    複数のドローンに同じコマンドを並行して送信し、ドローンごとの結果をまとめて返します。
+    """
+    try:
+        result = await drone_manager.execute_bulk_command(
+            request.command,
+            drone_ids=request.drone_ids,
+            selector=request.selector,
+            params=request.params,
+            timeout=request.timeout
+        )
+        logger.info(f"Bulk command {request.command} executed: {result['succeeded']}/{result['total']} succeeded")
+        return BulkCommandResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error executing bulk command {request.command}: {str(e)}")
+        raise HTTPException(status_code=500, detail="一括コマンドの実行に失敗しました")
+
+
 @router.post("/drones/{drone_id}/connect", response_model=SuccessResponse)
 async def connect_drone(
     drone_id: str = Path(..., description="ドローンID", regex="^[a-zA-Z0-9_-]+$"),
@@ -244,7 +274,7 @@ async def get_drone_status(
     ドローンの現在状態を取得します。
     """
     try:
-        status = await drone_manager.get_drone_status(drone_id)
+        status = await drone_manager.get_cached_drone_status(drone_id)
         logger.debug(f"Retrieved status for drone {drone_id}")
         return status
     except ValueError as e:
@@ -8,19 +8,20 @@ import logging
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.security import HTTPBearer
 
 from ..models.drone_models import (
     Drone, DroneStatus, TakeoffCommand, MoveCommand, RotateCommand, 
     AltitudeCommand, OperationResponse, Photo, FlightPlanRequest,
     LearningDataCollectionRequest, EnhancedDroneStatus, FlightLog,
-    SafetyViolation, DroneMetrics
+    SafetyViolation, DroneMetrics, BulkCommandRequest, BulkCommandResponse, PathPlanRequest
 )
 from ..models.vision_models import DetectionResult, TrackingStatus
 from ..models.common_models import SuccessResponse, ErrorResponse
 from ..core.enhanced_drone_manager import EnhancedDroneManager
 from ..core.enhanced_vision_service import EnhancedVisionService
+from ..core.response_cache import response_cache
 from ..security import get_api_key_header, api_key_manager
 
 logger = logging.getLogger(__name__)
@@ -243,6 +244,29 @@ async def emergency_stop_enhanced(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/drones/bulk/command/enhanced", response_model=BulkCommandResponse, tags=["enhanced-flight-control"])
+async def execute_bulk_command_enhanced(
+    request: BulkCommandRequest,
+    api_key: str = Depends(get_api_key_header)
+):
+    """Enhanced fleet command fanned out concurrently with per-drone timeouts"""
+    try:
+        drone_manager = get_enhanced_drone_manager()
+        result = await drone_manager.execute_bulk_command(
+            request.command,
+            drone_ids=request.drone_ids,
+            selector=request.selector,
+            params=request.params,
+            timeout=request.timeout
+        )
+        return BulkCommandResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in enhanced bulk command: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ===== Flight Planning =====
 
 @router.post("/drones/{drone_id}/flight_plan", response_model=SuccessResponse, tags=["flight-planning"])
@@ -263,6 +287,23 @@ async def execute_flight_plan(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/drones/{drone_id}/path/plan", response_model=Dict[str, Any], tags=["flight-planning"])
+async def plan_path(
+    drone_id: str,
+    request: PathPlanRequest,
+    api_key: str = Depends(get_api_key_header)
+):
+    """Plan a collision-free path around obstacles without flying it"""
+    try:
+        drone_manager = get_enhanced_drone_manager()
+        return await drone_manager.plan_path(drone_id, request.goal, request.start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error planning path: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/drones/{drone_id}/flight_plan/status", response_model=Dict[str, Any], tags=["flight-planning"])
 async def get_flight_plan_status(
     drone_id: str,
@@ -439,13 +480,18 @@ async def get_tracking_status_enhanced(
 
 @router.get("/vision/models/enhanced", response_model=List[Dict[str, Any]], tags=["enhanced-vision"])
 async def get_enhanced_vision_models(
+    request: Request,
     api_key: str = Depends(get_api_key_header)
 ):
-    """Get list of available enhanced vision models"""
+    """Get list of available enhanced vision models (304 when unchanged since If-None-Match)"""
     try:
         vision_service = get_enhanced_vision_service()
-        models = vision_service.get_available_models()
-        return models
+        
+        async def build():
+            return vision_service.get_available_models()
+        
+        return await response_cache.respond(request, "enhanced_vision_models", vision_service.models_version, build,
+                                            owner=vision_service)
     except Exception as e:
         logger.error(f"Error getting enhanced vision models: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -488,6 +534,28 @@ async def get_flight_logs(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/drones/{drone_id}/logs/flight/history", response_model=Dict[str, Any], tags=["safety-monitoring"])
+async def query_flight_logs(
+    drone_id: str,
+    start: Optional[datetime] = Query(None, description="Start time (inclusive)"),
+    end: Optional[datetime] = Query(None, description="End time (exclusive)"),
+    event_type: Optional[List[str]] = Query(None, description="Event types to include"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of log entries per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    api_key: str = Depends(get_api_key_header)
+):
+    """Query persisted flight logs by time range and event type with cursor pagination"""
+    try:
+        drone_manager = get_enhanced_drone_manager()
+        return await drone_manager.query_flight_logs(drone_id, start, end, event_type, limit, cursor)
+    except ValueError as e:
+        status_code = 404 if "not found" in str(e) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error querying flight logs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/system/safety/config", response_model=Dict[str, Any], tags=["safety-monitoring"])
 async def get_safety_config(
     api_key: str = Depends(get_api_key_header)
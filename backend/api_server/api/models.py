@@ -6,13 +6,14 @@ Implements model management endpoints from OpenAPI specification
 import logging
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, Path
+from fastapi import APIRouter, HTTPException, Depends, Path, Request
 from fastapi.responses import JSONResponse
 
 from ..models.model_models import Model, TrainModelRequest, TrainingJob
 from ..models.common_models import SuccessResponse
 from ..core.model_service import ModelService
 from ..core.dataset_service import DatasetService
+from ..core.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -43,17 +44,21 @@ def get_dataset_service() -> DatasetService:
 
 @router.get("/models", response_model=List[Model])
 async def get_models(
+    request: Request,
     model_svc: ModelService = Depends(get_model_service)
 ) -> List[Model]:
     """
     モデル一覧取得
     
-    学習済みモデルの一覧を取得します。
+    学習済みモデルの一覧を取得します。変更がなければ If-None-Match に 304 を返します。
     """
-    try:
+    async def build():
         models = await model_svc.get_models()
         logger.info(f"Retrieved {len(models)} models")
         return models
+    
+    try:
+        return await response_cache.respond(request, "models", model_svc.version, build, owner=model_svc)
     except Exception as e:
         logger.error(f"Error getting models: {str(e)}")
         raise HTTPException(status_code=500, detail="モデル一覧の取得に失敗しました")
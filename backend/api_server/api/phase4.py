@@ -321,7 +321,8 @@ async def get_performance_metrics(
 
 @router.get("/performance/api")
 async def get_api_performance(
-    endpoint: Optional[str] = Query(None, description="エンドポイント"),
+    endpoint: Optional[str] = Query(None, description="エンドポイント（ルートテンプレート、例: /api/drones/{drone_id}）"),
+    breakdown: bool = Query(False, description="メソッド・ルート・ステータス分類ごとの内訳を含める"),
     perf_svc: PerformanceService = Depends(get_performance_service),
     _: str = Depends(require_dashboard)
 ):
@@ -329,9 +330,11 @@ async def get_api_performance(
     API パフォーマンス取得
     
     API エンドポイントのパフォーマンス統計を取得します。
+    累計の件数・平均・最小・最大に加え、p50/p90/p99/p999 と直近 1 分・5 分の
+    スループットとパーセンタイルを返します。
     """
     try:
-        performance = perf_svc.get_api_performance(endpoint)
+        performance = perf_svc.get_api_performance(endpoint, include_routes=breakdown)
         logger.debug(f"Retrieved API performance for: {endpoint or 'all'}")
         return performance
     except Exception as e:
@@ -6,7 +6,7 @@ Implements vision-related endpoints from OpenAPI specification
 import logging
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, Path, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Depends, Path, File, UploadFile, Form, Request
 from fastapi.responses import JSONResponse
 
 from ..models.vision_models import (
@@ -16,6 +16,7 @@ from ..models.vision_models import (
 from ..models.common_models import SuccessResponse
 from ..core.vision_service import VisionService
 from ..core.dataset_service import DatasetService
+from ..core.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,17 +47,21 @@ def get_dataset_service() -> DatasetService:
 
 @router.get("/vision/datasets", response_model=List[Dataset])
 async def get_datasets(
+    request: Request,
     dataset_svc: DatasetService = Depends(get_dataset_service)
 ) -> List[Dataset]:
     """
     データセット一覧取得
     
-    学習データセットの一覧を取得します。
+    学習データセットの一覧を取得します。変更がなければ If-None-Match に 304 を返します。
     """
-    try:
+    async def build():
         datasets = await dataset_svc.get_datasets()
         logger.info(f"Retrieved {len(datasets)} datasets")
         return datasets
+    
+    try:
+        return await response_cache.respond(request, "datasets", dataset_svc.version, build, owner=dataset_svc)
     except Exception as e:
         logger.error(f"Error getting datasets: {str(e)}")
         raise HTTPException(status_code=500, detail="データセット一覧の取得に失敗しました")
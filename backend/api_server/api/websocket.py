@@ -6,7 +6,9 @@ Provides real-time status updates, camera streaming, and control
 import asyncio
 import json
 import logging
-from typing import Dict, Set, Any, Optional
+import time
+from typing import Dict, Set, Any, Optional, FrozenSet, List, Union
+from urllib.parse import parse_qsl
 from datetime import datetime
 
 from fastapi import WebSocket, WebSocketDisconnect
@@ -14,102 +16,546 @@ from fastapi.routing import APIWebSocketRoute
 import websockets
 
 from ..core.drone_manager import DroneManager
+from ..core.fleet_snapshot import FleetSnapshot
+from ..core.metrics_registry import GAUGE, MetricFamily
+from ..core.status_delta import StatusDeltaEncoder, group_subscribers
+from ..core.subscriptions import MAX_RATE_HZ, SAMPLED_TOPICS, TOPIC_MESSAGES, SubscriptionRegistry, apply_field_mask
+from ..core.ws_broker import PEER_LEFT_CHANNEL, InProcessBroker
+from ..core.ws_requests import RequestDispatcher, with_request_id
+from ..core.websocket_sender import ConnectionSender, SendPolicy, coalesce_key, policy_for
+from ..core.ws_codec import (
+    DETECTION_FIELDS, JSON, MSGPACK, TELEMETRY_FIELDS, decode_message, encode_message,
+    negotiate_subprotocol, resolve_encoding
+)
 from ..models.drone_models import DroneStatus
 
 logger = logging.getLogger(__name__)
 
+# 接続単位で配信を絞り込めるブロードキャストのトピック（未指定の接続はすべて受信）
+BROADCAST_TOPICS = frozenset({"network", "real_drone_events"})
+
+# テレメトリ購読にレート指定がない場合の配信周期（Hz）
+DEFAULT_TELEMETRY_HZ = 10.0
+
+# 時間のかかるリクエストの進捗通知間隔（秒）
+PROGRESS_INTERVAL = 0.5
+
 
 class ConnectionManager:
-    """WebSocket接続マネージャー"""
+    """
+    WebSocket接続マネージャー
+
+    送信は接続ごとの有界キューと書き込みタスクで行う。メッセージはエンコーディング
+    （JSON / MessagePack）ごとに1回だけシリアライズして同じエンコーディングの接続で共有し、
+    送信側はキューに積むだけで遅いクライアントを待たない。
+
+    複数ワーカーで動かす場合は配信をブローカー経由で他のワーカーにも送り、各ワーカーが
+    自分の接続に配る。定期配信（状態・テレメトリ）はプライマリのワーカーだけが行い、
+    他のワーカーは購読状況（interest）をプライマリに通知する。
+    """
     
-    def __init__(self):
+    def __init__(self, max_queue: int = 256):
         self.active_connections: Set[WebSocket] = set()
         self.drone_subscriptions: Dict[str, Set[WebSocket]] = {}
         self.status_broadcast_task: Optional[asyncio.Task] = None
         
+        # 接続ごとの送信キュー
+        self.max_queue = max_queue
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        # 接続 -> エンコーディング（未登録は JSON）
+        self.encodings: Dict[WebSocket, str] = {}
+        # 接続 -> リクエストディスパッチャー（切断時に処理中のリクエストをキャンセル）
+        self.dispatchers: Dict[WebSocket, RequestDispatcher] = {}
+        
+        # ドローン購読ごとのトピック・レート・フィールドマスク
+        self.subscriptions = SubscriptionRegistry()
+        # 接続 -> 受信するブロードキャストのトピック（未登録は全トピック）
+        self.broadcast_topics: Dict[WebSocket, FrozenSet[str]] = {}
+        
+        # 差分ステータスストリーム（接続 -> 対象ドローン集合、None は全ドローン）
+        self.status_stream_subscribers: Dict[WebSocket, Optional[FrozenSet[str]]] = {}
+        self.status_encoder = StatusDeltaEncoder()
+        
+        # 他のワーカープロセスへの配信（既定はプロセス内のみ）
+        self.broker = InProcessBroker()
+        # 送信元ID -> 他ワーカーの購読状況
+        self.remote_interest: Dict[str, Dict[str, Any]] = {}
+        
     async def connect(self, websocket: WebSocket):
-        """新しい接続を受け入れ"""
-        await websocket.accept()
+        """
+        新しい接続を受け入れ
+        
+        サブプロトコル "msgpack" またはクエリパラメータ encoding=msgpack で MessagePack を
+        要求できる（msgpack 未インストール時は JSON）。
+        """
+        scope = getattr(websocket, "scope", None)
+        scope = scope if isinstance(scope, dict) else {}
+        subprotocol = negotiate_subprotocol(scope.get("subprotocols") or ())
+        if subprotocol is not None:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        requested = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))).get("encoding")
+        encoding = resolve_encoding(subprotocol, requested)
+        if encoding != JSON:
+            self.encodings[websocket] = encoding
         self.active_connections.add(websocket)
-        logger.info(f"WebSocket connection established. Total connections: {len(self.active_connections)}")
+        self._start_sender(websocket)
+        logger.info(f"WebSocket connection established ({encoding}). "
+                    f"Total connections: {len(self.active_connections)}")
         
         # 初回接続時にスタートアップメッセージを送信
-        await self.send_personal_message(websocket, {
+        message = {
             "type": "connection_established",
             "message": "WebSocket connection established",
+            "encoding": encoding,
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        if encoding == MSGPACK:
+            # 位置配列の列定義
+            message["telemetry_fields"] = list(TELEMETRY_FIELDS)
+            message["detection_fields"] = list(DETECTION_FIELDS)
+        await self.send_personal_message(websocket, message)
     
     def disconnect(self, websocket: WebSocket):
         """接続を切断"""
         self.active_connections.discard(websocket)
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
+        dispatcher = self.dispatchers.pop(websocket, None)
+        if dispatcher is not None:
+            dispatcher.cancel_all()
         
         # ドローン購読から削除
         for drone_id, subscribers in self.drone_subscriptions.items():
             subscribers.discard(websocket)
+        self.subscriptions.remove_connection(websocket)
+        self.broadcast_topics.pop(websocket, None)
+        self.encodings.pop(websocket, None)
+        self.status_stream_subscribers.pop(websocket, None)
+        self._publish_interest()
         
         logger.info(f"WebSocket connection closed. Total connections: {len(self.active_connections)}")
     
+    def _start_sender(self, websocket: WebSocket) -> ConnectionSender:
+        """接続の送信キューを作成して書き込みタスクを開始（接続時のみ）"""
+        sender = ConnectionSender(websocket, self.max_queue, on_error=self.disconnect)
+        self.senders[websocket] = sender
+        sender.start()
+        return sender
+    
+    def enqueue_message(self, connections, message: Optional[dict] = None, policy: SendPolicy = SendPolicy.DROP_OLDEST,
+                        key: Optional[str] = None, message_text: Optional[str] = None) -> int:
+        """
+        メッセージを各接続のキューに積む（送信は待たない）
+        
+        エンコーディングごとに最初に必要になった時点で1回だけシリアライズする。
+        切断済み（送信キューのない）接続は送信先から除外し、送信キューを作り直さない。
+        
+        Args:
+            message: 送信メッセージ（message_text のみ指定時は必要になった時点で復元）
+            message_text: JSON でシリアライズ済みのメッセージ（あれば JSON 接続で再利用）
+        
+        Returns:
+            int: キューに入った接続数
+        """
+        encoded: Dict[str, Union[str, bytes]] = {JSON: message_text} if message_text is not None else {}
+        queued = 0
+        for connection in list(connections):
+            sender = self.senders.get(connection)
+            if sender is None:
+                continue
+            encoding = self.encodings.get(connection, JSON)
+            data = encoded.get(encoding)
+            if data is None:
+                if message is None:
+                    message = json.loads(message_text)
+                data = encoded[encoding] = encode_message(message, encoding)
+            if sender.enqueue(data, policy, key):
+                queued += 1
+        return queued
+    
+    def attach_dispatcher(self, websocket: WebSocket, dispatcher: RequestDispatcher) -> None:
+        """接続のリクエストディスパッチャーを登録"""
+        self.dispatchers[websocket] = dispatcher
+    
     async def send_personal_message(self, websocket: WebSocket, message: dict):
-        """個別にメッセージを送信"""
-        try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+        """
+        個別にメッセージを送信（応答は破棄しない）
+        
+        リクエストの処理中に呼ばれた場合は、そのリクエストの request_id を付与する。
+        """
+        self.enqueue_message([websocket], with_request_id(message), SendPolicy.RELIABLE)
+        # 書き込みタスクに実行機会を渡す
+        await asyncio.sleep(0)
     
-    async def broadcast(self, message: dict):
-        """全接続にブロードキャスト"""
+    async def broadcast(self, message: dict, topic: Optional[str] = None):
+        """
+        全接続にブロードキャスト
+        
+        Args:
+            message: 送信メッセージ
+            topic: ブロードキャストのトピック（指定時はそのトピックを除外した接続には送らない）
+        """
+        self.broker.publish("broadcast", {"message": message, "topic": topic})
+        await self._deliver_broadcast(message, topic)
+    
+    async def _deliver_broadcast(self, message: dict, topic: Optional[str] = None):
+        """このワーカーの接続にブロードキャスト"""
         if not self.active_connections:
             return
-            
-        message_text = json.dumps(message)
-        disconnected = set()
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_text)
-            except Exception as e:
-                logger.error(f"Error broadcasting message: {e}")
-                disconnected.add(connection)
-        
-        # 切断された接続を削除
-        for connection in disconnected:
-            self.disconnect(connection)
+        connections = self.active_connections
+        if topic is not None:
+            connections = [connection for connection in connections
+                           if topic in self.broadcast_topics.get(connection, BROADCAST_TOPICS)]
+        policy = policy_for(message)
+        self.enqueue_message(connections, message, policy,
+                             coalesce_key(message) if policy == SendPolicy.COALESCE else None)
+        await asyncio.sleep(0)
     
     async def send_to_drone_subscribers(self, drone_id: str, message: dict):
         """特定のドローン購読者にメッセージを送信"""
+        self.broker.publish("drone_message", {"drone_id": drone_id, "message": message})
+        await self._deliver_to_drone_subscribers(drone_id, message)
+    
+    async def _deliver_to_drone_subscribers(self, drone_id: str, message: Optional[dict] = None,
+                                            message_text: Optional[str] = None):
+        """このワーカーのドローン購読者に送信（未送信の同じドローンの状態は置き換える）"""
         if drone_id not in self.drone_subscriptions:
             return
-            
-        subscribers = self.drone_subscriptions[drone_id].copy()
-        message_text = json.dumps(message)
-        disconnected = set()
+        self.enqueue_message(self.drone_subscriptions[drone_id], message, SendPolicy.COALESCE,
+                             f"drone_status:{drone_id}", message_text)
+        await asyncio.sleep(0)
+    
+    async def send_text_to_drone_subscribers(self, drone_id: str, message_text: str):
+        """
+        シリアライズ済みの状態メッセージを特定のドローン購読者に送信
         
-        for connection in subscribers:
-            try:
-                await connection.send_text(message_text)
-            except Exception as e:
-                logger.error(f"Error sending to drone subscriber: {e}")
-                disconnected.add(connection)
+        未送信の同じドローンの状態は最新の内容に置き換える。
+        """
+        self.broker.publish("drone_message", {"drone_id": drone_id, "message_text": message_text})
+        await self._deliver_to_drone_subscribers(drone_id, message_text=message_text)
+    
+    def get_connection_statistics(self, websocket: Optional[WebSocket] = None) -> Dict[str, Any]:
+        """
+        送信キューの統計情報を取得
         
-        # 切断された接続を削除
-        for connection in disconnected:
-            self.disconnect(connection)
+        Args:
+            websocket: 指定時はその接続のみ
+        """
+        if websocket is not None:
+            sender = self.senders.get(websocket)
+            dispatcher = self.dispatchers.get(websocket)
+            stats = sender.get_statistics() if sender is not None else {}
+            if dispatcher is not None:
+                stats["requests"] = dispatcher.get_statistics()
+            return stats
+        per_connection = [sender.get_statistics() for sender in self.senders.values()]
+        return {
+            "connections": len(per_connection),
+            "queued": sum(stats["queue_depth"] for stats in per_connection),
+            "dropped": sum(stats["dropped"] for stats in per_connection),
+            "coalesced": sum(stats["coalesced"] for stats in per_connection),
+            "max_lag_ms": max((stats["max_lag_ms"] for stats in per_connection), default=0.0),
+            "max_oldest_pending_ms": max((stats["oldest_pending_ms"] for stats in per_connection), default=0.0),
+            "subscriptions": self.subscriptions.get_statistics(),
+            "broker": dict(self.broker.get_statistics(), remote_workers=len(self.remote_interest))
+        }
+    
+    def collect_metrics(self) -> List[MetricFamily]:
+        """Prometheus 用のメトリクスを取得"""
+        stats = self.get_connection_statistics()
+        return [
+            MetricFamily("websocket_connections_active", GAUGE, "Open WebSocket connections").add(stats["connections"]),
+            MetricFamily("websocket_send_queue_depth", GAUGE,
+                         "Messages waiting in WebSocket send queues").add(stats["queued"]),
+            MetricFamily("websocket_send_lag_seconds", GAUGE,
+                         "Largest observed send lag across WebSocket connections").add(stats["max_lag_ms"] / 1000),
+            MetricFamily("websocket_messages_dropped", GAUGE,
+                         "Messages dropped by open WebSocket connections' send queues").add(stats["dropped"]),
+            MetricFamily("websocket_messages_coalesced", GAUGE,
+                         "Messages coalesced by open WebSocket connections' send queues").add(stats["coalesced"])
+        ]
     
-    def subscribe_to_drone(self, websocket: WebSocket, drone_id: str):
-        """ドローンの状態更新を購読"""
+    def subscribe_to_drone(self, websocket: WebSocket, drone_id: str, topics: Optional[List[str]] = None,
+                           max_rate_hz: Optional[float] = None, fields: Optional[List[str]] = None):
+        """
+        ドローンの更新を購読
+        
+        Args:
+            topics: 購読するトピック（status, telemetry, detections, alerts。省略時は status）
+            max_rate_hz: 配信レートの上限（省略時は更新ごと）
+            fields: 配信するフィールド（"attitude.yaw" のようにネスト指定可。省略時は全フィールド）
+        
+        Raises:
+            ValueError: 不正な購読設定
+        """
+        subscription = self.subscriptions.subscribe(websocket, drone_id, topics, max_rate_hz, fields)
         if drone_id not in self.drone_subscriptions:
             self.drone_subscriptions[drone_id] = set()
         
         self.drone_subscriptions[drone_id].add(websocket)
-        logger.info(f"WebSocket subscribed to drone {drone_id}")
+        self._publish_interest()
+        logger.info(f"WebSocket subscribed to drone {drone_id} "
+                    f"(topics: {sorted(subscription.topics)}, max_rate_hz: {subscription.max_rate_hz})")
+        return subscription
     
     def unsubscribe_from_drone(self, websocket: WebSocket, drone_id: str):
         """ドローンの状態更新購読を解除"""
+        self.subscriptions.unsubscribe(websocket, drone_id)
+        self._publish_interest()
         if drone_id in self.drone_subscriptions:
             self.drone_subscriptions[drone_id].discard(websocket)
             logger.info(f"WebSocket unsubscribed from drone {drone_id}")
+    
+    def set_broadcast_topics(self, websocket: WebSocket, topics: List[str]) -> FrozenSet[str]:
+        """
+        接続が受信するブロードキャストのトピックを設定
+        
+        Raises:
+            ValueError: 不明なトピック
+        """
+        topic_set = frozenset(topics)
+        unknown = topic_set - BROADCAST_TOPICS
+        if unknown:
+            raise ValueError(f"Unknown broadcast topics: {sorted(unknown)} (available: {sorted(BROADCAST_TOPICS)})")
+        self.broadcast_topics[websocket] = topic_set
+        return topic_set
+    
+    def publish_drone_topic(self, drone_id: str, topic: str, payload: Dict[str, Any],
+                            timestamp: Optional[str] = None, message_text: Optional[str] = None) -> int:
+        """
+        ドローンのトピック更新を、送信時期が来た購読者だけに配信
+        
+        レート上限に達していない購読をフィールドマスクごとにまとめ、マスクごとに1回だけ
+        シリアライズする。未送信の同じ更新は送信キュー上で最新の内容に置き換える。
+        
+        Args:
+            payload: トピックのペイロード（フィールドマスクの適用対象）
+            timestamp: メッセージの時刻（省略時は現在時刻）
+            message_text: マスクなしの購読者に送る JSON シリアライズ済みメッセージ（あれば再利用）
+        
+        Returns:
+            int: このワーカーでキューに積んだメッセージ数
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        self.broker.publish("drone_topic", {"drone_id": drone_id, "topic": topic, "payload": payload,
+                                            "timestamp": timestamp})
+        return self._deliver_drone_topic(drone_id, topic, payload, timestamp, message_text)
+    
+    def _deliver_drone_topic(self, drone_id: str, topic: str, payload: Dict[str, Any],
+                             timestamp: Optional[str] = None, message_text: Optional[str] = None) -> int:
+        """ドローンのトピック更新をこのワーカーの購読者に配信"""
+        groups = self.subscriptions.collect_due(drone_id, topic)
+        if not groups:
+            return 0
+        
+        message_type, payload_key = TOPIC_MESSAGES[topic]
+        if topic in SAMPLED_TOPICS:
+            policy, key = SendPolicy.COALESCE, f"{message_type}:{drone_id}"
+        else:
+            policy, key = SendPolicy.RELIABLE, None
+        timestamp = timestamp or datetime.now().isoformat()
+        
+        queued = 0
+        for fields, connections in groups.items():
+            if fields is None and message_text is not None:
+                queued += self.enqueue_message(connections, None, policy, key, message_text)
+                continue
+            queued += self.enqueue_message(connections, {
+                "type": message_type,
+                "drone_id": drone_id,
+                payload_key: apply_field_mask(payload, fields),
+                "timestamp": timestamp
+            }, policy, key)
+        return queued
+    
+    def publish_detections(self, drone_id: str, detections: Dict[str, Any]) -> int:
+        """物体検出結果を detections 購読者に配信"""
+        return self.publish_drone_topic(drone_id, "detections", detections)
+    
+    def publish_alert(self, alert) -> int:
+        """
+        アラートを alerts 購読者に配信
+        
+        発生元がドローンのアラートはそのドローンの購読者に、それ以外はいずれかのドローンで
+        alerts を購読している接続に送る。
+        """
+        alert_dict = alert.to_dict() if hasattr(alert, "to_dict") else dict(alert)
+        self.broker.publish("alert", alert_dict)
+        return self._deliver_alert(alert_dict)
+    
+    def _deliver_alert(self, alert_dict: Dict[str, Any]) -> int:
+        """アラートをこのワーカーの alerts 購読者に配信"""
+        source = alert_dict.get("source")
+        if source in self.drone_subscriptions:
+            return self._deliver_drone_topic(source, "alerts", alert_dict)
+        
+        connections = self.subscriptions.connections_for("alerts")
+        if not connections:
+            return 0
+        return self.enqueue_message(connections, {
+            "type": "alert",
+            "alert": alert_dict,
+            "timestamp": datetime.now().isoformat()
+        }, SendPolicy.RELIABLE)
+    
+    def subscribe_status_stream(self, websocket: WebSocket, drone_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        差分ステータスストリームを購読
+        
+        Returns:
+            Dict[str, Any]: 購読開始時に送る全体スナップショット
+        """
+        targets = frozenset(drone_ids) if drone_ids else None
+        self.status_stream_subscribers[websocket] = targets
+        self._publish_interest()
+        logger.info(f"WebSocket subscribed to status stream (drones: {sorted(targets) if targets else 'all'})")
+        return self.status_encoder.full_message(targets)
+    
+    def unsubscribe_status_stream(self, websocket: WebSocket) -> bool:
+        """差分ステータスストリームの購読を解除"""
+        removed = self.status_stream_subscribers.pop(websocket, None) is not None
+        self._publish_interest()
+        return removed
+    
+    async def publish_status_delta(self, snapshot: FleetSnapshot) -> int:
+        """
+        スナップショットの差分をストリーム購読者に配信
+        
+        差分は tick ごとに1回だけ計算し、同じ対象集合の購読者には同じ文字列を送る。
+        遅れたクライアントで差分が破棄された場合は seq の欠番から再同期を要求できる。
+        
+        Returns:
+            int: キューに積んだメッセージ数
+        """
+        return await self._deliver_status_delta(snapshot.status_dicts)
+    
+    async def _deliver_status_delta(self, status_dicts: Dict[str, Dict[str, Any]]) -> int:
+        delta = self.status_encoder.update(status_dicts)
+        if delta is None or not self.status_stream_subscribers:
+            return 0
+        
+        sent = 0
+        for drone_ids, connections in group_subscribers(self.status_stream_subscribers):
+            sent += self.enqueue_message(connections, delta.to_message(drone_ids), SendPolicy.DROP_OLDEST)
+        await asyncio.sleep(0)
+        return sent
+    
+    async def publish_status_snapshot(self, snapshot: FleetSnapshot) -> int:
+        """
+        スナップショットの状態を status 購読者と差分ストリーム購読者に配信
+        
+        他のワーカーに状態の購読者がいる場合は、シリアライズ済みの状態メッセージを
+        ブローカー経由で転送する（差分は各ワーカーが自分の購読者向けに計算する）。
+        
+        Returns:
+            int: このワーカーでキューに積んだメッセージ数
+        """
+        timestamp = snapshot.taken_at.isoformat()
+        if any(interest.get("status") or interest.get("status_stream")
+               for interest in self.remote_interest.values()):
+            self.broker.publish("status_snapshot", {"status_messages": snapshot.status_messages,
+                                                    "timestamp": timestamp})
+        return await self._deliver_status(snapshot.status_dicts, snapshot.status_messages, timestamp)
+    
+    async def _deliver_status(self, status_dicts: Dict[str, Dict[str, Any]], status_messages: Dict[str, str],
+                              timestamp: str) -> int:
+        """状態をこのワーカーの status 購読者と差分ストリーム購読者に配信"""
+        sent = 0
+        # status 購読者のうち送信時期が来たものだけに配信（マスクなしは構築済みの文字列を共有）
+        for drone_id in self.subscriptions.drones_for("status"):
+            message_text = status_messages.get(drone_id)
+            if message_text is None:
+                continue
+            try:
+                sent += self._deliver_drone_topic(drone_id, "status", status_dicts[drone_id],
+                                                  timestamp, message_text)
+            except Exception as e:
+                logger.error(f"Error broadcasting status for drone {drone_id}: {e}")
+        await asyncio.sleep(0)
+        
+        # 差分ストリーム（変化したフィールドのみを1メッセージにまとめて配信）
+        sent += await self._deliver_status_delta(status_dicts)
+        return sent
+    
+    def telemetry_demand(self) -> Dict[str, float]:
+        """
+        全ワーカーのテレメトリ購読の要求レート
+        
+        Returns:
+            Dict[str, float]: ドローンID -> 最大レート（レート上限なしの購読があれば inf）
+        """
+        demand = self.subscriptions.demand("telemetry")
+        for interest in self.remote_interest.values():
+            for drone_id, rate in interest.get("telemetry", {}).items():
+                rate = float("inf") if rate is None else rate
+                demand[drone_id] = max(demand.get(drone_id, 0.0), rate)
+        return demand
+    
+    def _publish_interest(self) -> None:
+        """このワーカーの購読状況を他のワーカー（プライマリ）に通知"""
+        if isinstance(self.broker, InProcessBroker):
+            return
+        telemetry = {drone_id: None if rate == float("inf") else rate
+                     for drone_id, rate in self.subscriptions.demand("telemetry").items()}
+        self.broker.publish("interest", {
+            "telemetry": telemetry,
+            "status": bool(self.subscriptions.drones_for("status")),
+            "status_stream": bool(self.status_stream_subscribers)
+        })
+    
+    async def start_broker(self, broker) -> None:
+        """ブローカーを設定して開始（複数ワーカー構成用）"""
+        self.broker = broker
+        await broker.start(self._on_broker_message, on_connect=self._publish_interest)
+        logger.info(f"WebSocket broker started: {broker.get_statistics()}")
+    
+    async def stop_broker(self) -> None:
+        """ブローカーを停止してプロセス内のみの配信に戻す"""
+        await self.broker.stop()
+        self.broker = InProcessBroker()
+        self.remote_interest.clear()
+    
+    async def _on_broker_message(self, channel: str, data: Any, origin: str) -> None:
+        """他のワーカーから届いた配信をこのワーカーの接続に配る"""
+        if channel == "interest":
+            self.remote_interest[origin] = data
+        elif channel == PEER_LEFT_CHANNEL:
+            self.remote_interest.pop(origin, None)
+        elif channel == "drone_topic":
+            self._deliver_drone_topic(data["drone_id"], data["topic"], data["payload"], data.get("timestamp"))
+        elif channel == "alert":
+            self._deliver_alert(data)
+        elif channel == "broadcast":
+            await self._deliver_broadcast(data["message"], data.get("topic"))
+        elif channel == "drone_message":
+            await self._deliver_to_drone_subscribers(data["drone_id"], data.get("message"), data.get("message_text"))
+        elif channel == "status_snapshot":
+            status_messages = data["status_messages"]
+            status_dicts = {drone_id: json.loads(text)["status"] for drone_id, text in status_messages.items()}
+            await self._deliver_status(status_dicts, status_messages, data["timestamp"])
+        else:
+            logger.warning(f"Unknown broker channel: {channel}")
+
+
+async def receive_message(websocket: WebSocket) -> dict:
+    """
+    メッセージを1件受信してデコード（テキストは JSON、バイナリは MessagePack）
+    
+    Raises:
+        WebSocketDisconnect: 切断された
+        ValueError: デコードできない
+    """
+    data = await websocket.receive()
+    if data["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(data.get("code", 1000))
+    payload = data.get("text")
+    if payload is None:
+        payload = data.get("bytes") or b""
+    return decode_message(payload)
 
 
 # グローバル接続マネージャー
@@ -137,6 +583,16 @@ class WebSocketHandler:
                 await self._handle_get_all_drones(websocket, message)
             elif message_type == "ping":
                 await self._handle_ping(websocket, message)
+            elif message_type in ("subscribe_status_stream", "resync_status_stream"):
+                await self._handle_subscribe_status_stream(websocket, message)
+            elif message_type == "unsubscribe_status_stream":
+                await self._handle_unsubscribe_status_stream(websocket, message)
+            elif message_type == "get_connection_stats":
+                await self._handle_get_connection_stats(websocket, message)
+            elif message_type == "set_broadcast_topics":
+                await self._handle_set_broadcast_topics(websocket, message)
+            elif message_type == "cancel_request":
+                await self._handle_cancel_request(websocket, message)
             # Phase 6: Real drone specific message types
             elif message_type == "scan_real_drones":
                 await self._handle_scan_real_drones(websocket, message)
@@ -167,7 +623,12 @@ class WebSocketHandler:
             })
     
     async def _handle_subscribe_drone(self, websocket: WebSocket, message: dict):
-        """ドローン購読処理"""
+        """
+        ドローン購読処理
+        
+        topics / max_rate_hz / fields を指定すると、購読ごとにトピック・配信レート・
+        フィールドを絞り込める。
+        """
         drone_id = message.get("drone_id")
         if not drone_id:
             await manager.send_personal_message(websocket, {
@@ -178,15 +639,34 @@ class WebSocketHandler:
             })
             return
         
-        manager.subscribe_to_drone(websocket, drone_id)
+        options = {key: message[key] for key in ("topics", "max_rate_hz", "fields") if message.get(key) is not None}
+        try:
+            subscription = manager.subscribe_to_drone(websocket, drone_id, **options)
+        except ValueError as e:
+            await manager.send_personal_message(websocket, {
+                "type": "error",
+                "error_code": "INVALID_SUBSCRIPTION",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat()
+            })
+            return
+        
+        if options and hasattr(subscription, "to_dict"):
+            await manager.send_personal_message(websocket, {
+                "type": "subscribed",
+                "subscription": subscription.to_dict(),
+                "timestamp": datetime.now().isoformat()
+            })
+        if "status" not in options.get("topics", ["status"]):
+            return
         
         # 現在の状態を即座に送信
         try:
-            status = await self.drone_manager.get_drone_status(drone_id)
+            status = await self.drone_manager.get_cached_drone_status(drone_id)
             await manager.send_personal_message(websocket, {
                 "type": "drone_status",
                 "drone_id": drone_id,
-                "status": status.model_dump(),
+                "status": apply_field_mask(status.model_dump(mode="json"), options.get("fields")),
                 "timestamp": datetime.now().isoformat()
             })
         except Exception as e:
@@ -229,11 +709,11 @@ class WebSocketHandler:
             return
         
         try:
-            status = await self.drone_manager.get_drone_status(drone_id)
+            status = await self.drone_manager.get_cached_drone_status(drone_id)
             await manager.send_personal_message(websocket, {
                 "type": "drone_status",
                 "drone_id": drone_id,
-                "status": status.model_dump(),
+                "status": status.model_dump(mode="json"),
                 "timestamp": datetime.now().isoformat()
             })
         except Exception as e:
@@ -267,6 +747,103 @@ class WebSocketHandler:
             "type": "pong",
             "timestamp": datetime.now().isoformat()
         })
+    
+    async def _handle_subscribe_status_stream(self, websocket: WebSocket, message: dict):
+        """差分ステータスストリーム購読・再同期処理（全体スナップショットを送信）"""
+        drone_ids = message.get("drone_ids")
+        if drone_ids is not None and not isinstance(drone_ids, list):
+            await manager.send_personal_message(websocket, {
+                "type": "error",
+                "error_code": "INVALID_DRONE_IDS",
+                "message": "drone_ids must be a list",
+                "timestamp": datetime.now().isoformat()
+            })
+            return
+        
+        if message.get("type") == "resync_status_stream" and drone_ids is None:
+            # 再同期時は購読中の対象を維持
+            current = manager.status_stream_subscribers.get(websocket)
+            drone_ids = sorted(current) if current else None
+        
+        await manager.send_personal_message(
+            websocket, manager.subscribe_status_stream(websocket, drone_ids)
+        )
+    
+    async def _handle_unsubscribe_status_stream(self, websocket: WebSocket, message: dict):
+        """差分ステータスストリーム購読解除処理"""
+        manager.unsubscribe_status_stream(websocket)
+        await manager.send_personal_message(websocket, {
+            "type": "status_stream_unsubscribed",
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def _handle_get_connection_stats(self, websocket: WebSocket, message: dict):
+        """この接続の送信キュー統計取得処理"""
+        await manager.send_personal_message(websocket, {
+            "type": "connection_stats",
+            "stats": manager.get_connection_statistics(websocket),
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def _handle_cancel_request(self, websocket: WebSocket, message: dict):
+        """処理中リクエストのキャンセル処理"""
+        target = message.get("target_request_id")
+        dispatcher = manager.dispatchers.get(websocket)
+        cancelled = dispatcher is not None and target is not None and dispatcher.cancel(target)
+        await manager.send_personal_message(websocket, {
+            "type": "request_cancelled" if cancelled else "cancel_failed",
+            "target_request_id": target,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    async def _run_with_progress(self, websocket: WebSocket, operation, progress_type: str,
+                                 expected_seconds: Optional[float] = None):
+        """
+        時間のかかる処理を実行し、完了まで一定間隔で進捗メッセージを送信
+        
+        Returns:
+            処理の結果
+        """
+        task = asyncio.ensure_future(operation)
+        started = time.monotonic()
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+                if done:
+                    return task.result()
+                elapsed = time.monotonic() - started
+                await manager.send_personal_message(websocket, {
+                    "type": progress_type,
+                    "elapsed_seconds": round(elapsed, 1),
+                    "progress": round(min(elapsed / expected_seconds, 0.99), 2) if expected_seconds else None,
+                    "timestamp": datetime.now().isoformat()
+                })
+        finally:
+            # リクエストのキャンセル時は処理も止める
+            if not task.done():
+                task.cancel()
+    
+    async def _handle_set_broadcast_topics(self, websocket: WebSocket, message: dict):
+        """受信するブロードキャストのトピック設定処理"""
+        topics = message.get("topics")
+        try:
+            if not isinstance(topics, list):
+                raise ValueError("topics must be a list")
+            topic_set = manager.set_broadcast_topics(websocket, topics)
+        except ValueError as e:
+            await manager.send_personal_message(websocket, {
+                "type": "error",
+                "error_code": "INVALID_BROADCAST_TOPICS",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat()
+            })
+            return
+        
+        await manager.send_personal_message(websocket, {
+            "type": "broadcast_topics_updated",
+            "topics": sorted(topic_set),
+            "timestamp": datetime.now().isoformat()
+        })
 
     # Phase 6: Real drone specific WebSocket handlers
 
@@ -281,7 +858,9 @@ class WebSocketHandler:
                 "timestamp": datetime.now().isoformat()
             })
             
-            detected_drones = await self.drone_manager.scan_for_real_drones(timeout)
+            detected_drones = await self._run_with_progress(
+                websocket, self.drone_manager.scan_for_real_drones(timeout), "scan_progress", timeout
+            )
             
             await manager.send_personal_message(websocket, {
                 "type": "scan_completed",
@@ -331,7 +910,9 @@ class WebSocketHandler:
             return
         
         try:
-            verification_result = await self.drone_manager.verify_real_drone_connection(ip_address)
+            verification_result = await self._run_with_progress(
+                websocket, self.drone_manager.verify_real_drone_connection(ip_address), "verification_progress"
+            )
             
             await manager.send_personal_message(websocket, {
                 "type": "connection_verification",
@@ -421,48 +1002,70 @@ class WebSocketHandler:
 
 
 async def start_status_broadcaster(drone_manager: DroneManager):
-    """定期的なドローン状態ブロードキャストを開始（Phase 6対応）"""
+    """定期的なドローン状態ブロードキャストを開始（スナップショット共有版）"""
+    snapshotter = drone_manager.status_snapshot
+    last_tick = 0
+    
     while True:
         try:
-            if manager.drone_subscriptions:
-                for drone_id, subscribers in manager.drone_subscriptions.items():
-                    if subscribers:  # 購読者がいる場合のみ
-                        try:
-                            status = await drone_manager.get_drone_status(drone_id)
-                            
-                            # 基本ステータス送信
-                            status_message = {
-                                "type": "drone_status_update",
-                                "drone_id": drone_id,
-                                "status": status.model_dump(),
-                                "timestamp": datetime.now().isoformat()
-                            }
-                            
-                            # 実機ドローンの場合は追加情報を含める
-                            try:
-                                type_info = drone_manager.get_drone_type_info(drone_id)
-                                if type_info.get("is_real_drone", False):
-                                    status_message["real_drone_info"] = {
-                                        "connection_state": type_info.get("connection_state"),
-                                        "real_ip_address": type_info.get("real_ip_address"),
-                                        "is_real_drone": True
-                                    }
-                            except Exception:
-                                # タイプ情報取得に失敗してもステータス配信は継続
-                                pass
-                            
-                            await manager.send_to_drone_subscribers(drone_id, status_message)
-                            
-                        except Exception as e:
-                            logger.error(f"Error broadcasting status for drone {drone_id}: {e}")
+            if not manager.broker.is_primary:
+                # 定期配信はプライマリのワーカーが行い、このワーカーへはブローカー経由で届く
+                await asyncio.sleep(snapshotter.interval)
+                continue
             
-            await asyncio.sleep(1.0)  # 1秒間隔で更新
+            # 次の tick のスナップショットを待つ（構築は snapshotter が1回だけ行う）
+            snapshot = await snapshotter.wait_for_tick(last_tick, timeout=snapshotter.interval * 2)
+            if snapshot is None:
+                # 定期構築ループが動いていない場合はその場で構築
+                snapshot = await snapshotter.get_snapshot()
+            last_tick = snapshot.tick
             
+            # status 購読者（送信時期が来たもののみ）と差分ストリーム購読者に配信
+            await manager.publish_status_snapshot(snapshot)
+            
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error in status broadcaster: {e}")
             await asyncio.sleep(5.0)  # エラー時は5秒待機
 
 
+async def start_telemetry_broadcaster(drone_manager: DroneManager):
+    """
+    テレメトリ配信を開始
+    
+    周期は telemetry 購読者（全ワーカー分）が要求する最大レートに合わせ、購読者のいる
+    ドローンだけを読む。低レートの購読者には publish_drone_topic が間引いて送るため、
+    高レートの購読者がいても他の購読者の配信量は増えない。
+    """
+    while True:
+        try:
+            demand = manager.telemetry_demand() if manager.broker.is_primary else {}
+            if not demand:
+                # 購読者がいない間・プライマリでない間はテレメトリを読まない
+                await asyncio.sleep(0.5)
+                continue
+            rate = max(demand.values())
+            interval = 1.0 / min(DEFAULT_TELEMETRY_HZ if rate == float("inf") else rate, MAX_RATE_HZ)
+            
+            started = time.monotonic()
+            timestamp = datetime.now().isoformat()
+            for drone_id in demand:
+                try:
+                    telemetry = drone_manager.get_drone_telemetry(drone_id)
+                except ValueError:
+                    # 未接続のドローンは配信しない
+                    continue
+                manager.publish_drone_topic(drone_id, "telemetry", telemetry, timestamp)
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+            
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in telemetry broadcaster: {e}")
+            await asyncio.sleep(1.0)
+
+
 async def start_network_broadcaster(drone_manager: DroneManager):
     """定期的なネットワーク状態ブロードキャストを開始（Phase 6新機能）"""
     last_network_status = {}
@@ -483,7 +1086,7 @@ async def start_network_broadcaster(drone_manager: DroneManager):
                             "timestamp": datetime.now().isoformat()
                         }
                         
-                        await manager.broadcast(network_message)
+                        await manager.broadcast(network_message, topic="network")
                         last_network_status = current_network_status.copy()
                         
                 except Exception as e:
@@ -525,7 +1128,7 @@ async def start_real_drone_events_broadcaster(drone_manager: DroneManager):
                             "ip_address": ip,
                             "timestamp": datetime.now().isoformat()
                         }
-                        await manager.broadcast(detection_event)
+                        await manager.broadcast(detection_event, topic="real_drone_events")
                         logger.info(f"Real drone detected and broadcasted: {ip}")
                     
                     # 切断をブロードキャスト
@@ -535,7 +1138,7 @@ async def start_real_drone_events_broadcaster(drone_manager: DroneManager):
                             "ip_address": ip,
                             "timestamp": datetime.now().isoformat()
                         }
-                        await manager.broadcast(disconnection_event)
+                        await manager.broadcast(disconnection_event, topic="real_drone_events")
                         logger.info(f"Real drone disconnection broadcasted: {ip}")
                     
                     detected_drones_history = current_detected
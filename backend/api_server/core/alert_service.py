@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
-import psutil
+from .system_sampler import SystemMetricsSampler, system_sampler
 
 logger = logging.getLogger(__name__)
 
@@ -103,13 +103,15 @@ class AlertRule:
 class AlertService:
     """Advanced alerting and monitoring service"""
     
-    def __init__(self, max_alerts: int = 1000):
+    def __init__(self, max_alerts: int = 1000, sampler: Optional[SystemMetricsSampler] = None):
         self.alerts: List[Alert] = []
         self.max_alerts = max_alerts
         self.alert_rules: List[AlertRule] = []
         self.subscribers: List[callable] = []
         self.monitoring_active = False
         self.monitoring_task = None
+        # System metrics are read from the shared background sampler's latest snapshot
+        self.sampler = sampler or system_sampler
         
         # Initialize default alert rules
         self._initialize_default_rules()
@@ -297,23 +299,15 @@ class AlertService:
         """Continuous monitoring loop"""
         while self.monitoring_active:
             try:
-                # Collect current system metrics
+                # Read the latest system metrics snapshot
+                snapshot = self.sampler.latest()
                 metrics = {
-                    "cpu_usage": psutil.cpu_percent(),
-                    "memory_usage": psutil.virtual_memory().percent,
-                    "disk_usage": psutil.disk_usage('/').percent
+                    "cpu_usage": snapshot.cpu_percent,
+                    "memory_usage": snapshot.memory.percent,
+                    "disk_usage": snapshot.disk.percent
                 }
-                
-                # Get temperature if available
-                try:
-                    temps = psutil.sensors_temperatures()
-                    if temps:
-                        for name, entries in temps.items():
-                            if entries and 'cpu' in name.lower():
-                                metrics["temperature"] = entries[0].current
-                                break
-                except:
-                    pass
+                if snapshot.temperature is not None:
+                    metrics["temperature"] = snapshot.temperature
                     
                 # Evaluate metrics against rules
                 self.evaluate_system_metrics(metrics)
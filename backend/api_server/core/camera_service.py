@@ -8,15 +8,17 @@ import base64
 import cv2
 import logging
 import numpy as np
-from typing import Dict, Optional, List, Any
+from typing import Dict, Iterable, Optional, List, Any
 from datetime import datetime
 from uuid import uuid4
 
 from ...src.core.virtual_camera import (
-    VirtualCameraStream, VirtualCameraStreamManager, 
-    TrackingObject, TrackingObjectType, MovementPattern
+    VirtualCameraStream, TrackingObject, TrackingObjectType, MovementPattern
 )
+from ...src.core.demand_camera import DemandDrivenCameraStream, CameraStreamPool
+from .tello_video import TelloVideoStream
 from ..models.drone_models import Photo
+from .metrics_registry import GAUGE, MetricFamily
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +26,19 @@ logger = logging.getLogger(__name__)
 class CameraService:
     """カメラサービス - ドローンのカメラ機能を管理"""
     
-    def __init__(self):
-        """初期化"""
-        self.camera_manager = VirtualCameraStreamManager()
-        self.active_streams: Dict[str, VirtualCameraStream] = {}
+    # ライブストリーム用コンシューマーID
+    STREAM_CONSUMER_ID = "live_stream"
+    
+    def __init__(self, max_warm_streams: int = 4):
+        """
+        初期化
+        
+        Args:
+            max_warm_streams: 一時停止状態で保持する待機ストリーム数
+        """
+        self.stream_pool = CameraStreamPool(max_warm=max_warm_streams)
+        self.active_streams: Dict[str, DemandDrivenCameraStream] = {}
+        self.video_streams: Dict[str, TelloVideoStream] = {}
         self.photo_storage_path = "/tmp/drone_photos"
         
         # ダミー追跡オブジェクト設定
@@ -61,8 +72,31 @@ class CameraService:
         
         logger.info("CameraService initialized")
     
+    def attach_video_stream(self, drone_id: str, stream: TelloVideoStream) -> None:
+        """実機の映像ストリームを登録（以降のフレーム取得は実機映像を優先）"""
+        self.video_streams[drone_id] = stream
+        logger.info(f"Real video stream attached for drone {drone_id}")
+    
+    def detach_video_stream(self, drone_id: str) -> Optional[TelloVideoStream]:
+        """実機の映像ストリームの登録を解除"""
+        return self.video_streams.pop(drone_id, None)
+    
+    def get_frame_source(self, drone_id: str) -> Optional[Any]:
+        """フレーム取得元（実機映像 > 仮想カメラ）を取得"""
+        return self.video_streams.get(drone_id) or self.active_streams.get(drone_id)
+    
     async def start_camera_stream(self, drone_id: str, width: int = 640, height: int = 480, fps: int = 30) -> Dict[str, Any]:
         """カメラストリーミングを開始"""
+        if drone_id in self.video_streams:
+            stream = self.video_streams[drone_id]
+            return {
+                "success": True,
+                "message": f"Real video stream is active for drone {drone_id}",
+                "stream_id": drone_id,
+                "source": "tello",
+                "fps": stream.fps
+            }
+        
         if drone_id in self.active_streams:
             logger.warning(f"Camera stream for drone {drone_id} is already active")
             return {
@@ -72,20 +106,11 @@ class CameraService:
             }
         
         try:
-            # 仮想カメラストリームを作成
-            stream = self.camera_manager.create_stream(
-                name=drone_id,
-                width=width,
-                height=height,
-                fps=fps
-            )
-            
-            # デフォルトの追跡オブジェクトを追加
-            for obj in self.default_objects:
-                stream.add_tracking_object(obj)
+            # プールからストリームを取得（待機ストリームがあれば再利用）
+            stream = self._acquire_stream(drone_id, width, height, fps)
             
-            # ストリーミング開始
-            stream.start_stream()
+            # ライブストリームのコンシューマーとして登録（描画開始）
+            stream.add_consumer(self.STREAM_CONSUMER_ID, fps)
             self.active_streams[drone_id] = stream
             
             logger.info(f"Camera stream started for drone {drone_id}")
@@ -104,6 +129,13 @@ class CameraService:
     
     async def stop_camera_stream(self, drone_id: str) -> Dict[str, Any]:
         """カメラストリーミングを停止"""
+        if self.detach_video_stream(drone_id) is not None:
+            return {
+                "success": True,
+                "message": f"Real video stream detached for drone {drone_id}",
+                "stream_id": drone_id
+            }
+        
         if drone_id not in self.active_streams:
             logger.warning(f"No active camera stream for drone {drone_id}")
             return {
@@ -113,12 +145,8 @@ class CameraService:
             }
         
         try:
-            # ストリーミング停止
-            stream = self.active_streams[drone_id]
-            stream.stop_stream()
-            
-            # ストリームを削除
-            self.camera_manager.remove_stream(drone_id)
+            # ストリームを一時停止して待機プールへ戻す
+            self.stream_pool.release(drone_id)
             del self.active_streams[drone_id]
             
             logger.info(f"Camera stream stopped for drone {drone_id}")
@@ -134,23 +162,23 @@ class CameraService:
     
     async def capture_photo(self, drone_id: str) -> Photo:
         """写真を撮影"""
-        stream = self.active_streams.get(drone_id)
+        stream = self.get_frame_source(drone_id)
         
         if not stream:
-            # ストリームがない場合は一時的に作成
-            await self.start_camera_stream(drone_id)
-            stream = self.active_streams[drone_id]
+            # ストリームがない場合は待機プールから一時的に借りる
+            stream = self._acquire_stream(drone_id)
             temporary_stream = True
         else:
             temporary_stream = False
         
         try:
-            # 現在のフレームを取得
-            frame = stream.get_frame()
-            if frame is None:
-                # フレームが準備されるまで少し待機
-                await asyncio.sleep(0.1)
+            if isinstance(stream, DemandDrivenCameraStream):
+                # 撮影時点のフレームを描画（一時停止中のストリームが保持する古いフレームは使わない）
+                frame = stream.render_frame()
+            else:
                 frame = stream.get_frame()
+                if frame is None and hasattr(stream, "render_frame"):
+                    frame = stream.render_frame()
             
             if frame is None:
                 raise ValueError("Unable to capture frame from camera stream")
@@ -188,12 +216,83 @@ class CameraService:
             return photo
             
         finally:
-            # 一時的なストリームの場合は停止
+            # 一時的なストリームの場合は待機プールへ戻す
             if temporary_stream:
-                await self.stop_camera_stream(drone_id)
+                self.stream_pool.release(drone_id)
+    
+    def _acquire_stream(self, drone_id: str, width: int = 640, height: int = 480, fps: int = 30) -> DemandDrivenCameraStream:
+        """プールからストリームを取得し、追跡オブジェクトを初期化"""
+        stream, _ = self.stream_pool.acquire(drone_id, width, height, fps)
+        
+        # 再利用時は前回の利用者の追跡オブジェクトを置き換える
+        stream.clear_tracking_objects()
+        for obj in self.default_objects:
+            stream.add_tracking_object(obj)
+        
+        return stream
+    
+    def register_frame_consumer(self, drone_id: str, consumer_id: str, fps: Optional[float] = None) -> None:
+        """
+        フレームコンシューマーを登録
+        
+        ストリームの描画レートは最も高いレートを要求するコンシューマーに合わせられる。
+        """
+        stream = self.active_streams.get(drone_id)
+        if not stream:
+            raise ValueError(f"No active camera stream for drone {drone_id}")
+        stream.add_consumer(consumer_id, fps)
+    
+    def unregister_frame_consumer(self, drone_id: str, consumer_id: str) -> bool:
+        """フレームコンシューマーを登録解除"""
+        stream = self.active_streams.get(drone_id)
+        if not stream:
+            return False
+        return stream.remove_consumer(consumer_id)
+    
+    def get_pool_statistics(self) -> Dict[str, Any]:
+        """ストリームプールの統計情報を取得"""
+        return self.stream_pool.get_statistics()
+    
+    def collect_metrics(self, drone_ids: Optional[Iterable[str]] = None) -> List[MetricFamily]:
+        """
+        Prometheus 用のメトリクスを取得
+        
+        Args:
+            drone_ids: ストリームの有無を報告するドローン（ストリームのないドローンは 0）
+        """
+        active = MetricFamily("camera_stream_active", GAUGE, "Whether the drone camera stream is running")
+        fps = MetricFamily("camera_stream_fps", GAUGE, "Measured camera stream frame rate")
+        target_fps = MetricFamily("camera_stream_target_fps", GAUGE, "Configured camera stream frame rate")
+        for drone_id in sorted(set(drone_ids or ()) | set(self.active_streams) | set(self.video_streams)):
+            video_stream = self.video_streams.get(drone_id)
+            stream = self.active_streams.get(drone_id)
+            if video_stream is not None:
+                stats, source, running = video_stream.get_statistics(), "tello", video_stream.is_streaming
+            elif stream is not None:
+                stats, source, running = stream.get_statistics(), "virtual", True
+            else:
+                active.add(0, drone_id=drone_id)
+                continue
+            active.add(1 if running else 0, drone_id=drone_id)
+            fps.add(stats.get("actual_fps", 0), drone_id=drone_id, source=source)
+            target_fps.add(stats.get("target_fps", 0), drone_id=drone_id, source=source)
+        return [active, fps, target_fps]
     
     async def get_stream_info(self, drone_id: str) -> Optional[Dict[str, Any]]:
         """ストリーム情報を取得"""
+        video_stream = self.video_streams.get(drone_id)
+        if video_stream:
+            return {
+                "drone_id": drone_id,
+                "is_active": video_stream.is_streaming,
+                "source": "tello",
+                "width": video_stream.width,
+                "height": video_stream.height,
+                "target_fps": video_stream.fps,
+                "statistics": video_stream.get_statistics(),
+                "tracking_objects": 0
+            }
+        
         stream = self.active_streams.get(drone_id)
         if not stream:
             return None
@@ -213,12 +312,12 @@ class CameraService:
         """全ストリーム情報を取得"""
         return [
             await self.get_stream_info(drone_id) 
-            for drone_id in self.active_streams.keys()
+            for drone_id in {**self.active_streams, **self.video_streams}.keys()
         ]
     
     async def get_current_frame_base64(self, drone_id: str) -> Optional[str]:
         """現在のフレームをBase64形式で取得"""
-        stream = self.active_streams.get(drone_id)
+        stream = self.get_frame_source(drone_id)
         if not stream:
             return None
         
@@ -300,7 +399,7 @@ class CameraService:
         for drone_id in list(self.active_streams.keys()):
             await self.stop_camera_stream(drone_id)
         
-        # カメラマネージャーを停止
-        self.camera_manager.stop_all_streams()
+        # 待機ストリームを含めてプールを停止
+        self.stream_pool.shutdown()
         
         logger.info("CameraService shutdown complete")
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Drone Command Queue - Per-drone command actors with coalescing mailboxes
+Keeps control latency bounded when commands arrive faster than a drone can execute them
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 相対移動コマンド名（保留中の移動はベクトル加算で統合される）
+MOVE_COMMAND = "move"
+
+# 追跡による補正移動（最新の1件だけを保持し、移動コマンドとして実行する）
+TRACKING_MOVE_COMMAND = "tracking_move"
+
+CommandExecutor = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class PendingCommand:
+    """メールボックス内の保留コマンド"""
+    name: str
+    params: Dict[str, Any]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    merged_count: int = 1
+
+
+class DroneCommandActor:
+    """
+    ドローン1台分のコマンドアクター
+
+    メールボックスはコマンド名ごとに最新の1件だけを保持する（latest-wins）。
+    保留中の相対移動は1つの合成ベクトルに統合されるため、実行待ちのコマンドが
+    どれだけ送られてもキューは伸びず、制御遅延は1コマンド分の実行時間に収まる。
+    追跡の補正移動は古い目標位置に基づく分を足し合わせないよう、最新の1件で置き換える。
+    """
+
+    def __init__(self, drone_id: str, executors: Dict[str, CommandExecutor],
+                 max_move_cm: int = 500, max_latency_samples: int = 200):
+        """
+        初期化
+
+        Args:
+            drone_id: ドローンID
+            executors: コマンド名 -> 実行コルーチン関数 (drone_id, **params)
+            max_move_cm: 統合後の移動量の軸ごとの上限（cm）
+            max_latency_samples: 保持するレイテンシサンプル数
+        """
+        self.drone_id = drone_id
+        self.executors = executors
+        self.max_move_cm = max_move_cm
+
+        self.mailbox: "OrderedDict[str, PendingCommand]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.executing: Optional[str] = None
+
+        # 統計情報
+        self.submitted = 0
+        self.executed = 0
+        self.superseded = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.last_error: Optional[str] = None
+        self.queue_latencies_ms: Deque[float] = deque(maxlen=max_latency_samples)
+        self.execution_times_ms: Deque[float] = deque(maxlen=max_latency_samples)
+
+    @property
+    def queue_depth(self) -> int:
+        """保留中のコマンド数"""
+        return len(self.mailbox)
+
+    def submit(self, name: str, **params: Any) -> None:
+        """
+        コマンドを投入（同名の保留コマンドは置き換える）
+
+        Args:
+            name: コマンド名
+            **params: コマンドパラメータ
+        """
+        if name not in self.executors:
+            raise ValueError(f"Unknown command: {name}")
+
+        pending = self.mailbox.get(name)
+        if pending is not None:
+            # 古いコマンドは破棄（待ち時間は最初の投入時刻から計測）
+            pending.params = params
+            pending.merged_count += 1
+            self.superseded += 1
+        else:
+            self.mailbox[name] = PendingCommand(name=name, params=params)
+
+        self._after_submit()
+
+    def submit_move(self, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """
+        相対移動を投入（保留中の移動とベクトル加算で統合）
+
+        Args:
+            dx_cm: 右方向の移動量（cm）
+            dy_cm: 前方向の移動量（cm）
+            dz_cm: 上方向の移動量（cm）
+        """
+        if MOVE_COMMAND not in self.executors:
+            raise ValueError(f"Unknown command: {MOVE_COMMAND}")
+
+        pending = self.mailbox.get(MOVE_COMMAND)
+        if pending is not None:
+            params = pending.params
+            params["dx_cm"] += dx_cm
+            params["dy_cm"] += dy_cm
+            params["dz_cm"] += dz_cm
+            pending.merged_count += 1
+            self.superseded += 1
+        else:
+            self.mailbox[MOVE_COMMAND] = PendingCommand(
+                name=MOVE_COMMAND,
+                params={"dx_cm": dx_cm, "dy_cm": dy_cm, "dz_cm": dz_cm}
+            )
+
+        self._after_submit()
+
+    def submit_tracking_move(self, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """
+        追跡の補正移動を投入（保留中の補正移動は置き換える）
+
+        実行中の移動の間に届いた補正は古い目標位置に基づくため、合算せず最新の補正だけを実行する。
+        利用者の移動（submit_move）とは別に保持する。
+        """
+        if MOVE_COMMAND not in self.executors:
+            raise ValueError(f"Unknown command: {MOVE_COMMAND}")
+
+        params = {"dx_cm": dx_cm, "dy_cm": dy_cm, "dz_cm": dz_cm}
+        pending = self.mailbox.get(TRACKING_MOVE_COMMAND)
+        if pending is not None:
+            pending.params = params
+            pending.merged_count += 1
+            self.superseded += 1
+        else:
+            self.mailbox[TRACKING_MOVE_COMMAND] = PendingCommand(name=TRACKING_MOVE_COMMAND, params=params)
+
+        self._after_submit()
+
+    def _after_submit(self) -> None:
+        """投入後の共通処理（統計更新とアクター起動）"""
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self.mailbox))
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def _clamp_move(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """統合後の移動量を上限内に収める"""
+        limit = self.max_move_cm
+        return {
+            key: max(-limit, min(limit, value))
+            for key, value in params.items()
+        }
+
+    async def _run(self) -> None:
+        """メールボックス処理ループ"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self.mailbox:
+                name, command = self.mailbox.popitem(last=False)
+                is_move = name in (MOVE_COMMAND, TRACKING_MOVE_COMMAND)
+                params = self._clamp_move(command.params) if is_move else command.params
+                executor = self.executors[MOVE_COMMAND if is_move else name]
+
+                started = time.perf_counter()
+                self.queue_latencies_ms.append((started - command.enqueued_at) * 1000)
+                self.executing = name
+
+                try:
+                    await executor(self.drone_id, **params)
+                    self.executed += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.failed += 1
+                    self.last_error = str(e)
+                    logger.warning(f"Command {name} failed for drone {self.drone_id}: {e}")
+                finally:
+                    self.executing = None
+                    self.execution_times_ms.append((time.perf_counter() - started) * 1000)
+
+    async def stop(self) -> None:
+        """アクターを停止（保留コマンドは破棄）"""
+        self.mailbox.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    @staticmethod
+    def _summarize(samples: Deque[float]) -> Dict[str, float]:
+        """レイテンシサンプルを要約"""
+        if not samples:
+            return {"count": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+
+        ordered = sorted(samples)
+        p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+        return {
+            "count": len(ordered),
+            "avg_ms": round(sum(ordered) / len(ordered), 3),
+            "p95_ms": round(ordered[p95_index], 3),
+            "max_ms": round(ordered[-1], 3),
+            "last_ms": round(samples[-1], 3)
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "drone_id": self.drone_id,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "executing": self.executing,
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "superseded": self.superseded,
+            "failed": self.failed,
+            "last_error": self.last_error,
+            "queue_latency": self._summarize(self.queue_latencies_ms),
+            "execution_time": self._summarize(self.execution_times_ms)
+        }
+
+
+class DroneCommandDispatcher:
+    """ドローンごとのコマンドアクターを管理"""
+
+    def __init__(self, executors: Dict[str, CommandExecutor], max_move_cm: int = 500):
+        """
+        初期化
+
+        Args:
+            executors: コマンド名 -> 実行コルーチン関数 (drone_id, **params)
+            max_move_cm: 統合後の移動量の軸ごとの上限（cm）
+        """
+        self.executors = executors
+        self.max_move_cm = max_move_cm
+        self.actors: Dict[str, DroneCommandActor] = {}
+
+    def get_actor(self, drone_id: str) -> DroneCommandActor:
+        """ドローンのアクターを取得（なければ作成）"""
+        actor = self.actors.get(drone_id)
+        if actor is None:
+            actor = DroneCommandActor(drone_id, self.executors, self.max_move_cm)
+            self.actors[drone_id] = actor
+        return actor
+
+    def submit(self, drone_id: str, name: str, **params: Any) -> None:
+        """コマンドを投入"""
+        self.get_actor(drone_id).submit(name, **params)
+
+    def submit_move(self, drone_id: str, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """相対移動を投入"""
+        self.get_actor(drone_id).submit_move(dx_cm, dy_cm, dz_cm)
+
+    def submit_tracking_move(self, drone_id: str, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """追跡の補正移動を投入（最新の1件のみ保持）"""
+        self.get_actor(drone_id).submit_tracking_move(dx_cm, dy_cm, dz_cm)
+
+    async def remove_actor(self, drone_id: str) -> None:
+        """ドローンのアクターを停止して削除"""
+        actor = self.actors.pop(drone_id, None)
+        if actor:
+            await actor.stop()
+
+    def get_statistics(self, drone_id: Optional[str] = None) -> Dict[str, Any]:
+        """統計情報を取得"""
+        if drone_id is not None:
+            actor = self.actors.get(drone_id)
+            return actor.get_statistics() if actor else {"drone_id": drone_id, "queue_depth": 0}
+
+        return {
+            "total_actors": len(self.actors),
+            "total_queue_depth": sum(actor.queue_depth for actor in self.actors.values()),
+            "actors": {drone_id: actor.get_statistics() for drone_id, actor in self.actors.items()}
+        }
+
+    async def shutdown(self) -> None:
+        """全アクターを停止"""
+        for drone_id in list(self.actors.keys()):
+            await self.remove_actor(drone_id)
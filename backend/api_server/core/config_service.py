@@ -22,6 +22,9 @@ class GlobalConfig:
     space_bounds: List[float] = None
     auto_detection: Dict[str, Any] = None
     fallback: Dict[str, Any] = None
+    simulation_process: Dict[str, Any] = None
+    # 飛行ログの保存先ディレクトリ（None は保存せずメモリのみ）
+    flight_log_root: Optional[str] = None
     
     def __post_init__(self):
         if self.space_bounds is None:
@@ -37,6 +40,12 @@ class GlobalConfig:
                 "enabled": True,
                 "simulation_on_failure": True
             }
+        if self.simulation_process is None:
+            self.simulation_process = {
+                "enabled": False,
+                "physics_hz": 100.0,
+                "capacity": 64
+            }
 
 
 @dataclass
@@ -164,6 +173,18 @@ class DroneConfigService:
             self.global_config.auto_detection["enabled"] = auto_detect.lower() == "true"
             logger.info(f"TELLO_AUTO_DETECT override: {auto_detect}")
         
+        # SIMULATION_PROCESS環境変数
+        simulation_process = os.getenv("SIMULATION_PROCESS")
+        if simulation_process:
+            self.global_config.simulation_process["enabled"] = simulation_process.lower() == "true"
+            logger.info(f"SIMULATION_PROCESS override: {simulation_process}")
+        
+        # FLIGHT_LOG_ROOT環境変数
+        flight_log_root = os.getenv("FLIGHT_LOG_ROOT")
+        if flight_log_root:
+            self.global_config.flight_log_root = flight_log_root
+            logger.info(f"FLIGHT_LOG_ROOT override: {flight_log_root}")
+        
         # TELLO_CONNECTION_TIMEOUT環境変数
         timeout = os.getenv("TELLO_CONNECTION_TIMEOUT")
         if timeout:
@@ -209,7 +230,9 @@ class DroneConfigService:
                 default_mode=global_data.get("default_mode", "auto"),
                 space_bounds=global_data.get("space_bounds", [20.0, 20.0, 10.0]),
                 auto_detection=global_data.get("auto_detection", {}),
-                fallback=global_data.get("fallback", {})
+                fallback=global_data.get("fallback", {}),
+                simulation_process=global_data.get("simulation_process"),
+                flight_log_root=global_data.get("flight_log_root")
             )
         
         # ネットワーク設定
@@ -401,6 +424,10 @@ class DroneConfigService:
         """自動検出が有効かチェック"""
         return self.global_config.auto_detection.get("enabled", True)
     
+    def get_flight_log_root(self) -> Optional[str]:
+        """飛行ログの保存先ディレクトリを取得（未設定時は None）"""
+        return self.global_config.flight_log_root
+    
     def get_auto_detection_timeout(self) -> float:
         """自動検出タイムアウトを取得"""
         return self.global_config.auto_detection.get("timeout", 5.0)
@@ -25,6 +25,8 @@ class DatasetService:
         self.data_root = Path(data_root)
         self.datasets: Dict[str, Dataset] = {}
         self.dataset_images: Dict[str, List[DatasetImage]] = {}
+        # Incremented whenever a dataset is created, deleted or changed (used for ETags)
+        self.version = 0
         
         # Create data directory
         self.data_root.mkdir(parents=True, exist_ok=True)
@@ -133,6 +135,7 @@ class DatasetService:
         # Store dataset
         self.datasets[dataset_id] = dataset
         self.dataset_images[dataset_id] = []
+        self.version += 1
         
         logger.info(f"Created dataset: {dataset_id} - {request.name}")
         
@@ -163,6 +166,7 @@ class DatasetService:
         dataset_name = self.datasets[dataset_id].name
         del self.datasets[dataset_id]
         del self.dataset_images[dataset_id]
+        self.version += 1
         
         logger.info(f"Deleted dataset: {dataset_id} - {dataset_name}")
         
@@ -226,6 +230,7 @@ class DatasetService:
         # Update labels if new label provided
         if label and label not in self.datasets[dataset_id].labels:
             self.datasets[dataset_id].labels.append(label)
+        self.version += 1
         
         logger.info(f"Added image to dataset {dataset_id}: {new_filename}")
         
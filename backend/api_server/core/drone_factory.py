@@ -9,10 +9,16 @@ from enum import Enum
 from dataclasses import dataclass
 
 from ...src.core.drone_simulator import DroneSimulator
+from ...src.core.simulation_process import SimulatedDroneProxy, SimulationProcess
 from .tello_edu_controller import TelloEDUController, TelloNetworkService
+from .tello_command_transport import TelloCommandTransport
+from .tello_telemetry import TelloTelemetryListener
 
 logger = logging.getLogger(__name__)
 
+# シミュレーションドローンとして扱う型（スレッド実行とワーカープロセス実行）
+SIMULATED_DRONE_TYPES = (DroneSimulator, SimulatedDroneProxy)
+
 
 class DroneMode(Enum):
     """ドローン動作モード"""
@@ -40,14 +46,23 @@ class DroneFactory:
     設定に基づいてシミュレーションドローンまたは実機ドローンを作成
     """
     
-    def __init__(self, space_bounds: tuple = (20.0, 20.0, 10.0)):
+    def __init__(self, space_bounds: tuple = (20.0, 20.0, 10.0),
+                 telemetry_listener: Optional[TelloTelemetryListener] = None,
+                 command_transport: Optional[TelloCommandTransport] = None,
+                 simulation_process: Optional[SimulationProcess] = None):
         """
         初期化
         
         Args:
             space_bounds: シミュレーション空間の境界
+            telemetry_listener: 実機ドローンで共有するテレメトリ受信器
+            command_transport: 実機ドローンで共有する非同期コマンドトランスポート
+            simulation_process: 指定時はシミュレーションドローンをワーカープロセス上に作成
         """
         self.space_bounds = space_bounds
+        self.telemetry_listener = telemetry_listener
+        self.command_transport = command_transport
+        self.simulation_process = simulation_process
         self.created_drones: Dict[str, Union[DroneSimulator, TelloEDUController]] = {}
         self.drone_configs: Dict[str, DroneConfig] = {}
         self.detected_real_drones: List[str] = []
@@ -153,6 +168,12 @@ class DroneFactory:
             DroneSimulator: シミュレーションドローン
         """
         try:
+            if self.simulation_process is not None:
+                # 物理演算はワーカープロセスで実行し、プロキシを返す
+                drone = self.simulation_process.add_drone(drone_id, tuple(config.initial_position))
+                logger.info(f"Simulation drone created in worker process: {drone_id}")
+                return drone
+            
             drone = DroneSimulator(drone_id, self.space_bounds)
             
             # 初期位置を設定
@@ -199,7 +220,11 @@ class DroneFactory:
                 raise ValueError(f"Cannot connect to Tello at {ip_address}")
             
             # Tello EDUコントローラーを作成
-            tello_controller = TelloEDUController(drone_id, ip_address)
+            tello_controller = TelloEDUController(
+                drone_id, ip_address,
+                telemetry=self.telemetry_listener,
+                command_transport=self.command_transport
+            )
             
             # 接続試行
             if not tello_controller.connect():
@@ -274,9 +299,12 @@ class DroneFactory:
             if isinstance(drone, TelloEDUController):
                 drone.stop_simulation()
                 drone.disconnect()
-            elif isinstance(drone, DroneSimulator):
+            elif isinstance(drone, SIMULATED_DRONE_TYPES):
                 drone.stop_simulation()
             
+            if isinstance(drone, SimulatedDroneProxy):
+                drone.process.remove_drone(drone_id)
+            
             del self.created_drones[drone_id]
             logger.info(f"Drone removed: {drone_id}")
             return True
@@ -299,7 +327,7 @@ class DroneFactory:
         real_count = sum(1 for drone in self.created_drones.values() 
                         if isinstance(drone, TelloEDUController))
         sim_count = sum(1 for drone in self.created_drones.values() 
-                       if isinstance(drone, DroneSimulator))
+                       if isinstance(drone, SIMULATED_DRONE_TYPES))
         
         return {
             "total_drones": len(self.created_drones),
@@ -323,6 +351,19 @@ class DroneFactory:
         drone = self.get_drone(drone_id)
         return isinstance(drone, TelloEDUController)
     
+    def may_create_real_drone(self, drone_id: str) -> bool:
+        """
+        create_drone が実機に接続する可能性があるか（REAL / AUTO モード）
+        
+        Args:
+            drone_id: ドローンID
+        
+        Returns:
+            bool: 実機接続の可能性
+        """
+        config = self.drone_configs.get(drone_id)
+        return config is None or config.mode in (DroneMode.REAL, DroneMode.AUTO)
+    
     def shutdown_all(self) -> None:
         """全ドローンをシャットダウン"""
         logger.info("Shutting down all drones...")
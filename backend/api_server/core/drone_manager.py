@@ -7,7 +7,7 @@ import asyncio
 import logging
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from uuid import uuid4
 
 from ...src.core.drone_simulator import (
@@ -16,13 +16,29 @@ from ...src.core.drone_simulator import (
 from ..models.drone_models import Drone, DroneStatus, Attitude, Photo
 from ..models.common_models import SuccessResponse, ErrorResponse
 from .camera_service import CameraService
-from .drone_factory import DroneFactory, DroneConfig, DroneMode, DroneConfigLoader
+from ...src.core.simulation_process import SimulatedDroneProxy, SimulationProcess
+from .drone_factory import DroneFactory, DroneConfig, DroneMode, DroneConfigLoader, SIMULATED_DRONE_TYPES
 from .tello_edu_controller import TelloEDUController
+from .tello_command_transport import TelloCommandTransport
+from .tello_telemetry import DjitellopyStateBridge, TelloTelemetryListener
 from .config_service import ConfigService
 from .network_service import NetworkService, get_network_service
+from .command_queue import DroneCommandDispatcher, MOVE_COMMAND
+from .fleet_commands import dispatch_fleet_command, resolve_fleet_targets
+from .fleet_snapshot import FleetStatusSnapshotter
+from .metrics_registry import COUNTER, GAUGE, MetricFamily, metrics_registry
 
 logger = logging.getLogger(__name__)
 
+# ドローン制御コマンドの所要時間（メソッド名・ドローン種別ごと）
+COMMAND_DURATION = metrics_registry.histogram(
+    "drone_command_duration_seconds", "Drone control command latency", ("command", "kind"),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+COMMAND_ERRORS = metrics_registry.counter(
+    "drone_command_errors_total", "Drone control commands that raised an error", ("command", "kind")
+)
+
 
 class DroneManager:
     """ドローン管理システム（Phase 6: 実機・シミュレーション統合対応）"""
@@ -43,20 +59,54 @@ class DroneManager:
         if space_bounds is None:
             space_bounds = tuple(config_data.get("global", {}).get("space_bounds", [20.0, 20.0, 10.0]))
         
+        # 実機テレメトリ受信器（状態ポート8890を全実機で共有）
+        self.telemetry_listener = TelloTelemetryListener()
+        # djitellopy 自身の受信スレッドの置き換え（最初の実機接続時に Tello 生成前に適用する）
+        self.telemetry_bridge = DjitellopyStateBridge(self.telemetry_listener)
+        
+        # 実機コマンドトランスポート（全実機で1ソケットを共有し、スレッドを使わずに並行送信）
+        self.command_transport = TelloCommandTransport()
+        
+        # 物理シミュレーションの別プロセス実行（API プロセスは共有メモリから状態を読むだけ）
+        process_config = config_data.get("global", {}).get("simulation_process", {}) or {}
+        self.simulation_process: Optional[SimulationProcess] = None
+        if process_config.get("enabled", False):
+            self.simulation_process = SimulationProcess(
+                space_bounds,
+                capacity=process_config.get("capacity", 64),
+                physics_hz=process_config.get("physics_hz", 100.0),
+                workers=process_config.get("workers", 1)
+            )
+        
         # ドローンファクトリー初期化
-        self.drone_factory = DroneFactory(space_bounds)
+        self.drone_factory = DroneFactory(
+            space_bounds,
+            telemetry_listener=self.telemetry_listener,
+            command_transport=self.command_transport,
+            simulation_process=self.simulation_process
+        )
         
         # 従来のシミュレーター（下位互換性のため）
         self.multi_drone_simulator = MultiDroneSimulator(space_bounds)
         
         # ドローン管理
         self.connected_drones: Dict[str, Union[DroneSimulator, TelloEDUController]] = {}
+        # 接続処理中のドローン（作成をスレッドで行う間の二重接続を防ぐ）
+        self._connecting: Set[str] = set()
         self.drone_info: Dict[str, Drone] = {}
         
         # サービス初期化
         self.camera_service = CameraService()
         self.network_service = get_network_service()
         
+        # ドローンごとのコマンドアクター（追従制御などの高頻度コマンド用）
+        self.command_dispatcher = DroneCommandDispatcher({
+            MOVE_COMMAND: self.move_drone_relative
+        })
+        
+        # 全ドローン状態のスナップショット（tick ごとに1回構築し全読み手で共有）
+        self.status_snapshot = FleetStatusSnapshotter(self)
+        
         # 設定からドローン情報を初期化
         self._initialize_from_config(config_data)
         
@@ -137,10 +187,23 @@ class DroneManager:
         if drone_id in self.connected_drones:
             raise ValueError(f"Drone {drone_id} already connected")
         
+        if drone_id in self._connecting:
+            raise ValueError(f"Drone {drone_id} is already connecting")
+        
+        self._connecting.add(drone_id)
         try:
-            # ドローンファクトリーを使用してドローンインスタンスを作成
-            drone_instance = self.drone_factory.create_drone(drone_id)
+            # シミュレーションワーカーは最初の接続時に起動
+            if self.simulation_process is not None and not self.simulation_process.is_alive:
+                await asyncio.to_thread(self.simulation_process.start)
+            
+            # djitellopy は接続時に状態パケットを待つため、実機の作成前に受信スレッドを置き換えて受信器を起動する
+            if self.drone_factory.may_create_real_drone(drone_id) and self.telemetry_bridge.install():
+                await self._start_telemetry_listener()
+            
+            # ドローンファクトリーを使用してドローンインスタンスを作成（実機の検出・接続はブロックするためスレッドで実行）
+            drone_instance = await asyncio.to_thread(self.drone_factory.create_drone, drone_id)
             self.connected_drones[drone_id] = drone_instance
+            self.status_snapshot.invalidate()
             
             # ドローン情報を更新
             self.drone_info[drone_id].status = "connected"
@@ -153,20 +216,27 @@ class DroneManager:
                     self.drone_info[drone_id].ip_address = drone_instance.ip_address
                 self.drone_info[drone_id].type = "real"
                 
-                # 状態監視を開始
-                drone_instance.start_simulation()
+                # 状態監視を開始（テレメトリ受信器は最初の実機接続時に起動）
+                if not await self._start_telemetry_listener():
+                    drone_instance.telemetry = None
+                try:
+                    await self.command_transport.start()
+                except OSError as e:
+                    logger.warning(f"Command transport unavailable, falling back to blocking commands: {e}")
+                    drone_instance.command_client = None
+                await asyncio.to_thread(drone_instance.start_simulation)
                 
                 logger.info(f"Real drone {drone_id} connected at {drone_instance.ip_address}")
                 return SuccessResponse(
                     message=f"実機ドローン {drone_id} に正常に接続しました（IP: {drone_instance.ip_address}）"
                 )
                 
-            elif isinstance(drone_instance, DroneSimulator):
+            elif isinstance(drone_instance, SIMULATED_DRONE_TYPES):
                 # シミュレーションの場合：従来通りの処理
                 self.drone_info[drone_id].type = "simulation"
                 
-                # シミュレーション開始
-                drone_instance.start_simulation()
+                # シミュレーション開始（ワーカープロセスへの要求は応答を待つためスレッドで実行）
+                await asyncio.to_thread(drone_instance.start_simulation)
                 
                 logger.info(f"Simulation drone {drone_id} connected and simulation started")
                 return SuccessResponse(
@@ -181,7 +251,10 @@ class DroneManager:
             # 接続失敗時は情報をクリア
             if drone_id in self.connected_drones:
                 del self.connected_drones[drone_id]
+            self.status_snapshot.invalidate()
             raise ValueError(f"ドローン {drone_id} への接続に失敗しました: {str(e)}")
+        finally:
+            self._connecting.discard(drone_id)
     
     async def disconnect_drone(self, drone_id: str) -> SuccessResponse:
         """ドローンから切断（実機・シミュレーション対応）"""
@@ -191,17 +264,21 @@ class DroneManager:
         if drone_id in self.connected_drones:
             drone_instance = self.connected_drones[drone_id]
             
+            # 保留中のコマンドを破棄
+            await self.command_dispatcher.remove_actor(drone_id)
+            
             try:
                 # 実機の場合の切断処理
                 if isinstance(drone_instance, TelloEDUController):
-                    drone_instance.stop_simulation()
-                    drone_instance.disconnect()
+                    self.camera_service.detach_video_stream(drone_id)
+                    await asyncio.to_thread(drone_instance.stop_simulation)
+                    await asyncio.to_thread(drone_instance.disconnect)
                     logger.info(f"Real drone {drone_id} disconnected")
                     message = f"実機ドローン {drone_id} から正常に切断しました"
                     
-                elif isinstance(drone_instance, DroneSimulator):
+                elif isinstance(drone_instance, SIMULATED_DRONE_TYPES):
                     # シミュレーションの場合：従来通りの処理
-                    drone_instance.stop_simulation()
+                    await asyncio.to_thread(drone_instance.stop_simulation)
                     logger.info(f"Simulation drone {drone_id} disconnected")
                     message = f"シミュレーションドローン {drone_id} から正常に切断しました"
                     
@@ -211,6 +288,7 @@ class DroneManager:
                 
                 # 接続状態をクリア
                 del self.connected_drones[drone_id]
+                self.status_snapshot.invalidate()
                 
                 # ドローン情報を更新
                 self.drone_info[drone_id].status = "disconnected"
@@ -228,6 +306,46 @@ class DroneManager:
             message=f"ドローン {drone_id} は既に切断されています"
         )
     
+    async def _start_telemetry_listener(self) -> bool:
+        """
+        テレメトリ受信器を起動（起動済みの場合は何もしない）
+        
+        ポートを取得できない場合は djitellopy 自身の状態受信に戻し、ポーリングで状態を取得する。
+        """
+        try:
+            await self.telemetry_listener.start()
+            return True
+        except OSError as e:
+            logger.warning(f"Telemetry listener unavailable, falling back to polling: {e}")
+            self.telemetry_bridge.uninstall()
+            return False
+    
+    async def _execute_drone_command(self, drone: Union[DroneSimulator, TelloEDUController],
+                                     method: str, *args: Any) -> Any:
+        """
+        ドローンの制御メソッドを実行
+        
+        実機は共有トランスポートがあれば非同期版（*_async）を待機し、
+        なければブロッキング呼び出しをスレッドで実行する。ワーカープロセス上のシミュレーターは
+        応答待ちがあるためスレッドで、同一プロセスのシミュレーターは即時実行。
+        コマンドの結果は次の tick の状態スナップショットに反映される（コマンドごとには再構築しない）。
+        """
+        kind = "real" if isinstance(drone, TelloEDUController) else "simulation"
+        started = time.perf_counter()
+        try:
+            if isinstance(drone, TelloEDUController):
+                if drone.command_client is not None:
+                    return await getattr(drone, f"{method}_async")(*args)
+                return await asyncio.to_thread(getattr(drone, method), *args)
+            if isinstance(drone, SimulatedDroneProxy):
+                return await asyncio.to_thread(getattr(drone, method), *args)
+            return getattr(drone, method)(*args)
+        except Exception:
+            COMMAND_ERRORS.labels(method, kind).inc()
+            raise
+        finally:
+            COMMAND_DURATION.labels(method, kind).observe(time.perf_counter() - started)
+    
     async def takeoff_drone(self, drone_id: str) -> SuccessResponse:
         """ドローンを離陸"""
         drone_sim = self._get_connected_drone(drone_id)
@@ -237,7 +355,7 @@ class DroneManager:
             raise ValueError("バッテリー残量不足です")
         
         # 離陸実行
-        success = drone_sim.takeoff()
+        success = await self._execute_drone_command(drone_sim, "takeoff")
         if not success:
             raise ValueError("離陸に失敗しました")
         
@@ -254,7 +372,7 @@ class DroneManager:
         drone_sim = self._get_connected_drone(drone_id)
         
         # 着陸実行
-        success = drone_sim.land()
+        success = await self._execute_drone_command(drone_sim, "land")
         if not success:
             raise ValueError("着陸に失敗しました")
         
@@ -293,7 +411,7 @@ class DroneManager:
             raise ValueError(f"Invalid direction: {direction}")
         
         # 移動実行
-        success = drone_sim.move_to_position(x, y, z)
+        success = await self._execute_drone_command(drone_sim, "move_to_position", x, y, z)
         if not success:
             raise ValueError("移動に失敗しました")
         
@@ -302,6 +420,86 @@ class DroneManager:
             message=f"ドローン {drone_id} の移動を開始しました"
         )
     
+    async def move_drone_relative(self, drone_id: str, dx_cm: float, dy_cm: float, dz_cm: float) -> SuccessResponse:
+        """
+        ドローンを相対ベクトルで移動（1コマンドで合成移動）
+        
+        Args:
+            drone_id: ドローンID
+            dx_cm: 右方向の移動量（cm）
+            dy_cm: 前方向の移動量（cm）
+            dz_cm: 上方向の移動量（cm）
+        """
+        drone_sim = self._get_connected_drone(drone_id)
+        
+        x, y, z = drone_sim.get_current_position()
+        
+        success = await self._execute_drone_command(
+            drone_sim, "move_to_position",
+            x + dx_cm / 100.0,
+            y + dy_cm / 100.0,
+            z + dz_cm / 100.0
+        )
+        if not success:
+            raise ValueError("移動に失敗しました")
+        
+        logger.debug(f"Drone {drone_id} moving by ({dx_cm:.0f}, {dy_cm:.0f}, {dz_cm:.0f})cm")
+        return SuccessResponse(
+            message=f"ドローン {drone_id} の移動を開始しました"
+        )
+    
+    def queue_relative_move(self, drone_id: str, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """
+        相対移動をドローンのコマンドアクターに投入
+        
+        実行待ちの移動と統合されるため、高頻度で呼び出しても遅延は蓄積しない。
+        """
+        self._get_connected_drone(drone_id)
+        self.command_dispatcher.submit_move(drone_id, dx_cm, dy_cm, dz_cm)
+    
+    def queue_tracking_move(self, drone_id: str, dx_cm: float, dy_cm: float, dz_cm: float) -> None:
+        """
+        追跡の補正移動をドローンのコマンドアクターに投入
+        
+        実行待ちの補正移動は最新のもので置き換えるため、古い目標位置に基づく補正は累積しない。
+        """
+        self._get_connected_drone(drone_id)
+        self.command_dispatcher.submit_tracking_move(drone_id, dx_cm, dy_cm, dz_cm)
+    
+    def get_command_queue_statistics(self, drone_id: Optional[str] = None) -> Dict[str, Any]:
+        """コマンドキューの統計情報（キュー深さ・遅延）を取得"""
+        return self.command_dispatcher.get_statistics(drone_id)
+    
+    def collect_metrics(self) -> List[MetricFamily]:
+        """
+        Prometheus 用のメトリクスを取得（接続状態・バッテリー・カメラ・シミュレーション）
+        
+        共有状態や受信済みの値を読むだけで、ドローンへの問い合わせは行わない。
+        """
+        connection = MetricFamily("drone_connection_status", GAUGE, "Whether the drone is connected (1) or not (0)")
+        battery = MetricFamily("drone_battery_percentage", GAUGE, "Drone battery level")
+        for drone_id, info in sorted(self.drone_info.items()):
+            drone = self.connected_drones.get(drone_id)
+            connection.add(1 if drone is not None else 0, drone_id=drone_id, type=info.type)
+            if drone is not None:
+                battery.add(drone.get_battery_level(), drone_id=drone_id)
+        families = [connection, battery]
+        families.extend(self.camera_service.collect_metrics(self.connected_drones.keys()))
+        
+        if self.simulation_process is not None and self.simulation_process.is_alive:
+            stats = self.simulation_process.get_statistics()
+            families.extend([
+                MetricFamily("simulation_tick_seconds", GAUGE, "Duration of the latest physics tick").add(
+                    stats["last_tick_ms"] / 1000),
+                MetricFamily("simulation_tick_max_seconds", GAUGE, "Longest physics tick so far").add(
+                    stats["max_tick_ms"] / 1000),
+                MetricFamily("simulation_ticks_total", COUNTER, "Physics ticks run by the slowest worker").add(
+                    stats["ticks"]),
+                MetricFamily("simulation_tick_overruns_total", COUNTER, "Physics ticks that overran their budget").add(
+                    stats["overruns"])
+            ])
+        return families
+    
     async def rotate_drone(self, drone_id: str, direction: str, angle: int) -> SuccessResponse:
         """ドローンを回転"""
         drone_sim = self._get_connected_drone(drone_id)
@@ -324,7 +522,7 @@ class DroneManager:
             target_yaw += 360
         
         # 回転実行
-        success = drone_sim.rotate_to_yaw(target_yaw)
+        success = await self._execute_drone_command(drone_sim, "rotate_to_yaw", target_yaw)
         if not success:
             raise ValueError("回転に失敗しました")
         
@@ -338,13 +536,45 @@ class DroneManager:
         drone_sim = self._get_connected_drone(drone_id)
         
         # 緊急着陸実行
-        drone_sim.emergency_land()
+        await self._execute_drone_command(drone_sim, "emergency_land")
         
         logger.warning(f"Drone {drone_id} emergency stop executed")
         return SuccessResponse(
             message=f"ドローン {drone_id} の緊急停止を実行しました"
         )
     
+    async def execute_bulk_command(
+        self,
+        command: str,
+        drone_ids: Optional[List[str]] = None,
+        selector: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 10.0
+    ) -> Dict[str, Any]:
+        """
+        複数ドローンへコマンドを一括実行（並行送信）
+        
+        Args:
+            command: connect / disconnect / takeoff / land / move / rotate / emergency
+            drone_ids: 対象ドローンIDリスト
+            selector: 対象セレクタ（all / connected / disconnected / real / dummy）
+            params: コマンドパラメータ（move: direction, distance / rotate: direction, angle）
+            timeout: ドローンごとのタイムアウト（秒）
+        """
+        targets = resolve_fleet_targets(
+            self.drone_info, self.connected_drones.keys(), drone_ids, selector
+        )
+        handlers = {
+            "connect": lambda drone_id, p: self.connect_drone(drone_id),
+            "disconnect": lambda drone_id, p: self.disconnect_drone(drone_id),
+            "takeoff": lambda drone_id, p: self.takeoff_drone(drone_id),
+            "land": lambda drone_id, p: self.land_drone(drone_id),
+            "move": lambda drone_id, p: self.move_drone(drone_id, p["direction"], p["distance"]),
+            "rotate": lambda drone_id, p: self.rotate_drone(drone_id, p["direction"], p["angle"]),
+            "emergency": lambda drone_id, p: self.emergency_stop_drone(drone_id)
+        }
+        return await dispatch_fleet_command(handlers, command, targets, params, timeout)
+    
     async def get_drone_status(self, drone_id: str) -> DroneStatus:
         """ドローン状態を取得（実機・シミュレーション対応）"""
         if drone_id not in self.drone_info:
@@ -366,7 +596,7 @@ class DroneManager:
         if isinstance(drone_instance, TelloEDUController):
             # 実機ドローンの状態取得
             return await self._get_real_drone_status(drone_id, drone_instance)
-        elif isinstance(drone_instance, DroneSimulator):
+        elif isinstance(drone_instance, SIMULATED_DRONE_TYPES):
             # シミュレーションドローンの状態取得
             return await self._get_simulation_drone_status(drone_id, drone_instance)
         else:
@@ -380,6 +610,31 @@ class DroneManager:
                 last_updated=datetime.now()
             )
     
+    async def get_cached_drone_status(self, drone_id: str) -> DroneStatus:
+        """スナップショットからドローン状態を取得（O(1)、最大1 tick 分古い）"""
+        return await self.status_snapshot.get_status(drone_id)
+    
+    def get_drone_telemetry(self, drone_id: str) -> Dict[str, Any]:
+        """
+        高頻度配信用の軽量テレメトリを取得（位置・速度・バッテリー・飛行状態のみ）
+        
+        実機は状態ポートの受信値、シミュレーションは共有状態を読むだけで、ドローンへの問い合わせは行わない。
+        
+        Raises:
+            ValueError: ドローンが見つからない・未接続
+        """
+        drone = self._get_connected_drone(drone_id)
+        telemetry = {
+            "position": list(drone.get_current_position()),
+            "velocity": list(drone.get_current_velocity()),
+            "battery_level": drone.get_battery_level(),
+            "flight_state": drone.get_flight_state()
+        }
+        if isinstance(drone, SIMULATED_DRONE_TYPES):
+            rotation = drone.current_state.rotation
+            telemetry["attitude"] = {"pitch": rotation.x, "roll": rotation.y, "yaw": rotation.z}
+        return telemetry
+    
     async def _get_real_drone_status(self, drone_id: str, drone: TelloEDUController) -> DroneStatus:
         """実機ドローンの詳細状態を取得"""
         try:
@@ -511,9 +766,14 @@ class DroneManager:
     async def start_camera_stream(self, drone_id: str) -> SuccessResponse:
         """カメラストリーミングを開始"""
         # ドローンが接続されているかチェック
-        self._get_connected_drone(drone_id)
+        drone = self._get_connected_drone(drone_id)
         
         try:
+            # 実機は映像ポートのH.264をデコードして使用
+            if isinstance(drone, TelloEDUController):
+                video_stream = await self._execute_drone_command(drone, "start_video_stream")
+                self.camera_service.attach_video_stream(drone_id, video_stream)
+            
             result = await self.camera_service.start_camera_stream(drone_id)
             logger.info(f"Camera stream started for drone {drone_id}")
             return SuccessResponse(
@@ -526,10 +786,12 @@ class DroneManager:
     async def stop_camera_stream(self, drone_id: str) -> SuccessResponse:
         """カメラストリーミングを停止"""
         # ドローンが接続されているかチェック
-        self._get_connected_drone(drone_id)
+        drone = self._get_connected_drone(drone_id)
         
         try:
             result = await self.camera_service.stop_camera_stream(drone_id)
+            if isinstance(drone, TelloEDUController):
+                await self._execute_drone_command(drone, "stop_video_stream")
             logger.info(f"Camera stream stopped for drone {drone_id}")
             return SuccessResponse(
                 message=f"ドローン {drone_id} のカメラストリーミングを停止しました"
@@ -636,7 +898,7 @@ class DroneManager:
                 "real_connected_count": sum(1 for d in self.connected_drones.values() 
                                            if isinstance(d, TelloEDUController)),
                 "simulation_connected_count": sum(1 for d in self.connected_drones.values() 
-                                                 if isinstance(d, DroneSimulator)),
+                                                 if isinstance(d, SIMULATED_DRONE_TYPES)),
                 "auto_scan_enabled": self.network_service.auto_scan_enabled,
                 "last_scan_time": network_stats.get("scan_statistics", {}).get("last_scan_time")
             }
@@ -737,7 +999,7 @@ class DroneManager:
                         "connection_state": drone_instance.get_connection_state().value,
                         "real_ip_address": drone_instance.ip_address
                     })
-                elif isinstance(drone_instance, DroneSimulator):
+                elif isinstance(drone_instance, SIMULATED_DRONE_TYPES):
                     result.update({
                         "drone_class": "simulation",
                         "is_real_drone": False,
@@ -811,6 +1073,12 @@ class DroneManager:
         except Exception as e:
             logger.warning(f"Failed to stop auto scan: {e}")
         
+        # コマンドアクターを停止
+        await self.command_dispatcher.shutdown()
+        
+        # 状態スナップショットの構築を停止
+        await self.status_snapshot.stop()
+        
         # カメラサービスをシャットダウン
         await self.camera_service.shutdown()
         
@@ -824,6 +1092,16 @@ class DroneManager:
         # マルチドローンシミュレータを停止（下位互換性のため）
         self.multi_drone_simulator.stop_all_simulations()
         
+        # シミュレーションワーカーを停止
+        if self.simulation_process is not None:
+            await asyncio.to_thread(self.simulation_process.close)
+        
+        # テレメトリ受信器を停止
+        self.telemetry_listener.stop()
+        
+        # コマンドトランスポートを閉じる
+        self.command_transport.close()
+        
         # ネットワークサービスをシャットダウン
         self.network_service.shutdown()
         
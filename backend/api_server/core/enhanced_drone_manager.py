@@ -16,11 +16,14 @@ from enum import Enum
 from ...src.core.drone_simulator import (
     DroneSimulator, MultiDroneSimulator, DroneState, Vector3D
 )
+from ...src.core.path_planner import PathPlanner
 from ..models.drone_models import Drone, DroneStatus, Attitude, Photo
 from ..models.common_models import SuccessResponse, ErrorResponse
 from .camera_service import CameraService
 from .vision_service import VisionService
 from .enhanced_vision_service import EnhancedVisionService
+from .fleet_commands import dispatch_fleet_command, resolve_fleet_targets
+from .flight_log_store import FlightLogStore
 
 logger = logging.getLogger(__name__)
 
@@ -103,9 +106,17 @@ class DroneMetrics:
 class EnhancedDroneManager:
     """強化されたドローン管理システム - Phase 3"""
     
-    def __init__(self, space_bounds: Tuple[float, float, float] = (20.0, 20.0, 10.0)):
-        """初期化"""
+    def __init__(self, space_bounds: Tuple[float, float, float] = (20.0, 20.0, 10.0),
+                 flight_log_root: Optional[str] = None):
+        """
+        初期化
+        
+        Args:
+            space_bounds: シミュレーション空間境界
+            flight_log_root: 飛行ログの保存先ディレクトリ（None は保存せずメモリのみ。設定の flight_log_root を渡す）
+        """
         self.multi_drone_simulator = MultiDroneSimulator(space_bounds)
+        self.path_planner = PathPlanner(self.multi_drone_simulator.shared_virtual_world)
         self.connected_drones: Dict[str, DroneSimulator] = {}
         self.drone_info: Dict[str, Drone] = {}
         self.drone_metrics: Dict[str, DroneMetrics] = {}
@@ -123,9 +134,12 @@ class EnhancedDroneManager:
         self.camera_service = CameraService()
         self.vision_service = VisionService()
         self.enhanced_vision_service = EnhancedVisionService()
+        # 追跡ループはカメラストリームのフレームコンシューマーとして登録される
+        self.vision_service.camera_service = self.camera_service
+        self.enhanced_vision_service.camera_service = self.camera_service
         
         # 監視とログ
-        self.flight_logs: Dict[str, List[Dict[str, Any]]] = {}
+        self.flight_log_store = FlightLogStore(flight_log_root)
         self.monitoring_active = False
         self.monitoring_task: Optional[asyncio.Task] = None
         
@@ -160,7 +174,6 @@ class EnhancedDroneManager:
             self.flight_modes[drone_id] = FlightMode.MANUAL
             self.flight_plans[drone_id] = None
             self.safety_violations[drone_id] = []
-            self.flight_logs[drone_id] = []
             logger.info(f"Enhanced dummy drone initialized: {drone_id}")
     
     # ===== 基本ドローン制御 =====
@@ -186,6 +199,7 @@ class EnhancedDroneManager:
         
         # シミュレーション開始
         drone_sim.start_simulation()
+        self.multi_drone_simulator.start_separation_monitor()
         
         # 接続ログ記録
         await self._log_flight_event(drone_id, "connection", {"status": "connected"})
@@ -292,6 +306,12 @@ class EnhancedDroneManager:
             safety_checks=flight_plan.get("safety_checks", True)
         )
         
+        # 障害物を迂回するウェイポイントに展開
+        if flight_plan.get("path_planning", True) and plan.waypoints:
+            plan.waypoints = await asyncio.to_thread(
+                self._expand_waypoints, drone_sim.get_current_position(), plan.waypoints
+            )
+        
         # 安全チェック
         if plan.safety_checks and not await self._check_flight_plan_safety(drone_id, plan):
             raise ValueError("飛行計画の安全チェックに失敗しました")
@@ -315,6 +335,46 @@ class EnhancedDroneManager:
             message=f"ドローン {drone_id} の飛行計画実行を開始しました"
         )
     
+    def _expand_waypoints(self, start: Tuple[float, float, float],
+                          waypoints: List[Tuple[float, float, float]]) -> List[Tuple[float, float, float]]:
+        """各ウェイポイント間を衝突のない経路で補間（障害物がなければ元のまま）"""
+        expanded = []
+        current = tuple(start)
+        for waypoint in waypoints:
+            try:
+                path = self.path_planner.plan(current, tuple(waypoint))
+            except ValueError as e:
+                raise ValueError(f"ウェイポイント {tuple(waypoint)} への経路がありません: {e}")
+            expanded.extend(path.waypoints)
+            current = tuple(waypoint)
+        return expanded
+    
+    async def plan_path(self, drone_id: str, goal: Tuple[float, float, float],
+                        start: Optional[Tuple[float, float, float]] = None) -> Dict[str, Any]:
+        """
+        衝突のない経路を計画（飛行はしない）
+        
+        Args:
+            drone_id: ドローンID
+            goal: 目標位置
+            start: 開始位置（省略時はドローンの現在位置）
+        """
+        if start is None:
+            start = self._get_connected_drone(drone_id).get_current_position()
+        elif drone_id not in self.drone_info:
+            raise ValueError(f"Drone {drone_id} not found")
+        
+        path = await asyncio.to_thread(self.path_planner.plan, tuple(start), tuple(goal))
+        return {
+            "start": tuple(start),
+            "goal": tuple(goal),
+            "waypoints": path.waypoints,
+            "length": path.length,
+            "expanded_nodes": path.expanded_nodes,
+            "compute_ms": path.compute_ms,
+            "cached": path.cached
+        }
+    
     async def _execute_flight_plan_task(self, drone_id: str, plan: FlightPlan) -> None:
         """飛行計画実行タスク"""
         drone_sim = self._get_connected_drone(drone_id)
@@ -648,6 +708,15 @@ class EnhancedDroneManager:
                 })
                 return False
         
+        # 現在位置から各ウェイポイントまでの線分を障害物に対して掃引
+        drone_sim = self.connected_drones.get(drone_id)
+        if drone_sim is not None and plan.waypoints:
+            path = [drone_sim.get_current_position()] + [tuple(waypoint) for waypoint in plan.waypoints]
+            collision = drone_sim.virtual_world.find_path_collision(path)
+            if collision:
+                await self._record_safety_violation(drone_id, "flight_plan_collision", collision)
+                return False
+        
         return True
     
     async def _record_safety_violation(self, drone_id: str, violation_type: str, details: Dict[str, Any]) -> None:
@@ -668,8 +737,8 @@ class EnhancedDroneManager:
     
     def _determine_violation_severity(self, violation_type: str) -> str:
         """違反の重要度を判定"""
-        critical_violations = ["low_battery", "collision_detected", "emergency_landing"]
-        high_violations = ["altitude_bounds", "position_bounds", "max_flight_time"]
+        critical_violations = ["low_battery", "collision_detected", "emergency_landing", "drone_collision"]
+        high_violations = ["altitude_bounds", "position_bounds", "max_flight_time", "flight_plan_collision"]
         
         if violation_type in critical_violations:
             return SafetyLevel.CRITICAL.value
@@ -706,12 +775,27 @@ class EnhancedDroneManager:
                 for drone_id in list(self.connected_drones.keys()):
                     await self._monitor_drone(drone_id)
                 
+                # 機体間の近接イベントを記録
+                await self._process_proximity_events()
+                
                 await asyncio.sleep(1.0)  # 1秒間隔
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {str(e)}")
                 await asyncio.sleep(5.0)  # エラー時は少し長めの間隔
     
+    async def _process_proximity_events(self) -> None:
+        """シミュレータの近接イベントを飛行ログと安全違反に反映"""
+        for event in self.multi_drone_simulator.drain_proximity_events():
+            for drone_id in event["drone_ids"]:
+                if drone_id not in self.drone_info:
+                    continue
+                if event["type"] == "collision":
+                    self.flight_modes[drone_id] = FlightMode.EMERGENCY
+                    await self._record_safety_violation(drone_id, "drone_collision", event)
+                else:
+                    await self._log_flight_event(drone_id, "near_miss", event)
+    
     async def _monitor_drone(self, drone_id: str) -> None:
         """個別ドローンの監視"""
         try:
@@ -754,18 +838,8 @@ class EnhancedDroneManager:
         metrics.performance_score = max(0.0, min(100.0, score))
     
     async def _log_flight_event(self, drone_id: str, event_type: str, data: Dict[str, Any]) -> None:
-        """飛行イベントをログに記録"""
-        log_entry = {
-            "timestamp": datetime.now(),
-            "event_type": event_type,
-            "data": data
-        }
-        
-        self.flight_logs[drone_id].append(log_entry)
-        
-        # ログサイズ制限（最新1000件まで）
-        if len(self.flight_logs[drone_id]) > 1000:
-            self.flight_logs[drone_id] = self.flight_logs[drone_id][-1000:]
+        """飛行イベントをログに記録（直近はリング、履歴はディスクへバッチ書き込み）"""
+        self.flight_log_store.append(drone_id, event_type, data)
     
     # ===== 緊急処理 =====
     
@@ -830,12 +904,25 @@ class EnhancedDroneManager:
         return status_dict
     
     async def get_flight_logs(self, drone_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """飛行ログを取得"""
-        if drone_id not in self.flight_logs:
-            return []
+        """飛行ログ（直近）を取得"""
+        return self.flight_log_store.recent(drone_id, limit)
+    
+    async def query_flight_logs(self, drone_id: str, start: Optional[datetime] = None,
+                                end: Optional[datetime] = None, event_types: Optional[List[str]] = None,
+                                limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        飛行ログ履歴を検索（時刻範囲・イベント種別、カーソルページング）
+        
+        Returns:
+            Dict[str, Any]: {"entries": [...], "next_cursor": str | None}
+        """
+        if drone_id not in self.drone_info:
+            raise ValueError(f"Drone {drone_id} not found")
         
-        logs = self.flight_logs[drone_id]
-        return logs[-limit:] if len(logs) > limit else logs
+        # ディスク読み出しを伴うためスレッドで実行
+        return await asyncio.to_thread(
+            self.flight_log_store.query, drone_id, start, end, event_types, limit, cursor
+        )
     
     async def get_safety_violations(self, drone_id: str) -> List[Dict[str, Any]]:
         """安全違反履歴を取得"""
@@ -1040,6 +1127,29 @@ class EnhancedDroneManager:
             message=f"ドローン {drone_id} の回転を開始しました（強化版）"
         )
     
+    async def execute_bulk_command(
+        self,
+        command: str,
+        drone_ids: Optional[List[str]] = None,
+        selector: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 10.0
+    ) -> Dict[str, Any]:
+        """複数ドローンへコマンドを一括実行（強化版：安全チェック・飛行ログ付き）"""
+        targets = resolve_fleet_targets(
+            self.drone_info, self.connected_drones.keys(), drone_ids, selector
+        )
+        handlers = {
+            "connect": lambda drone_id, p: self.connect_drone(drone_id),
+            "disconnect": lambda drone_id, p: self.disconnect_drone(drone_id),
+            "takeoff": lambda drone_id, p: self.takeoff_drone(drone_id),
+            "land": lambda drone_id, p: self.land_drone(drone_id),
+            "move": lambda drone_id, p: self.move_drone(drone_id, p["direction"], p["distance"]),
+            "rotate": lambda drone_id, p: self.rotate_drone(drone_id, p["direction"], p["angle"]),
+            "emergency": lambda drone_id, p: self.emergency_land_drone(drone_id)
+        }
+        return await dispatch_fleet_command(handlers, command, targets, params, timeout)
+    
     async def get_drone_status(self, drone_id: str) -> DroneStatus:
         """ドローン状態を取得（基本実装から継承）"""
         if drone_id not in self.drone_info:
@@ -1180,6 +1290,9 @@ class EnhancedDroneManager:
         # マルチドローンシミュレータを停止
         self.multi_drone_simulator.stop_all_simulations()
         
+        # 保留中の飛行ログを書き込む
+        await self.flight_log_store.close()
+        
         logger.info("EnhancedDroneManager shutdown complete")
     
     @staticmethod
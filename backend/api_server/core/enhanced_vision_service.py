@@ -21,6 +21,7 @@ from ..models.vision_models import (
     Detection, DetectionResult, BoundingBox, TrackingStatus
 )
 from ..models.common_models import SuccessResponse
+from .frame_sources import FrameSourceMixin
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,8 @@ class EnhancedDetectionModel:
             "detection_counts": [],
             "confidence_scores": []
         }
+        # 統計が更新されるたびに増える（モデル一覧の ETag 用）
+        self.version = 0
         
     def detect(self, image: np.ndarray, confidence_threshold: float = None) -> List[Detection]:
         """
@@ -183,6 +186,7 @@ class EnhancedDetectionModel:
         if detections:
             avg_confidence = sum(d.confidence for d in detections) / len(detections)
             self.performance_stats["confidence_scores"].append(avg_confidence)
+        self.version += 1
         
         return detections
     
@@ -271,7 +275,7 @@ class OpenCVTracker:
             return False, None
 
 
-class EnhancedVisionService:
+class EnhancedVisionService(FrameSourceMixin):
     """Enhanced vision processing service for Phase 3"""
     
     def __init__(self):
@@ -280,6 +284,9 @@ class EnhancedVisionService:
         self.learning_sessions: Dict[str, LearningSession] = {}
         self.active_trackers: Dict[str, OpenCVTracker] = {}
         
+        # ドローンIDごとのフレームソース（記録再生・実カメラ等）
+        self.frame_sources: Dict[str, Any] = {}
+        
         self.is_tracking_active = False
         self.current_tracking_config: Optional[TrackingConfig] = None
         self.tracking_stats = {
@@ -436,80 +443,90 @@ class EnhancedVisionService:
         # Initialize tracker
         tracker_key = f"{tracking_id}_tracker"
         
-        while self.is_tracking_active and tracking_id in self.tracking_sessions:
-            try:
-                session["total_frames"] += 1
+        # Request frames from the drone's camera stream at the tracking rate
+        consumer_id = f"enhanced_tracking:{tracking_id}"
+        self._register_frame_consumer(session["drone_id"], consumer_id, 1.0 / config.update_interval)
+        
+        try:
+            while self.is_tracking_active and tracking_id in self.tracking_sessions:
+                try:
+                    session["total_frames"] += 1
                 
-                # Simulate frame processing
-                await asyncio.sleep(config.update_interval)
+                    # Simulate frame processing
+                    await asyncio.sleep(config.update_interval)
                 
-                # Simulate getting new frame
-                frame = self._simulate_camera_frame()
+                    # Get new frame (registered source, camera stream or simulated)
+                    frame = self._get_drone_frame(session["drone_id"])
+                    if frame is None:
+                        continue
                 
-                if tracker_key not in self.active_trackers:
-                    # First frame - detect initial target
-                    success, initial_bbox = await self._detect_initial_target(
-                        frame, session["model_id"], config.confidence_threshold
-                    )
+                    if tracker_key not in self.active_trackers:
+                        # First frame - detect initial target
+                        success, initial_bbox = await self._detect_initial_target(
+                            frame, session["model_id"], config.confidence_threshold
+                        )
                     
-                    if success and initial_bbox:
-                        # Initialize tracker
-                        tracker = OpenCVTracker(config.algorithm)
-                        if tracker.initialize(frame, initial_bbox):
-                            self.active_trackers[tracker_key] = tracker
-                            session["target_detected"] = True
-                            session["target_position"] = initial_bbox
-                            session["last_detection_time"] = datetime.now()
-                            session["tracking_loss_count"] = 0
-                            logger.info(f"Target acquired and tracker initialized for session {tracking_id}")
+                        if success and initial_bbox:
+                            # Initialize tracker
+                            tracker = OpenCVTracker(config.algorithm)
+                            if tracker.initialize(frame, initial_bbox):
+                                self.active_trackers[tracker_key] = tracker
+                                session["target_detected"] = True
+                                session["target_position"] = initial_bbox
+                                session["last_detection_time"] = datetime.now()
+                                session["tracking_loss_count"] = 0
+                                logger.info(f"Target acquired and tracker initialized for session {tracking_id}")
+                            else:
+                                session["target_detected"] = False
                         else:
                             session["target_detected"] = False
-                    else:
-                        session["target_detected"] = False
-                        session["tracking_loss_count"] += 1
+                            session["tracking_loss_count"] += 1
                 
-                else:
-                    # Update existing tracker
-                    tracker = self.active_trackers[tracker_key]
-                    success, bbox = tracker.update(frame)
+                    else:
+                        # Update existing tracker
+                        tracker = self.active_trackers[tracker_key]
+                        success, bbox = tracker.update(frame)
                     
-                    if success and bbox:
-                        session["target_detected"] = True
-                        session["target_position"] = bbox
-                        session["last_detection_time"] = datetime.now()
-                        session["tracking_loss_count"] = 0
-                        session["successful_frames"] += 1
+                        if success and bbox:
+                            session["target_detected"] = True
+                            session["target_position"] = bbox
+                            session["last_detection_time"] = datetime.now()
+                            session["tracking_loss_count"] = 0
+                            session["successful_frames"] += 1
                         
-                        # Quality check
-                        if tracker.tracking_quality < 0.3:
-                            logger.warning(f"Low tracking quality ({tracker.tracking_quality:.2f}) for session {tracking_id}")
-                            # Re-initialize detection
-                            del self.active_trackers[tracker_key]
+                            # Quality check
+                            if tracker.tracking_quality < 0.3:
+                                logger.warning(f"Low tracking quality ({tracker.tracking_quality:.2f}) for session {tracking_id}")
+                                # Re-initialize detection
+                                del self.active_trackers[tracker_key]
                             
-                    else:
-                        session["target_detected"] = False
-                        session["tracking_loss_count"] += 1
+                        else:
+                            session["target_detected"] = False
+                            session["tracking_loss_count"] += 1
                         
-                        # Check if tracking is lost for too long
-                        if session["tracking_loss_count"] > config.max_tracking_loss:
-                            logger.warning(f"Tracking lost for session {tracking_id} - attempting re-detection")
-                            del self.active_trackers[tracker_key]
-                            session["tracking_loss_count"] = 0
+                            # Check if tracking is lost for too long
+                            if session["tracking_loss_count"] > config.max_tracking_loss:
+                                logger.warning(f"Tracking lost for session {tracking_id} - attempting re-detection")
+                                del self.active_trackers[tracker_key]
+                                session["tracking_loss_count"] = 0
                 
-                # Update global stats
-                self.tracking_stats["total_frames"] += 1
-                if session["target_detected"]:
-                    self.tracking_stats["successful_tracks"] += 1
-                else:
-                    self.tracking_stats["lost_tracks"] += 1
+                    # Update global stats
+                    self.tracking_stats["total_frames"] += 1
+                    if session["target_detected"]:
+                        self.tracking_stats["successful_tracks"] += 1
+                    else:
+                        self.tracking_stats["lost_tracks"] += 1
                 
-                # Simulate drone control based on target position
-                if session["target_detected"] and session["target_position"]:
-                    await self._simulate_drone_tracking_control(session, config)
+                    # Simulate drone control based on target position
+                    if session["target_detected"] and session["target_position"]:
+                        await self._simulate_drone_tracking_control(session, config)
                 
-            except Exception as e:
-                logger.error(f"Error in enhanced tracking loop: {str(e)}")
-                await asyncio.sleep(1.0)
+                except Exception as e:
+                    logger.error(f"Error in enhanced tracking loop: {str(e)}")
+                    await asyncio.sleep(1.0)
+        
+        finally:
+            self._unregister_frame_consumer(session["drone_id"], consumer_id)
         
         # Cleanup tracker
         if tracker_key in self.active_trackers:
@@ -700,6 +717,11 @@ class EnhancedVisionService:
     
     # ===== Model Management =====
     
+    @property
+    def models_version(self) -> Tuple[int, int]:
+        """モデル一覧（性能統計を含む）のバージョン"""
+        return len(self.models), sum(model.version for model in self.models.values())
+    
     def get_available_models(self) -> List[Dict[str, Any]]:
         """Get list of available models with details"""
         model_list = []
@@ -848,5 +870,6 @@ class EnhancedVisionService:
         self.tracking_sessions.clear()
         self.learning_sessions.clear()
         self.active_trackers.clear()
+        self.frame_sources.clear()
         
         logger.info("EnhancedVisionService shutdown complete")
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Fleet Commands - Concurrent fan-out of one command to many drones
+Dispatches per-drone coroutines with asyncio.gather and per-drone timeouts
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from ..models.drone_models import validate_command_params
+
+logger = logging.getLogger(__name__)
+
+# 一括実行できるコマンドと必須パラメータ
+FLEET_COMMANDS: Dict[str, List[str]] = {
+    "connect": [],
+    "disconnect": [],
+    "takeoff": [],
+    "land": [],
+    "move": ["direction", "distance"],
+    "rotate": ["direction", "angle"],
+    "emergency": []
+}
+
+# 対象選択セレクタ（ドローンタイプ "real" / "dummy" も指定可能）
+FLEET_SELECTORS = ("all", "connected", "disconnected")
+
+FleetHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+# タイムアウト後も実行を続けているコマンド（完了まで参照を保持する）
+_unfinished_commands: Set[asyncio.Task] = set()
+
+
+def validate_fleet_command(command: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    コマンド名とパラメータを検証（move / rotate は MoveCommand / RotateCommand の範囲と方向）
+
+    Returns:
+        Dict[str, Any]: 検証済みパラメータ
+    """
+    if command not in FLEET_COMMANDS:
+        raise ValueError(f"Invalid fleet command: {command}")
+
+    params = dict(params or {})
+    missing = [name for name in FLEET_COMMANDS[command] if name not in params]
+    if missing:
+        raise ValueError(f"Invalid parameters for {command}: missing {', '.join(missing)}")
+    return validate_command_params(command, params)
+
+
+def resolve_fleet_targets(
+    drone_info: Dict[str, Any],
+    connected_ids: Iterable[str],
+    drone_ids: Optional[List[str]] = None,
+    selector: Optional[str] = None
+) -> List[str]:
+    """
+    対象ドローンIDを解決
+
+    Args:
+        drone_info: ドローンID -> Drone
+        connected_ids: 接続中のドローンID
+        drone_ids: 明示的なドローンIDリスト
+        selector: all / connected / disconnected / real / dummy
+
+    Returns:
+        List[str]: 重複を除いた対象ドローンID（指定順）
+    """
+    if drone_ids is None and selector is None:
+        raise ValueError("Invalid target: drone_ids or selector is required")
+
+    targets: List[str] = []
+    if drone_ids is not None:
+        targets.extend(drone_ids)
+
+    if selector is not None:
+        connected = set(connected_ids)
+        if selector == "all":
+            selected = list(drone_info.keys())
+        elif selector == "connected":
+            selected = [drone_id for drone_id in drone_info if drone_id in connected]
+        elif selector == "disconnected":
+            selected = [drone_id for drone_id in drone_info if drone_id not in connected]
+        elif selector in ("real", "dummy"):
+            selected = [drone_id for drone_id, info in drone_info.items() if info.type == selector]
+        else:
+            raise ValueError(f"Invalid selector: {selector}")
+        targets.extend(selected)
+
+    return list(dict.fromkeys(targets))
+
+
+def _finish_late(drone_id: str, task: asyncio.Task) -> None:
+    """タイムアウト後に完了したコマンドの結果を回収"""
+    _unfinished_commands.discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.warning(f"Fleet command for {drone_id} failed after timeout: {error}")
+    else:
+        logger.info(f"Fleet command for {drone_id} completed after timeout")
+
+
+def get_unfinished_command_count() -> int:
+    """タイムアウト後も実行中のコマンド数"""
+    return len(_unfinished_commands)
+
+
+async def _run_one(drone_id: str, handler: FleetHandler, params: Dict[str, Any],
+                   timeout: float, semaphore: Optional[asyncio.Semaphore]) -> Dict[str, Any]:
+    """
+    1台分のコマンドを実行して結果を返す（例外は結果に変換）
+
+    接続や実機コマンドはスレッドで実行されキャンセルできないため、タイムアウト時もコマンドは
+    キャンセルせずに完了まで実行させ、結果だけを先にタイムアウトとして返す（同時実行数の枠は完了まで保持）。
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {
+        "drone_id": drone_id,
+        "success": False,
+        "message": None,
+        "error": None,
+        "timed_out": False
+    }
+
+    if semaphore is not None:
+        await semaphore.acquire()
+    task = asyncio.ensure_future(handler(drone_id, params))
+    if semaphore is not None:
+        task.add_done_callback(lambda _: semaphore.release())
+
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if not done:
+        _unfinished_commands.add(task)
+        task.add_done_callback(lambda t: _finish_late(drone_id, t))
+        result["timed_out"] = True
+        result["error"] = f"Timed out after {timeout}s (command still running)"
+    else:
+        try:
+            response = task.result()
+            result["success"] = True
+            result["message"] = getattr(response, "message", None)
+        except Exception as e:
+            result["error"] = str(e)
+
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+async def dispatch_fleet_command(
+    handlers: Dict[str, FleetHandler],
+    command: str,
+    drone_ids: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    timeout: float = 10.0,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    コマンドを複数ドローンへ並行送信
+
+    1台の失敗やタイムアウトは他のドローンに影響せず、全台の結果を1つにまとめて返す。
+
+    Args:
+        handlers: コマンド名 -> 実行コルーチン関数 (drone_id, params)
+        command: コマンド名
+        drone_ids: 対象ドローンID
+        params: コマンドパラメータ
+        timeout: ドローンごとのタイムアウト（秒）
+        max_concurrency: 同時実行数の上限（None は無制限）
+
+    Returns:
+        Dict[str, Any]: 一括実行結果
+    """
+    params = validate_fleet_command(command, params)
+    handler = handlers.get(command)
+    if handler is None:
+        raise ValueError(f"Invalid fleet command: {command}")
+    if timeout <= 0:
+        raise ValueError("Invalid timeout: must be positive")
+
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        _run_one(drone_id, handler, params, timeout, semaphore)
+        for drone_id in drone_ids
+    ])
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    succeeded = sum(1 for result in results if result["success"])
+    timed_out = sum(1 for result in results if result["timed_out"])
+
+    logger.info(
+        f"Fleet command {command}: {succeeded}/{len(results)} succeeded "
+        f"({timed_out} timed out) in {elapsed_ms:.1f}ms"
+    )
+
+    return {
+        "command": command,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "timed_out": timed_out,
+        "elapsed_ms": elapsed_ms,
+        "results": list(results)
+    }
@@ -0,0 +1,268 @@
+"""
+Fleet Status Snapshot - Tick-level cached status of every drone
+Built once per tick from simulator / controller state and shared by all readers
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..models.drone_models import DroneStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FleetSnapshot:
+    """ある時点の全ドローン状態（構築後は変更しない）"""
+    tick: int
+    taken_at: datetime
+    statuses: Dict[str, DroneStatus]
+    status_dicts: Dict[str, Dict[str, Any]]
+    type_info: Dict[str, Dict[str, Any]]
+    build_time_ms: float = 0.0
+    # ドローンID -> 配信用メッセージ（JSON文字列、1回だけシリアライズ）
+    status_messages: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def drone_ids(self) -> List[str]:
+        """スナップショットに含まれるドローンID"""
+        return list(self.statuses.keys())
+
+    @property
+    def connected_count(self) -> int:
+        """接続中のドローン数"""
+        return sum(1 for status in self.statuses.values() if status.connection_status == "connected")
+
+    @property
+    def age(self) -> float:
+        """スナップショットの経過時間（秒）"""
+        return (datetime.now() - self.taken_at).total_seconds()
+
+
+class FleetStatusSnapshotter:
+    """
+    全ドローン状態のスナップショットを tick ごとに1回構築する
+
+    ブロードキャスター・ダッシュボード・REST は同じスナップショットを参照するため、
+    状態取得は O(1) で、読み手が増えても構築コストは増えない。
+    """
+
+    def __init__(self, drone_manager, interval: float = 1.0):
+        """
+        初期化
+
+        Args:
+            drone_manager: DroneManager インスタンス
+            interval: スナップショット構築間隔（秒）
+        """
+        self.drone_manager = drone_manager
+        self.interval = interval
+
+        self._snapshot: Optional[FleetSnapshot] = None
+        self._dirty = True
+        self._tick = 0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._updated: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 統計情報
+        self.builds = 0
+        self.reads = 0
+        self.last_build_time_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """定期構築ループが動作中か"""
+        return self._task is not None and not self._task.done()
+
+    def _ensure_primitives(self) -> None:
+        """イベントループ上で同期プリミティブを遅延生成"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+            self._updated = asyncio.Condition()
+
+    def invalidate(self) -> None:
+        """
+        次回の読み取りでスナップショットを再構築させる（接続・切断時など）
+
+        コマンド実行による状態変化では呼ばず、次の tick の構築に任せる。
+        """
+        self._dirty = True
+
+    def _needs_refresh(self) -> bool:
+        """公開中のスナップショットが無効化済み、または（定期構築ループ停止中に）古くなっているか"""
+        snapshot = self._snapshot
+        return snapshot is None or self._dirty or (not self.is_running and snapshot.age >= self.interval)
+
+    async def _build_status(self, drone_id: str) -> DroneStatus:
+        """1台分の状態を構築（失敗時は切断状態）"""
+        try:
+            return await self.drone_manager.get_drone_status(drone_id)
+        except Exception as e:
+            logger.warning(f"Could not get status for drone {drone_id}: {e}")
+            return DroneStatus(
+                drone_id=drone_id,
+                connection_status="disconnected",
+                flight_status="landed",
+                battery_level=0,
+                last_updated=datetime.now()
+            )
+
+    async def refresh(self, only_if_stale: bool = False) -> FleetSnapshot:
+        """
+        スナップショットを構築して公開
+
+        Args:
+            only_if_stale: ロック取得後に再確認し、待機中に他の読み手が構築済みならそれを返す
+        """
+        self._ensure_primitives()
+
+        async with self._refresh_lock:
+            if only_if_stale and not self._needs_refresh():
+                return self._snapshot
+
+            started = time.perf_counter()
+            self._dirty = False
+
+            statuses: Dict[str, DroneStatus] = {}
+            status_dicts: Dict[str, Dict[str, Any]] = {}
+            type_info: Dict[str, Dict[str, Any]] = {}
+            status_messages: Dict[str, str] = {}
+            timestamp = datetime.now()
+
+            for drone_id in list(self.drone_manager.drone_info.keys()):
+                status = await self._build_status(drone_id)
+                status_dict = status.model_dump(mode="json")
+                info = self.drone_manager.get_drone_type_info(drone_id)
+
+                message = {
+                    "type": "drone_status_update",
+                    "drone_id": drone_id,
+                    "status": status_dict,
+                    "timestamp": timestamp.isoformat()
+                }
+                if info.get("is_real_drone", False):
+                    message["real_drone_info"] = {
+                        "connection_state": info.get("connection_state"),
+                        "real_ip_address": info.get("real_ip_address"),
+                        "is_real_drone": True
+                    }
+
+                statuses[drone_id] = status
+                status_dicts[drone_id] = status_dict
+                type_info[drone_id] = info
+                status_messages[drone_id] = json.dumps(message)
+
+            self._tick += 1
+            build_time_ms = (time.perf_counter() - started) * 1000
+            self._snapshot = FleetSnapshot(
+                tick=self._tick,
+                taken_at=timestamp,
+                statuses=statuses,
+                status_dicts=status_dicts,
+                type_info=type_info,
+                build_time_ms=round(build_time_ms, 3),
+                status_messages=status_messages
+            )
+            self.builds += 1
+            self.last_build_time_ms = build_time_ms
+
+        async with self._updated:
+            self._updated.notify_all()
+
+        return self._snapshot
+
+    async def get_snapshot(self) -> FleetSnapshot:
+        """
+        最新のスナップショットを取得
+
+        定期構築ループが動作していない場合や無効化された場合はその場で構築する。
+        同時に待機した読み手は最初の1回の構築結果を共有する。
+        """
+        self.reads += 1
+        if self._needs_refresh():
+            return await self.refresh(only_if_stale=True)
+        return self._snapshot
+
+    async def get_status(self, drone_id: str) -> DroneStatus:
+        """スナップショットから1台分の状態を取得"""
+        snapshot = await self.get_snapshot()
+        status = snapshot.statuses.get(drone_id)
+        if status is None:
+            if drone_id not in self.drone_manager.drone_info:
+                raise ValueError(f"Drone {drone_id} not found")
+            # スナップショット構築後に追加されたドローン
+            self.invalidate()
+            snapshot = await self.get_snapshot()
+            status = snapshot.statuses[drone_id]
+        return status
+
+    async def wait_for_tick(self, last_tick: int, timeout: Optional[float] = None) -> Optional[FleetSnapshot]:
+        """
+        last_tick より新しいスナップショットが公開されるまで待機
+
+        Returns:
+            Optional[FleetSnapshot]: 新しいスナップショット（タイムアウト時は None）
+        """
+        self._ensure_primitives()
+        if self._snapshot is not None and self._snapshot.tick > last_tick:
+            return self._snapshot
+
+        async with self._updated:
+            try:
+                await asyncio.wait_for(
+                    self._updated.wait_for(
+                        lambda: self._snapshot is not None and self._snapshot.tick > last_tick
+                    ),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                return None
+        return self._snapshot
+
+    async def _run(self) -> None:
+        """定期構築ループ"""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error building fleet snapshot: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """定期構築ループを開始"""
+        if not self.is_running:
+            self._ensure_primitives()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Fleet status snapshotter started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """定期構築ループを停止"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        snapshot = self._snapshot
+        return {
+            "running": self.is_running,
+            "interval": self.interval,
+            "tick": self._tick,
+            "builds": self.builds,
+            "reads": self.reads,
+            "last_build_time_ms": round(self.last_build_time_ms, 3),
+            "drones": len(snapshot.statuses) if snapshot else 0,
+            "age_seconds": round(snapshot.age, 3) if snapshot else None
+        }
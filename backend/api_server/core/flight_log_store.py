@@ -0,0 +1,432 @@
+"""
+Flight Log Store - Ring buffer + append-only segmented on-disk flight log
+Recent events are served from a fixed-capacity ring per drone; history is persisted to JSONL segments with time and event-type indexes
+(or kept in memory only, for the events still in each ring, when no log root is configured)
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "flight-"
+SEGMENT_SUFFIX = ".jsonl"
+
+# 索引のキー（時刻, 連番）
+IndexKey = Tuple[float, int]
+
+
+@dataclass(frozen=True)
+class RecordLocation:
+    """ディスク上のレコード位置"""
+    segment_id: int
+    offset: int
+    length: int
+
+
+def encode_cursor(key: IndexKey) -> str:
+    """索引キーをカーソル文字列に変換"""
+    return f"{key[0]!r}:{key[1]}"
+
+
+def decode_cursor(cursor: str) -> IndexKey:
+    """カーソル文字列を索引キーに変換"""
+    try:
+        ts, seq = cursor.rsplit(":", 1)
+        return float(ts), int(seq)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class FlightLogStore:
+    """
+    飛行ログストア
+
+    - ドローンごとの固定長リング（直近ログの取得はメモリのみ）
+    - 追記専用の JSONL セグメント（一定サイズでローテーション、古いセグメントから削除）
+    - ドローン別の時刻索引とイベント種別索引（再起動時にセグメントから再構築）
+
+    append はメモリ操作のみで、ディスク書き込みはバッチ化してスレッドで実行する。
+    log_root を指定しない場合はディスクに書き込まず、リングに残っている範囲のみ検索できる。
+    """
+
+    def __init__(self, log_root: Optional[str] = None, ring_capacity: int = 1000,
+                 segment_max_bytes: int = 4 * 1024 * 1024, max_segments: Optional[int] = 50,
+                 flush_interval: float = 0.5, batch_size: int = 256):
+        """
+        初期化
+
+        Args:
+            log_root: セグメントの保存先ディレクトリ（None はメモリのみ）
+            ring_capacity: ドローンごとに保持する直近ログ数
+            segment_max_bytes: セグメントのローテーションサイズ
+            max_segments: 保持するセグメント数（None は無制限）
+            flush_interval: 書き込みバッチの最大待ち時間（秒）
+            batch_size: この件数が溜まったら待たずに書き込む
+        """
+        self.log_root = log_root
+        self.persistent = log_root is not None
+        self.ring_capacity = ring_capacity
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._rings: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._time_index: Dict[str, List[IndexKey]] = {}
+        self._type_index: Dict[Tuple[str, str], List[IndexKey]] = {}
+        self._locations: Dict[int, RecordLocation] = {}
+        self._pending: List[Dict[str, Any]] = []
+        # ディスク未書き込みのレコード（メモリのみの場合はリングに残っているレコード全て）
+        self._pending_by_seq: Dict[int, Dict[str, Any]] = {}
+        self._segments: List[int] = []
+        self._segment_first_seq: Dict[int, int] = {}
+        self._segment_size = 0
+        self._next_seq = 1
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # 統計情報
+        self.records_appended = 0
+        self.records_written = 0
+        self.batches_written = 0
+        self.segments_removed = 0
+        self.corrupt_lines = 0
+
+        if self.persistent:
+            os.makedirs(log_root, exist_ok=True)
+            self._load_segments()
+
+    # ===== セグメント管理 =====
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.log_root, f"{SEGMENT_PREFIX}{segment_id:06d}{SEGMENT_SUFFIX}")
+
+    def _load_segments(self) -> None:
+        """既存セグメントを走査して索引とリングを再構築"""
+        segment_ids = sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.log_root)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for segment_id in segment_ids:
+            offset = 0
+            first_seq: Optional[int] = None
+            with open(self._segment_path(segment_id), "rb") as f:
+                for line in f:
+                    length = len(line)
+                    try:
+                        record = json.loads(line)
+                        entry = self._from_record(record)
+                    except (ValueError, KeyError):
+                        # 書き込み途中で停止した行など
+                        self.corrupt_lines += 1
+                        offset += length
+                        continue
+                    seq = record["seq"]
+                    if first_seq is None:
+                        first_seq = seq
+                    self._index(record["drone_id"], record["event_type"], record["ts"], seq)
+                    self._locations[seq] = RecordLocation(segment_id, offset, length)
+                    self._ring(record["drone_id"]).append(entry)
+                    self._next_seq = max(self._next_seq, seq + 1)
+                    offset += length
+            self._segments.append(segment_id)
+            self._segment_first_seq[segment_id] = first_seq if first_seq is not None else self._next_seq
+            self._segment_size = offset
+
+        if segment_ids:
+            # 末尾が書き込み途中の可能性があるため、再起動後は新しいセグメントに追記する
+            self._segment_size = self.segment_max_bytes
+            logger.info(f"Flight log store loaded: {len(self._locations)} records in {len(segment_ids)} segments")
+
+    def _rotate_segment(self, first_seq: int) -> None:
+        """新しいセグメントを開始し、保持数を超えた古いセグメントを削除"""
+        segment_id = self._segments[-1] + 1 if self._segments else 1
+        self._segments.append(segment_id)
+        self._segment_first_seq[segment_id] = first_seq
+        self._segment_size = 0
+
+        while self.max_segments is not None and len(self._segments) > self.max_segments:
+            self._remove_oldest_segment()
+
+    def _remove_oldest_segment(self) -> None:
+        """最古のセグメントと対応する索引を削除"""
+        segment_id = self._segments.pop(0)
+        boundary = self._segment_first_seq.get(self._segments[0], self._next_seq)
+        self._segment_first_seq.pop(segment_id, None)
+        with self._lock:
+            for seq in [seq for seq, location in self._locations.items() if location.segment_id == segment_id]:
+                del self._locations[seq]
+            for keys in list(self._time_index.values()) + list(self._type_index.values()):
+                keys[:] = [key for key in keys if key[1] >= boundary]
+        try:
+            os.remove(self._segment_path(segment_id))
+        except OSError as e:
+            logger.warning(f"Failed to remove flight log segment {segment_id}: {e}")
+        self.segments_removed += 1
+
+    # ===== 書き込み =====
+
+    def _ring(self, drone_id: str) -> Deque[Dict[str, Any]]:
+        ring = self._rings.get(drone_id)
+        if ring is None:
+            ring = deque(maxlen=self.ring_capacity)
+            self._rings[drone_id] = ring
+        return ring
+
+    def _index(self, drone_id: str, event_type: str, ts: float, seq: int) -> None:
+        """時刻索引とイベント種別索引に追加（時刻の逆転時のみ挿入ソート）"""
+        key = (ts, seq)
+        for keys in (self._time_index.setdefault(drone_id, []),
+                     self._type_index.setdefault((drone_id, event_type), [])):
+            if keys and keys[-1] > key:
+                bisect.insort(keys, key)
+            else:
+                keys.append(key)
+
+    def _forget(self, drone_id: str, seq: int) -> None:
+        """リングから押し出されたレコードを索引から削除（メモリのみの場合）"""
+        record = self._pending_by_seq.pop(seq, None)
+        if record is None:
+            return
+        key = (record["ts"], seq)
+        for keys in (self._time_index.get(drone_id), self._type_index.get((drone_id, record["event_type"]))):
+            if not keys:
+                continue
+            index = bisect.bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                del keys[index]
+
+    @staticmethod
+    def _from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """ディスク上のレコードを返却形式に変換"""
+        return {
+            "seq": record["seq"],
+            "timestamp": datetime.fromisoformat(record["timestamp"]),
+            "event_type": record["event_type"],
+            "data": record["data"]
+        }
+
+    def append(self, drone_id: str, event_type: str, data: Dict[str, Any],
+               timestamp: Optional[datetime] = None) -> int:
+        """
+        イベントを追記（メモリ操作のみ。ディスクへはバッチで書き込む）
+
+        Returns:
+            int: レコード連番
+        """
+        timestamp = timestamp or datetime.now()
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            record = {
+                "seq": seq,
+                "drone_id": drone_id,
+                "ts": timestamp.timestamp(),
+                "timestamp": timestamp.isoformat(),
+                "event_type": event_type,
+                "data": data
+            }
+            ring = self._ring(drone_id)
+            if self.persistent:
+                self._pending.append(record)
+            elif len(ring) == ring.maxlen:
+                self._forget(drone_id, ring[0]["seq"])
+            self._pending_by_seq[seq] = record
+            self._index(drone_id, event_type, record["ts"], seq)
+            ring.append({
+                "seq": seq,
+                "timestamp": timestamp,
+                "event_type": event_type,
+                "data": data
+            })
+            self.records_appended += 1
+            pending = len(self._pending)
+
+        if self.persistent:
+            self._schedule_flush(pending)
+        return seq
+
+    def _schedule_flush(self, pending: int) -> None:
+        """書き込みをスケジュール（イベントループ外ではバッチサイズ到達時に同期書き込み）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if pending >= self.batch_size:
+                self.flush()
+            return
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later(0.0 if pending >= self.batch_size else self.flush_interval))
+
+    async def _flush_later(self, delay: float) -> None:
+        """待機後にスレッドで書き込み"""
+        if delay:
+            await asyncio.sleep(delay)
+        while self._pending:
+            await asyncio.to_thread(self.flush)
+
+    def flush(self) -> int:
+        """
+        保留中のレコードをディスクに書き込む
+
+        Returns:
+            int: 書き込んだ件数
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            if not self._segments:
+                self._rotate_segment(batch[0]["seq"])
+
+            locations: Dict[int, RecordLocation] = {}
+            segment_id = self._segments[-1]
+            f = open(self._segment_path(segment_id), "ab")
+            try:
+                for record in batch:
+                    if self._segment_size >= self.segment_max_bytes:
+                        f.close()
+                        self._rotate_segment(record["seq"])
+                        segment_id = self._segments[-1]
+                        f = open(self._segment_path(segment_id), "ab")
+                    line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                    f.write(line)
+                    locations[record["seq"]] = RecordLocation(segment_id, self._segment_size, len(line))
+                    self._segment_size += len(line)
+            finally:
+                f.close()
+
+            live_segments = set(self._segments)
+            with self._lock:
+                for seq, location in locations.items():
+                    self._pending_by_seq.pop(seq, None)
+                    # 同じバッチ内のローテーションで削除されたセグメントは索引に載せない
+                    if location.segment_id in live_segments:
+                        self._locations[seq] = location
+
+            self.records_written += len(batch)
+            self.batches_written += 1
+            return len(batch)
+
+    async def close(self) -> None:
+        """保留中の書き込みを完了させる"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self.flush)
+
+    # ===== 読み出し =====
+
+    def recent(self, drone_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """直近のログを古い順に取得（リングのみ参照）"""
+        ring = self._rings.get(drone_id)
+        if not ring or limit <= 0:
+            return []
+        with self._lock:
+            entries = list(ring)
+        return entries[-limit:]
+
+    def _read_records(self, seqs: Iterable[int]) -> List[Dict[str, Any]]:
+        """連番のレコードを保留バッファまたはセグメントから読み出す"""
+        records: List[Dict[str, Any]] = []
+        handles: Dict[int, Any] = {}
+        try:
+            for seq in seqs:
+                with self._lock:
+                    pending = self._pending_by_seq.get(seq)
+                    location = self._locations.get(seq)
+                if pending is not None:
+                    records.append(self._from_record(pending))
+                    continue
+                if location is None:
+                    continue
+                f = handles.get(location.segment_id)
+                if f is None:
+                    f = open(self._segment_path(location.segment_id), "rb")
+                    handles[location.segment_id] = f
+                f.seek(location.offset)
+                records.append(self._from_record(json.loads(f.read(location.length))))
+        finally:
+            for f in handles.values():
+                f.close()
+        return records
+
+    def query(self, drone_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              event_types: Optional[List[str]] = None, limit: int = 100,
+              cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        時刻範囲・イベント種別でログを検索（古い順、カーソルでページング）
+
+        Args:
+            drone_id: ドローンID
+            start: 開始時刻（含む）
+            end: 終了時刻（含まない）
+            event_types: イベント種別（None は全種別）
+            limit: 1ページの最大件数
+            cursor: 前ページの next_cursor
+
+        Returns:
+            Dict[str, Any]: {"entries": [...], "next_cursor": str | None}
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        low: IndexKey = (start.timestamp(), 0) if start else (float("-inf"), 0)
+        if cursor:
+            after = decode_cursor(cursor)
+            low = max(low, (after[0], after[1] + 1))
+        high: IndexKey = (end.timestamp(), 0) if end else (float("inf"), 0)
+
+        with self._lock:
+            if event_types is None:
+                sources = [self._time_index.get(drone_id, [])]
+            else:
+                sources = [self._type_index.get((drone_id, event_type), []) for event_type in set(event_types)]
+            slices = [
+                keys[bisect.bisect_left(keys, low):bisect.bisect_left(keys, high)]
+                for keys in sources
+            ]
+        keys = list(heapq.merge(*slices))[:limit + 1] if len(slices) > 1 else (slices[0][:limit + 1] if slices else [])
+
+        page = keys[:limit]
+        return {
+            "entries": self._read_records(seq for _, seq in page),
+            "next_cursor": encode_cursor(page[-1]) if len(keys) > limit else None
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._lock:
+            pending = len(self._pending)
+            indexed = len(self._locations) + len(self._pending_by_seq)
+        return {
+            "log_root": self.log_root,
+            "persistent": self.persistent,
+            "drones": len(self._rings),
+            "records_appended": self.records_appended,
+            "records_written": self.records_written,
+            "records_indexed": indexed,
+            "pending_records": pending,
+            "batches_written": self.batches_written,
+            "avg_batch_size": round(self.records_written / self.batches_written, 2) if self.batches_written else 0.0,
+            "segments": len(self._segments),
+            "segments_removed": self.segments_removed,
+            "corrupt_lines": self.corrupt_lines
+        }
@@ -0,0 +1,67 @@
+"""
+Frame Sources - Per-drone frame sources shared by the vision services
+Lets VisionService and EnhancedVisionService read frames from recorded replays or camera streams
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameSourceMixin:
+    """
+    ドローンごとのフレームソースを管理する Mixin
+
+    get_frame() を持つ任意のオブジェクト（VirtualCameraStream、再現可能なベンチマーク用の
+    FrameReplaySource など）をソースとして登録できる。未登録のドローンは camera_service の
+    ストリーム、それもなければ模擬フレームを返す。利用側は __init__ で frame_sources を初期化すること。
+    """
+
+    frame_sources: Dict[str, Any]
+    # フレームの取得とコンシューマー登録に使う CameraService（未設定時は登録ソースのみ）
+    camera_service: Optional[Any] = None
+
+    def set_frame_source(self, drone_id: str, source: Any) -> None:
+        """ドローンのフレームソースを登録"""
+        self.frame_sources[drone_id] = source
+        logger.info(f"Frame source registered for drone {drone_id}: {type(source).__name__}")
+
+    def clear_frame_source(self, drone_id: str) -> bool:
+        """ドローンのフレームソースの登録を解除"""
+        return self.frame_sources.pop(drone_id, None) is not None
+
+    def _get_drone_frame(self, drone_id: str) -> Optional[np.ndarray]:
+        """ドローンの次のフレームを取得（ソース未登録時はカメラストリーム、なければ模擬フレーム）"""
+        source = self.frame_sources.get(drone_id)
+        if source is None and self.camera_service is not None:
+            source = self.camera_service.get_frame_source(drone_id)
+        if source is not None:
+            return source.get_frame()
+        return self._simulate_camera_frame()
+
+    def _register_frame_consumer(self, drone_id: str, consumer_id: str, fps: float) -> bool:
+        """
+        処理ループをカメラストリームのフレームコンシューマーとして登録
+
+        ストリームの描画レートは登録中のコンシューマーの最大 fps に合わせられるため、
+        ループの実際の処理レートを渡す。ストリームが動作していない場合は登録しない。
+        """
+        if self.camera_service is None:
+            return False
+        try:
+            self.camera_service.register_frame_consumer(drone_id, consumer_id, fps)
+        except ValueError:
+            return False
+        return True
+
+    def _unregister_frame_consumer(self, drone_id: str, consumer_id: str) -> None:
+        """フレームコンシューマーの登録を解除"""
+        if self.camera_service is not None:
+            self.camera_service.unregister_frame_consumer(drone_id, consumer_id)
+
+    def _simulate_camera_frame(self) -> np.ndarray:
+        """模擬フレームを生成（ランダムノイズ）"""
+        return np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8)
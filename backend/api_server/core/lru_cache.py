@@ -0,0 +1,292 @@
+"""
+LRU Cache - Bounded in-memory cache with TTL expiry and single-flight loading
+Entries are evicted least-recently-used first by count and approximate byte size; expiry is
+ordered by a heap so cleanup only touches expired entries, and concurrent misses share one load
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 既定の上限
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# サイズ推定でたどる入れ子の深さと、コンテナごとに調べる要素数
+SIZE_ESTIMATE_DEPTH = 4
+SIZE_ESTIMATE_SAMPLE = 16
+
+# キーに名前空間（"名前空間:..." の先頭部分）がない場合の名前空間
+DEFAULT_NAMESPACE = "default"
+
+
+def estimate_size(value: Any, depth: int = 0) -> int:
+    """
+    値のおおよそのバイト数
+
+    文字列化はせず、大きなコンテナは先頭 SIZE_ESTIMATE_SAMPLE 件から全体を推定する。
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if depth >= SIZE_ESTIMATE_DEPTH:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        count = len(value)
+        sample = list(itertools.islice(value.items(), SIZE_ESTIMATE_SAMPLE))
+        sampled = sum(estimate_size(key, depth + 1) + estimate_size(item, depth + 1) for key, item in sample)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        count = len(value)
+        sample = list(itertools.islice(value, SIZE_ESTIMATE_SAMPLE))
+        sampled = sum(estimate_size(item, depth + 1) for item in sample)
+    elif hasattr(value, "__dict__"):
+        return estimate_size(vars(value), depth + 1)
+    else:
+        return sys.getsizeof(value)
+    if not sample:
+        return sys.getsizeof(value)
+    return sys.getsizeof(value) + sampled * count // len(sample)
+
+
+def namespace_of(key: str) -> str:
+    """キーの名前空間（最初の ":" より前）"""
+    namespace, separator, _ = key.partition(":")
+    return namespace if separator else DEFAULT_NAMESPACE
+
+
+class CacheEntry:
+    """キャッシュエントリ"""
+    __slots__ = ("value", "expires_at", "size", "hits", "namespace")
+
+    def __init__(self, value: Any, expires_at: float, size: int, namespace: str):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.hits = 0
+        self.namespace = namespace
+
+
+class NamespaceStats:
+    """名前空間ごとの統計"""
+    __slots__ = ("entries", "hits", "misses", "evictions", "expirations", "coalesced", "loads", "load_errors")
+
+    def __init__(self):
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.load_errors = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["hit_rate_percent"] = round(self.hits / lookups * 100, 2) if lookups else 0.0
+        return stats
+
+
+class LRUCache:
+    """
+    件数・おおよそのバイト数で上限を持つ LRU キャッシュ
+
+    期限切れは (期限, 連番, キー) のヒープで管理し、上書きで古くなったヒープ要素は取り出し時に
+    読み飛ばす。get_or_load / load は同じキーの読み込みが実行中ならその結果を待つため、
+    同時に外れた呼び出しでも読み込みは1回で済む。
+    """
+
+    def __init__(self, default_ttl: int = 300, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, clock: Callable[[], float] = time.monotonic):
+        """
+        初期化
+
+        Args:
+            default_ttl: 既定の有効期間（秒）
+            max_entries: エントリ数の上限
+            max_bytes: 合計サイズ（推定）の上限
+            clock: 時刻の取得関数
+        """
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        # キー -> エントリ（先頭が最も長く使われていない）
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.namespaces: Dict[str, NamespaceStats] = {}
+        self.rejected = 0
+
+    def _stats(self, namespace: str) -> NamespaceStats:
+        stats = self.namespaces.get(namespace)
+        if stats is None:
+            stats = self.namespaces[namespace] = NamespaceStats()
+        return stats
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            self.namespaces[entry.namespace].entries -= 1
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """値を取得（期限切れ・未登録は None）"""
+        entry = self.cache.get(key)
+        if entry is None:
+            self._stats(namespace_of(key)).misses += 1
+            return None
+        stats = self.namespaces[entry.namespace]
+        if self.clock() >= entry.expires_at:
+            self._remove(key)
+            stats.expirations += 1
+            stats.misses += 1
+            return None
+        self.cache.move_to_end(key)
+        entry.hits += 1
+        stats.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, size: Optional[int] = None) -> bool:
+        """
+        値を登録
+
+        Args:
+            ttl: 有効期間（秒、省略時は default_ttl）
+            size: サイズ（バイト、省略時は推定）
+
+        Returns:
+            bool: 登録したか（単体で max_bytes を超える値は登録しない）
+        """
+        now = self.clock()
+        size = estimate_size(value) if size is None else size
+        self._remove(key)
+        if size > self.max_bytes:
+            self.rejected += 1
+            logger.debug(f"Cache value for {key} too large to store ({size} bytes)")
+            return False
+
+        expires_at = now + (ttl or self.default_ttl)
+        namespace = namespace_of(key)
+        self.cache[key] = CacheEntry(value, expires_at, size, namespace)
+        self.total_bytes += size
+        self._stats(namespace).entries += 1
+        heapq.heappush(self._expiry_heap, (expires_at, next(self._sequence), key))
+
+        if len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+            # 期限切れから先に空け、足りなければ最も長く使われていないものを追い出す
+            self._expire(now)
+        while len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+            evicted_key = next(iter(self.cache))
+            self.namespaces[self._remove(evicted_key).namespace].evictions += 1
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._compact_heap()
+        return True
+
+    def delete(self, key: str) -> bool:
+        """値を削除"""
+        return self._remove(key) is not None
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        for stats in self.namespaces.values():
+            stats.entries = 0
+        self.cache.clear()
+        self._expiry_heap.clear()
+        self.total_bytes = 0
+
+    def _expire(self, now: float) -> int:
+        """期限切れのエントリをヒープの先頭から削除"""
+        heap = self._expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # 上書き・削除済みのヒープ要素は読み飛ばす
+            if entry is None or entry.expires_at != expires_at:
+                continue
+            self._remove(key)
+            self.namespaces[entry.namespace].expirations += 1
+            expired += 1
+        return expired
+
+    def _compact_heap(self) -> None:
+        """読み飛ばすだけのヒープ要素を取り除く"""
+        self._expiry_heap = [item for item in self._expiry_heap
+                             if item[2] in self.cache and self.cache[item[2]].expires_at == item[0]]
+        heapq.heapify(self._expiry_heap)
+
+    def cleanup_expired(self) -> int:
+        """期限切れのエントリを削除し、削除件数を返す"""
+        return self._expire(self.clock())
+
+    async def load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None) -> Any:
+        """
+        値を読み込んで登録（キャッシュは参照しない）
+
+        同じキーの読み込みが実行中ならその結果を待つ。読み込みは呼び出し元が
+        キャンセルされても続行し、失敗した結果は登録しない。
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats(namespace_of(key)).coalesced += 1
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(self._run_loader(key, loader, ttl))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task)
+
+    async def _run_loader(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int]) -> Any:
+        stats = self._stats(namespace_of(key))
+        stats.loads += 1
+        try:
+            value = await loader()
+        except Exception:
+            stats.load_errors += 1
+            raise
+        else:
+            self.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None) -> Any:
+        """値を取得し、なければ読み込んで登録（同時の読み込みは1回にまとめる）"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        return await self.load(key, loader, ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        now = self.clock()
+        namespaces = {name: stats.to_dict() for name, stats in sorted(self.namespaces.items())}
+        return {
+            "total_entries": len(self.cache),
+            "active_entries": sum(1 for entry in self.cache.values() if now < entry.expires_at),
+            "total_hits": sum(stats.hits for stats in self.namespaces.values()),
+            "total_misses": sum(stats.misses for stats in self.namespaces.values()),
+            "total_evictions": sum(stats.evictions for stats in self.namespaces.values()),
+            "total_size_bytes": self.total_bytes,
+            "total_size_mb": round(self.total_bytes / (1024 * 1024), 2),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "rejected": self.rejected,
+            "inflight_loads": len(self._inflight),
+            "namespaces": namespaces
+        }
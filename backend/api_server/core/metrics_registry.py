@@ -0,0 +1,385 @@
+"""
+Metrics Registry - Low-overhead Prometheus metrics and text exposition
+Counters, gauges and histograms with labels are updated in place on the hot path; the
+exposition text is rendered periodically into a buffer so scrapes never run collectors
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prometheus テキスト形式
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 既定のヒストグラムバケット（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 既定の再描画間隔（秒）
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+def escape_label_value(value: str) -> str:
+    """ラベル値のエスケープ"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """ラベルを {name="value",...} 形式に整形（ラベルなしは空文字）"""
+    body = ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in labels)
+    return f"{{{body}}}" if body else ""
+
+
+def format_value(value: float) -> str:
+    """サンプル値の整形"""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+@dataclass
+class MetricFamily:
+    """
+    描画用のメトリクス（名前・種類・説明とサンプル）
+
+    コレクターはこの形でその時点の値を返す。サンプルは (接尾辞, ラベル, 値)。
+    """
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[str, Tuple[Tuple[str, str], ...], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels: Any) -> "MetricFamily":
+        """サンプルを追加"""
+        self.samples.append((suffix, tuple((name, str(label)) for name, label in labels.items()), float(value)))
+        return self
+
+    def add_histogram(self, buckets: Sequence[Tuple[float, float]], total: float, count: float,
+                      **labels: Any) -> "MetricFamily":
+        """
+        ヒストグラムのサンプルを追加
+
+        Args:
+            buckets: (上限, 累積件数) の列（+Inf は count から補う）
+            total: 観測値の合計
+            count: 観測数
+        """
+        label_pairs = tuple((name, str(label)) for name, label in labels.items())
+        for upper, cumulative in buckets:
+            self.samples.append(("_bucket", label_pairs + (("le", format_value(upper)),), float(cumulative)))
+        self.samples.append(("_bucket", label_pairs + (("le", "+Inf"),), float(count)))
+        self.samples.append(("_sum", label_pairs, float(total)))
+        self.samples.append(("_count", label_pairs, float(count)))
+        return self
+
+    def render(self) -> str:
+        """Prometheus テキスト形式に描画"""
+        help_text = self.help.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {help_text}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples:
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _CounterChild:
+    """ラベル値ごとのカウンター"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """加算（負の値は不可）"""
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        self.value += amount
+
+
+class _GaugeChild:
+    """ラベル値ごとのゲージ"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    """ラベル値ごとのヒストグラム（バケットは非累積で持ち、描画時に累積する）"""
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """値を1件記録"""
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """
+    ラベル付きメトリクスの基底クラス
+
+    labels() で取得した子を呼び出し側で保持すれば、更新はラベル解決なしの属性加算のみ。
+    """
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **labels: Any) -> Any:
+        """
+        ラベル値に対応する子を取得（なければ作成）
+
+        Raises:
+            ValueError: ラベルの数・名前が定義と一致しない
+        """
+        if labels:
+            if values or set(labels) != set(self.labelnames):
+                raise ValueError(f"Metric {self.name} expects labels {self.labelnames}")
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"Metric {self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values: Any) -> None:
+        """ラベル値に対応する子を削除"""
+        self._children.pop(tuple(str(value) for value in values), None)
+
+    def _label_pairs(self, key: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key))
+
+    def collect(self) -> MetricFamily:
+        """現在の値を MetricFamily として取得"""
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, child in list(self._children.items()):
+            family.samples.append(("", self._label_pairs(key), child.value))
+        return family
+
+
+class Counter(Metric):
+    """単調増加のカウンター"""
+
+    type = COUNTER
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """ラベルなしのカウンターを加算"""
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """任意に増減するゲージ"""
+
+    type = GAUGE
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """ラベルなしのゲージを設定"""
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    """固定バケットのヒストグラム"""
+
+    type = HISTOGRAM
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        upper_bounds = tuple(sorted(float(bucket) for bucket in buckets if not math.isinf(bucket)))
+        if not upper_bounds:
+            raise ValueError(f"Histogram {name} needs at least one finite bucket")
+        if "le" in self.labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        self.upper_bounds = upper_bounds
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        """ラベルなしのヒストグラムに記録"""
+        self.labels().observe(value)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            buckets = []
+            for upper, count in zip(self.upper_bounds, child.counts):
+                cumulative += count
+                buckets.append((upper, cumulative))
+            family.add_histogram(buckets, child.sum, child.count, **dict(self._label_pairs(key)))
+        return family
+
+
+class MetricsRegistry:
+    """
+    メトリクスのレジストリ
+
+    登録済みのメトリクスはホットパスで直接更新し、ドローン状態などの取得系の値は
+    コレクター（MetricFamily を返す関数）が描画時に読む。描画は refresh() で
+    バッファに書き出し、/metrics は描画済みのバッファを返すだけにする。
+    """
+
+    def __init__(self, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        初期化
+
+        Args:
+            refresh_interval: バックグラウンドでの再描画間隔（秒）
+        """
+        self.refresh_interval = refresh_interval
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[MetricFamily]]] = {}
+        self._buffer: Optional[bytes] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 統計
+        self.refreshes = 0
+        self.collector_errors = 0
+        self.last_render_ms = 0.0
+        self.last_refresh: Optional[float] = None
+
+    def _register(self, metric_class, name: str, help: str, labelnames: Sequence[str], **kwargs) -> Any:
+        existing = self._metrics.get(name)
+        if existing is not None:
+            if type(existing) is not metric_class or existing.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return existing
+        metric = self._metrics[name] = metric_class(name, help, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """カウンターを登録（登録済みなら既存のものを返す）"""
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """ゲージを登録（登録済みなら既存のものを返す）"""
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """ヒストグラムを登録（登録済みなら既存のものを返す）"""
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def add_collector(self, name: str, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """コレクターを登録（同名のコレクターは置き換える）"""
+        self._collectors[name] = collector
+
+    def remove_collector(self, name: str) -> None:
+        """コレクターを登録解除"""
+        self._collectors.pop(name, None)
+
+    def collect(self) -> List[MetricFamily]:
+        """全メトリクスの現在値を取得（失敗したコレクターは読み飛ばす）"""
+        families = [metric.collect() for metric in list(self._metrics.values())]
+        for name, collector in list(self._collectors.items()):
+            try:
+                families.extend(collector())
+            except Exception as e:
+                self.collector_errors += 1
+                logger.warning(f"Metrics collector {name} failed: {e}")
+        return families
+
+    def render(self) -> str:
+        """Prometheus テキスト形式に描画"""
+        return "".join(family.render() for family in self.collect() if family.samples)
+
+    def refresh(self) -> bytes:
+        """描画してバッファを更新"""
+        started = time.perf_counter()
+        self._buffer = self.render().encode("utf-8")
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+        self.last_refresh = time.time()
+        self.refreshes += 1
+        return self._buffer
+
+    def exposition(self) -> bytes:
+        """描画済みのバッファ（未描画なら描画する）"""
+        if self._buffer is None:
+            return self.refresh()
+        return self._buffer
+
+    async def start(self) -> None:
+        """バックグラウンドでの再描画を開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """バックグラウンドでの再描画を停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Metrics refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "metrics": len(self._metrics),
+            "collectors": sorted(self._collectors),
+            "refreshes": self.refreshes,
+            "collector_errors": self.collector_errors,
+            "last_render_ms": round(self.last_render_ms, 3),
+            "buffer_bytes": len(self._buffer) if self._buffer is not None else 0,
+            "refresh_interval": self.refresh_interval
+        }
+
+
+# プロセス全体で共有するレジストリ
+metrics_registry = MetricsRegistry()
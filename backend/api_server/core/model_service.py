@@ -36,6 +36,7 @@ class MockTrainingRunner:
             # Update job status to running
             self.job.status = "running"
             self.job.started_at = datetime.now()
+            model_service.version += 1
             self.job.progress = 0.0
             self.job.current_epoch = 0
             self.job.total_epochs = self.training_params.epochs
@@ -47,6 +48,7 @@ class MockTrainingRunner:
                 if self.is_cancelled:
                     self.job.status = "cancelled"
                     self.job.completed_at = datetime.now()
+                    model_service.version += 1
                     logger.info(f"Training job {self.job.id} cancelled at epoch {epoch}")
                     return
                 
@@ -98,6 +100,7 @@ class MockTrainingRunner:
             
             # Add model to service
             model_service.models[model_id] = final_model
+            model_service.version += 1
             
             logger.info(f"Training job {self.job.id} completed successfully. Model ID: {model_id}")
             
@@ -105,6 +108,7 @@ class MockTrainingRunner:
             self.job.status = "failed"
             self.job.error_message = str(e)
             self.job.completed_at = datetime.now()
+            model_service.version += 1
             logger.error(f"Training job {self.job.id} failed: {str(e)}")
         
         finally:
@@ -123,6 +127,8 @@ class ModelService:
         self.training_jobs: Dict[str, TrainingJob] = {}
         self.training_runners: Dict[str, MockTrainingRunner] = {}
         self.model_root = Path("/tmp/mfg_drone_models")
+        # Incremented whenever the model list or a training job's status changes (used for ETags)
+        self.version = 0
         
         # Create model directory
         self.model_root.mkdir(parents=True, exist_ok=True)
@@ -235,6 +241,7 @@ class ModelService:
         
         model_name = self.models[model_id].name
         del self.models[model_id]
+        self.version += 1
         
         logger.info(f"Deleted model: {model_id} - {model_name}")
         
@@ -288,6 +295,7 @@ class ModelService:
         )
         
         self.training_jobs[job_id] = training_job
+        self.version += 1
         
         # Create and start training runner
         runner = MockTrainingRunner(training_job, training_params)
@@ -376,6 +384,7 @@ class ModelService:
         
         for job_id in jobs_to_remove:
             del self.training_jobs[job_id]
+            self.version += 1
             if job_id in self.training_runners:
                 del self.training_runners[job_id]
         
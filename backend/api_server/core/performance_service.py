@@ -12,7 +12,10 @@ from functools import wraps
 import json
 import gc
 
-import psutil
+from .lru_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, LRUCache
+from .metrics_registry import COUNTER, GAUGE, MetricFamily
+from .request_metrics import ANY_METHOD, RequestMetrics
+from .system_sampler import SystemMetricsSampler, system_sampler
 
 logger = logging.getLogger(__name__)
 
@@ -73,77 +76,8 @@ class PerformanceMetrics:
             "metric_name": metric_name
         }
 
-class SimpleCache:
-    """Simple in-memory cache with TTL support"""
-    
-    def __init__(self, default_ttl: int = 300):
-        self.cache: Dict[str, Dict] = {}
-        self.default_ttl = default_ttl
-        
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if key in self.cache:
-            entry = self.cache[key]
-            if time.time() < entry["expires_at"]:
-                entry["hits"] += 1
-                return entry["value"]
-            else:
-                del self.cache[key]
-        return None
-        
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache"""
-        ttl = ttl or self.default_ttl
-        self.cache[key] = {
-            "value": value,
-            "created_at": time.time(),
-            "expires_at": time.time() + ttl,
-            "hits": 0,
-            "size_bytes": len(str(value).encode('utf-8'))
-        }
-        
-    def delete(self, key: str) -> bool:
-        """Delete key from cache"""
-        if key in self.cache:
-            del self.cache[key]
-            return True
-        return False
-        
-    def clear(self) -> None:
-        """Clear all cache entries"""
-        self.cache.clear()
-        
-    def cleanup_expired(self) -> int:
-        """Remove expired entries and return count"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self.cache.items() 
-            if current_time >= entry["expires_at"]
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
-            
-        return len(expired_keys)
-        
-    def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
-        current_time = time.time()
-        total_hits = sum(entry["hits"] for entry in self.cache.values())
-        total_size = sum(entry["size_bytes"] for entry in self.cache.values())
-        
-        active_entries = sum(
-            1 for entry in self.cache.values() 
-            if current_time < entry["expires_at"]
-        )
-        
-        return {
-            "total_entries": len(self.cache),
-            "active_entries": active_entries,
-            "total_hits": total_hits,
-            "total_size_bytes": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
-        }
+# Kept for existing callers; the bounded LRU cache replaces the unbounded dict cache
+SimpleCache = LRUCache
 
 def performance_monitor(metric_name: str):
     """Decorator to monitor function performance"""
@@ -197,10 +131,17 @@ def performance_monitor(metric_name: str):
 class PerformanceService:
     """Comprehensive performance monitoring and optimization service"""
     
-    def __init__(self, cache_ttl: int = 300, max_metrics: int = 10000):
+    def __init__(self, cache_ttl: int = 300, max_metrics: int = 10000,
+                 request_metrics: Optional[RequestMetrics] = None,
+                 cache_max_entries: int = DEFAULT_MAX_ENTRIES, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                 sampler: Optional[SystemMetricsSampler] = None):
         self.metrics = PerformanceMetrics(max_metrics)
-        self.cache = SimpleCache(cache_ttl)
+        self.cache = LRUCache(cache_ttl, max_entries=cache_max_entries, max_bytes=cache_max_bytes)
         self.api_calls: Dict[str, List[Dict]] = {}
+        # Latency histograms fed by RequestTimingMiddleware and record_api_call
+        self.request_metrics = request_metrics or RequestMetrics()
+        # Host metrics come from the shared background sampler rather than blocking psutil calls
+        self.sampler = sampler or system_sampler
         self.start_time = time.time()
         
         # Performance counters
@@ -237,62 +178,43 @@ class PerformanceService:
             duration,
             {"success": success}
         )
-        
-    def get_api_performance(self, endpoint: Optional[str] = None) -> Dict[str, Any]:
-        """Get API performance statistics"""
-        if endpoint and endpoint in self.api_calls:
-            calls = self.api_calls[endpoint]
-        else:
-            calls = []
-            for ep_calls in self.api_calls.values():
-                calls.extend(ep_calls)
-                
-        if not calls:
+        self.request_metrics.record(ANY_METHOD, endpoint, 200 if success else 500, duration)
+        
+    def get_api_performance(self, endpoint: Optional[str] = None,
+                            include_routes: bool = False) -> Dict[str, Any]:
+        """
+        Get API performance statistics from the latency histograms
+        
+        Args:
+            endpoint: Route template (e.g. /api/drones/{drone_id}); all routes when omitted
+            include_routes: Add a per method / route / status class breakdown
+        """
+        if endpoint and endpoint not in self.request_metrics.routes():
             return {"call_count": 0}
-            
-        durations = [call["duration"] for call in calls]
-        success_count = sum(1 for call in calls if call["success"])
-        
-        return {
-            "call_count": len(calls),
-            "success_rate": round(success_count / len(calls) * 100, 2),
-            "avg_duration_ms": round(sum(durations) / len(durations) * 1000, 2),
-            "min_duration_ms": round(min(durations) * 1000, 2),
-            "max_duration_ms": round(max(durations) * 1000, 2),
-            "total_errors": len(calls) - success_count
-        }
+        performance = self.request_metrics.summary(endpoint or None)
+        if include_routes and performance["call_count"]:
+            performance["routes"] = self.request_metrics.breakdown(endpoint or None)
+        return performance
         
     def get_system_performance(self) -> Dict[str, Any]:
-        """Get current system performance metrics"""
-        # CPU metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count()
-        
-        # Memory metrics
-        memory = psutil.virtual_memory()
-        
-        # Disk metrics
-        disk = psutil.disk_usage('/')
-        
-        # Network metrics
-        network = psutil.net_io_counters()
-        
-        # Process metrics
-        process = psutil.Process()
-        process_memory = process.memory_info()
+        """Get current system performance metrics from the latest sampler snapshot"""
+        snapshot = self.sampler.latest()
+        memory = snapshot.memory
+        disk = snapshot.disk
+        network = snapshot.network
         
         return {
             "cpu": {
-                "usage_percent": round(cpu_percent, 1),
-                "count": cpu_count,
-                "load_avg": list(psutil.getloadavg()) if hasattr(psutil, 'getloadavg') else None
+                "usage_percent": round(snapshot.cpu_percent, 1),
+                "count": snapshot.cpu_count,
+                "load_avg": snapshot.load_avg
             },
             "memory": {
                 "total_gb": round(memory.total / (1024**3), 2),
                 "available_gb": round(memory.available / (1024**3), 2),
                 "used_gb": round(memory.used / (1024**3), 2),
                 "usage_percent": round(memory.percent, 1),
-                "process_memory_mb": round(process_memory.rss / (1024**2), 2)
+                "process_memory_mb": round(snapshot.process_rss / (1024**2), 2)
             },
             "disk": {
                 "total_gb": round(disk.total / (1024**3), 2),
@@ -304,10 +226,14 @@ class PerformanceService:
                 "bytes_sent_mb": round(network.bytes_sent / (1024**2), 2),
                 "bytes_recv_mb": round(network.bytes_recv / (1024**2), 2),
                 "packets_sent": network.packets_sent,
-                "packets_recv": network.packets_recv
+                "packets_recv": network.packets_recv,
+                "sent_bytes_per_second": round(snapshot.network_rates["sent"], 1),
+                "recv_bytes_per_second": round(snapshot.network_rates["recv"], 1)
             },
+            "temperature_celsius": snapshot.temperature,
             "uptime_seconds": int(time.time() - self.start_time),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": snapshot.timestamp.isoformat(),
+            "sample_age_seconds": round(snapshot.age_seconds, 2)
         }
         
     def get_performance_summary(self) -> Dict[str, Any]:
@@ -324,7 +250,7 @@ class PerformanceService:
         
         # API performance summary
         api_summary = {}
-        for endpoint in self.api_calls.keys():
+        for endpoint in self.request_metrics.routes():
             api_summary[endpoint] = self.get_api_performance(endpoint)
             
         return {
@@ -345,6 +271,32 @@ class PerformanceService:
             "timestamp": datetime.now().isoformat()
         }
         
+    def collect_metrics(self) -> List[MetricFamily]:
+        """Collect cache metrics for Prometheus exposition"""
+        total_cache_requests = self.cache_hits + self.cache_misses
+        namespace_requests = MetricFamily("cache_namespace_requests_total", COUNTER,
+                                          "Cache lookups by key namespace and result")
+        namespace_evictions = MetricFamily("cache_namespace_evictions_total", COUNTER,
+                                           "Entries evicted to stay within the cache bounds, by key namespace")
+        for namespace, stats in sorted(self.cache.namespaces.items()):
+            namespace_requests.add(stats.hits, namespace=namespace, result="hit")
+            namespace_requests.add(stats.misses, namespace=namespace, result="miss")
+            namespace_requests.add(stats.coalesced, namespace=namespace, result="coalesced")
+            namespace_evictions.add(stats.evictions, namespace=namespace)
+        return [
+            MetricFamily("cache_requests_total", COUNTER, "Cache lookups by result")
+                .add(self.cache_hits, cache="performance", result="hit")
+                .add(self.cache_misses, cache="performance", result="miss"),
+            MetricFamily("cache_hit_ratio", GAUGE, "Fraction of cache lookups served from the cache").add(
+                self.cache_hits / total_cache_requests if total_cache_requests else 0.0, cache="performance"),
+            MetricFamily("cache_entries", GAUGE, "Entries held in the cache").add(
+                len(self.cache.cache), cache="performance"),
+            MetricFamily("cache_size_bytes", GAUGE, "Approximate size of cached values").add(
+                self.cache.total_bytes, cache="performance"),
+            namespace_requests,
+            namespace_evictions
+        ]
+        
     def optimize_performance(self) -> Dict[str, Any]:
         """Perform performance optimizations"""
         optimizations = []
@@ -407,11 +359,8 @@ class PerformanceService:
                     
                 self.cache_misses += 1
                 
-                # Execute function and cache result
-                result = await func(*args, **kwargs)
-                self.cache.set(cache_key, result, ttl)
-                
-                return result
+                # Execute function and cache result; concurrent misses share one call
+                return await self.cache.load(cache_key, lambda: func(*args, **kwargs), ttl)
                 
             @wraps(func)
             def sync_wrapper(*args, **kwargs):
@@ -0,0 +1,364 @@
+"""
+Request Metrics - Per-route request timing in fixed-memory log-linear latency histograms
+Every HTTP request is timed by route template, method and status class; percentiles and throughput
+are read over sliding windows without keeping individual samples
+"""
+
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics_registry import COUNTER, DEFAULT_BUCKETS, HISTOGRAM, MetricFamily
+
+logger = logging.getLogger(__name__)
+
+# バケットの分解能（2^SUB_BUCKET_BITS 未満は 1µs 刻み、以降は1オクターブを 2^(SUB_BUCKET_BITS-1) 分割）
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+# 記録できる最大値（µs、超えた値は最大バケットに入れる）
+MAX_TRACKABLE_US = (1 << 27) - 1
+BUCKET_COUNT = ((MAX_TRACKABLE_US.bit_length() - SUB_BUCKET_BITS + 1) << (SUB_BUCKET_BITS - 1)) + SUB_BUCKET_HALF
+
+# 既定の集計窓（名前 -> 秒）
+DEFAULT_WINDOWS: Dict[str, float] = {"1m": 60.0, "5m": 300.0}
+
+# ルートに一致しなかったリクエスト・系列数の上限を超えた場合のルート名
+UNMATCHED_ROUTE = "<unmatched>"
+OVERFLOW_ROUTE = "<other>"
+
+# record_api_call 経由の記録（HTTP メソッド不明）
+ANY_METHOD = "-"
+
+PERCENTILES: Tuple[Tuple[str, float], ...] = (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p999", 0.999))
+
+
+def bucket_index(value_us: int) -> int:
+    """値（µs）のバケット番号"""
+    if value_us > MAX_TRACKABLE_US:
+        value_us = MAX_TRACKABLE_US
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value_us if value_us > 0 else 0
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value_us >> shift)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """バケットの値の範囲 [下限, 上限)（µs）"""
+    if index < (1 << SUB_BUCKET_BITS):
+        return index, index + 1
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    lower = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return lower, lower + (1 << shift)
+
+
+def percentiles_from_counts(counts: np.ndarray, min_us: Optional[int] = None,
+                            max_us: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """
+    ヒストグラムからパーセンタイルを計算（バケットの中央値、ms）
+
+    Args:
+        min_us: 実測の最小値（指定時は結果をこの範囲に収める）
+        max_us: 実測の最大値
+    """
+    total = int(counts.sum())
+    if total == 0:
+        return {name: None for name, _ in PERCENTILES}
+    cumulative = np.cumsum(counts)
+    result = {}
+    for name, quantile in PERCENTILES:
+        rank = max(1, math.ceil(quantile * total))
+        index = int(np.searchsorted(cumulative, rank))
+        lower, upper = bucket_bounds(index)
+        value = (lower + upper - 1) / 2
+        if min_us is not None:
+            value = max(value, min_us)
+        if max_us is not None:
+            value = min(value, max_us)
+        result[name] = round(value / 1000, 3)
+    return result
+
+
+class LatencyHistogram:
+    """
+    1系列分のレイテンシヒストグラム（固定メモリ）
+
+    slot_seconds 秒ごとのヒストグラムをリングで持ち、古いスロットは累計に畳み込む。
+    集計窓はリング上の直近のスロットを合計して求めるため、個々のサンプルは保持しない。
+    """
+
+    def __init__(self, slots: int = 15, slot_seconds: float = 20.0, now: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            slots: リングのスロット数（slots * slot_seconds が最長の集計窓）
+            slot_seconds: 1スロットの時間幅（秒）
+        """
+        self.slots = slots
+        self.slot_seconds = slot_seconds
+        self.ring = np.zeros((slots, BUCKET_COUNT), dtype=np.uint32)
+        self.retired = np.zeros(BUCKET_COUNT, dtype=np.uint64)
+        now = time.perf_counter() if now is None else now
+        self._slot_id = int(now // slot_seconds)
+        self._row = self.ring[self._slot_id % slots]
+
+        # 累計（正確な値）
+        self.count = 0
+        self.errors = 0
+        self.sum_us = 0
+        self.min_us = MAX_TRACKABLE_US + 1
+        self.max_us = -1
+        # ステータスコードごとの件数
+        self.statuses: Dict[int, int] = {}
+
+    def _advance(self, slot_id: int) -> None:
+        """現在のスロットを進め、再利用するスロットを累計に畳み込む"""
+        for next_id in range(max(self._slot_id + 1, slot_id - self.slots + 1), slot_id + 1):
+            row = self.ring[next_id % self.slots]
+            self.retired += row
+            row[:] = 0
+        self._slot_id = slot_id
+        self._row = self.ring[slot_id % self.slots]
+
+    def record(self, value_us: int, error: bool = False, now: Optional[float] = None) -> None:
+        """レイテンシ（µs）を1件記録"""
+        slot_id = int((time.perf_counter() if now is None else now) // self.slot_seconds)
+        if slot_id > self._slot_id:
+            self._advance(slot_id)
+        self._row[bucket_index(value_us)] += 1
+        self.count += 1
+        self.sum_us += value_us
+        if error:
+            self.errors += 1
+        if value_us > self.max_us:
+            self.max_us = value_us
+        if value_us < self.min_us:
+            self.min_us = value_us
+
+    def window_counts(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, float]:
+        """
+        直近 seconds 秒のヒストグラム
+
+        Returns:
+            Tuple[np.ndarray, float]: (バケットごとの件数, 集計したスロットが覆う秒数)
+        """
+        now = time.perf_counter() if now is None else now
+        slot_id = int(now // self.slot_seconds)
+        if slot_id > self._slot_id:
+            self._advance(slot_id)
+        slots = max(1, min(self.slots, math.ceil(seconds / self.slot_seconds)))
+        rows = [(slot_id - offset) % self.slots for offset in range(slots)]
+        counts = self.ring[rows].sum(axis=0, dtype=np.uint64)
+        span = (slots - 1) * self.slot_seconds + (now - slot_id * self.slot_seconds)
+        return counts, max(span, 1e-9)
+
+    def total_counts(self) -> np.ndarray:
+        """累計のヒストグラム"""
+        return self.retired + self.ring.sum(axis=0, dtype=np.uint64)
+
+
+class RequestMetrics:
+    """
+    リクエストのレイテンシ記録
+
+    (メソッド, ルートテンプレート, ステータス分類) ごとに LatencyHistogram を持つ。
+    ルートはテンプレート（/api/drones/{drone_id} など）で記録するため系列数は有界で、
+    上限を超えた場合は OVERFLOW_ROUTE にまとめる。
+    """
+
+    def __init__(self, slots: int = 15, slot_seconds: float = 20.0, max_series: int = 512,
+                 windows: Optional[Dict[str, float]] = None, now: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            slots: 系列ごとのスロット数
+            slot_seconds: 1スロットの時間幅（秒）
+            max_series: 系列数の上限
+            windows: 集計窓（名前 -> 秒、slots * slot_seconds 以下）
+            now: 計測開始時刻（perf_counter、省略時は現在）
+        """
+        # スループットの分母は計測開始からの経過時間を上限とする（系列の作成時刻ではない）
+        self.started_at = time.perf_counter() if now is None else now
+        self.slots = slots
+        self.slot_seconds = slot_seconds
+        self.max_series = max_series
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        # (メソッド, ルートテンプレート, ステータスコードの百の位) -> ヒストグラム
+        self.series: Dict[Tuple[str, str, int], LatencyHistogram] = {}
+
+    def record(self, method: str, route: str, status: int, duration: float, now: Optional[float] = None) -> None:
+        """
+        リクエストを1件記録
+
+        Args:
+            method: HTTP メソッド
+            route: ルートテンプレート
+            status: ステータスコード
+            duration: 処理時間（秒）
+        """
+        key = (method, route, status // 100)
+        histogram = self.series.get(key)
+        if histogram is None:
+            histogram = self._create_series(key, now)
+        histogram.record(int(duration * 1_000_000), status >= 500, now)
+        statuses = histogram.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def _create_series(self, key: Tuple[str, str, int], now: Optional[float]) -> LatencyHistogram:
+        if len(self.series) >= self.max_series:
+            key = (key[0], OVERFLOW_ROUTE, key[2])
+            histogram = self.series.get(key)
+            if histogram is not None:
+                return histogram
+            logger.warning(f"Request metrics series limit reached ({self.max_series}), grouping into {OVERFLOW_ROUTE}")
+        histogram = self.series[key] = LatencyHistogram(self.slots, self.slot_seconds, now)
+        return histogram
+
+    def routes(self) -> List[str]:
+        """記録のあるルートテンプレート"""
+        return sorted({route for _, route, _ in self.series})
+
+    def _select(self, route: Optional[str] = None, method: Optional[str] = None) -> List[Tuple[Tuple[str, str, int], LatencyHistogram]]:
+        return [(key, histogram) for key, histogram in self.series.items()
+                if (route is None or key[1] == route) and (method is None or key[0] == method)]
+
+    def _summarize(self, selected: Iterable[Tuple[Tuple[str, str, int], LatencyHistogram]],
+                   now: float) -> Dict[str, Any]:
+        selected = list(selected)
+        count = sum(histogram.count for _, histogram in selected)
+        if count == 0:
+            return {"call_count": 0}
+        errors = sum(histogram.errors for _, histogram in selected)
+        min_us = min(histogram.min_us for _, histogram in selected)
+        max_us = max(histogram.max_us for _, histogram in selected)
+        total = sum((histogram.total_counts() for _, histogram in selected), np.zeros(BUCKET_COUNT, dtype=np.uint64))
+
+        windows = {}
+        for name, seconds in self.windows.items():
+            counts = np.zeros(BUCKET_COUNT, dtype=np.uint64)
+            span = 1e-9
+            for _, histogram in selected:
+                window, window_span = histogram.window_counts(seconds, now)
+                counts += window
+                span = max(span, window_span)
+            # 起動直後は経過時間で割る。ただし1件目で極端な値にならないよう最短でも1スロット分
+            span = max(min(span, now - self.started_at), min(self.slot_seconds, seconds))
+            window_count = int(counts.sum())
+            windows[name] = {
+                "count": window_count,
+                "throughput_rps": round(window_count / span, 3),
+                **percentiles_from_counts(counts)
+            }
+
+        return {
+            "call_count": count,
+            "success_rate": round((count - errors) / count * 100, 2),
+            "avg_duration_ms": round(sum(histogram.sum_us for _, histogram in selected) / count / 1000, 2),
+            "min_duration_ms": round(min_us / 1000, 2),
+            "max_duration_ms": round(max_us / 1000, 2),
+            "total_errors": errors,
+            "percentiles_ms": percentiles_from_counts(total, min_us, max_us),
+            "windows": windows
+        }
+
+    def summary(self, route: Optional[str] = None, method: Optional[str] = None,
+                now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        レイテンシ統計を取得
+
+        Args:
+            route: ルートテンプレート（省略時は全ルートの合計）
+            method: HTTP メソッド
+
+        Returns:
+            Dict[str, Any]: 累計の件数・エラー・平均/最小/最大とパーセンタイル、集計窓ごとの
+            件数・スループット・パーセンタイル
+        """
+        now = time.perf_counter() if now is None else now
+        return self._summarize(self._select(route, method), now)
+
+    def breakdown(self, route: Optional[str] = None, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """系列（メソッド・ルート・ステータス分類）ごとのレイテンシ統計"""
+        now = time.perf_counter() if now is None else now
+        result = []
+        for key, histogram in sorted(self._select(route)):
+            method, route_template, status_group = key
+            result.append({"method": method, "route": route_template, "status_class": f"{status_group}xx",
+                           **self._summarize([(key, histogram)], now)})
+        return result
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """記録の統計情報"""
+        return {
+            "series": len(self.series),
+            "max_series": self.max_series,
+            "bucket_count": BUCKET_COUNT,
+            "memory_bytes": sum(h.ring.nbytes + h.retired.nbytes for h in self.series.values()),
+            "windows": self.windows
+        }
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        """
+        Prometheus 用のメトリクスを取得
+
+        http_requests_total はステータスコードごと、http_request_duration_seconds は
+        ステータス分類ごと。ヒストグラムの le はバケット境界に丸めた近似値。
+        """
+        requests_total = MetricFamily("http_requests_total", COUNTER, "HTTP requests by route template and status")
+        duration = MetricFamily("http_request_duration_seconds", HISTOGRAM,
+                                "HTTP request latency by route template and status class")
+        le_indices = [(le, bucket_index(int(le * 1_000_000))) for le in DEFAULT_BUCKETS]
+        for (method, route, status_group), histogram in sorted(self.series.items()):
+            for status, count in sorted(histogram.statuses.items()):
+                requests_total.add(count, method=method, route=route, status=status)
+            if histogram.count == 0:
+                continue
+            cumulative = np.cumsum(histogram.total_counts())
+            duration.add_histogram([(le, int(cumulative[index])) for le, index in le_indices],
+                                   histogram.sum_us / 1_000_000, histogram.count,
+                                   method=method, route=route, status_class=f"{status_group}xx")
+        return [requests_total, duration]
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """ASGI スコープからルートテンプレートを取得（ルーティング後に設定される route を使う）"""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestTimingMiddleware:
+    """
+    HTTP リクエストの処理時間を RequestMetrics に記録する ASGI ミドルウェア
+
+    レスポンス本文の送信完了までを計測する。WebSocket など HTTP 以外はそのまま通す。
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            ended = time.perf_counter()
+            self.metrics.record(scope["method"], route_template(scope), status, ended - started, ended)
@@ -0,0 +1,154 @@
+"""
+Response Cache - Versioned JSON responses with strong ETags and 304 revalidation
+Read-heavy endpoints name the resource version they depend on; the body is serialized once per
+version and a matching If-None-Match is answered with 304 without rebuilding the payload
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 再検証を必須にする（ブラウザは毎回 If-None-Match を送り、変更がなければ 304 を受け取る）
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+# 同じバージョンの応答を保持する時間（秒、バージョンが変わった古い応答は LRU で追い出される）
+DEFAULT_RESPONSE_TTL = 3600
+
+
+def serialize_json(payload: Any) -> bytes:
+    """JSONResponse と同じ形式で直列化"""
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    """本文から強い ETag を生成"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match が ETag に一致するか（RFC 9110 の弱い比較）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class CachedResponse:
+    """直列化済みの応答本文と ETag"""
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+    @property
+    def nbytes(self) -> int:
+        """キャッシュのサイズ計算用"""
+        return len(self.body)
+
+
+class VersionedResponseCache:
+    """
+    リソースのバージョンをキーにした応答キャッシュ
+
+    サービスは変更のたびにバージョンを進め、エンドポイントは (リソース名, バージョン) で
+    直列化済みの本文を引く。同じバージョンへの同時リクエストでも構築は1回だけ行う。
+
+    バージョンはサービスのインスタンスごとに 0 から数えるため、キーにはバージョンを持つ
+    インスタンス（owner）ごとに割り当てた世代番号も含める。サービスが作り直されると
+    別のキーになり、前のインスタンスの応答は返さない。
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024,
+                 cache_control: str = DEFAULT_CACHE_CONTROL):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持する応答数の上限
+            max_bytes: 保持する本文の合計サイズの上限
+            cache_control: 応答に付与する Cache-Control
+        """
+        self.cache = LRUCache(DEFAULT_RESPONSE_TTL, max_entries=max_entries, max_bytes=max_bytes)
+        self.cache_control = cache_control
+        # バージョンを持つインスタンス -> 世代番号（番号は再利用しない）
+        self._epochs: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._next_epoch = itertools.count(1)
+        self.not_modified = 0
+        self.built = 0
+
+    def epoch_of(self, owner: Any) -> int:
+        """インスタンスの世代番号"""
+        epoch = self._epochs.get(owner)
+        if epoch is None:
+            epoch = self._epochs[owner] = next(self._next_epoch)
+        return epoch
+
+    def _key(self, resource: str, version: Hashable, owner: Any) -> str:
+        if owner is None:
+            return f"{resource}:{version!r}"
+        owners = owner if isinstance(owner, tuple) else (owner,)
+        epochs: Tuple[int, ...] = tuple(self.epoch_of(item) for item in owners)
+        return f"{resource}:{epochs!r}:{version!r}"
+
+    async def respond(self, request: Request, resource: str, version: Hashable,
+                      build: Callable[[], Awaitable[Any]], owner: Any = None) -> Response:
+        """
+        バージョンに対応する応答を返す（If-None-Match が一致すれば 304）
+
+        Args:
+            resource: リソース名（キャッシュの名前空間）
+            version: リソースのバージョン（変更のたびに変わる値）
+            build: 応答の内容を構築する関数（キャッシュにない場合だけ呼ぶ）
+            owner: バージョンを持つインスタンス（複数の場合はタプル）
+        """
+        key = self._key(resource, version, owner)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = await self.cache.load(key, lambda: self._build(build))
+
+        headers = {"ETag": cached.etag, "Cache-Control": self.cache_control}
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    async def _build(self, build: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        body = serialize_json(await build())
+        self.built += 1
+        return CachedResponse(body, make_etag(body))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        stats = self.cache.get_stats()
+        return {
+            "entries": stats["total_entries"],
+            "size_bytes": stats["total_size_bytes"],
+            "built": self.built,
+            "not_modified": self.not_modified,
+            "resources": stats["namespaces"]
+        }
+
+
+# ルーター間で共有する応答キャッシュ
+response_cache = VersionedResponseCache()
@@ -0,0 +1,167 @@
+"""
+Status Delta Encoder - Field-level deltas between fleet status snapshots
+Lets the WebSocket status stream send one full snapshot and then only changed fields
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 毎 tick 必ず変化するため差分の対象外とするフィールド
+DEFAULT_IGNORED_FIELDS = ("last_updated",)
+
+
+def diff_fields(previous: Dict[str, Any], current: Dict[str, Any],
+                ignored: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    2つの状態辞書の差分を取得（ネストした辞書は変化したキーだけを含む）
+
+    Returns:
+        Dict[str, Any]: 変化したフィールド -> 新しい値
+    """
+    changes: Dict[str, Any] = {}
+    for key, value in current.items():
+        if key in ignored:
+            continue
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff_fields(old, value)
+            if nested:
+                changes[key] = nested
+        elif key not in previous or old != value:
+            changes[key] = value
+    return changes
+
+
+@dataclass
+class StatusDelta:
+    """1 tick 分の差分"""
+    seq: int
+    changes: Dict[str, Dict[str, Any]]
+    removed: List[str] = field(default_factory=list)
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    def to_message(self, drone_ids: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """配信メッセージを作成（drone_ids 指定時は対象ドローンのみ）"""
+        changes = self.changes
+        removed = self.removed
+        if drone_ids is not None:
+            changes = {drone_id: fields for drone_id, fields in changes.items() if drone_id in drone_ids}
+            removed = [drone_id for drone_id in removed if drone_id in drone_ids]
+
+        return {
+            "type": "fleet_status_delta",
+            "seq": self.seq,
+            "changes": changes,
+            "removed": removed,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+
+class StatusDeltaEncoder:
+    """
+    フリート状態の差分エンコーダー
+
+    tick ごとの状態を前回と比較し、変化したフィールドだけを連番付きで返す。
+    変化がない tick では連番を進めないため、クライアントは seq が連続しているかで
+    取りこぼしを検出し、再同期（全体スナップショット）を要求できる。
+    """
+
+    def __init__(self, ignored_fields: Iterable[str] = DEFAULT_IGNORED_FIELDS):
+        """
+        初期化
+
+        Args:
+            ignored_fields: 差分の対象外とするフィールド
+        """
+        self.ignored_fields = tuple(ignored_fields)
+        self.seq = 0
+        self.state: Dict[str, Dict[str, Any]] = {}
+
+        # 統計情報
+        self.updates = 0
+        self.deltas = 0
+        self.changed_fields = 0
+
+    def update(self, status_dicts: Dict[str, Dict[str, Any]]) -> Optional[StatusDelta]:
+        """
+        新しい状態を取り込み差分を返す
+
+        Args:
+            status_dicts: ドローンID -> JSON互換の状態辞書（呼び出し後に変更しないこと）
+
+        Returns:
+            Optional[StatusDelta]: 変化がなければ None
+        """
+        self.updates += 1
+        changes: Dict[str, Dict[str, Any]] = {}
+        for drone_id, status in status_dicts.items():
+            fields = diff_fields(self.state.get(drone_id, {}), status, self.ignored_fields)
+            if fields:
+                changes[drone_id] = fields
+        removed = [drone_id for drone_id in self.state if drone_id not in status_dicts]
+
+        self.state = dict(status_dicts)
+        if not changes and not removed:
+            return None
+
+        self.seq += 1
+        self.deltas += 1
+        self.changed_fields += sum(len(fields) for fields in changes.values())
+        return StatusDelta(seq=self.seq, changes=changes, removed=removed)
+
+    def full_message(self, drone_ids: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """現在の状態全体を再同期用メッセージとして作成"""
+        drones = self.state
+        if drone_ids is not None:
+            drones = {drone_id: status for drone_id, status in drones.items() if drone_id in drone_ids}
+
+        return {
+            "type": "fleet_status_snapshot",
+            "seq": self.seq,
+            "drones": drones,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "seq": self.seq,
+            "drones": len(self.state),
+            "updates": self.updates,
+            "deltas": self.deltas,
+            "changed_fields": self.changed_fields,
+            "avg_changed_fields": round(self.changed_fields / self.deltas, 2) if self.deltas else 0.0
+        }
+
+
+def apply_delta(state: Dict[str, Dict[str, Any]], message: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    差分メッセージを状態に適用（クライアント側の参照実装）
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 適用後の状態
+    """
+    def merge(target: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        for key, value in fields.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                merge(target[key], value)
+            else:
+                target[key] = value
+
+    for drone_id, fields in message.get("changes", {}).items():
+        merge(state.setdefault(drone_id, {}), fields)
+    for drone_id in message.get("removed", []):
+        state.pop(drone_id, None)
+    return state
+
+
+def group_subscribers(subscribers: Dict[Any, Optional[FrozenSet[str]]]) -> List[Tuple[Optional[FrozenSet[str]], List[Any]]]:
+    """同じ対象ドローン集合を購読する接続をまとめる（メッセージはグループごとに1回だけ作成）"""
+    groups: Dict[Optional[FrozenSet[str]], List[Any]] = {}
+    for connection, drone_ids in subscribers.items():
+        groups.setdefault(drone_ids, []).append(connection)
+    return list(groups.items())
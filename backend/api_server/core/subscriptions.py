@@ -0,0 +1,223 @@
+"""
+Subscriptions - Per-subscription topics, rate limits and field masks for WebSocket clients
+Decides which subscribers are due for an update so each payload is built only for the groups that need it
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ドローン単位で購読できるトピック
+TOPICS: Tuple[str, ...] = ("status", "telemetry", "detections", "alerts")
+DEFAULT_TOPICS: FrozenSet[str] = frozenset({"status"})
+
+# 間引きの対象（alerts はイベントのため間引かない）
+SAMPLED_TOPICS: FrozenSet[str] = frozenset({"status", "telemetry", "detections"})
+
+# トピック -> (メッセージ種別, ペイロードのキー)
+TOPIC_MESSAGES: Dict[str, Tuple[str, str]] = {
+    "status": ("drone_status_update", "status"),
+    "telemetry": ("drone_telemetry", "telemetry"),
+    "detections": ("drone_detections", "detections"),
+    "alerts": ("drone_alert", "alert"),
+}
+
+# 購読できる最大レート（Hz）
+MAX_RATE_HZ = 50.0
+
+# 送信周期の揺らぎの許容（周期の 10% 早く来ても送る）
+RATE_TOLERANCE = 0.9
+
+
+def apply_field_mask(data: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """
+    フィールドマスクを適用（"attitude.yaw" のようにドット区切りでネストを指定できる）
+
+    Returns:
+        Dict[str, Any]: 指定フィールドのみの辞書（fields が None なら元の辞書）
+    """
+    if fields is None:
+        return data
+    masked: Dict[str, Any] = {}
+    for path in fields:
+        keys = path.split(".")
+        source = data
+        for key in keys:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+        else:
+            target = masked
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = source
+    return masked
+
+
+@dataclass
+class Subscription:
+    """1接続・1ドローン分の購読設定"""
+    connection: Any
+    drone_id: str
+    topics: FrozenSet[str] = DEFAULT_TOPICS
+    max_rate_hz: Optional[float] = None
+    fields: Optional[Tuple[str, ...]] = None
+    last_sent: Dict[str, float] = field(default_factory=dict)
+    sent: int = 0
+    skipped: int = 0
+
+    def is_due(self, topic: str, now: float) -> bool:
+        """レート上限の範囲内で送信できるか"""
+        if self.max_rate_hz is None or topic not in SAMPLED_TOPICS:
+            return True
+        last = self.last_sent.get(topic)
+        return last is None or now - last >= RATE_TOLERANCE / self.max_rate_hz
+
+    def to_dict(self) -> Dict[str, Any]:
+        """購読設定を辞書に変換"""
+        return {
+            "drone_id": self.drone_id,
+            "topics": sorted(self.topics),
+            "max_rate_hz": self.max_rate_hz,
+            "fields": list(self.fields) if self.fields is not None else None
+        }
+
+
+class SubscriptionRegistry:
+    """
+    WebSocket 購読の登録簿
+
+    トピックごとに購読者を引けるようにし、配信時はレート上限に達していない購読だけを
+    フィールドマスク単位にまとめて返す。呼び出し側はマスクごとに1回だけメッセージを作る。
+    """
+
+    def __init__(self):
+        # ドローンID -> 接続 -> 購読
+        self._by_drone: Dict[str, Dict[Any, Subscription]] = {}
+
+    def subscribe(self, connection: Any, drone_id: str, topics: Optional[Iterable[str]] = None,
+                  max_rate_hz: Optional[float] = None, fields: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        購読を登録（同じ接続・ドローンの既存の購読は置き換える）
+
+        Raises:
+            ValueError: 不明なトピック・不正なレート・フィールド指定
+        """
+        topic_set = frozenset(topics) if topics is not None else DEFAULT_TOPICS
+        unknown = topic_set - set(TOPICS)
+        if unknown:
+            raise ValueError(f"Unknown topics: {sorted(unknown)} (available: {list(TOPICS)})")
+        if not topic_set:
+            raise ValueError("At least one topic is required")
+        if max_rate_hz is not None:
+            if not isinstance(max_rate_hz, (int, float)) or max_rate_hz <= 0:
+                raise ValueError("max_rate_hz must be a positive number")
+            max_rate_hz = min(float(max_rate_hz), MAX_RATE_HZ)
+        field_tuple = None
+        if fields is not None:
+            if isinstance(fields, str) or not all(isinstance(name, str) and name for name in fields):
+                raise ValueError("fields must be a list of field names")
+            field_tuple = tuple(sorted(set(fields)))
+
+        subscription = Subscription(connection, drone_id, topic_set, max_rate_hz, field_tuple)
+        self._by_drone.setdefault(drone_id, {})[connection] = subscription
+        return subscription
+
+    def unsubscribe(self, connection: Any, drone_id: str) -> bool:
+        """購読を解除"""
+        subscriptions = self._by_drone.get(drone_id)
+        if not subscriptions or subscriptions.pop(connection, None) is None:
+            return False
+        if not subscriptions:
+            del self._by_drone[drone_id]
+        return True
+
+    def remove_connection(self, connection: Any) -> int:
+        """接続の全購読を解除"""
+        removed = 0
+        for drone_id in list(self._by_drone):
+            if self.unsubscribe(connection, drone_id):
+                removed += 1
+        return removed
+
+    def get(self, connection: Any, drone_id: str) -> Optional[Subscription]:
+        """購読設定を取得"""
+        return self._by_drone.get(drone_id, {}).get(connection)
+
+    def subscribers(self, drone_id: str, topic: str) -> List[Subscription]:
+        """ドローン・トピックの購読一覧"""
+        return [subscription for subscription in self._by_drone.get(drone_id, {}).values()
+                if topic in subscription.topics]
+
+    def drones_for(self, topic: str) -> List[str]:
+        """トピックの購読者がいるドローン"""
+        return [drone_id for drone_id, subscriptions in self._by_drone.items()
+                if any(topic in subscription.topics for subscription in subscriptions.values())]
+
+    def connections_for(self, topic: str) -> Set[Any]:
+        """いずれかのドローンでトピックを購読している接続"""
+        return {subscription.connection for subscriptions in self._by_drone.values()
+                for subscription in subscriptions.values() if topic in subscription.topics}
+
+    def demand(self, topic: str) -> Dict[str, float]:
+        """
+        ドローンごとにトピックで要求されている最大レート
+
+        Returns:
+            Dict[str, float]: ドローンID -> 最大レート（レート上限なしの購読があれば inf）
+        """
+        rates: Dict[str, float] = {}
+        for drone_id, subscriptions in self._by_drone.items():
+            for subscription in subscriptions.values():
+                if topic in subscription.topics:
+                    rate = float("inf") if subscription.max_rate_hz is None else subscription.max_rate_hz
+                    rates[drone_id] = max(rates.get(drone_id, 0.0), rate)
+        return rates
+
+    def max_rate(self, topic: str) -> Optional[float]:
+        """
+        トピックで要求されている最大レート
+
+        Returns:
+            Optional[float]: 購読者がいなければ None、レート上限なしの購読があれば inf
+        """
+        rates = [subscription.max_rate_hz for subscriptions in self._by_drone.values()
+                 for subscription in subscriptions.values() if topic in subscription.topics]
+        if not rates:
+            return None
+        return float("inf") if None in rates else max(rates)
+
+    def collect_due(self, drone_id: str, topic: str,
+                    now: Optional[float] = None) -> Dict[Optional[Tuple[str, ...]], List[Any]]:
+        """
+        送信時期が来た購読をフィールドマスクごとにまとめ、送信済みとして記録
+
+        Returns:
+            Dict[Optional[Tuple[str, ...]], List[Any]]: フィールドマスク -> 接続
+        """
+        now = time.monotonic() if now is None else now
+        groups: Dict[Optional[Tuple[str, ...]], List[Any]] = {}
+        for subscription in self.subscribers(drone_id, topic):
+            if not subscription.is_due(topic, now):
+                subscription.skipped += 1
+                continue
+            subscription.last_sent[topic] = now
+            subscription.sent += 1
+            groups.setdefault(subscription.fields, []).append(subscription.connection)
+        return groups
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        subscriptions = [subscription for by_connection in self._by_drone.values()
+                         for subscription in by_connection.values()]
+        return {
+            "subscriptions": len(subscriptions),
+            "drones": len(self._by_drone),
+            "topics": {topic: sum(1 for subscription in subscriptions if topic in subscription.topics)
+                       for topic in TOPICS},
+            "sent": sum(subscription.sent for subscription in subscriptions),
+            "skipped_by_rate": sum(subscription.skipped for subscription in subscriptions)
+        }
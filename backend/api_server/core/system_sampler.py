@@ -0,0 +1,265 @@
+"""
+System Sampler - Background sampling of host resource metrics into a shared snapshot
+CPU, memory, disk, network and temperature are read by one task at a fixed cadence off the event
+loop; status endpoints and the alert loop read the latest snapshot instead of calling psutil
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from .metrics_registry import GAUGE, MetricFamily
+
+logger = logging.getLogger(__name__)
+
+# 既定のサンプリング間隔（秒、SYSTEM_METRICS_INTERVAL で変更可能）
+DEFAULT_SAMPLE_INTERVAL = 5.0
+
+# 最新のスナップショットがこの間隔の何倍より古ければ停滞とみなす
+STALE_INTERVALS = 3
+
+
+def read_temperature() -> Optional[float]:
+    """CPU の温度（なければ最初に見つかったセンサー、取得できなければ None）"""
+    sensors = getattr(psutil, "sensors_temperatures", None)
+    if sensors is None:
+        return None
+    try:
+        temps = sensors()
+    except Exception:
+        return None
+    if not temps:
+        return None
+    for name, entries in temps.items():
+        if entries and "cpu" in name.lower():
+            return entries[0].current
+    for entries in temps.values():
+        if entries:
+            return entries[0].current
+    return None
+
+
+@dataclass
+class SystemSnapshot:
+    """ある時点のシステムリソースの状態"""
+    sequence: int
+    taken_at: float
+    timestamp: datetime
+    cpu_percent: float
+    cpu_percent_per_core: List[float]
+    cpu_count: Optional[int]
+    cpu_frequency_mhz: Optional[float]
+    load_avg: Optional[List[float]]
+    memory: Any
+    swap: Any
+    disk: Any
+    disk_io: Any
+    network: Any
+    process_rss: int
+    process_count: int
+    temperature: Optional[float] = None
+    # 前回のサンプルからの送受信速度（バイト/秒、初回は 0）
+    network_rates: Dict[str, float] = field(default_factory=lambda: {"sent": 0.0, "recv": 0.0})
+    sample_ms: float = 0.0
+
+    @property
+    def age_seconds(self) -> float:
+        """スナップショットの経過秒数"""
+        return max(0.0, time.monotonic() - self.taken_at)
+
+
+class SystemMetricsSampler:
+    """
+    システムリソースの定期サンプラー
+
+    バックグラウンドタスクが interval 秒ごとにスレッド上で psutil を読み、スナップショットを
+    差し替える。読み手は latest() で直近のスナップショットを O(1) で参照する。CPU 使用率は
+    前回の呼び出しからの差分（interval=None）で求めるため、イベントループを止めない。
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, disk_path: str = "/"):
+        """
+        初期化
+
+        Args:
+            interval: サンプリング間隔（秒）
+            disk_path: 使用率を測るディスクのパス
+        """
+        self.interval = interval
+        self.disk_path = disk_path
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sequence = 0
+
+        # 統計
+        self.samples = 0
+        self.errors = 0
+        self.on_demand_samples = 0
+
+        # CPU 使用率の基準点を作る（最初の interval=None の呼び出しは意味のない値を返す）
+        try:
+            psutil.cpu_percent(interval=None)
+            psutil.cpu_percent(interval=None, percpu=True)
+        except Exception:
+            pass
+
+    @property
+    def running(self) -> bool:
+        """バックグラウンドでサンプリング中か"""
+        return self._task is not None and not self._task.done()
+
+    def sample(self) -> SystemSnapshot:
+        """psutil を読んでスナップショットを作成し、最新として保持する"""
+        started = time.perf_counter()
+        network = psutil.net_io_counters()
+        now = time.monotonic()
+        previous = self._snapshot
+        rates = {"sent": 0.0, "recv": 0.0}
+        if previous is not None and previous.network is not None and network is not None:
+            elapsed = now - previous.taken_at
+            if elapsed > 0:
+                rates = {
+                    "sent": max(0.0, (network.bytes_sent - previous.network.bytes_sent) / elapsed),
+                    "recv": max(0.0, (network.bytes_recv - previous.network.bytes_recv) / elapsed)
+                }
+
+        cpu_freq = psutil.cpu_freq() if hasattr(psutil, "cpu_freq") else None
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+        self._sequence += 1
+        snapshot = SystemSnapshot(
+            sequence=self._sequence,
+            taken_at=now,
+            timestamp=datetime.now(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            cpu_percent_per_core=list(per_core) if isinstance(per_core, (list, tuple)) else [],
+            cpu_count=psutil.cpu_count(),
+            cpu_frequency_mhz=cpu_freq.current if cpu_freq else None,
+            load_avg=list(psutil.getloadavg()) if hasattr(psutil, "getloadavg") else None,
+            memory=psutil.virtual_memory(),
+            swap=psutil.swap_memory(),
+            disk=psutil.disk_usage(self.disk_path),
+            disk_io=psutil.disk_io_counters(),
+            network=network,
+            process_rss=psutil.Process().memory_info().rss,
+            process_count=len(psutil.pids()),
+            temperature=read_temperature(),
+            network_rates=rates
+        )
+        snapshot.sample_ms = (time.perf_counter() - started) * 1000
+        self._snapshot = snapshot
+        self.samples += 1
+        return snapshot
+
+    def latest(self) -> SystemSnapshot:
+        """
+        最新のスナップショットを取得
+
+        サンプリング中は保持しているスナップショットをそのまま返す。停止中（テストや
+        単体での利用）はその場で読み直す。CPU 使用率は差分で求めるため待ち時間は発生しない。
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self.running:
+            return snapshot
+        self.on_demand_samples += 1
+        return self.sample()
+
+    def is_stale(self) -> bool:
+        """スナップショットが更新されていないか"""
+        snapshot = self._snapshot
+        return snapshot is None or snapshot.age_seconds > self.interval * STALE_INTERVALS
+
+    async def start(self, interval: Optional[float] = None) -> None:
+        """バックグラウンドでのサンプリングを開始"""
+        if interval is not None:
+            self.interval = interval
+        if self.running:
+            return
+        # 開始直後の読み手にもスナップショットを用意しておく
+        await asyncio.to_thread(self.sample)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"System metrics sampler started ({self.interval}s interval)")
+
+    async def stop(self) -> None:
+        """バックグラウンドでのサンプリングを停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("System metrics sampler stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.sample)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"System metrics sampling failed: {e}")
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        """Prometheus 用のメトリクス（最新のスナップショットから作成）"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        families = [
+            MetricFamily("system_cpu_usage_percent", GAUGE, "Host CPU usage"),
+            MetricFamily("system_memory_usage_percent", GAUGE, "Host memory usage"),
+            MetricFamily("system_disk_usage_percent", GAUGE, "Disk usage of the sampled path"),
+            MetricFamily("system_network_bytes_per_second", GAUGE, "Host network throughput"),
+            MetricFamily("process_resident_memory_bytes", GAUGE, "Resident memory of the server process"),
+            MetricFamily("system_sample_age_seconds", GAUGE, "Seconds since the last system sample")
+        ]
+        cpu, memory, disk, network, rss, age = families
+        cpu.add(snapshot.cpu_percent)
+        memory.add(snapshot.memory.percent)
+        disk.add(snapshot.disk.percent, path=self.disk_path)
+        network.add(snapshot.network_rates["sent"], direction="sent")
+        network.add(snapshot.network_rates["recv"], direction="recv")
+        rss.add(snapshot.process_rss)
+        age.add(snapshot.age_seconds)
+        if snapshot.temperature is not None:
+            temperature = MetricFamily("system_temperature_celsius", GAUGE, "Host CPU temperature")
+            temperature.add(snapshot.temperature)
+            families.append(temperature)
+        return families
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        snapshot = self._snapshot
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "on_demand_samples": self.on_demand_samples,
+            "errors": self.errors,
+            "last_sequence": snapshot.sequence if snapshot else None,
+            "last_sample_ms": round(snapshot.sample_ms, 2) if snapshot else None,
+            "age_seconds": round(snapshot.age_seconds, 2) if snapshot else None,
+            "stale": self.is_stale()
+        }
+
+
+def sample_interval_from_env(default: float = DEFAULT_SAMPLE_INTERVAL) -> float:
+    """SYSTEM_METRICS_INTERVAL からサンプリング間隔を取得"""
+    value = os.getenv("SYSTEM_METRICS_INTERVAL")
+    if not value:
+        return default
+    try:
+        interval = float(value)
+    except ValueError:
+        logger.warning(f"Invalid SYSTEM_METRICS_INTERVAL: {value}, using {default}s")
+        return default
+    return interval if interval > 0 else default
+
+
+# サービス間で共有するサンプラー
+system_sampler = SystemMetricsSampler()
@@ -7,10 +7,9 @@ import asyncio
 import logging
 import time
 from datetime import datetime
-from typing import List, Dict, Any
-
-import psutil
+from typing import List, Dict, Any, Optional
 
+from .system_sampler import SystemMetricsSampler, system_sampler
 from ..models.model_models import SystemStatus
 from ..models.drone_models import DroneStatus
 
@@ -20,9 +19,11 @@ logger = logging.getLogger(__name__)
 class SystemService:
     """System monitoring service for dashboard functionality"""
     
-    def __init__(self):
+    def __init__(self, sampler: Optional[SystemMetricsSampler] = None):
         self.start_time = time.time()
         self.system_metrics = {}
+        # Resource usage is read from the shared background sampler's latest snapshot
+        self.sampler = sampler or system_sampler
         
     async def get_system_status(self, drone_manager, vision_service, model_service) -> SystemStatus:
         """
@@ -36,31 +37,21 @@ class SystemService:
         Returns:
             SystemStatus with current system metrics
         """
-        # Get system resource usage
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Get system temperature (if available)
-        temperature = None
-        try:
-            temps = psutil.sensors_temperatures()
-            if temps:
-                # Try to get CPU temperature
-                for name, entries in temps.items():
-                    if entries and 'cpu' in name.lower():
-                        temperature = entries[0].current
-                        break
-                # Fallback to first available temperature
-                if temperature is None and temps:
-                    temperature = list(temps.values())[0][0].current
-        except:
-            temperature = None
+        # Get system resource usage (latest snapshot, no blocking psutil calls)
+        snapshot = self.sampler.latest()
+        cpu_usage = snapshot.cpu_percent
+        memory = snapshot.memory
+        disk = snapshot.disk
+        temperature = snapshot.temperature
         
         # Get connected drones count
         try:
-            drones = await drone_manager.get_available_drones()
-            connected_drones = len([d for d in drones if d.status == "connected"])
+            snapshotter = getattr(drone_manager, "status_snapshot", None)
+            if snapshotter is not None:
+                connected_drones = (await snapshotter.get_snapshot()).connected_count
+            else:
+                drones = await drone_manager.get_available_drones()
+                connected_drones = len([d for d in drones if d.status == "connected"])
         except:
             connected_drones = 0
         
@@ -104,6 +95,12 @@ class SystemService:
             List of DroneStatus objects
         """
         try:
+            # Shared fleet snapshot: built once per tick for all readers
+            snapshotter = getattr(drone_manager, "status_snapshot", None)
+            if snapshotter is not None:
+                snapshot = await snapshotter.get_snapshot()
+                return list(snapshot.statuses.values())
+            
             drones = await drone_manager.get_available_drones()
             statuses = []
             
@@ -244,31 +241,19 @@ class SystemService:
         Returns:
             Dictionary with performance information
         """
-        # CPU information
-        cpu_count = psutil.cpu_count()
-        cpu_freq = psutil.cpu_freq()
-        cpu_percent_per_core = psutil.cpu_percent(percpu=True)
-        
-        # Memory information
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        
-        # Disk information
-        disk = psutil.disk_usage('/')
-        disk_io = psutil.disk_io_counters()
-        
-        # Network information
-        network_io = psutil.net_io_counters()
-        
-        # Process information
-        process_count = len(psutil.pids())
+        snapshot = self.sampler.latest()
+        memory = snapshot.memory
+        swap = snapshot.swap
+        disk = snapshot.disk
+        disk_io = snapshot.disk_io
+        network_io = snapshot.network
         
         return {
             "cpu": {
-                "count": cpu_count,
-                "frequency_mhz": cpu_freq.current if cpu_freq else None,
-                "usage_percent": round(psutil.cpu_percent(), 1),
-                "usage_per_core": [round(p, 1) for p in cpu_percent_per_core]
+                "count": snapshot.cpu_count,
+                "frequency_mhz": snapshot.cpu_frequency_mhz,
+                "usage_percent": round(snapshot.cpu_percent, 1),
+                "usage_per_core": [round(p, 1) for p in snapshot.cpu_percent_per_core]
             },
             "memory": {
                 "total_gb": round(memory.total / (1024**3), 2),
@@ -293,10 +278,12 @@ class SystemService:
                 "bytes_sent_mb": round(network_io.bytes_sent / (1024**2), 2),
                 "bytes_recv_mb": round(network_io.bytes_recv / (1024**2), 2),
                 "packets_sent": network_io.packets_sent,
-                "packets_recv": network_io.packets_recv
+                "packets_recv": network_io.packets_recv,
+                "sent_bytes_per_second": round(snapshot.network_rates["sent"], 1),
+                "recv_bytes_per_second": round(snapshot.network_rates["recv"], 1)
             },
             "processes": {
-                "count": process_count
+                "count": snapshot.process_count
             },
             "uptime_seconds": int(time.time() - self.start_time),
             "timestamp": datetime.now()
@@ -0,0 +1,440 @@
+"""
+Tello Command Transport - Asyncio-native UDP command client for Tello SDK
+Awaitable ok/error responses with per-drone sequencing, timeouts and retries, without threads
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tello SDK のコマンドポート
+TELLO_COMMAND_PORT = 8889
+
+# 再送しても安全なコマンド（問い合わせ・モード切替）
+IDEMPOTENT_COMMANDS = ("command", "streamon", "streamoff", "speed")
+
+
+class TelloCommandError(ValueError):
+    """Tello がエラー応答を返した"""
+
+
+def is_idempotent(command: str) -> bool:
+    """再送しても副作用が重複しないコマンドか"""
+    return command.endswith("?") or command.split(" ", 1)[0] in IDEMPOTENT_COMMANDS
+
+
+@dataclass
+class InFlightCommand:
+    """応答待ちのコマンド"""
+    drone_ip: str
+    command: str
+    future: asyncio.Future
+    sent_at: float = field(default_factory=time.perf_counter)
+    attempt: int = 1
+
+
+class TelloCommandProtocol(asyncio.DatagramProtocol):
+    """コマンドソケットの DatagramProtocol（受信は transport に委譲）"""
+
+    def __init__(self, owner: "TelloCommandTransport"):
+        self.owner = owner
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.owner._on_response(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        logger.warning(f"Tello command socket error: {exc}")
+
+
+class TelloCommandTransport:
+    """
+    全ドローン共通のUDPコマンドトランスポート
+
+    Tello の応答にはコマンドIDがないため、1台につき同時に1コマンドだけを送る
+    （ドローンごとのロックで順序付け）。異なるドローンへのコマンドは1つのソケットで
+    並行に送信でき、応答は送信元IPで振り分ける。
+
+    タイムアウトした送信の応答は後から届く可能性があるため、そのドローンに「未回収の応答」を
+    記録する。次のコマンドは未回収の応答が届く（破棄する）か待ち時間を過ぎるまで送信しない。
+    これにより遅れて届いた ok が別のコマンドの応答として扱われることはない。
+    """
+
+    def __init__(self, local_host: str = "0.0.0.0", local_port: int = 0,
+                 timeout: float = 7.0, retries: int = 1, max_latency_samples: int = 200):
+        """
+        初期化
+
+        Args:
+            local_host: 送信元アドレス
+            local_port: 送信元ポート（0は自動割り当て）
+            timeout: 1回の送信あたりの応答待ち時間（秒）
+            retries: タイムアウト時の再送回数（再送安全なコマンドのみ）
+            max_latency_samples: 保持するレイテンシサンプル数
+        """
+        self.local_host = local_host
+        self.local_port = local_port
+        self.timeout = timeout
+        self.retries = retries
+
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._in_flight: Dict[str, InFlightCommand] = {}
+        # ドローンIP -> 未回収の応答の期限（タイムアウトした送信ごとに1つ）
+        self._strays: Dict[str, Deque[float]] = {}
+        self._stray_events: Dict[str, asyncio.Event] = {}
+
+        # 統計情報
+        self.commands_sent = 0
+        self.responses_ok = 0
+        self.responses_error = 0
+        self.timeouts = 0
+        self.retransmissions = 0
+        self.unexpected_responses = 0
+        self.stray_responses = 0
+        self.stray_waits = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=max_latency_samples)
+
+    @property
+    def is_running(self) -> bool:
+        """ソケットが開いているか"""
+        return self._transport is not None
+
+    @property
+    def local_address(self) -> Optional[Tuple[str, int]]:
+        """バインド済みアドレス"""
+        if self._transport is None:
+            return None
+        return self._transport.get_extra_info("sockname")
+
+    async def start(self) -> None:
+        """ソケットを開く（開始済みの場合は何もしない）"""
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: TelloCommandProtocol(self),
+            local_addr=(self.local_host, self.local_port)
+        )
+        self._transport = transport
+        logger.info(f"Tello command transport started on {self.local_address}")
+
+    def close(self) -> None:
+        """ソケットを閉じ、応答待ちのコマンドを失敗させる"""
+        for in_flight in list(self._in_flight.values()):
+            if not in_flight.future.done():
+                in_flight.future.set_exception(ConnectionError("Command transport closed"))
+        self._in_flight.clear()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            logger.info("Tello command transport closed")
+
+    def _on_response(self, data: bytes, addr: Tuple[str, int]) -> None:
+        """応答を送信元IPの応答待ちコマンドに渡す"""
+        strays = self._live_strays(addr[0])
+        if strays:
+            # タイムアウトした送信への遅延応答（応答は送信順に届くため、最も古いものとみなす）
+            strays.popleft()
+            self.stray_responses += 1
+            self.unexpected_responses += 1
+            logger.debug(f"Discarded late Tello response from {addr[0]}: {data!r}")
+            event = self._stray_events.get(addr[0])
+            if event is not None:
+                event.set()
+            return
+        in_flight = self._in_flight.get(addr[0])
+        if in_flight is None or in_flight.future.done():
+            # タイムアウト後に届いた応答など
+            self.unexpected_responses += 1
+            logger.debug(f"Unexpected Tello response from {addr[0]}: {data!r}")
+            return
+        in_flight.future.set_result(data.decode("utf-8", errors="replace").strip())
+
+    def _live_strays(self, drone_ip: str) -> Optional[Deque[float]]:
+        """期限内の未回収の応答（期限切れは取り除く）"""
+        strays = self._strays.get(drone_ip)
+        if strays is None:
+            return None
+        now = time.monotonic()
+        while strays and strays[0] <= now:
+            strays.popleft()
+        if not strays:
+            del self._strays[drone_ip]
+            return None
+        return strays
+
+    def _mark_strays(self, drone_ip: str, count: int, window: float) -> None:
+        """タイムアウトした送信の応答を未回収として記録"""
+        if count <= 0:
+            return
+        # 短いタイムアウトで送ったコマンドでも、遅延応答は既定のタイムアウト程度までは届きうる
+        expires_at = time.monotonic() + max(window, self.timeout)
+        self._strays.setdefault(drone_ip, deque()).extend([expires_at] * count)
+
+    async def _settle(self, drone_ip: str) -> None:
+        """未回収の応答が届く（破棄する）か期限を過ぎるまで待つ"""
+        waited = False
+        while True:
+            strays = self._live_strays(drone_ip)
+            if not strays:
+                return
+            if not waited:
+                self.stray_waits += 1
+                waited = True
+            event = self._stray_events.setdefault(drone_ip, asyncio.Event())
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), timeout=max(0.0, strays[0] - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    def _lock_for(self, drone_ip: str) -> asyncio.Lock:
+        lock = self._locks.get(drone_ip)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[drone_ip] = lock
+        return lock
+
+    async def send_command(self, drone_ip: str, command: str, timeout: Optional[float] = None,
+                           retries: Optional[int] = None, port: int = TELLO_COMMAND_PORT) -> str:
+        """
+        コマンドを送信して応答を待つ
+
+        Args:
+            drone_ip: ドローンのIP
+            command: SDKコマンド文字列（例: "takeoff", "battery?"）
+            timeout: 応答待ち時間（秒）
+            retries: 再送回数（未指定時は再送安全なコマンドのみ self.retries）
+            port: 送信先ポート
+
+        Returns:
+            str: 応答文字列（"ok" または問い合わせ結果）
+
+        Raises:
+            TelloCommandError: エラー応答
+            asyncio.TimeoutError: 全ての試行でタイムアウト
+        """
+        if self._transport is None:
+            raise ConnectionError("Command transport not started")
+
+        timeout = self.timeout if timeout is None else timeout
+        if retries is None:
+            retries = self.retries if is_idempotent(command) else 0
+
+        async with self._lock_for(drone_ip):
+            # 前のコマンドの遅延応答をこのコマンドの応答と取り違えないよう、先に回収する
+            await self._settle(drone_ip)
+
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            payload = command.encode("utf-8")
+            unanswered = 0
+
+            for attempt in range(1, retries + 2):
+                in_flight = InFlightCommand(
+                    drone_ip=drone_ip, command=command,
+                    future=loop.create_future(), attempt=attempt
+                )
+                self._in_flight[drone_ip] = in_flight
+                self._transport.sendto(payload, (drone_ip, port))
+                self.commands_sent += 1
+                unanswered += 1
+                if attempt > 1:
+                    self.retransmissions += 1
+
+                try:
+                    response = await asyncio.wait_for(in_flight.future, timeout=timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    logger.warning(f"Tello command timeout: {drone_ip} '{command}' (attempt {attempt})")
+                    continue
+                finally:
+                    if self._in_flight.get(drone_ip) is in_flight:
+                        del self._in_flight[drone_ip]
+
+                # 再送した場合、先に送った分の応答が後から届く可能性がある
+                self._mark_strays(drone_ip, unanswered - 1, timeout)
+                self.latencies_ms.append((time.perf_counter() - started) * 1000)
+                if response.lower().startswith("error"):
+                    self.responses_error += 1
+                    raise TelloCommandError(f"Tello {drone_ip} rejected '{command}': {response}")
+                self.responses_ok += 1
+                return response
+
+            self._mark_strays(drone_ip, unanswered, timeout)
+            raise asyncio.TimeoutError(f"No response from Tello {drone_ip} for '{command}'")
+
+    def get_in_flight(self) -> List[Dict[str, Any]]:
+        """応答待ちコマンドの一覧"""
+        now = time.perf_counter()
+        return [
+            {
+                "drone_ip": in_flight.drone_ip,
+                "command": in_flight.command,
+                "attempt": in_flight.attempt,
+                "waiting_ms": round((now - in_flight.sent_at) * 1000, 3)
+            }
+            for in_flight in self._in_flight.values()
+        ]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        latencies = sorted(self.latencies_ms)
+        return {
+            "running": self.is_running,
+            "commands_sent": self.commands_sent,
+            "responses_ok": self.responses_ok,
+            "responses_error": self.responses_error,
+            "timeouts": self.timeouts,
+            "retransmissions": self.retransmissions,
+            "unexpected_responses": self.unexpected_responses,
+            "stray_responses": self.stray_responses,
+            "stray_waits": self.stray_waits,
+            "pending_strays": {ip: len(strays) for ip, strays in self._strays.items()},
+            "in_flight": self.get_in_flight(),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_latency_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0.0
+        }
+
+
+class TelloCommandClient:
+    """1台分のTello SDKコマンドクライアント"""
+
+    MOVE_DIRECTIONS = ("up", "down", "left", "right", "forward", "back")
+
+    def __init__(self, transport: TelloCommandTransport, drone_ip: str, port: int = TELLO_COMMAND_PORT):
+        """
+        初期化
+
+        Args:
+            transport: 共有コマンドトランスポート
+            drone_ip: ドローンのIP
+            port: ドローンのコマンドポート
+        """
+        self.transport = transport
+        self.drone_ip = drone_ip
+        self.port = port
+
+    async def send(self, command: str, timeout: Optional[float] = None, retries: Optional[int] = None) -> str:
+        """コマンドを送信して応答を返す"""
+        return await self.transport.send_command(self.drone_ip, command, timeout, retries, self.port)
+
+    async def enter_sdk_mode(self) -> None:
+        """SDKモードに切り替え"""
+        await self.send("command")
+
+    async def takeoff(self) -> None:
+        """離陸"""
+        await self.send("takeoff", timeout=20.0)
+
+    async def land(self) -> None:
+        """着陸"""
+        await self.send("land", timeout=20.0)
+
+    async def emergency(self) -> None:
+        """モーター緊急停止"""
+        await self.send("emergency")
+
+    async def move(self, direction: str, distance_cm: int) -> None:
+        """指定方向へ移動（20〜500cm）"""
+        if direction not in self.MOVE_DIRECTIONS:
+            raise ValueError(f"Invalid direction: {direction}")
+        if not 20 <= distance_cm <= 500:
+            raise ValueError(f"Invalid distance: {distance_cm}cm (20-500)")
+        await self.send(f"{direction} {int(distance_cm)}")
+
+    async def rotate(self, degrees: int) -> None:
+        """回転（正: 時計回り、負: 反時計回り）"""
+        command = "cw" if degrees > 0 else "ccw"
+        await self.send(f"{command} {int(abs(degrees))}")
+
+    async def get_battery(self) -> int:
+        """バッテリー残量（%）を問い合わせ"""
+        return int(await self.send("battery?"))
+
+
+class MockTelloServer:
+    """
+    ローカルのTello模擬UDPサーバー（テスト・開発用）
+
+    host に 127.0.0.0/8 の異なるアドレスを使えば1台のマシンで複数ドローンを模擬できる。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けアドレス（ドローンのIP）
+            port: 待ち受けポート
+            delay: 応答までの遅延（秒）
+        """
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.battery = 90
+        self.received: List[str] = []
+        self.drop_next = 0
+        self.error_commands: Dict[str, str] = {}
+
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._tasks: set = set()
+        self.active = 0
+        self.max_active = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """待ち受けアドレス"""
+        return (self.host, self.port)
+
+    async def start(self) -> None:
+        """待ち受けを開始"""
+        loop = asyncio.get_running_loop()
+        server = self
+
+        class _Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+                task = asyncio.ensure_future(server._handle(data.decode("utf-8"), addr))
+                server._tasks.add(task)
+                task.add_done_callback(server._tasks.discard)
+
+        self._transport, _ = await loop.create_datagram_endpoint(_Protocol, local_addr=(self.host, self.port))
+        self.port = self._transport.get_extra_info("sockname")[1]
+
+    def _respond(self, command: str) -> str:
+        """コマンドに対する応答を作成"""
+        name = command.split(" ", 1)[0]
+        if name in self.error_commands:
+            return self.error_commands[name]
+        if command == "battery?":
+            return str(self.battery)
+        return "ok"
+
+    async def _handle(self, command: str, addr: Tuple[str, int]) -> None:
+        """1コマンドを処理"""
+        self.received.append(command)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.drop_next > 0:
+                self.drop_next -= 1
+                return
+            if self._transport is not None:
+                self._transport.sendto(self._respond(command).encode("utf-8"), addr)
+        finally:
+            self.active -= 1
+
+    async def stop(self) -> None:
+        """待ち受けを停止"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
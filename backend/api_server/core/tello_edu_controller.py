@@ -11,6 +11,10 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
 
+from .tello_command_transport import TelloCommandClient, TelloCommandTransport
+from .tello_telemetry import TelloTelemetry, TelloTelemetryListener
+from .tello_video import TELLO_VIDEO_PORT, TelloVideoStream
+
 try:
     from djitellopy import Tello
 except ImportError:
@@ -34,13 +38,17 @@ class TelloEDUController:
     DroneSimulatorと同じインターフェースを提供し、実機制御を行う
     """
     
-    def __init__(self, drone_id: str = "tello_001", ip_address: Optional[str] = None):
+    def __init__(self, drone_id: str = "tello_001", ip_address: Optional[str] = None,
+                 telemetry: Optional[TelloTelemetryListener] = None,
+                 command_transport: Optional[TelloCommandTransport] = None):
         """
         初期化
         
         Args:
             drone_id: ドローンID
             ip_address: Tello EDUのIPアドレス（Noneの場合は自動検出）
+            telemetry: 共有テレメトリ受信器（指定時はポーリングスレッドを使わない）
+            command_transport: 共有非同期コマンドトランスポート（指定時は *_async メソッドで使用）
         """
         if Tello is None:
             raise ImportError("djitellopy library is required for TelloEDUController")
@@ -49,6 +57,12 @@ class TelloEDUController:
         self.ip_address = ip_address
         self.tello: Optional[Tello] = None
         self.connection_state = TelloConnectionState.DISCONNECTED
+        self.telemetry = telemetry
+        self.command_client: Optional[TelloCommandClient] = (
+            TelloCommandClient(command_transport, ip_address)
+            if command_transport is not None and ip_address else None
+        )
+        self.video_stream: Optional[TelloVideoStream] = None
         
         # 状態管理
         self._current_position = (0.0, 0.0, 0.0)  # x, y, z (m)
@@ -116,6 +130,8 @@ class TelloEDUController:
             bool: 切断成功フラグ
         """
         try:
+            self._close_video_stream()
+            
             if self.tello and self._connection_established:
                 self.tello.end()
             
@@ -140,6 +156,13 @@ class TelloEDUController:
             return
         
         self._is_running = True
+        
+        # 共有テレメトリ受信器がある場合は状態ポートのプッシュ通知を利用
+        if self.telemetry is not None and self.ip_address:
+            self.telemetry.register_drone(self.drone_id, self.ip_address)
+            logger.info(f"State monitoring via telemetry listener: {self.ip_address}")
+            return
+        
         self._state_update_thread = threading.Thread(target=self._state_update_loop, daemon=True)
         self._state_update_thread.start()
         
@@ -155,8 +178,11 @@ class TelloEDUController:
             return
         
         self._is_running = False
+        if self.telemetry is not None:
+            self.telemetry.unregister_drone(self.drone_id)
         if self._state_update_thread:
             self._state_update_thread.join(timeout=1.0)
+            self._state_update_thread = None
         
         logger.info("State monitoring stopped")
     
@@ -291,41 +317,13 @@ class TelloEDUController:
             return False
         
         try:
-            # 現在位置からの相対移動量を計算
-            current_x, current_y, current_z = self._current_position
-            dx = x - current_x
-            dy = y - current_y
-            dz = z - current_z
-            
-            # cm単位に変換
-            dx_cm = int(dx * 100)
-            dy_cm = int(dy * 100)
-            dz_cm = int(dz * 100)
-            
-            # 移動範囲制限（Tello EDUの制限）
-            max_move_cm = 500  # 5m
-            if abs(dx_cm) > max_move_cm or abs(dy_cm) > max_move_cm or abs(dz_cm) > max_move_cm:
-                logger.warning(f"Move distance too large: dx={dx_cm}, dy={dy_cm}, dz={dz_cm}")
+            moves = self._plan_move(x, y, z)
+            if moves is None:
                 return False
             
             # 移動実行
-            if abs(dx_cm) > 20:  # 20cm以上の移動のみ実行
-                if dx_cm > 0:
-                    self.tello.move_right(abs(dx_cm))
-                else:
-                    self.tello.move_left(abs(dx_cm))
-            
-            if abs(dy_cm) > 20:
-                if dy_cm > 0:
-                    self.tello.move_forward(abs(dy_cm))
-                else:
-                    self.tello.move_back(abs(dy_cm))
-            
-            if abs(dz_cm) > 20:
-                if dz_cm > 0:
-                    self.tello.move_up(abs(dz_cm))
-                else:
-                    self.tello.move_down(abs(dz_cm))
+            for direction, distance_cm in moves:
+                getattr(self.tello, f"move_{direction}")(distance_cm)
             
             # 位置を更新
             self._current_position = (x, y, z)
@@ -337,6 +335,37 @@ class TelloEDUController:
             logger.error(f"Move failed: {self.drone_id}, Error: {e}")
             return False
     
+    def _plan_move(self, x: float, y: float, z: float) -> Optional[List[Tuple[str, int]]]:
+        """
+        目標位置までの移動コマンド列を計算
+        
+        Returns:
+            Optional[List[Tuple[str, int]]]: (方向, 距離cm) のリスト。移動範囲超過時は None
+        """
+        # 現在位置からの相対移動量を計算
+        current_x, current_y, current_z = self._current_position
+        
+        # cm単位に変換
+        dx_cm = int((x - current_x) * 100)
+        dy_cm = int((y - current_y) * 100)
+        dz_cm = int((z - current_z) * 100)
+        
+        # 移動範囲制限（Tello EDUの制限）
+        max_move_cm = 500  # 5m
+        if abs(dx_cm) > max_move_cm or abs(dy_cm) > max_move_cm or abs(dz_cm) > max_move_cm:
+            logger.warning(f"Move distance too large: dx={dx_cm}, dy={dy_cm}, dz={dz_cm}")
+            return None
+        
+        moves: List[Tuple[str, int]] = []
+        # 20cm以上の移動のみ実行
+        if abs(dx_cm) > 20:
+            moves.append(("right" if dx_cm > 0 else "left", abs(dx_cm)))
+        if abs(dy_cm) > 20:
+            moves.append(("forward" if dy_cm > 0 else "back", abs(dy_cm)))
+        if abs(dz_cm) > 20:
+            moves.append(("up" if dz_cm > 0 else "down", abs(dz_cm)))
+        return moves
+    
     def rotate_to_yaw(self, yaw_degrees: float) -> bool:
         """
         指定角度に回転
@@ -356,11 +385,7 @@ class TelloEDUController:
             return False
         
         try:
-            # 角度を-180〜180の範囲に正規化
-            while yaw_degrees > 180:
-                yaw_degrees -= 360
-            while yaw_degrees < -180:
-                yaw_degrees += 360
+            yaw_degrees = self._normalize_yaw(yaw_degrees)
             
             # 回転実行
             if abs(yaw_degrees) > 10:  # 10度以上の回転のみ実行
@@ -376,18 +401,229 @@ class TelloEDUController:
             logger.error(f"Rotation failed: {self.drone_id}, Error: {e}")
             return False
     
+    @staticmethod
+    def _normalize_yaw(yaw_degrees: float) -> float:
+        """角度を-180〜180の範囲に正規化"""
+        while yaw_degrees > 180:
+            yaw_degrees -= 360
+        while yaw_degrees < -180:
+            yaw_degrees += 360
+        return yaw_degrees
+    
+    # 非同期コマンド（共有トランスポート経由、スレッドを使わない）
+    
+    def _can_command_async(self, action: str) -> bool:
+        """非同期コマンドを送信できるか"""
+        if self.command_client is None:
+            logger.warning(f"{action} failed: No command transport for {self.drone_id}")
+            return False
+        if not self._connection_established:
+            logger.warning(f"{action} failed: Not connected to Tello")
+            return False
+        return True
+    
+    async def takeoff_async(self) -> bool:
+        """離陸（非同期）"""
+        if not self._can_command_async("Takeoff"):
+            return False
+        
+        if self._battery_level < 10:
+            logger.warning("Takeoff failed: Low battery")
+            return False
+        
+        try:
+            await self.command_client.takeoff()
+            self._is_flying = True
+            self._flight_state = "flying"
+            self._current_position = (self._current_position[0], self._current_position[1], 1.5)
+            
+            logger.info(f"Takeoff successful: {self.drone_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Takeoff failed: {self.drone_id}, Error: {e}")
+            return False
+    
+    async def land_async(self) -> bool:
+        """着陸（非同期）"""
+        if not self._can_command_async("Land"):
+            return False
+        
+        try:
+            await self.command_client.land()
+            self._is_flying = False
+            self._flight_state = "landed"
+            self._current_position = (self._current_position[0], self._current_position[1], 0.0)
+            
+            logger.info(f"Landing successful: {self.drone_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Landing failed: {self.drone_id}, Error: {e}")
+            return False
+    
+    async def emergency_land_async(self) -> None:
+        """緊急着陸（非同期）"""
+        if not self._can_command_async("Emergency land"):
+            return
+        
+        try:
+            await self.command_client.emergency()
+            self._is_flying = False
+            self._flight_state = "emergency"
+            
+            logger.warning(f"Emergency landing executed: {self.drone_id}")
+            
+        except Exception as e:
+            logger.error(f"Emergency landing failed: {self.drone_id}, Error: {e}")
+    
+    async def move_to_position_async(self, x: float, y: float, z: float) -> bool:
+        """指定座標に移動（非同期）"""
+        if not self._can_command_async("Move"):
+            return False
+        
+        if not self._is_flying:
+            logger.warning("Move failed: Not flying")
+            return False
+        
+        try:
+            moves = self._plan_move(x, y, z)
+            if moves is None:
+                return False
+            
+            for direction, distance_cm in moves:
+                await self.command_client.move(direction, distance_cm)
+            
+            self._current_position = (x, y, z)
+            
+            logger.info(f"Move successful: {self.drone_id} to ({x:.2f}, {y:.2f}, {z:.2f})")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Move failed: {self.drone_id}, Error: {e}")
+            return False
+    
+    async def rotate_to_yaw_async(self, yaw_degrees: float) -> bool:
+        """指定角度に回転（非同期）"""
+        if not self._can_command_async("Rotate"):
+            return False
+        
+        if not self._is_flying:
+            logger.warning("Rotate failed: Not flying")
+            return False
+        
+        try:
+            yaw_degrees = self._normalize_yaw(yaw_degrees)
+            if abs(yaw_degrees) > 10:  # 10度以上の回転のみ実行
+                await self.command_client.rotate(int(yaw_degrees))
+            
+            logger.info(f"Rotation successful: {self.drone_id} to {yaw_degrees} degrees")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Rotation failed: {self.drone_id}, Error: {e}")
+            return False
+    
+    # 映像ストリーム
+    
+    def _open_video_stream(self, port: int) -> TelloVideoStream:
+        """映像受信を開始（streamon 前に待ち受けて最初のキーフレームを取りこぼさない）"""
+        if self.video_stream is not None and self.video_stream.is_streaming:
+            return self.video_stream
+        stream = TelloVideoStream(self.drone_id, port=port, source_ip=self.ip_address)
+        stream.start_stream()
+        self.video_stream = stream
+        return stream
+    
+    def _close_video_stream(self) -> None:
+        """映像受信を停止"""
+        if self.video_stream is not None:
+            self.video_stream.stop_stream()
+            self.video_stream = None
+    
+    def start_video_stream(self, port: int = TELLO_VIDEO_PORT) -> TelloVideoStream:
+        """
+        映像ストリームを開始
+        
+        Returns:
+            TelloVideoStream: デコード済みフレームを提供するストリーム
+        """
+        if not self._connection_established or not self.tello:
+            raise ValueError("Not connected to Tello")
+        
+        stream = self._open_video_stream(port)
+        try:
+            self.tello.streamon()
+        except Exception:
+            self._close_video_stream()
+            raise
+        
+        logger.info(f"Video stream started: {self.drone_id}")
+        return stream
+    
+    async def start_video_stream_async(self, port: int = TELLO_VIDEO_PORT) -> TelloVideoStream:
+        """映像ストリームを開始（非同期）"""
+        if not self._can_command_async("Video stream"):
+            raise ValueError("Not connected to Tello")
+        
+        stream = self._open_video_stream(port)
+        try:
+            await self.command_client.send("streamon")
+        except Exception:
+            self._close_video_stream()
+            raise
+        
+        logger.info(f"Video stream started: {self.drone_id}")
+        return stream
+    
+    def stop_video_stream(self) -> None:
+        """映像ストリームを停止"""
+        try:
+            if self.tello and self._connection_established:
+                self.tello.streamoff()
+        except Exception as e:
+            logger.warning(f"streamoff failed: {self.drone_id}, Error: {e}")
+        finally:
+            self._close_video_stream()
+    
+    async def stop_video_stream_async(self) -> None:
+        """映像ストリームを停止（非同期）"""
+        try:
+            if self.command_client is not None and self._connection_established:
+                await self.command_client.send("streamoff")
+        except Exception as e:
+            logger.warning(f"streamoff failed: {self.drone_id}, Error: {e}")
+        finally:
+            self._close_video_stream()
+    
     # 状態取得メソッド
     
+    def _get_telemetry(self) -> Optional[TelloTelemetry]:
+        """最新テレメトリを取得（受信器未使用・未受信・古い場合は None）"""
+        if self.telemetry is None or not self.ip_address:
+            return None
+        return self.telemetry.get_state(self.ip_address)
+    
     def get_current_position(self) -> Tuple[float, float, float]:
         """現在位置を取得"""
+        telemetry = self._get_telemetry()
+        if telemetry is not None:
+            x, y, _ = self._current_position
+            return (x, y, telemetry.height_cm / 100.0)
         return self._current_position
     
     def get_current_velocity(self) -> Tuple[float, float, float]:
         """現在速度を取得"""
+        telemetry = self._get_telemetry()
+        if telemetry is not None:
+            return telemetry.velocity
         return self._current_velocity
     
     def get_battery_level(self) -> float:
         """バッテリー残量を取得"""
+        telemetry = self._get_telemetry()
+        if telemetry is not None:
+            self._battery_level = telemetry.battery
         return self._battery_level
     
     def get_flight_state(self) -> str:
@@ -442,7 +678,19 @@ class TelloEDUController:
             "is_flying": self._is_flying
         }
         
-        if self._connection_established and self.tello:
+        telemetry = self._get_telemetry()
+        if telemetry is not None:
+            # 状態ポートから受信済みの値を使用（ドローンへの問い合わせなし）
+            info.update({
+                "battery_level": telemetry.battery,
+                "height": telemetry.height_cm,
+                "temperature": telemetry.temperature,
+                "attitude": telemetry.attitude,
+                "speed": dict(zip(("x", "y", "z"), telemetry.velocity)),
+                "barometer": telemetry.values.get("baro"),
+                "telemetry_age": round(telemetry.age, 3)
+            })
+        elif self._connection_established and self.tello:
             try:
                 # Tello固有の情報を取得
                 info.update({
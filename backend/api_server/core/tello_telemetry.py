@@ -0,0 +1,414 @@
+"""
+Tello Telemetry - Push-based state telemetry over the Tello state port (UDP 8890)
+One asyncio datagram endpoint receives the ~10 Hz state of every drone and demultiplexes it by source IP
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    from djitellopy import tello as djitellopy_tello
+except ImportError:
+    # Fallback for environments where djitellopy is not available
+    djitellopy_tello = None
+
+logger = logging.getLogger(__name__)
+
+# Tello SDK の状態送信ポート
+TELLO_STATE_PORT = 8890
+
+# 状態パケットのフィールド既定値（SDK 2.0 の順序）
+DEFAULT_TELLO_STATE: Dict[str, Union[int, float]] = {
+    "mid": -1, "x": 0, "y": 0, "z": 0,
+    "pitch": 0, "roll": 0, "yaw": 0,
+    "vgx": 0, "vgy": 0, "vgz": 0,
+    "templ": 60, "temph": 62,
+    "tof": 10, "h": 0, "bat": 100,
+    "baro": 0.0, "time": 0,
+    "agx": 0.0, "agy": 0.0, "agz": -1000.0
+}
+
+
+def _parse_value(raw: str) -> Union[int, float, str]:
+    """数値に変換できる値は数値に変換"""
+    try:
+        return int(raw)
+    except ValueError:
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+
+
+def parse_tello_state(data: bytes) -> Dict[str, Union[int, float, str]]:
+    """
+    Tello 状態パケットを解析
+
+    例: b"pitch:0;roll:0;yaw:0;vgx:0;...;bat:87;baro:12.34;time:0;\\r\\n"
+
+    Returns:
+        Dict[str, Union[int, float, str]]: フィールド名 -> 値
+    """
+    text = data.decode("ascii", errors="strict").strip()
+    if not text:
+        raise ValueError("Empty state packet")
+
+    values: Dict[str, Union[int, float, str]] = {}
+    for item in text.split(";"):
+        if not item:
+            continue
+        key, sep, raw = item.partition(":")
+        if not sep or not key:
+            raise ValueError(f"Malformed state field: {item!r}")
+        values[key.strip()] = _parse_value(raw.strip())
+    return values
+
+
+def format_tello_state(values: Dict[str, Any]) -> bytes:
+    """状態辞書を Tello 状態パケット形式に変換"""
+    return ("".join(f"{key}:{value};" for key, value in values.items()) + "\r\n").encode("ascii")
+
+
+@dataclass(frozen=True)
+class TelloTelemetry:
+    """1パケット分のテレメトリ（不変。更新時は新しいオブジェクトに差し替える）"""
+    source_ip: str
+    values: Dict[str, Union[int, float, str]]
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        """受信からの経過時間（秒）"""
+        return time.monotonic() - self.received_at
+
+    def _number(self, key: str, default: float = 0.0) -> float:
+        value = self.values.get(key, default)
+        return float(value) if isinstance(value, (int, float)) else default
+
+    @property
+    def battery(self) -> float:
+        """バッテリー残量（%）"""
+        return self._number("bat", 0.0)
+
+    @property
+    def height_cm(self) -> int:
+        """高度（cm）"""
+        return int(self._number("h"))
+
+    @property
+    def attitude(self) -> Dict[str, float]:
+        """姿勢（度）"""
+        return {"pitch": self._number("pitch"), "roll": self._number("roll"), "yaw": self._number("yaw")}
+
+    @property
+    def velocity(self) -> Tuple[float, float, float]:
+        """速度（m/s、Tello は dm/s で送信）"""
+        return (self._number("vgx") / 10.0, self._number("vgy") / 10.0, self._number("vgz") / 10.0)
+
+    @property
+    def temperature(self) -> float:
+        """温度（℃、最低・最高の平均）"""
+        return (self._number("templ") + self._number("temph")) / 2.0
+
+
+TelemetryCallback = Callable[[str, TelloTelemetry], None]
+
+
+class TelloStateProtocol(asyncio.DatagramProtocol):
+    """状態ポートの DatagramProtocol（受信は listener に委譲）"""
+
+    def __init__(self, listener: "TelloTelemetryListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.listener._on_datagram(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        logger.warning(f"Tello state socket error: {exc}")
+
+
+class TelloTelemetryListener:
+    """
+    全ドローン共通のテレメトリ受信器
+
+    1つのソケットで全ドローンの状態を受信し、送信元IPごとに最新状態を保持する。
+    状態は不変オブジェクトの差し替えで更新するため、読み手（別スレッドを含む）はロック不要。
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = TELLO_STATE_PORT, stale_after: float = 1.0):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けアドレス
+            port: 待ち受けポート
+            stale_after: この秒数を超えて更新がない状態は古いとみなす
+        """
+        self.host = host
+        self.port = port
+        self.stale_after = stale_after
+
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._states: Dict[str, TelloTelemetry] = {}
+        self._drone_ips: Dict[str, str] = {}
+        self._callbacks: List[TelemetryCallback] = []
+
+        # 統計情報
+        self.packets_received = 0
+        self.parse_errors = 0
+        self.packets_by_source: Dict[str, int] = {}
+
+    @property
+    def is_running(self) -> bool:
+        """受信中か"""
+        return self._transport is not None
+
+    @property
+    def local_address(self) -> Optional[Tuple[str, int]]:
+        """バインド済みアドレス（ポート0指定時の実ポート確認用）"""
+        if self._transport is None:
+            return None
+        return self._transport.get_extra_info("sockname")
+
+    async def start(self) -> None:
+        """受信を開始（開始済みの場合は何もしない）"""
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: TelloStateProtocol(self),
+            local_addr=(self.host, self.port)
+        )
+        self._transport = transport
+        self.port = transport.get_extra_info("sockname")[1]
+        logger.info(f"Tello telemetry listener started on {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        """受信を停止"""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            logger.info("Tello telemetry listener stopped")
+
+    def register_drone(self, drone_id: str, ip_address: str) -> None:
+        """ドローンIDと送信元IPを対応付け"""
+        self._drone_ips[drone_id] = ip_address
+
+    def unregister_drone(self, drone_id: str) -> None:
+        """ドローンIDの対応付けを解除"""
+        ip_address = self._drone_ips.pop(drone_id, None)
+        if ip_address is not None:
+            self._states.pop(ip_address, None)
+
+    def add_callback(self, callback: TelemetryCallback) -> None:
+        """受信ごとに呼ばれるコールバックを登録 (source_ip, telemetry)"""
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: TelemetryCallback) -> bool:
+        """コールバックを登録解除"""
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+            return True
+        return False
+
+    def _on_datagram(self, data: bytes, addr: Tuple[str, int]) -> None:
+        """受信パケットを解析して最新状態を差し替え"""
+        source_ip = addr[0]
+        try:
+            values = parse_tello_state(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            self.parse_errors += 1
+            logger.debug(f"Invalid Tello state packet from {source_ip}: {e}")
+            return
+
+        telemetry = TelloTelemetry(source_ip=source_ip, values=values)
+        self._states[source_ip] = telemetry
+        self.packets_received += 1
+        self.packets_by_source[source_ip] = self.packets_by_source.get(source_ip, 0) + 1
+
+        for callback in self._callbacks:
+            try:
+                callback(source_ip, telemetry)
+            except Exception as e:
+                logger.error(f"Telemetry callback error: {e}")
+
+    def get_state(self, key: str, include_stale: bool = False) -> Optional[TelloTelemetry]:
+        """
+        最新テレメトリを取得
+
+        Args:
+            key: ドローンIDまたは送信元IP
+            include_stale: 古い状態も返すか
+        """
+        ip_address = self._drone_ips.get(key, key)
+        telemetry = self._states.get(ip_address)
+        if telemetry is None:
+            return None
+        if not include_stale and telemetry.age > self.stale_after:
+            return None
+        return telemetry
+
+    def get_sources(self) -> List[str]:
+        """テレメトリを送信している送信元IP一覧"""
+        return list(self._states.keys())
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "running": self.is_running,
+            "port": self.port,
+            "packets_received": self.packets_received,
+            "parse_errors": self.parse_errors,
+            "sources": len(self._states),
+            "registered_drones": len(self._drone_ips),
+            "packets_by_source": dict(self.packets_by_source),
+            "stale_sources": [ip for ip, state in self._states.items() if state.age > self.stale_after]
+        }
+
+
+class DjitellopyStateBridge:
+    """
+    djitellopy の状態受信を TelloTelemetryListener に置き換える
+
+    djitellopy は最初の Tello 生成時に状態ポート 8890 をバインドする受信スレッドを起動するため、
+    そのままでは受信器がポートを取得できない。install() は受信スレッドを無効化し、受信器が
+    受け取った状態を djitellopy のドローンごとの状態に書き込む（Tello.connect() の状態待ちと
+    get_battery() などの取得メソッドはそのまま動作する）。最初の Tello 生成より前に呼ぶこと。
+    """
+
+    def __init__(self, listener: TelloTelemetryListener, module: Any = None):
+        """
+        初期化
+
+        Args:
+            listener: 状態ポートを受信するテレメトリ受信器
+            module: djitellopy.tello モジュール（テスト用に差し替え可能）
+        """
+        self.listener = listener
+        self.module = module if module is not None else djitellopy_tello
+        self.installed = False
+        self._original_receiver: Any = None
+        self.states_forwarded = 0
+
+    def install(self) -> bool:
+        """
+        djitellopy の状態受信スレッドを無効化して受信器から状態を渡す
+
+        Returns:
+            bool: 置き換えたか（djitellopy がない、または受信スレッドが起動済みの場合は False）
+        """
+        if self.installed:
+            return True
+        if self.module is None:
+            return False
+        if getattr(self.module, "threads_initialized", False):
+            logger.warning("djitellopy state receiver is already running; telemetry listener cannot own the state port")
+            return False
+
+        tello_class = self.module.Tello
+        self._original_receiver = tello_class.__dict__.get("udp_state_receiver")
+        tello_class.udp_state_receiver = staticmethod(self._disabled_receiver)
+        self.listener.add_callback(self._forward_state)
+        self.installed = True
+        logger.info("djitellopy state receiver replaced by the shared telemetry listener")
+        return True
+
+    def uninstall(self) -> None:
+        """djitellopy 自身の状態受信に戻す（受信器を起動できなかった場合など）"""
+        if not self.installed:
+            return
+        if self._original_receiver is not None:
+            self.module.Tello.udp_state_receiver = self._original_receiver
+        self.listener.remove_callback(self._forward_state)
+        self.installed = False
+        logger.info("djitellopy state receiver restored")
+
+    @staticmethod
+    def _disabled_receiver() -> None:
+        """djitellopy の受信スレッドの代わり（ポートをバインドせずに終了）"""
+        logger.debug("djitellopy state receiver disabled; states come from the telemetry listener")
+
+    def _forward_state(self, source_ip: str, telemetry: TelloTelemetry) -> None:
+        """受信した状態を djitellopy のドローンごとの状態に書き込む"""
+        drones = getattr(self.module, "drones", None)
+        if drones and source_ip in drones:
+            drones[source_ip]["state"] = dict(telemetry.values)
+            self.states_forwarded += 1
+
+
+class FakeTelloStateEmitter:
+    """
+    Tello の状態送信を模擬するUDP送信器（テスト・開発用）
+
+    source_ip にバインドして送信するため、127.0.0.0/8 の異なるアドレスを使えば
+    1台のマシンで複数ドローンを模擬できる。
+    """
+
+    def __init__(self, target: Tuple[str, int], source_ip: str = "127.0.0.1", rate_hz: float = 10.0):
+        """
+        初期化
+
+        Args:
+            target: 送信先 (host, port)
+            source_ip: 送信元IP
+            rate_hz: 定期送信レート
+        """
+        self.target = target
+        self.source_ip = source_ip
+        self.rate_hz = rate_hz
+        self.state: Dict[str, Any] = dict(DEFAULT_TELLO_STATE)
+
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._task: Optional[asyncio.Task] = None
+        self.packets_sent = 0
+
+    async def open(self) -> None:
+        """送信ソケットを開く"""
+        if self._transport is None:
+            loop = asyncio.get_running_loop()
+            self._transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol,
+                local_addr=(self.source_ip, 0),
+                remote_addr=self.target
+            )
+
+    async def send(self, **overrides: Any) -> None:
+        """状態を更新して1パケット送信"""
+        await self.open()
+        self.state.update(overrides)
+        self._transport.sendto(format_tello_state(self.state))
+        self.packets_sent += 1
+
+    async def send_raw(self, data: bytes) -> None:
+        """任意のバイト列を送信（異常系テスト用）"""
+        await self.open()
+        self._transport.sendto(data)
+
+    async def _run(self) -> None:
+        """定期送信ループ"""
+        interval = 1.0 / self.rate_hz
+        while True:
+            await self.send(time=self.state.get("time", 0))
+            await asyncio.sleep(interval)
+
+    async def start(self) -> None:
+        """定期送信を開始"""
+        await self.open()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """送信を停止してソケットを閉じる"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
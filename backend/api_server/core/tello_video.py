@@ -0,0 +1,640 @@
+"""
+Tello Video - H.264 decode pipeline for the Tello video port (UDP 11111)
+One receiver per video port demultiplexes UDP packets by source IP; a dedicated thread per drone reassembles
+Annex-B NAL units from its packets and decodes them into a preallocated frame ring
+"""
+
+import logging
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import av
+except ImportError:
+    # Fallback for environments where PyAV is not available
+    av = None
+
+logger = logging.getLogger(__name__)
+
+# Tello SDK の映像送信ポート
+TELLO_VIDEO_PORT = 11111
+
+# Tello は H.264 ストリームを最大1460バイトのUDPパケットに分割して送信する
+TELLO_VIDEO_PACKET_SIZE = 1460
+
+# デコード待ちパケットの上限（1ドローンあたり、約6MB）
+MAX_QUEUED_PACKETS = 4096
+
+START_CODE = b"\x00\x00\x01"
+
+# 映像を含む NAL ユニット種別（非IDRスライス / IDRスライス）
+VCL_NAL_TYPES = (1, 5)
+
+
+def nal_unit_type(nal: bytes) -> int:
+    """開始コード付き NAL ユニットの種別を取得"""
+    header = nal.find(START_CODE)
+    if header < 0 or header + 3 >= len(nal):
+        raise ValueError("Not an Annex-B NAL unit")
+    return nal[header + 3] & 0x1F
+
+
+class H264NalAssembler:
+    """
+    Annex-B バイトストリームの NAL ユニット再構成器
+
+    UDPパケットの境界は NAL ユニットの境界と一致しないため、受信データを連結し
+    開始コード（00 00 01 / 00 00 00 01）間を1ユニットとして取り出す。
+    最後のユニットは次の開始コードを受信するまで保留する。
+    """
+
+    def __init__(self, max_buffer: int = 2 * 1024 * 1024):
+        """
+        初期化
+
+        Args:
+            max_buffer: 保留データの上限（超過時は破棄して再同期）
+        """
+        self.max_buffer = max_buffer
+        self._buffer = bytearray()
+        self._scan_from = 0
+
+        # 統計情報
+        self.nal_units = 0
+        self.discarded_bytes = 0
+        self.overflows = 0
+
+    @staticmethod
+    def _unit_start(buffer: bytearray, index: int) -> int:
+        """4バイト開始コードの場合は先頭の 00 を含める"""
+        return index - 1 if index > 0 and buffer[index - 1] == 0 else index
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        受信データを追加し、完成した NAL ユニットを返す
+
+        Returns:
+            List[bytes]: 開始コード付き NAL ユニット
+        """
+        buffer = self._buffer
+        buffer.extend(data)
+
+        first = buffer.find(START_CODE)
+        if first < 0:
+            # 開始コード待ち（末尾3バイトは次のパケットと連結して開始コードになり得る）
+            if len(buffer) > 3:
+                self.discarded_bytes += len(buffer) - 3
+                del buffer[:-3]
+            self._scan_from = 0
+            return []
+
+        start = self._unit_start(buffer, first)
+        if start > 0:
+            # 最初の開始コードより前のデータは途中から受信した断片
+            self.discarded_bytes += start
+            del buffer[:start]
+            self._scan_from = 0
+
+        units: List[bytes] = []
+        current = 0
+        search = max(self._scan_from, buffer.find(START_CODE) + 3)
+        while True:
+            index = buffer.find(START_CODE, search)
+            if index < 0:
+                break
+            boundary = self._unit_start(buffer, index)
+            if boundary > current:
+                units.append(bytes(buffer[current:boundary]))
+                current = boundary
+            search = index + 3
+
+        if current:
+            del buffer[:current]
+        # 次回は末尾の開始コード候補から走査を再開
+        self._scan_from = max(len(buffer) - 3, 0)
+
+        if len(buffer) > self.max_buffer:
+            self.overflows += 1
+            self.discarded_bytes += len(buffer)
+            buffer.clear()
+            self._scan_from = 0
+
+        self.nal_units += len(units)
+        return units
+
+    def flush(self) -> Optional[bytes]:
+        """保留中の最後のユニットを取り出す"""
+        if not self._buffer.startswith(START_CODE) and not self._buffer.startswith(b"\x00" + START_CODE):
+            self._buffer.clear()
+            return None
+        unit = bytes(self._buffer)
+        self._buffer.clear()
+        self._scan_from = 0
+        self.nal_units += 1
+        return unit
+
+
+class FrameRing:
+    """
+    事前確保したフレームリングバッファ
+
+    デコード済みフレームを固定スロットにコピーするため、定常状態でフレームごとの
+    メモリ確保が発生しない。フレーム形状が変わった場合のみ再確保する。
+    """
+
+    def __init__(self, capacity: int = 8, shape: Optional[Tuple[int, ...]] = None, dtype: Any = np.uint8):
+        """
+        初期化
+
+        Args:
+            capacity: 保持するフレーム数
+            shape: フレーム形状（未指定時は最初のフレームから決定）
+            dtype: フレームのデータ型
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._frames: Optional[np.ndarray] = None
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self.next_seq = 0
+        self.allocations = 0
+        if shape is not None:
+            self._allocate(tuple(shape))
+
+    @property
+    def shape(self) -> Optional[Tuple[int, ...]]:
+        """フレーム形状"""
+        return None if self._frames is None else self._frames.shape[1:]
+
+    def _allocate(self, shape: Tuple[int, ...]) -> None:
+        self._frames = np.zeros((self.capacity,) + shape, dtype=self.dtype)
+        self.allocations += 1
+
+    def push(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """フレームを格納して連番を返す"""
+        with self._lock:
+            if self._frames is None:
+                self._allocate(frame.shape)
+            elif self._frames.shape[1:] != frame.shape:
+                self._allocate(frame.shape)
+                # 解像度変更前のフレームは参照できないため連番を進めて範囲外にする
+                self.next_seq += self.capacity
+            seq = self.next_seq
+            slot = seq % self.capacity
+            np.copyto(self._frames[slot], frame, casting="unsafe")
+            self._timestamps[slot] = time.time() if timestamp is None else timestamp
+            self.next_seq += 1
+            return seq
+
+    def latest(self) -> Tuple[Optional[np.ndarray], Optional[float], int]:
+        """
+        最新フレームのコピーを取得
+
+        Returns:
+            Tuple[Optional[np.ndarray], Optional[float], int]: (フレーム, タイムスタンプ, 連番)
+        """
+        with self._lock:
+            if self._frames is None or self.next_seq == 0:
+                return None, None, -1
+            seq = self.next_seq - 1
+            slot = seq % self.capacity
+            return self._frames[slot].copy(), float(self._timestamps[slot]), seq
+
+    def since(self, seq: int) -> Tuple[List[Tuple[int, np.ndarray, float]], int]:
+        """
+        指定連番以降のフレームを取得
+
+        Args:
+            seq: 最後に受け取った連番（-1 で保持中の全フレーム）
+
+        Returns:
+            Tuple[List[Tuple[int, np.ndarray, float]], int]: ((連番, フレーム, タイムスタンプ) のリスト, 上書きされて取得できなかった数)
+        """
+        with self._lock:
+            if self._frames is None:
+                return [], 0
+            oldest = max(0, self.next_seq - self.capacity)
+            start = seq + 1
+            missed = max(0, oldest - start) if seq >= 0 else 0
+            start = max(start, oldest)
+            frames = []
+            for current in range(start, self.next_seq):
+                slot = current % self.capacity
+                frames.append((current, self._frames[slot].copy(), float(self._timestamps[slot])))
+            return frames, missed
+
+
+class PyAVH264Decoder:
+    """PyAV (FFmpeg) による H.264 デコーダー"""
+
+    def __init__(self):
+        if av is None:
+            raise ImportError("PyAV (av) library is required for H.264 decoding")
+        self._codec = av.CodecContext.create("h264", "r")
+
+    def decode(self, data: bytes) -> List[np.ndarray]:
+        """NAL ユニットを投入し、完成したフレーム（BGR）を返す"""
+        frames = []
+        for packet in self._codec.parse(data):
+            for frame in self._codec.decode(packet):
+                frames.append(frame.to_ndarray(format="bgr24"))
+        return frames
+
+
+DecoderFactory = Callable[[], Any]
+
+
+class TelloVideoReceiver:
+    """
+    映像ポートの共有受信器
+
+    Tello は全機が同じポート（11111）に映像を送るため、ポートごとに1つのソケットで受信し、
+    送信元IPで各ドローンのストリームに振り分ける（テレメトリ受信と同じ方式）。
+    同じポートに複数のソケットをバインドすると、パケットはそのうち1つにしか届かない。
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = TELLO_VIDEO_PORT,
+                 recv_buffer: int = 4 * 1024 * 1024):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0は自動割り当て）
+            recv_buffer: ソケットの受信バッファサイズ
+        """
+        self.host = host
+        self.port = port
+        self.key = (host, port)
+        self.recv_buffer = recv_buffer
+        self._lock = threading.Lock()
+        # 受信スレッドはロックなしで参照するため、変更時は辞書ごと差し替える
+        self._streams: Dict[Optional[str], "TelloVideoStream"] = {}
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 統計情報
+        self.packets_received = 0
+        self.packets_unrouted = 0
+
+    @property
+    def running(self) -> bool:
+        """受信中か"""
+        return self._running
+
+    @property
+    def local_address(self) -> Optional[Tuple[str, int]]:
+        """バインド済みアドレス"""
+        return None if self._socket is None else self._socket.getsockname()
+
+    @property
+    def stream_count(self) -> int:
+        """登録中のストリーム数"""
+        return len(self._streams)
+
+    def add_stream(self, stream: "TelloVideoStream") -> None:
+        """ストリームを登録（最初の登録で受信を開始）"""
+        with self._lock:
+            if stream.source_ip in self._streams:
+                raise ValueError(
+                    f"Video stream for {stream.source_ip or 'any source'} already registered on port {self.port}"
+                )
+            if not self._running:
+                self._open()
+            self._streams = {**self._streams, stream.source_ip: stream}
+
+    def remove_stream(self, stream: "TelloVideoStream") -> bool:
+        """
+        ストリームの登録を解除（最後のストリームの解除で受信を停止）
+
+        Returns:
+            bool: 登録中のストリームがなくなったか
+        """
+        with self._lock:
+            if self._streams.get(stream.source_ip) is stream:
+                self._streams = {ip: s for ip, s in self._streams.items() if s is not stream}
+            if self._streams:
+                return False
+            self._close()
+            return True
+
+    def _open(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # Iフレームはパケットが連続するため受信バッファを大きく取る
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer)
+            sock.bind((self.host, self.port))
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(0.2)
+        self._socket = sock
+        self.port = sock.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._receive_loop, args=(sock,), name=f"tello-video-rx-{self.port}", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Video receiver started on {self.host}:{self.port}")
+
+    def _close(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        logger.info(f"Video receiver stopped on {self.host}:{self.port}")
+
+    def _receive_loop(self, sock: socket.socket) -> None:
+        """受信ループ（送信元IPで振り分けるだけで、デコードは各ストリームのスレッドが行う）"""
+        while self._running:
+            try:
+                data, addr = sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.packets_received += 1
+            streams = self._streams
+            stream = streams.get(addr[0])
+            if stream is None:
+                stream = streams.get(None)
+            if stream is None:
+                self.packets_unrouted += 1
+                for other in streams.values():
+                    other.packets_ignored += 1
+                continue
+            stream.enqueue_packet(data)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "running": self._running,
+            "streams": [ip or "*" for ip in self._streams],
+            "packets_received": self.packets_received,
+            "packets_unrouted": self.packets_unrouted
+        }
+
+
+# (待ち受けアドレス, ポート) -> 共有受信器
+_receivers: Dict[Tuple[str, int], TelloVideoReceiver] = {}
+_receivers_lock = threading.Lock()
+
+
+def acquire_video_receiver(stream: "TelloVideoStream") -> TelloVideoReceiver:
+    """ストリームの待ち受けポートの共有受信器に登録（ポート0は共有しない）"""
+    with _receivers_lock:
+        receiver = _receivers.get((stream.host, stream.port)) if stream.port else None
+        if receiver is None:
+            receiver = TelloVideoReceiver(stream.host, stream.port)
+            receiver.add_stream(stream)
+            if stream.port:
+                _receivers[receiver.key] = receiver
+        else:
+            receiver.add_stream(stream)
+        return receiver
+
+
+def release_video_receiver(receiver: TelloVideoReceiver, stream: "TelloVideoStream") -> None:
+    """ストリームの登録を解除（どのストリームも使わなくなった受信器は閉じる）"""
+    with _receivers_lock:
+        if receiver.remove_stream(stream) and _receivers.get(receiver.key) is receiver:
+            del _receivers[receiver.key]
+
+
+def get_video_receivers() -> List[TelloVideoReceiver]:
+    """稼働中の共有受信器"""
+    with _receivers_lock:
+        return list(_receivers.values())
+
+
+class TelloVideoStream:
+    """
+    Tello 実機の映像ストリーム
+
+    映像ポートの共有受信器から送信元IPで振り分けられたパケットを、ドローンごとの専用スレッドが
+    デコードしてフレームリングに格納する。VirtualCameraStream と同じ get_frame / get_statistics を提供する。
+    """
+
+    def __init__(self, drone_id: str, host: str = "0.0.0.0", port: int = TELLO_VIDEO_PORT,
+                 source_ip: Optional[str] = None, ring_size: int = 8,
+                 decoder_factory: Optional[DecoderFactory] = None, fps: int = 30,
+                 max_latency_samples: int = 300, max_queued_packets: int = MAX_QUEUED_PACKETS):
+        """
+        初期化
+
+        Args:
+            drone_id: ドローンID
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0は自動割り当て）
+            source_ip: 受け付ける送信元IP（Noneの場合は他のストリームに該当しない全て）
+            ring_size: フレームリングのスロット数
+            decoder_factory: デコーダー生成関数（未指定時は PyAV）
+            fps: 公称フレームレート（情報表示用）
+            max_latency_samples: 保持するデコード遅延サンプル数
+            max_queued_packets: デコード待ちパケットの上限
+        """
+        self.drone_id = drone_id
+        self.host = host
+        self.port = port
+        self.source_ip = source_ip
+        self.fps = fps
+        self.decoder_factory = decoder_factory or PyAVH264Decoder
+        self.max_queued_packets = max_queued_packets
+
+        self.ring = FrameRing(ring_size)
+        self.assembler = H264NalAssembler()
+        self.is_streaming = False
+        self.start_time = time.time()
+
+        self._receiver: Optional[TelloVideoReceiver] = None
+        self._packets: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._last_read_seq = -1
+
+        # 統計情報
+        self.packets_received = 0
+        self.bytes_received = 0
+        self.packets_ignored = 0
+        self.packets_overflowed = 0
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.decode_errors = 0
+        self.decode_latencies_ms: Deque[float] = deque(maxlen=max_latency_samples)
+
+    @property
+    def width(self) -> int:
+        """フレーム幅（未受信時は0）"""
+        shape = self.ring.shape
+        return shape[1] if shape else 0
+
+    @property
+    def height(self) -> int:
+        """フレーム高さ（未受信時は0）"""
+        shape = self.ring.shape
+        return shape[0] if shape else 0
+
+    @property
+    def frame_count(self) -> int:
+        """デコード済みフレーム数"""
+        return self.frames_decoded
+
+    @property
+    def local_address(self) -> Optional[Tuple[str, int]]:
+        """バインド済みアドレス"""
+        return None if self._receiver is None else self._receiver.local_address
+
+    def start_stream(self) -> None:
+        """共有受信器に登録し、デコードスレッドを開始"""
+        if self.is_streaming:
+            logger.warning(f"Video stream already running: {self.drone_id}")
+            return
+
+        decoder = self.decoder_factory()
+        self._packets = queue.Queue(maxsize=self.max_queued_packets)
+        self._receiver = acquire_video_receiver(self)
+        self.port = self._receiver.port
+
+        self.is_streaming = True
+        self.start_time = time.time()
+        self._thread = threading.Thread(
+            target=self._decode_loop, args=(decoder,), name=f"tello-video-{self.drone_id}", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Video stream started: {self.drone_id} on {self.host}:{self.port}")
+
+    def stop_stream(self) -> None:
+        """共有受信器から登録を解除し、デコードスレッドを停止"""
+        if not self.is_streaming:
+            return
+        self.is_streaming = False
+        if self._receiver is not None:
+            release_video_receiver(self._receiver, self)
+            self._receiver = None
+        if self._thread:
+            # 受信済みのパケットをデコードし終えてから終了させる
+            self._packets.put(None)
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        logger.info(f"Video stream stopped: {self.drone_id}")
+
+    def enqueue_packet(self, data: bytes) -> None:
+        """受信器から振り分けられたパケットをデコード待ちに追加（受信スレッドから呼ばれる）"""
+        try:
+            self._packets.put_nowait((data, time.perf_counter()))
+        except queue.Full:
+            self.packets_overflowed += 1
+
+    def _decode_loop(self, decoder: Any) -> None:
+        """デコードループ"""
+        while True:
+            item = self._packets.get()
+            if item is None:
+                break
+
+            data, received_at = item
+            self.packets_received += 1
+            self.bytes_received += len(data)
+            for nal in self.assembler.feed(data):
+                self._decode(decoder, nal, received_at)
+
+        # 停止時に保留中の最後のユニットをデコード
+        nal = self.assembler.flush()
+        if nal:
+            self._decode(decoder, nal, time.perf_counter())
+
+    def _decode(self, decoder: Any, nal: bytes, received_at: float) -> None:
+        """1ユニットをデコードしてリングに格納"""
+        try:
+            frames = decoder.decode(nal)
+        except Exception as e:
+            self.decode_errors += 1
+            logger.debug(f"H.264 decode error ({self.drone_id}): {e}")
+            return
+
+        for frame in frames:
+            self.ring.push(frame)
+            self.frames_decoded += 1
+            self.decode_latencies_ms.append((time.perf_counter() - received_at) * 1000)
+
+    def get_frame(self) -> Optional[np.ndarray]:
+        """最新フレームを取得"""
+        frame, _ = self.get_frame_with_timestamp()
+        return frame
+
+    def get_frame_with_timestamp(self) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """最新フレームとそのデコード時刻を取得（前回取得以降に読まれなかったフレームはドロップとして計上）"""
+        frame, timestamp, seq = self.ring.latest()
+        if seq >= 0:
+            if seq > self._last_read_seq + 1 and self._last_read_seq >= 0:
+                self.frames_dropped += seq - self._last_read_seq - 1
+            self._last_read_seq = max(self._last_read_seq, seq)
+        return frame, timestamp
+
+    def get_frames_since(self, seq: int) -> Tuple[List[Tuple[int, np.ndarray, float]], int]:
+        """指定連番以降のフレームを取得（全フレームを処理したいコンシューマー用）"""
+        return self.ring.since(seq)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        elapsed_time = time.time() - self.start_time
+        latencies = sorted(self.decode_latencies_ms)
+        return {
+            "frame_count": self.frames_decoded,
+            "elapsed_time": elapsed_time,
+            "target_fps": self.fps,
+            "actual_fps": self.frames_decoded / elapsed_time if elapsed_time > 0 else 0,
+            "packets_received": self.packets_received,
+            "bytes_received": self.bytes_received,
+            "packets_ignored": self.packets_ignored,
+            "packets_overflowed": self.packets_overflowed,
+            "nal_units": self.assembler.nal_units,
+            "discarded_bytes": self.assembler.discarded_bytes,
+            "decode_errors": self.decode_errors,
+            "frames_dropped": self.frames_dropped,
+            "ring_size": self.ring.capacity,
+            "avg_decode_latency_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_decode_latency_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0.0,
+            "max_decode_latency_ms": round(latencies[-1], 3) if latencies else 0.0
+        }
+
+
+def replay_h264_file(path: str, target: Tuple[str, int], source_ip: str = "127.0.0.1",
+                     packet_size: int = TELLO_VIDEO_PACKET_SIZE, packet_interval: float = 0.0005) -> int:
+    """
+    H.264 ファイルを Tello と同じパケット分割でUDP送信（テスト・開発用）
+
+    Returns:
+        int: 送信したパケット数
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((source_ip, 0))
+        packets = 0
+        for offset in range(0, len(data), packet_size):
+            sock.sendto(data[offset:offset + packet_size], target)
+            packets += 1
+            if packet_interval:
+                time.sleep(packet_interval)
+        return packets
+    finally:
+        sock.close()
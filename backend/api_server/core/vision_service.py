@@ -11,7 +11,7 @@ import time
 import uuid
 from datetime import datetime
 from io import BytesIO
-from typing import List, Optional, Dict, Any, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import cv2
 import numpy as np
@@ -21,9 +21,16 @@ from ..models.vision_models import (
     Detection, DetectionResult, BoundingBox, TrackingStatus
 )
 from ..models.common_models import SuccessResponse
+from .metrics_registry import metrics_registry
+from .frame_sources import FrameSourceMixin
 
 logger = logging.getLogger(__name__)
 
+# 物体検出の所要時間（モデル・入力元ごと）
+DETECTION_DURATION = metrics_registry.histogram(
+    "vision_detection_duration_seconds", "Object detection latency", ("model_id", "source")
+)
+
 
 class MockDetectionModel:
     """
@@ -70,18 +77,43 @@ class MockDetectionModel:
         return detections
 
 
-class VisionService:
+class VisionService(FrameSourceMixin):
     """Vision processing service for object detection and tracking"""
     
+    # Frame rate of the drone camera tracking loop
+    TRACKING_FPS = 10.0
+    
     def __init__(self):
         self.models: Dict[str, MockDetectionModel] = {}
         self.tracking_sessions: Dict[str, Dict[str, Any]] = {}
         self.is_tracking_active = False
         self.current_tracking_config = None
         
+        # Frame sources per drone (recorded replay, camera streams, ...)
+        self.frame_sources: Dict[str, Any] = {}
+        
+        # Callbacks notified with (drone_id, result dict) after drone camera detections
+        self.detection_callbacks: List[Callable[[str, Dict[str, Any]], Any]] = []
+        
         # Initialize default models
         self._initialize_default_models()
         
+    def add_detection_callback(self, callback: Callable[[str, Dict[str, Any]], Any]) -> None:
+        """Register a callback for detection results from drone cameras"""
+        self.detection_callbacks.append(callback)
+    
+    def _notify_detection(self, drone_id: str, result: DetectionResult) -> None:
+        """Notify detection callbacks (errors are logged, never raised)"""
+        if not self.detection_callbacks:
+            return
+        payload = result.model_dump(mode="json")
+        payload["source_info"] = getattr(result, "source_info", None)
+        for callback in self.detection_callbacks:
+            try:
+                callback(drone_id, payload)
+            except Exception as e:
+                logger.error(f"Error notifying detection callback: {e}")
+    
     def _initialize_default_models(self):
         """Initialize default detection models"""
         default_models = [
@@ -143,6 +175,7 @@ class VisionService:
         detections = model.detect(cv_image, confidence_threshold)
         
         processing_time = time.time() - start_time
+        DETECTION_DURATION.labels(model_id, "image").observe(processing_time)
         
         logger.info(f"Object detection completed: {len(detections)} objects found in {processing_time:.3f}s")
         
@@ -294,6 +327,7 @@ class VisionService:
     def set_drone_manager(self, drone_manager):
         """Set drone manager reference for real drone camera access"""
         self.drone_manager = drone_manager
+        self.camera_service = getattr(drone_manager, "camera_service", None)
         if not hasattr(self, 'real_camera_interfaces'):
             self.real_camera_interfaces = {}
             self.drone_camera_streams = {}
@@ -374,16 +408,18 @@ class VisionService:
             raise ValueError(f"Camera not available for drone {drone_id}")
         
         try:
-            # For Phase 6, we'll simulate getting a frame from the drone
-            # In a full implementation, this would get the actual camera frame
-            height, width = 480, 640
-            simulated_frame = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+            # Get a frame from the registered source, or simulate one
+            frame = self._get_drone_frame(drone_id)
+            if frame is None:
+                raise ValueError("No frame available from camera source")
+            height, width = frame.shape[:2]
             
             # Perform detection on the frame
             model = self.models[model_id]
-            detections = model.detect(simulated_frame, confidence_threshold)
+            detections = model.detect(frame, confidence_threshold)
             
             processing_time = time.time() - start_time
+            DETECTION_DURATION.labels(model_id, "drone_camera").observe(processing_time)
             
             logger.info(f"Object detection from drone {drone_id}: {len(detections)} objects found in {processing_time:.3f}s")
             
@@ -402,6 +438,7 @@ class VisionService:
                 "camera_resolution": f"{width}x{height}"
             }
             
+            self._notify_detection(drone_id, result)
             return result
             
         except Exception as e:
@@ -477,38 +514,45 @@ class VisionService:
         config = self.current_tracking_config
         model = self.models[config["model_id"]]
         
-        while self.is_tracking_active and self.current_tracking_config:
-            try:
-                # Get frame from drone camera (simulated for Phase 6)
-                height, width = 480, 640
-                frame = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+        # Request frames from the drone's camera stream at the tracking rate
+        consumer_id = f"vision_tracking:{config['tracking_id']}"
+        self._register_frame_consumer(config["drone_id"], consumer_id, self.TRACKING_FPS)
+        
+        try:
+            while self.is_tracking_active and self.current_tracking_config:
+                try:
+                    # Get frame from drone camera (registered source, camera stream or simulated)
+                    frame = self._get_drone_frame(config["drone_id"])
                 
-                if frame is not None:
-                    config["tracking_stats"]["total_frames"] += 1
+                    if frame is not None:
+                        config["tracking_stats"]["total_frames"] += 1
                     
-                    # Perform object detection on frame
-                    detections = model.detect(frame, config["confidence_threshold"])
+                        # Perform object detection on frame
+                        detections = model.detect(frame, config["confidence_threshold"])
                     
-                    if detections:
-                        # Use first detection as target
-                        target = detections[0]
-                        config["target_detected"] = True
-                        config["target_position"] = target.bbox
-                        config["last_detection_time"] = datetime.now()
-                        config["tracking_stats"]["detection_frames"] += 1
+                        if detections:
+                            # Use first detection as target
+                            target = detections[0]
+                            config["target_detected"] = True
+                            config["target_position"] = target.bbox
+                            config["last_detection_time"] = datetime.now()
+                            config["tracking_stats"]["detection_frames"] += 1
                         
-                        # Enhanced tracking with movement commands
-                        await self._send_enhanced_tracking_commands(config["drone_id"], target.bbox, config)
+                            # Enhanced tracking with movement commands
+                            await self._send_enhanced_tracking_commands(config["drone_id"], target.bbox, config)
                         
-                    else:
-                        config["target_detected"] = False
-                        config["target_position"] = None
+                        else:
+                            config["target_detected"] = False
+                            config["target_position"] = None
                 
-                await asyncio.sleep(0.1)  # 10 FPS tracking
+                    await asyncio.sleep(1.0 / self.TRACKING_FPS)
                 
-            except Exception as e:
-                logger.error(f"Error in enhanced tracking loop: {e}")
-                await asyncio.sleep(0.5)
+                except Exception as e:
+                    logger.error(f"Error in enhanced tracking loop: {e}")
+                    await asyncio.sleep(0.5)
+        
+        finally:
+            self._unregister_frame_consumer(config["drone_id"], consumer_id)
         
         logger.info("Enhanced tracking loop ended")
     
@@ -533,19 +577,20 @@ class VisionService:
             movement_threshold = 50  # pixels
             movement_distance = 20   # cm
             
-            # Horizontal movement commands
+            # Horizontal and vertical corrections are combined into one vector
+            dx_cm = 0
+            dz_cm = 0
             if abs(offset_x) > movement_threshold:
-                direction = "right" if offset_x > 0 else "left"
-                await self.drone_manager.move_drone(drone_id, direction, movement_distance)
-                config["tracking_stats"]["tracking_commands_sent"] += 1
-                logger.debug(f"Enhanced tracking: {direction} {movement_distance}cm")
-            
-            # Vertical movement commands
+                dx_cm = movement_distance if offset_x > 0 else -movement_distance
             if abs(offset_y) > movement_threshold:
-                direction = "up" if offset_y < 0 else "down"  # Inverted for camera coordinates
-                await self.drone_manager.move_drone(drone_id, direction, movement_distance)
+                dz_cm = movement_distance if offset_y < 0 else -movement_distance  # Inverted for camera coordinates
+            
+            if dx_cm or dz_cm:
+                # Queue on the drone's command actor; a pending correction is
+                # replaced by the latest one so the tracking tick never waits for the drone
+                self.drone_manager.queue_tracking_move(drone_id, dx_cm, 0, dz_cm)
                 config["tracking_stats"]["tracking_commands_sent"] += 1
-                logger.debug(f"Enhanced tracking: {direction} {movement_distance}cm")
+                logger.debug(f"Enhanced tracking: move ({dx_cm}, 0, {dz_cm})cm")
             
         except Exception as e:
             logger.error(f"Error sending enhanced tracking commands: {e}")
@@ -562,6 +607,10 @@ class VisionService:
             status.camera_source = "drone_camera" if config.get("use_drone_camera") else "static_image"
             status.tracking_stats = config.get("tracking_stats", {})
             
+            # Command queue depth and latency for the tracked drone
+            if hasattr(self, 'drone_manager') and self.drone_manager and config.get("drone_id"):
+                status.command_queue = self.drone_manager.get_command_queue_statistics(config["drone_id"])
+            
             # Add drone-specific information
             if hasattr(self, 'drone_manager') and self.drone_manager:
                 drone_id = config.get("drone_id")
@@ -624,4 +673,6 @@ class VisionService:
         if hasattr(self, 'real_camera_interfaces'):
             self.real_camera_interfaces.clear()
         
+        self.frame_sources.clear()
+        
         logger.info("Enhanced vision service shutdown complete")
\ No newline at end of file
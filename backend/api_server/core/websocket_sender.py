@@ -0,0 +1,186 @@
+"""
+WebSocket Sender - Per-connection bounded send queues with writer tasks
+Producers enqueue pre-serialized messages without awaiting the socket, so a slow client only delays itself
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class SendPolicy(str, Enum):
+    """キューが満杯・重複したときの扱い"""
+    RELIABLE = "reliable"        # 破棄しない（入りきらない場合は接続を切断）
+    DROP_OLDEST = "drop_oldest"  # 満杯時は最も古い破棄可能なメッセージを捨てる
+    COALESCE = "coalesce"        # 同じキーの未送信メッセージを最新の内容に置き換える
+
+
+# メッセージ種別ごとの送信ポリシー（未登録の種別は DROP_OLDEST）
+MESSAGE_POLICIES: Dict[str, SendPolicy] = {
+    "drone_status": SendPolicy.COALESCE,
+    "network_status_update": SendPolicy.COALESCE,
+    "fleet_status_delta": SendPolicy.DROP_OLDEST,
+    "real_drone_detected": SendPolicy.RELIABLE,
+    "real_drone_disconnected": SendPolicy.RELIABLE,
+}
+
+
+def policy_for(message: Dict[str, Any]) -> SendPolicy:
+    """メッセージ種別から送信ポリシーを取得"""
+    return MESSAGE_POLICIES.get(message.get("type"), SendPolicy.DROP_OLDEST)
+
+
+def coalesce_key(message: Dict[str, Any]) -> str:
+    """置き換え対象を判定するキー（種別 + ドローンID）"""
+    drone_id = message.get("drone_id")
+    return f"{message.get('type')}:{drone_id}" if drone_id else str(message.get("type"))
+
+
+class ConnectionSender:
+    """
+    1接続分の送信キューと書き込みタスク
+
+    enqueue は待たずに戻るため、送信側のコストはクライアントの速度に依存しない。
+    キューの要素は [ポリシー, キー, テキスト, 投入時刻] で、置き換え時はテキストだけを差し替えて
+    元の順序を保つ。
+    """
+
+    def __init__(self, websocket: Any, max_queue: int = 256,
+                 on_error: Optional[Callable[[Any], None]] = None):
+        """
+        初期化
+
+        Args:
+            websocket: 送信先の WebSocket
+            max_queue: 未送信メッセージの上限
+            on_error: 送信失敗・キュー溢れ時に呼ぶコールバック（接続の後始末用）
+        """
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.on_error = on_error
+        self.queue: Deque[List[Any]] = deque()
+        self.pending_keys: Dict[str, List[Any]] = {}
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        # 送信中メッセージの投入時刻（送信が詰まった接続の遅延を見るため）
+        self.sending_since: Optional[float] = None
+
+        # 統計情報
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def start(self) -> None:
+        """書き込みタスクを開始"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        """書き込みタスクを停止し未送信メッセージを破棄"""
+        self.closed = True
+        self.queue.clear()
+        self.pending_keys.clear()
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    def enqueue(self, text: Union[str, bytes], policy: SendPolicy = SendPolicy.DROP_OLDEST, key: Optional[str] = None) -> bool:
+        """
+        シリアライズ済みメッセージをキューに追加（bytes はバイナリフレームで送信）
+
+        Returns:
+            bool: キューに入った（または置き換えた）か
+        """
+        if self.closed:
+            return False
+        if policy == SendPolicy.COALESCE and key is not None:
+            entry = self.pending_keys.get(key)
+            if entry is not None:
+                entry[2] = text
+                self.coalesced += 1
+                return True
+
+        if len(self.queue) >= self.max_queue and not self._drop_oldest():
+            if policy != SendPolicy.RELIABLE:
+                self.dropped += 1
+                return False
+            # 破棄できないメッセージが溜まり続ける接続は切断する
+            logger.warning(f"WebSocket send queue overflow ({len(self.queue)} messages), closing connection")
+            self._fail()
+            return False
+
+        entry = [policy, key if policy == SendPolicy.COALESCE else None, text, time.monotonic()]
+        self.queue.append(entry)
+        if entry[1] is not None:
+            self.pending_keys[entry[1]] = entry
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.ready.set()
+        return True
+
+    def _drop_oldest(self) -> bool:
+        """最も古い破棄可能なメッセージを捨てる"""
+        for index, entry in enumerate(self.queue):
+            if entry[0] != SendPolicy.RELIABLE:
+                del self.queue[index]
+                if entry[1] is not None:
+                    self.pending_keys.pop(entry[1], None)
+                self.dropped += 1
+                return True
+        return False
+
+    def _fail(self) -> None:
+        self.close()
+        if self.on_error is not None:
+            self.on_error(self.websocket)
+
+    async def _run(self) -> None:
+        """キューを順に送信"""
+        while not self.closed:
+            if not self.queue:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            entry = self.queue.popleft()
+            if entry[1] is not None:
+                self.pending_keys.pop(entry[1], None)
+            self.sending_since = entry[3]
+            try:
+                if isinstance(entry[2], bytes):
+                    await self.websocket.send_bytes(entry[2])
+                else:
+                    await self.websocket.send_text(entry[2])
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error sending WebSocket message: {e}")
+                self._fail()
+                return
+            finally:
+                self.sending_since = None
+            lag_ms = (time.monotonic() - entry[3]) * 1000
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        oldest = self.sending_since if self.sending_since is not None else (self.queue[0][3] if self.queue else None)
+        oldest_ms = (time.monotonic() - oldest) * 1000 if oldest is not None else 0.0
+        return {
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "oldest_pending_ms": oldest_ms,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms
+        }
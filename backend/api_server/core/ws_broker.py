@@ -0,0 +1,395 @@
+"""
+WebSocket Broker - Pub/sub backends that fan WebSocket publications out across API worker processes
+In-process by default; the Unix-domain-socket broker lets any number of uvicorn workers share publications
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import tempfile
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Fallback for platforms without fcntl (Unix socket broker unavailable)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INPROCESS = "inprocess"
+UNIX = "unix"
+
+# 既定のソケットパス（同じホストのワーカーが共有）
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "mfg_drone_ws_broker.sock")
+
+# ブローカーが送るチャンネル
+HELLO_CHANNEL = "hello"
+PEER_LEFT_CHANNEL = "peer_left"
+SERVER_ORIGIN = "broker"
+
+# フレームヘッダー（ペイロード長、ビッグエンディアン 4 バイト）
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# 受信メッセージの処理関数 (チャンネル, データ, 送信元ID)
+MessageHandler = Callable[[str, Any, str], Awaitable[None]]
+
+
+def encode_frame(origin: str, channel: str, data: Any) -> bytes:
+    """メッセージを長さ付きフレームにエンコード"""
+    payload = json.dumps({"o": origin, "c": channel, "d": data}, default=str).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """
+    フレームを1件読み込み（ヘッダーを除いたペイロード）
+
+    Raises:
+        asyncio.IncompleteReadError: 接続が閉じられた
+        ValueError: フレームが大きすぎる
+    """
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Broker frame too large: {length} bytes")
+    return await reader.readexactly(length)
+
+
+class InProcessBroker:
+    """
+    単一プロセス用のブローカー（既定）
+
+    配信先はすべて同じプロセスにあるため、他プロセスへは何も送らない。
+    """
+
+    is_primary = True
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}"
+
+    async def start(self, handler: MessageHandler, on_connect: Optional[Callable[[], None]] = None) -> None:
+        """ブローカーを開始"""
+        if on_connect is not None:
+            on_connect()
+
+    def publish(self, channel: str, data: Any) -> bool:
+        """他プロセスへ配信（他プロセスがないため常に False）"""
+        return False
+
+    async def stop(self) -> None:
+        """ブローカーを停止"""
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {"type": INPROCESS, "primary": True}
+
+
+class BrokerServer:
+    """
+    Unix ドメインソケットの中継サーバー
+
+    プライマリのワーカープロセス内で動作し、受け取ったフレームを送信元以外の全クライアントに
+    そのまま転送する（デコードするのは接続時の hello だけ）。送信が詰まったクライアントへの
+    フレームは破棄し、他のクライアントを待たせない。
+    """
+
+    def __init__(self, path: str, max_buffer: int = 4 * 1024 * 1024):
+        """
+        初期化
+
+        Args:
+            path: ソケットパス
+            max_buffer: クライアントごとの未送信バイト数の上限
+        """
+        self.path = path
+        self.max_buffer = max_buffer
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.clients: Dict[asyncio.StreamWriter, str] = {}
+
+        # 統計情報
+        self.relayed = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        """サーバーを開始（既存のソケットファイルは削除して作り直す）"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        logger.info(f"WebSocket broker server listening on {self.path}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        origin = None
+        try:
+            hello = json.loads(await read_frame(reader))
+            if hello.get("c") != HELLO_CHANNEL:
+                raise ValueError("Broker client must send hello first")
+            origin = str(hello.get("o"))
+            self.clients[writer] = origin
+            # 登録済みであることを返す（以降の配信はこのクライアントにも届く）
+            writer.write(encode_frame(SERVER_ORIGIN, HELLO_CHANNEL, None))
+            logger.info(f"WebSocket broker client attached: {origin} (clients: {len(self.clients)})")
+
+            while True:
+                payload = await read_frame(reader)
+                self._relay(_HEADER.pack(len(payload)) + payload, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket broker client error ({origin}): {e}")
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+            if origin is not None:
+                logger.info(f"WebSocket broker client detached: {origin} (clients: {len(self.clients)})")
+                self._relay(encode_frame(origin, PEER_LEFT_CHANNEL, None), None)
+
+    def _relay(self, frame: bytes, sender: Optional[asyncio.StreamWriter]) -> None:
+        """送信元以外の全クライアントへ転送"""
+        for writer in list(self.clients):
+            if writer is sender or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += 1
+                continue
+            writer.write(frame)
+            self.relayed += 1
+
+    async def stop(self) -> None:
+        """サーバーを停止"""
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.clients):
+                writer.close()
+            self.clients.clear()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "clients": len(self.clients),
+            "relayed": self.relayed,
+            "dropped": self.dropped
+        }
+
+
+class UnixSocketBroker:
+    """
+    Unix ドメインソケット経由で複数のワーカープロセスをつなぐブローカー
+
+    ロックファイルを取得できたワーカーがプライマリとなって中継サーバーを起動し、全ワーカー
+    （プライマリ自身を含む）がクライアントとして接続する。プライマリが終了するとロックが
+    解放され、再接続を試みている他のワーカーが引き継ぐ。publish は待たずに書き込み、
+    接続していない間のメッセージは破棄する。
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH, lock_path: Optional[str] = None,
+                 max_buffer: int = 4 * 1024 * 1024, reconnect_interval: float = 0.5,
+                 connect_timeout: float = 2.0):
+        """
+        初期化
+
+        Args:
+            path: ソケットパス
+            lock_path: プライマリ選出用のロックファイル（省略時はソケットパス + .lock）
+            max_buffer: 未送信バイト数の上限（超えた分の publish は破棄）
+            reconnect_interval: 再接続・プライマリ引き継ぎの試行間隔（秒）
+            connect_timeout: 中継サーバーの登録応答を待つ時間（秒）
+
+        Raises:
+            ValueError: fcntl を使用できない環境
+        """
+        if fcntl is None:
+            raise ValueError("Unix socket broker requires fcntl (POSIX only)")
+        self.path = path
+        self.lock_path = lock_path or f"{path}.lock"
+        self.max_buffer = max_buffer
+        self.reconnect_interval = reconnect_interval
+        self.connect_timeout = connect_timeout
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self.handler: Optional[MessageHandler] = None
+        self.on_connect: Optional[Callable[[], None]] = None
+        self.server: Optional[BrokerServer] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+
+        # 統計情報
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    @property
+    def is_primary(self) -> bool:
+        """中継サーバーを持つプライマリか"""
+        return self.server is not None
+
+    @property
+    def connected(self) -> bool:
+        """中継サーバーに接続しているか"""
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def start(self, handler: MessageHandler, on_connect: Optional[Callable[[], None]] = None) -> None:
+        """
+        ブローカーを開始（最初の接続を試みてから受信タスクを起動）
+
+        Args:
+            handler: 他プロセスからのメッセージを処理する関数
+            on_connect: 接続・再接続のたびに呼ぶ関数（購読状況の再通知用）
+        """
+        self.handler = handler
+        self.on_connect = on_connect
+        reader = await self._connect()
+        self.task = asyncio.create_task(self._run(reader))
+
+    def _try_become_primary(self) -> bool:
+        """ロックを取得できればプライマリになる"""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _connect(self) -> Optional[asyncio.StreamReader]:
+        """中継サーバーに接続（ロックを取得できた場合は先にサーバーを起動）"""
+        try:
+            if self.server is None and self._try_become_primary():
+                server = BrokerServer(self.path, self.max_buffer)
+                await server.start()
+                self.server = server
+                logger.info(f"WebSocket broker: this worker is primary ({self.origin})")
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        except OSError as e:
+            logger.debug(f"WebSocket broker connect failed: {e}")
+            return None
+
+        # hello を送り、中継サーバーに登録されるまで待つ
+        writer.write(encode_frame(self.origin, HELLO_CHANNEL, None))
+        try:
+            reply = json.loads(await asyncio.wait_for(read_frame(reader), self.connect_timeout))
+            if reply.get("c") != HELLO_CHANNEL:
+                raise ValueError(f"Unexpected broker reply: {reply.get('c')}")
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            logger.debug(f"WebSocket broker handshake failed: {e!r}")
+            writer.close()
+            return None
+        self.writer = writer
+        if self.on_connect is not None:
+            try:
+                self.on_connect()
+            except Exception as e:
+                logger.error(f"Error in broker connect callback: {e}")
+        return reader
+
+    async def _run(self, reader: Optional[asyncio.StreamReader]) -> None:
+        while True:
+            if reader is None:
+                await asyncio.sleep(self.reconnect_interval)
+                reader = await self._connect()
+                if reader is None:
+                    continue
+                self.reconnects += 1
+            try:
+                while True:
+                    message = json.loads(await read_frame(reader))
+                    self.received += 1
+                    try:
+                        await self.handler(message["c"], message.get("d"), message["o"])
+                    except Exception as e:
+                        logger.error(f"Error handling broker message on {message.get('c')}: {e}")
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+                logger.warning(f"WebSocket broker connection lost: {e!r}")
+            finally:
+                if self.writer is not None:
+                    self.writer.close()
+                self.writer = None
+                reader = None
+
+    def publish(self, channel: str, data: Any) -> bool:
+        """
+        他のワーカープロセスへ配信（待たずに書き込む）
+
+        Returns:
+            bool: 書き込んだか（未接続・送信が詰まっている場合は破棄して False）
+        """
+        writer = self.writer
+        if writer is None or writer.is_closing() or writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped += 1
+            return False
+        writer.write(encode_frame(self.origin, channel, data))
+        self.published += 1
+        return True
+
+    async def stop(self) -> None:
+        """ブローカーを停止（プライマリの場合はサーバーとロックも解放）"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.server is not None:
+            await self.server.stop()
+            self.server = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        stats = {
+            "type": UNIX,
+            "path": self.path,
+            "origin": self.origin,
+            "primary": self.is_primary,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects
+        }
+        if self.server is not None:
+            stats["server"] = self.server.get_statistics()
+        return stats
+
+
+def create_broker(kind: Optional[str] = None, path: Optional[str] = None):
+    """
+    ブローカーを作成
+
+    Args:
+        kind: "inprocess"（既定）または "unix"（省略時は環境変数 WS_BROKER）
+        path: Unix ソケットのパス（省略時は環境変数 WS_BROKER_SOCKET または既定のパス）
+
+    Raises:
+        ValueError: 不明な種別
+    """
+    kind = (kind or os.getenv("WS_BROKER") or INPROCESS).lower()
+    if kind == INPROCESS:
+        return InProcessBroker()
+    if kind == UNIX:
+        if fcntl is None:
+            logger.warning("Unix socket broker is not available on this platform, using in-process broker")
+            return InProcessBroker()
+        return UnixSocketBroker(path or os.getenv("WS_BROKER_SOCKET") or DEFAULT_SOCKET_PATH)
+    raise ValueError(f"Unknown WebSocket broker: {kind} (available: {INPROCESS}, {UNIX})")
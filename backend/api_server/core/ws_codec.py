@@ -0,0 +1,156 @@
+"""
+WebSocket Codec - JSON / MessagePack encoding negotiated per connection
+MessagePack messages use numeric timestamps and positional arrays for telemetry and detections
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import msgpack
+except ImportError:
+    # Fallback for environments where msgpack is not available (JSON only)
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JSON = "json"
+MSGPACK = "msgpack"
+ENCODINGS = (JSON, MSGPACK)
+
+# WebSocket サブプロトコル名 -> エンコーディング
+SUBPROTOCOLS: Dict[str, str] = {"msgpack": MSGPACK, "json": JSON}
+
+# 数値（UNIX 秒）に変換する時刻フィールド
+TIMESTAMP_KEYS = frozenset({"timestamp", "last_updated", "frame_timestamp"})
+
+# 位置配列に詰めるテレメトリ・検出結果の列（接続確立時にクライアントへ通知）
+TELEMETRY_FIELDS = ("x", "y", "z", "vx", "vy", "vz", "battery_level", "flight_state", "pitch", "roll", "yaw")
+DETECTION_FIELDS = ("label", "confidence", "x", "y", "width", "height")
+
+
+def msgpack_available() -> bool:
+    """MessagePack を使用できるか"""
+    return msgpack is not None
+
+
+def negotiate_subprotocol(subprotocols: Sequence[str] = ()) -> Optional[str]:
+    """
+    クライアントが提示した WebSocket サブプロトコル（先頭が優先）から採用するものを選ぶ
+
+    Returns:
+        Optional[str]: 採用するサブプロトコル（該当なしは None）
+    """
+    for subprotocol in subprotocols:
+        encoding = SUBPROTOCOLS.get(subprotocol)
+        if encoding == MSGPACK and not msgpack_available():
+            continue
+        if encoding is not None:
+            return subprotocol
+    return None
+
+
+def resolve_encoding(subprotocol: Optional[str], requested: Optional[str] = None) -> str:
+    """サブプロトコルとクエリパラメータからエンコーディングを決定（使えない場合は JSON）"""
+    encoding = SUBPROTOCOLS.get(subprotocol) if subprotocol else (requested or JSON).lower()
+    if encoding == MSGPACK and not msgpack_available():
+        logger.warning("MessagePack requested but msgpack is not installed, falling back to JSON")
+        return JSON
+    return encoding if encoding in ENCODINGS else JSON
+
+
+def _to_epoch(value: Any) -> Any:
+    """ISO 形式の時刻文字列を UNIX 秒に変換（変換できない値はそのまま）"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def _compact_timestamps(value: Any) -> Any:
+    """時刻フィールドを再帰的に数値へ変換"""
+    if isinstance(value, dict):
+        return {key: _to_epoch(item) if key in TIMESTAMP_KEYS else _compact_timestamps(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact_timestamps(item) for item in value]
+    return value
+
+
+def telemetry_to_array(telemetry: Dict[str, Any]) -> Optional[List[Any]]:
+    """テレメトリ辞書を TELEMETRY_FIELDS 順の配列に変換（位置・速度がない場合は None）"""
+    position, velocity = telemetry.get("position"), telemetry.get("velocity")
+    if position is None or velocity is None:
+        return None
+    attitude = telemetry.get("attitude") or {}
+    return [*position, *velocity, telemetry.get("battery_level"), telemetry.get("flight_state"),
+            attitude.get("pitch"), attitude.get("roll"), attitude.get("yaw")]
+
+
+def detections_to_arrays(detections: List[Dict[str, Any]]) -> List[List[Any]]:
+    """検出結果を DETECTION_FIELDS 順の配列のリストに変換"""
+    arrays = []
+    for detection in detections:
+        bbox = detection.get("bbox") or {}
+        arrays.append([detection.get("label"), detection.get("confidence"),
+                       bbox.get("x"), bbox.get("y"), bbox.get("width"), bbox.get("height")])
+    return arrays
+
+
+def compact_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    MessagePack 用のコンパクトなメッセージに変換
+
+    時刻を数値にし、テレメトリと検出結果を位置配列に詰める（フィールドマスクで
+    一部のフィールドだけを含む場合は辞書のまま）。
+    """
+    compact = _compact_timestamps(message)
+    message_type = compact.get("type")
+    if message_type == "drone_telemetry" and isinstance(compact.get("telemetry"), dict):
+        array = telemetry_to_array(compact["telemetry"])
+        if array is not None:
+            compact["telemetry"] = array
+    elif message_type == "drone_detections" and isinstance(compact.get("detections"), dict):
+        result = compact["detections"]
+        if isinstance(result.get("detections"), list):
+            compact["detections"] = dict(result, detections=detections_to_arrays(result["detections"]))
+    return compact
+
+
+def encode_message(message: Dict[str, Any], encoding: str = JSON) -> Union[str, bytes]:
+    """
+    メッセージをエンコード
+
+    Returns:
+        Union[str, bytes]: JSON はテキストフレーム用の文字列、MessagePack はバイナリ
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(compact_message(message), use_bin_type=True)
+    return json.dumps(message)
+
+
+def decode_message(data: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    受信メッセージをデコード（テキストは JSON、バイナリは MessagePack）
+
+    Raises:
+        ValueError: デコードできない・辞書でない
+    """
+    if isinstance(data, (bytes, bytearray)):
+        if msgpack is None:
+            raise ValueError("Binary messages require MessagePack support")
+        try:
+            message = msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack message: {e}")
+    else:
+        message = json.loads(data)
+    if not isinstance(message, dict):
+        raise ValueError("Message must be an object")
+    return message
@@ -0,0 +1,130 @@
+"""
+WebSocket Requests - Concurrent per-connection request dispatch with correlation IDs
+Each incoming message runs as its own task so a long request no longer blocks the socket
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 処理中リクエストの ID（応答メッセージに request_id として付与する）
+current_request_id: ContextVar[Optional[Any]] = ContextVar("current_request_id", default=None)
+
+# 同時実行数の上限に数えない軽量なメッセージ種別
+UNLIMITED_TYPES = frozenset({"ping", "cancel_request", "get_connection_stats"})
+
+
+def with_request_id(message: Dict[str, Any]) -> Dict[str, Any]:
+    """処理中リクエストの ID を応答メッセージに付与"""
+    request_id = current_request_id.get()
+    if request_id is None or "request_id" in message:
+        return message
+    return dict(message, request_id=request_id)
+
+
+class RequestDispatcher:
+    """
+    1接続分のリクエストを並行処理するディスパッチャー
+
+    受信ループは submit でタスクを起動するだけで次のメッセージを受け取れる。
+    同時実行数が上限に達している場合は受け付けず、切断時は実行中のリクエストを
+    すべてキャンセルする。
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Awaitable[Any]], max_concurrency: int = 8,
+                 unlimited_types: Iterable[str] = UNLIMITED_TYPES):
+        """
+        初期化
+
+        Args:
+            handler: メッセージ処理関数
+            max_concurrency: 同時に処理するリクエスト数の上限
+            unlimited_types: 上限に数えないメッセージ種別
+        """
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.unlimited_types = frozenset(unlimited_types)
+        self.tasks: Dict[asyncio.Task, Optional[Any]] = {}
+        self.limited_active = 0
+        self.closed = False
+
+        # 統計情報
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    @property
+    def active(self) -> int:
+        """処理中のリクエスト数"""
+        return len(self.tasks)
+
+    def submit(self, message: Dict[str, Any]) -> bool:
+        """
+        リクエストを別タスクで処理開始
+
+        Returns:
+            bool: 受け付けたか（切断済み・同時実行数の上限で拒否した場合は False）
+        """
+        limited = message.get("type") not in self.unlimited_types
+        if self.closed or (limited and self.limited_active >= self.max_concurrency):
+            self.rejected += 1
+            return False
+
+        if limited:
+            self.limited_active += 1
+        request_id = message.get("request_id")
+        task = asyncio.create_task(self._run(message, request_id, limited))
+        self.tasks[task] = request_id
+        self.submitted += 1
+        return True
+
+    async def _run(self, message: Dict[str, Any], request_id: Optional[Any], limited: bool) -> None:
+        current_request_id.set(request_id)
+        try:
+            await self.handler(message)
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error processing WebSocket request {message.get('type')}: {e}")
+        finally:
+            if limited:
+                self.limited_active -= 1
+            self.tasks.pop(asyncio.current_task(), None)
+
+    def cancel(self, request_id: Any) -> bool:
+        """指定 ID の処理中リクエストをキャンセル"""
+        cancelled = False
+        for task, task_request_id in list(self.tasks.items()):
+            if request_id is not None and task_request_id == request_id and not task.done():
+                task.cancel()
+                cancelled = True
+        return cancelled
+
+    def cancel_all(self) -> int:
+        """処理中のリクエストをすべてキャンセルし、以降の受け付けを停止"""
+        self.closed = True
+        count = 0
+        for task in list(self.tasks):
+            if not task.done():
+                task.cancel()
+                count += 1
+        return count
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "failed": self.failed
+        }
@@ -6,11 +6,12 @@ FastAPI application with drone control, vision, model management, and dashboard
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 from typing import Dict, Any
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -21,6 +22,11 @@ from .core.model_service import ModelService
 from .core.system_service import SystemService
 from .core.alert_service import AlertService
 from .core.performance_service import PerformanceService
+from .core.metrics_registry import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics_registry
+from .core.system_sampler import sample_interval_from_env, system_sampler
+from .core.request_metrics import RequestMetrics, RequestTimingMiddleware
+from .core.ws_broker import create_broker
+from .core.ws_requests import RequestDispatcher
 
 from .api.drones import router as drones_router
 from .api.vision import router as vision_router, initialize_vision_router
@@ -30,7 +36,9 @@ from .api.phase4 import router as phase4_router, initialize_phase4_router
 from .api.websocket import (
     manager as websocket_manager, 
     WebSocketHandler, 
-    start_status_broadcaster
+    receive_message as receive_websocket_message,
+    start_status_broadcaster,
+    start_telemetry_broadcaster
 )
 from .security import (
     limiter, 
@@ -70,6 +78,7 @@ async def lifespan(app: FastAPI):
     logger.info("Drone Manager initialized")
     
     vision_service = VisionService()
+    vision_service.camera_service = drone_manager.camera_service
     logger.info("Vision Service initialized")
     
     dataset_service = DatasetService()
@@ -85,7 +94,7 @@ async def lifespan(app: FastAPI):
     alert_service = AlertService()
     logger.info("Alert Service initialized")
     
-    performance_service = PerformanceService()
+    performance_service = PerformanceService(request_metrics=request_metrics)
     logger.info("Performance Service initialized")
     
     # Initialize API routers with service instances
@@ -95,15 +104,37 @@ async def lifespan(app: FastAPI):
     initialize_phase4_router(alert_service, performance_service)
     logger.info("API routers initialized")
     
+    # 全ドローン状態スナップショットの定期構築を開始
+    drone_manager.status_snapshot.start()
+    
+    # WebSocket 配信のブローカー（WS_BROKER=unix で複数ワーカー間に配信）
+    await websocket_manager.start_broker(create_broker())
+    
     # WebSocket状態ブロードキャスターを開始
     status_broadcaster_task = asyncio.create_task(start_status_broadcaster(drone_manager))
     logger.info("WebSocket status broadcaster started")
     
+    # テレメトリ配信（telemetry 購読者がいる間だけ要求レートで動作）と検出・アラートの購読者配信
+    telemetry_broadcaster_task = asyncio.create_task(start_telemetry_broadcaster(drone_manager))
+    vision_service.add_detection_callback(websocket_manager.publish_detections)
+    alert_service.subscribe_to_alerts(websocket_manager.publish_alert)
+    
+    # システムメトリクスの定期サンプリング（SYSTEM_METRICS_INTERVAL 秒ごと、各サービスは最新値を参照）
+    await system_sampler.start(sample_interval_from_env())
+    
     # Phase 4: Start monitoring services
     alert_monitoring_task = asyncio.create_task(alert_service.start_monitoring(30))
     performance_monitoring_task = asyncio.create_task(performance_service.start_monitoring(60))
     logger.info("Phase 4 monitoring services started")
     
+    # Prometheus メトリクス（/metrics は定期的に描画したバッファを返す）
+    metrics_registry.add_collector("http", request_metrics.collect_metrics)
+    metrics_registry.add_collector("drones", drone_manager.collect_metrics)
+    metrics_registry.add_collector("websocket", websocket_manager.collect_metrics)
+    metrics_registry.add_collector("cache", performance_service.collect_metrics)
+    metrics_registry.add_collector("system", system_sampler.collect_metrics)
+    await metrics_registry.start()
+    
     yield
     
     # 終了時処理
@@ -111,10 +142,14 @@ async def lifespan(app: FastAPI):
     
     # 状態ブロードキャスターを停止
     status_broadcaster_task.cancel()
-    try:
-        await status_broadcaster_task
-    except asyncio.CancelledError:
-        pass
+    telemetry_broadcaster_task.cancel()
+    for task in (status_broadcaster_task, telemetry_broadcaster_task):
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await websocket_manager.stop_broker()
+    await metrics_registry.stop()
     
     # Phase 4: Stop monitoring services
     alert_monitoring_task.cancel()
@@ -124,6 +159,7 @@ async def lifespan(app: FastAPI):
         await performance_monitoring_task
     except asyncio.CancelledError:
         pass
+    await system_sampler.stop()
     
     # Shutdown all services
     if alert_service:
@@ -218,6 +254,10 @@ async def add_security_headers(request, call_next):
     
     return response
 
+# リクエスト計測（最も外側で計測するため最後に追加）
+request_metrics = RequestMetrics()
+app.add_middleware(RequestTimingMiddleware, metrics=request_metrics)
+
 # APIルーター登録
 app.include_router(drones_router, prefix="/api", tags=["drones"])
 app.include_router(vision_router, prefix="/api", tags=["vision"])
@@ -231,39 +271,43 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocketエンドポイント
     
-    リアルタイムドローン状態更新とコマンド送信用
+    リアルタイムドローン状態更新とコマンド送信用。受信したメッセージは接続ごとの
+    ディスパッチャーで個別のタスクとして処理し、応答には要求の request_id を付与する。
     """
     websocket_handler = WebSocketHandler(drone_manager)
     await websocket_manager.connect(websocket)
+    dispatcher = RequestDispatcher(partial(websocket_handler.handle_message, websocket))
+    websocket_manager.attach_dispatcher(websocket, dispatcher)
     
     try:
         while True:
-            # メッセージを受信
-            data = await websocket.receive_text()
-            
+            # メッセージを受信（テキストは JSON、バイナリは MessagePack）
             try:
-                import json
-                message = json.loads(data)
-                await websocket_handler.handle_message(websocket, message)
-            except json.JSONDecodeError:
+                message = await receive_websocket_message(websocket)
+            except ValueError:
                 await websocket_manager.send_personal_message(websocket, {
                     "type": "error",
                     "error_code": "INVALID_JSON",
                     "message": "Invalid JSON format",
                     "timestamp": drone_manager.get_current_timestamp().isoformat() if drone_manager else None
                 })
-            except Exception as e:
-                logger.error(f"Error handling WebSocket message: {e}")
+                continue
+            
+            if not dispatcher.submit(message):
                 await websocket_manager.send_personal_message(websocket, {
                     "type": "error",
-                    "error_code": "MESSAGE_HANDLING_ERROR", 
-                    "message": f"Error handling message: {str(e)}",
+                    "error_code": "TOO_MANY_REQUESTS",
+                    "message": f"Too many concurrent requests (limit {dispatcher.max_concurrency})",
+                    "request_id": message.get("request_id"),
                     "timestamp": drone_manager.get_current_timestamp().isoformat() if drone_manager else None
                 })
                 
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket)
         logger.info("WebSocket client disconnected")
+    finally:
+        # 切断時は処理中のリクエストをキャンセル
+        dispatcher.cancel_all()
 
 # 基本ヘルスチェックエンドポイント
 @app.get("/")
@@ -301,6 +345,12 @@ async def health_check(request):
     return health_status
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus メトリクス（バックグラウンドで描画済みのテキストを返す）"""
+    return Response(content=metrics_registry.exposition(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Phase 5: Dashboard routes
 @app.get("/dashboard", response_class=HTMLResponse)
 @limiter.limit("50/minute")
@@ -5,7 +5,8 @@ All models are based on the OpenAPI specification
 
 from .common_models import SuccessResponse, ErrorResponse
 from .drone_models import (
-    Drone, DroneStatus, Attitude, MoveCommand, RotateCommand, Photo
+    Drone, DroneStatus, Attitude, MoveCommand, RotateCommand, Photo,
+    BulkCommandRequest, BulkCommandResult, BulkCommandResponse
 )
 from .vision_models import (
     BoundingBox, Detection, DetectionRequest, DetectionResult,
@@ -27,6 +28,9 @@ __all__ = [
     "MoveCommand",
     "RotateCommand",
     "Photo",
+    "BulkCommandRequest",
+    "BulkCommandResult",
+    "BulkCommandResponse",
     # Vision models
     "BoundingBox",
     "Detection",
@@ -4,8 +4,8 @@ Based on OpenAPI specification schemas
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional, Dict, Any, List, Literal, Tuple
+from pydantic import BaseModel, Field, ConfigDict, ValidationError, model_validator
 
 
 class Attitude(BaseModel):
@@ -149,4 +149,105 @@ class Photo(BaseModel):
     path: str = Field(..., description="ファイルパス")
     timestamp: datetime = Field(..., description="撮影時刻")
     drone_id: str = Field(..., description="撮影したドローンID")
-    metadata: Optional[Dict[str, Any]] = Field(None, description="写真のメタデータ")
\ No newline at end of file
+    metadata: Optional[Dict[str, Any]] = Field(None, description="写真のメタデータ")
+
+
+# パラメータを持つ一括コマンドと、その検証に使う単体コマンドのモデル
+BULK_COMMAND_PARAM_MODELS: Dict[str, type] = {
+    "move": MoveCommand,
+    "rotate": RotateCommand
+}
+
+
+def validate_command_params(command: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    コマンドパラメータを単体コマンドのモデル（範囲・方向の値）で検証
+
+    Returns:
+        Dict[str, Any]: 検証済みパラメータ
+    """
+    params = dict(params or {})
+    model = BULK_COMMAND_PARAM_MODELS.get(command)
+    if model is None:
+        return params
+    try:
+        validated = model.model_validate(params)
+    except ValidationError as e:
+        details = "; ".join(
+            f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+        )
+        raise ValueError(f"Invalid parameters for {command}: {details}") from None
+    params.update(validated.model_dump())
+    return params
+
+
+class BulkCommandRequest(BaseModel):
+    """一括コマンドリクエスト"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "command": "move",
+                "drone_ids": ["drone_001", "drone_002"],
+                "params": {
+                    "direction": "up",
+                    "distance": 50
+                },
+                "timeout": 10.0
+            }
+        }
+    )
+    
+    command: Literal["connect", "disconnect", "takeoff", "land", "move", "rotate", "emergency"] = Field(
+        ..., description="コマンド"
+    )
+    drone_ids: Optional[List[str]] = Field(None, description="対象ドローンIDリスト")
+    selector: Optional[Literal["all", "connected", "disconnected", "real", "dummy"]] = Field(
+        None, description="対象セレクタ"
+    )
+    params: Optional[Dict[str, Any]] = Field(None, description="コマンドパラメータ")
+    timeout: float = Field(10.0, gt=0, le=120, description="ドローンごとのタイムアウト（秒）")
+    
+    @model_validator(mode="after")
+    def validate_params(self) -> "BulkCommandRequest":
+        """move / rotate のパラメータを送信前に検証（不正な値は 422）"""
+        if self.command in BULK_COMMAND_PARAM_MODELS:
+            self.params = validate_command_params(self.command, self.params)
+        return self
+
+
+class PathPlanRequest(BaseModel):
+    """経路計画リクエスト"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "goal": [5.0, 3.0, 2.0],
+                "start": [0.0, 0.0, 1.0]
+            }
+        }
+    )
+    
+    goal: Tuple[float, float, float] = Field(..., description="目標位置 [x, y, z]（m）")
+    start: Optional[Tuple[float, float, float]] = Field(
+        None, description="開始位置 [x, y, z]（m、未指定時は現在位置）"
+    )
+
+
+class BulkCommandResult(BaseModel):
+    """ドローンごとの一括コマンド結果"""
+    drone_id: str = Field(..., description="ドローンID")
+    success: bool = Field(..., description="成功したかどうか")
+    message: Optional[str] = Field(None, description="結果メッセージ")
+    error: Optional[str] = Field(None, description="エラー内容")
+    timed_out: bool = Field(False, description="タイムアウトしたかどうか")
+    elapsed_ms: float = Field(..., ge=0, description="実行時間（ミリ秒）")
+
+
+class BulkCommandResponse(BaseModel):
+    """一括コマンドレスポンス"""
+    command: str = Field(..., description="コマンド")
+    total: int = Field(..., ge=0, description="対象ドローン数")
+    succeeded: int = Field(..., ge=0, description="成功数")
+    failed: int = Field(..., ge=0, description="失敗数")
+    timed_out: int = Field(..., ge=0, description="タイムアウト数")
+    elapsed_ms: float = Field(..., ge=0, description="全体の実行時間（ミリ秒）")
+    results: List[BulkCommandResult] = Field(..., description="ドローンごとの結果")
@@ -143,6 +143,11 @@ class TrackingStatus(BaseModel):
     follow_distance: Optional[int] = Field(None, description="追従距離（cm）")
     last_detection_time: Optional[datetime] = Field(None, description="最終検出時刻")
     started_at: Optional[datetime] = Field(None, description="追跡開始時刻")
+    camera_source: Optional[str] = Field(None, description="カメラソース")
+    tracking_stats: Optional[Dict[str, Any]] = Field(None, description="追跡統計")
+    drone_type: Optional[str] = Field(None, description="ドローン種別")
+    is_real_drone: Optional[bool] = Field(None, description="実機かどうか")
+    command_queue: Optional[Dict[str, Any]] = Field(None, description="コマンドキュー統計（キュー深さ・遅延）")
 
 
 class Dataset(BaseModel):
@@ -9,6 +9,8 @@ from .virtual_camera import (
     MovementPattern,
     create_sample_scenario
 )
+from .frame_recorder import FrameRecorder, FrameReplaySource
+from .demand_camera import DemandDrivenCameraStream, CameraStreamPool
 
 __all__ = [
     'VirtualCameraStream',
@@ -16,5 +18,9 @@ __all__ = [
     'TrackingObject',
     'TrackingObjectType',
     'MovementPattern',
-    'create_sample_scenario'
+    'create_sample_scenario',
+    'FrameRecorder',
+    'FrameReplaySource',
+    'DemandDrivenCameraStream',
+    'CameraStreamPool'
 ]
\ No newline at end of file
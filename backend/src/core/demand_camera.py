@@ -0,0 +1,311 @@
+"""
+需要駆動型カメラストリームモジュール
+コンシューマーが存在する間だけ描画する仮想カメラと、待機ストリームのウォームプール
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .virtual_camera import VirtualCameraStream
+
+logger = logging.getLogger(__name__)
+
+
+class DemandDrivenCameraStream(VirtualCameraStream):
+    """
+    需要駆動型の仮想カメラストリーム
+
+    描画スレッドはコンシューマーが登録されている間だけ動作し、
+    描画レートは最も高いフレームレートを要求するコンシューマーに合わせる
+    （上限はストリームの fps）。コンシューマーがいない間は一時停止し CPU を消費しない。
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: int = 30):
+        """
+        初期化
+
+        Args:
+            width: 画像幅
+            height: 画像高さ
+            fps: 最大フレームレート
+        """
+        super().__init__(width, height, fps)
+
+        # コンシューマーID -> 要求フレームレート
+        self.consumers: Dict[str, float] = {}
+        self._consumer_lock = threading.Lock()
+        self._demand_event = threading.Event()
+        self._render_lock = threading.Lock()
+        # ストリームを利用中のドローンID（プールから再利用される際に付け替える）
+        self.owner: Optional[str] = None
+
+        # 統計情報
+        self.rendered_frames = 0
+        self.paused_since: Optional[float] = time.time()
+
+    @property
+    def effective_fps(self) -> float:
+        """現在の描画フレームレート（コンシューマー不在時は0）"""
+        with self._consumer_lock:
+            if not self.consumers:
+                return 0.0
+            return min(float(self.fps), max(self.consumers.values()))
+
+    @property
+    def has_consumers(self) -> bool:
+        """コンシューマーが登録されているか"""
+        return bool(self.consumers)
+
+    @property
+    def is_paused(self) -> bool:
+        """描画が一時停止中か"""
+        return not self._demand_event.is_set()
+
+    def add_consumer(self, consumer_id: str, fps: Optional[float] = None) -> None:
+        """
+        コンシューマーを登録（既存の場合は要求レートを更新）
+
+        Args:
+            consumer_id: コンシューマーID
+            fps: 要求フレームレート（未指定時はストリームの fps）
+        """
+        requested = float(fps) if fps else float(self.fps)
+        with self._consumer_lock:
+            self.consumers[consumer_id] = max(0.1, requested)
+        self.paused_since = None
+        self._demand_event.set()
+        logger.debug(f"カメラコンシューマー登録: {consumer_id} @ {requested}fps")
+
+    def remove_consumer(self, consumer_id: str) -> bool:
+        """コンシューマーを登録解除"""
+        with self._consumer_lock:
+            removed = self.consumers.pop(consumer_id, None) is not None
+            if not self.consumers:
+                self._demand_event.clear()
+                self.paused_since = time.time()
+        return removed
+
+    def clear_consumers(self) -> None:
+        """全コンシューマーを登録解除して一時停止"""
+        with self._consumer_lock:
+            self.consumers.clear()
+            self._demand_event.clear()
+            self.paused_since = time.time()
+
+    def rebind(self, owner: str) -> None:
+        """
+        ストリームを別の利用者に付け替え、描画済みフレームを破棄
+
+        待機中に保持していた古いフレーム（他のドローンのものを含む）を返さないようにする。
+        """
+        with self.frame_lock:
+            self.current_frame = None
+        self.owner = owner
+
+    def render_frame(self) -> np.ndarray:
+        """
+        1フレームを同期的に描画
+
+        一時停止中のストリームからも即座にフレームを得られる（写真撮影用）。
+        """
+        with self._render_lock:
+            frame = self._generate_frame()
+        with self.frame_lock:
+            self.current_frame = frame
+            self.frame_count += 1
+            self.rendered_frames += 1
+        return frame.copy()
+
+    def _stream_loop(self) -> None:
+        """需要駆動の描画ループ"""
+        while self.is_streaming:
+            # コンシューマーがいない間は待機
+            if not self._demand_event.wait(timeout=0.5):
+                continue
+            if not self.is_streaming:
+                break
+
+            fps = self.effective_fps
+            if fps <= 0:
+                continue
+
+            start_time = time.time()
+            self.render_frame()
+
+            processing_time = time.time() - start_time
+            sleep_time = max(0, 1.0 / fps - processing_time)
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+
+    def stop_stream(self) -> None:
+        """ストリーミング停止"""
+        if not self.is_streaming:
+            return
+        self.is_streaming = False
+        # 一時停止中のスレッドを起こして終了させる
+        self._demand_event.set()
+        if self.stream_thread:
+            self.stream_thread.join(timeout=1.0)
+        self.stream_thread = None
+        self._demand_event.clear()
+        logger.info("需要駆動カメラストリーミング停止")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        stats = super().get_statistics()
+        stats.update({
+            "consumers": len(self.consumers),
+            "effective_fps": self.effective_fps,
+            "is_paused": self.is_paused,
+            "rendered_frames": self.rendered_frames
+        })
+        return stats
+
+
+class CameraStreamPool:
+    """
+    カメラストリームのウォームプール
+
+    解放されたストリームは停止せず一時停止状態でプールに保持し、
+    次回の取得時に再利用する。写真撮影などの単発利用はスレッド起動待ちなしで行える。
+    """
+
+    def __init__(self, max_warm: int = 4,
+                 stream_factory: Optional[Callable[[int, int, int], DemandDrivenCameraStream]] = None):
+        """
+        初期化
+
+        Args:
+            max_warm: 保持する待機ストリームの最大数
+            stream_factory: ストリーム生成関数 (width, height, fps) -> stream
+        """
+        self.max_warm = max_warm
+        self.stream_factory = stream_factory or DemandDrivenCameraStream
+
+        self.active: Dict[str, DemandDrivenCameraStream] = {}
+        # 待機ストリーム（最後に利用した名前 -> ストリーム、LRU順）
+        self.warm: "OrderedDict[str, DemandDrivenCameraStream]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 統計情報
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self.evictions = 0
+
+        logger.info(f"カメラストリームプール初期化: max_warm={max_warm}")
+
+    def _take_warm(self, name: str, width: int, height: int) -> Optional[DemandDrivenCameraStream]:
+        """条件に合う待機ストリームを取り出す（同名を優先、取り出したストリームは name に付け替える）"""
+        stream = self._pop_warm(name, width, height)
+        if stream is not None:
+            stream.rebind(name)
+        return stream
+
+    def _pop_warm(self, name: str, width: int, height: int) -> Optional[DemandDrivenCameraStream]:
+        stream = self.warm.get(name)
+        if stream is not None and (stream.width, stream.height) == (width, height):
+            return self.warm.pop(name)
+
+        for warm_name, warm_stream in self.warm.items():
+            if (warm_stream.width, warm_stream.height) == (width, height):
+                return self.warm.pop(warm_name)
+        return None
+
+    def acquire(self, name: str, width: int = 640, height: int = 480, fps: int = 30) -> Tuple[DemandDrivenCameraStream, bool]:
+        """
+        ストリームを取得
+
+        Args:
+            name: ストリーム名（ドローンID）
+            width: 画像幅
+            height: 画像高さ
+            fps: 最大フレームレート
+
+        Returns:
+            Tuple[DemandDrivenCameraStream, bool]: (ストリーム, 新規作成かどうか)
+        """
+        with self._lock:
+            if name in self.active:
+                return self.active[name], False
+
+            stream = self._take_warm(name, width, height)
+            created = stream is None
+            if created:
+                stream = self.stream_factory(width, height, fps)
+                stream.owner = name
+                self.cold_starts += 1
+            else:
+                self.warm_hits += 1
+                stream.fps = fps
+                stream.frame_interval = 1.0 / fps
+
+            self.active[name] = stream
+
+        if not stream.is_streaming:
+            stream.start_stream()
+
+        return stream, created
+
+    def release(self, name: str) -> bool:
+        """
+        ストリームを解放して待機プールへ戻す
+
+        Returns:
+            bool: 解放したかどうか
+        """
+        evicted = []
+        with self._lock:
+            stream = self.active.pop(name, None)
+            if stream is None:
+                return False
+
+            stream.clear_consumers()
+            self.warm[name] = stream
+            self.warm.move_to_end(name)
+
+            while len(self.warm) > self.max_warm:
+                _, oldest = self.warm.popitem(last=False)
+                evicted.append(oldest)
+                self.evictions += 1
+
+        for oldest in evicted:
+            oldest.stop_stream()
+        return True
+
+    def prewarm(self, count: int, width: int = 640, height: int = 480, fps: int = 30) -> int:
+        """待機ストリームを事前に用意"""
+        created = 0
+        with self._lock:
+            while len(self.warm) < min(count, self.max_warm):
+                stream = self.stream_factory(width, height, fps)
+                stream.start_stream()
+                self.warm[f"__prewarm_{len(self.warm)}_{created}"] = stream
+                created += 1
+        return created
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "active_streams": len(self.active),
+            "warm_streams": len(self.warm),
+            "max_warm": self.max_warm,
+            "warm_hits": self.warm_hits,
+            "cold_starts": self.cold_starts,
+            "evictions": self.evictions
+        }
+
+    def shutdown(self) -> None:
+        """全ストリームを停止"""
+        with self._lock:
+            streams = list(self.active.values()) + list(self.warm.values())
+            self.active.clear()
+            self.warm.clear()
+
+        for stream in streams:
+            stream.stop_stream()
+        logger.info("カメラストリームプール停止")
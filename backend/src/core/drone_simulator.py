@@ -7,10 +7,11 @@ import numpy as np
 import time
 import threading
 import logging
-from typing import List, Dict, Tuple, Optional, Union, Any
+from typing import List, Dict, Tuple, Optional, Union, Any, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 import json
+from collections import deque
 from scipy.spatial.distance import cdist
 from shapely.geometry import Point, Polygon, LineString
 import matplotlib.pyplot as plt
@@ -147,6 +148,7 @@ class Virtual3DSpace:
         self.bounds = Vector3D(*bounds)
         self.obstacles: Dict[str, Obstacle] = {}
         self.no_fly_zones: List[Polygon] = []
+        self.version = 0  # 障害物の追加・削除ごとに増加（経路キャッシュの無効化用）
         
         # デフォルトの境界壁を追加
         self._create_boundary_walls()
@@ -195,12 +197,14 @@ class Virtual3DSpace:
     def add_obstacle(self, obstacle: Obstacle) -> None:
         """障害物を追加"""
         self.obstacles[obstacle.id] = obstacle
+        self.version += 1
         logger.info(f"障害物追加: {obstacle.id} at {obstacle.position.to_tuple()}")
     
     def remove_obstacle(self, obstacle_id: str) -> bool:
         """障害物を削除"""
         if obstacle_id in self.obstacles:
             del self.obstacles[obstacle_id]
+            self.version += 1
             logger.info(f"障害物削除: {obstacle_id}")
             return True
         return False
@@ -230,6 +234,102 @@ class Virtual3DSpace:
         
         return False, None
     
+    def get_obstacle_bounds(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """全障害物の AABB を配列で取得 (ID一覧, 最小点 (N, 3), 最大点 (N, 3))"""
+        ids = list(self.obstacles.keys())
+        centers = np.array([obstacle.position.to_tuple() for obstacle in self.obstacles.values()],
+                           dtype=np.float64).reshape(-1, 3)
+        half_sizes = np.array([obstacle.size.to_tuple() for obstacle in self.obstacles.values()],
+                              dtype=np.float64).reshape(-1, 3) / 2
+        return ids, centers - half_sizes, centers + half_sizes
+    
+    def sweep_segments(self, points, drone_size: Vector3D = Vector3D(0.2, 0.2, 0.1),
+                       chunk_elements: int = 262144) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """
+        経路の各線分をドローンの AABB で掃引し、最初の衝突時刻を求める
+        
+        障害物をドローンの半サイズだけ膨張させ（ミンコフスキー和）、全線分×全障害物の
+        スラブ判定を一括で行う。開始点で既に接触している障害物（床に着地中など）は
+        離脱方向とみなして除外する。
+        
+        Args:
+            points: 経路の点列 (N, 3)。線分は points[i] -> points[i + 1]
+            drone_size: ドローンのバウンディングボックスサイズ
+            chunk_elements: 一度に判定する線分×障害物数の上限（メモリ使用量の制限）
+            
+        Returns:
+            Tuple[np.ndarray, List[Optional[str]]]: 線分ごとの衝突時刻 t∈[0, 1]（衝突なしは inf）と障害物ID
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        segment_count = max(len(points) - 1, 0)
+        times = np.full(segment_count, np.inf)
+        hit_ids: List[Optional[str]] = [None] * segment_count
+        ids, box_min, box_max = self.get_obstacle_bounds()
+        if segment_count == 0 or not ids:
+            return times, hit_ids
+        
+        half = np.array(drone_size.to_tuple(), dtype=np.float64) / 2
+        box_min = (box_min - half)[None, :, :]
+        box_max = (box_max + half)[None, :, :]
+        hit_index = np.full(segment_count, -1)
+        
+        chunk = max(1, chunk_elements // len(ids))
+        for offset in range(0, segment_count, chunk):
+            end = min(offset + chunk, segment_count)
+            origin = points[offset:end][:, None, :]
+            delta = points[offset + 1:end + 1][:, None, :] - origin
+            
+            with np.errstate(divide="ignore", invalid="ignore"):
+                inverse = 1.0 / delta
+                t1 = (box_min - origin) * inverse
+                t2 = (box_max - origin) * inverse
+            near = np.minimum(t1, t2)
+            far = np.maximum(t1, t2)
+            
+            # 軸方向に動かない場合はスラブ内なら常に重なり、外なら交差なし
+            still = delta == 0
+            inside = (origin >= box_min) & (origin <= box_max)
+            near = np.where(still, np.where(inside, -np.inf, np.inf), near)
+            far = np.where(still, np.where(inside, np.inf, -np.inf), far)
+            
+            t_enter = near.max(axis=2)
+            t_exit = far.min(axis=2)
+            hits = (t_enter <= t_exit) & (t_enter >= 0) & (t_enter <= 1)
+            # 開始点で接触している障害物は除外
+            hits &= ~inside.all(axis=2)
+            
+            t_enter = np.where(hits, t_enter, np.inf)
+            first = t_enter.argmin(axis=1)
+            first_time = t_enter[np.arange(len(first)), first]
+            times[offset:offset + len(first)] = first_time
+            hit_index[offset:offset + len(first)] = np.where(np.isfinite(first_time), first, -1)
+        
+        for segment in np.flatnonzero(hit_index >= 0):
+            hit_ids[segment] = ids[hit_index[segment]]
+        return times, hit_ids
+    
+    def find_path_collision(self, points) -> Optional[Dict[str, Any]]:
+        """
+        経路上の最初の衝突を取得
+        
+        Returns:
+            Optional[Dict[str, Any]]: segment_index, time, obstacle_id, position（衝突なしは None）
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        times, hit_ids = self.sweep_segments(points)
+        colliding = np.flatnonzero(np.isfinite(times))
+        if len(colliding) == 0:
+            return None
+        segment = int(colliding[0])
+        t = float(times[segment])
+        position = points[segment] + (points[segment + 1] - points[segment]) * t
+        return {
+            "segment_index": segment,
+            "time": t,
+            "obstacle_id": hit_ids[segment],
+            "position": tuple(float(value) for value in position)
+        }
+    
     def is_position_valid(self, position: Vector3D) -> bool:
         """位置が有効かチェック（境界内かつ衝突なし）"""
         # 境界チェック
@@ -351,6 +451,10 @@ class DroneSimulator:
         self.current_state = DroneState3D()
         self.target_position: Optional[Vector3D] = None
         self.flight_path: List[Vector3D] = []
+        self.separation_velocity = Vector3D()  # 他機との間隔維持のための回避速度（MultiDroneSimulator が設定）
+        # 他スレッドから通知された衝突（次の更新ステップでこのドローンのスレッドが処理する）
+        self._pending_collision: Optional[str] = None
+        self._collision_lock = threading.Lock()
         
         # カメラストリーム統合
         self.camera_stream: Optional[VirtualCameraStream] = None
@@ -423,6 +527,11 @@ class DroneSimulator:
     
     def _update_simulation(self, dt: float) -> None:
         """シミュレーションの1ステップ更新"""
+        pending_collision = self._take_pending_collision()
+        if pending_collision is not None:
+            self._handle_collision(pending_collision)
+            return
+        
         if self.current_state.state == DroneState.IDLE:
             return
         
@@ -432,6 +541,11 @@ class DroneSimulator:
         # 物理エンジンで新しい状態を計算
         new_state = self.physics_engine.apply_forces(self.current_state, thrust, dt)
         
+        # 他機からの回避速度を反映
+        separation = self.separation_velocity
+        if separation.x or separation.y or separation.z:
+            new_state.position = new_state.position + separation * dt
+        
         # 衝突判定
         collision, obstacle_id = self.virtual_world.check_collision(new_state.position)
         if collision:
@@ -491,6 +605,25 @@ class DroneSimulator:
             new_size = int(base_size / altitude_factor)
             obj.size = (new_size, new_size)
     
+    def report_collision(self, obstacle_id: str) -> None:
+        """
+        他スレッドから衝突を通知
+        
+        状態の更新はシミュレーションスレッドと競合するため、ここでは記録のみ行い、
+        次の更新ステップで _handle_collision を実行する。
+        """
+        with self._collision_lock:
+            if self._pending_collision is None:
+                self._pending_collision = obstacle_id
+    
+    def _take_pending_collision(self) -> Optional[str]:
+        """通知された衝突を取り出す"""
+        if self._pending_collision is None:
+            return None
+        with self._collision_lock:
+            obstacle_id, self._pending_collision = self._pending_collision, None
+        return obstacle_id
+    
     def _handle_collision(self, obstacle_id: Optional[str]) -> None:
         """衝突処理"""
         self.current_state.state = DroneState.COLLISION
@@ -578,6 +711,14 @@ class DroneSimulator:
             logger.warning(f"移動失敗: 目標位置が無効です {target.to_tuple()}")
             return False
         
+        # 目標点だけでなく移動経路上の衝突も確認
+        collision = self.virtual_world.find_path_collision(
+            [self.current_state.position.to_tuple(), target.to_tuple()]
+        )
+        if collision:
+            logger.warning(f"移動失敗: 経路上に障害物があります {collision['obstacle_id']} at {collision['position']}")
+            return False
+        
         self.target_position = target
         self.flight_path.append(target)
         
@@ -740,15 +881,105 @@ class DroneSimulator:
 
 
 # 統合クラス（複数ドローンのシミュレーション管理）
+# 近傍セル探索用オフセット（自セル + 辞書順で正の13方向、各ペアを1回だけ列挙する）
+HALF_NEIGHBOR_OFFSETS: List[Tuple[int, int, int]] = [(0, 0, 0)] + [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+# 機体間の近接判定対象とする状態（空中にいる状態）
+AIRBORNE_STATES = (DroneState.TAKEOFF, DroneState.FLYING, DroneState.LANDING, DroneState.EMERGENCY)
+
+
+def find_close_pairs(positions: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    一様ハッシュグリッドで距離 radius 以内の点ペアを列挙
+    
+    セルの一辺を radius にすると、近接ペアは自セルか隣接セルにしか存在しないため
+    全体で O(n) の候補数になる。距離は候補をまとめて NumPy で計算する。
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: インデックス i, j (i < j) と距離
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0))
+    if len(positions) < 2 or radius <= 0:
+        return empty
+    
+    grid: Dict[Tuple[int, int, int], List[int]] = {}
+    for index, cell in enumerate(map(tuple, np.floor(positions / radius).astype(np.int64).tolist())):
+        grid.setdefault(cell, []).append(index)
+    
+    first: List[int] = []
+    second: List[int] = []
+    for (cx, cy, cz), members in grid.items():
+        for dx, dy, dz in HALF_NEIGHBOR_OFFSETS:
+            if dx == dy == dz == 0:
+                for k, i in enumerate(members):
+                    for j in members[k + 1:]:
+                        first.append(i)
+                        second.append(j)
+                continue
+            others = grid.get((cx + dx, cy + dy, cz + dz))
+            if others is None:
+                continue
+            for i in members:
+                for j in others:
+                    first.append(i)
+                    second.append(j)
+    if not first:
+        return empty
+    
+    i_index = np.array(first, dtype=np.intp)
+    j_index = np.array(second, dtype=np.intp)
+    distances = np.linalg.norm(positions[i_index] - positions[j_index], axis=1)
+    close = distances <= radius
+    i_index, j_index = i_index[close], j_index[close]
+    swap = i_index > j_index
+    i_index[swap], j_index[swap] = j_index[swap], i_index[swap]
+    return i_index, j_index, distances[close]
+
+
 class MultiDroneSimulator:
     """複数ドローンシミュレーションマネージャー"""
     
-    def __init__(self, space_bounds: Tuple[float, float, float] = (30.0, 30.0, 15.0)):
-        """初期化"""
+    def __init__(self, space_bounds: Tuple[float, float, float] = (30.0, 30.0, 15.0),
+                 near_miss_distance: float = 1.0, collision_distance: float = 0.3,
+                 max_separation_speed: float = 1.0, separation_interval: float = 0.02):
+        """
+        初期化
+        
+        Args:
+            space_bounds: 3D空間の境界
+            near_miss_distance: ニアミスとみなす機体間距離（回避を開始する距離, m）
+            collision_distance: 衝突とみなす機体間距離（m）
+            max_separation_speed: 回避速度の上限（m/s）
+            separation_interval: 機体間距離監視の周期（秒）
+        """
         self.space_bounds = space_bounds
         self.drones: Dict[str, DroneSimulator] = {}
         self.shared_virtual_world = Virtual3DSpace(space_bounds)
         
+        # 機体間の間隔維持
+        self.near_miss_distance = near_miss_distance
+        self.collision_distance = collision_distance
+        self.max_separation_speed = max_separation_speed
+        self.separation_interval = separation_interval
+        self.proximity_events: deque = deque(maxlen=1000)
+        self._pending_events: List[Dict[str, Any]] = []
+        self._active_pairs: Dict[Tuple[str, str], str] = {}
+        self._events_lock = threading.Lock()
+        self._separation_running = False
+        self._separation_thread: Optional[threading.Thread] = None
+        
+        # 統計情報
+        self.separation_ticks = 0
+        self.last_separation_ms = 0.0
+        self.max_separation_ms = 0.0
+        self.near_miss_count = 0
+        self.drone_collision_count = 0
+        
         logger.info("複数ドローンシミュレーター初期化")
     
     def add_drone(self, drone_id: str, initial_position: Tuple[float, float, float] = (0, 0, 0)) -> DroneSimulator:
@@ -770,14 +1001,166 @@ class MultiDroneSimulator:
         """全ドローンのシミュレーション開始"""
         for drone in self.drones.values():
             drone.start_simulation()
+        self.start_separation_monitor()
         logger.info("全ドローンシミュレーション開始")
     
     def stop_all_simulations(self) -> None:
         """全ドローンのシミュレーション停止"""
+        self.stop_separation_monitor()
         for drone in self.drones.values():
             drone.stop_simulation()
         logger.info("全ドローンシミュレーション停止")
     
+    # 機体間の間隔維持
+    
+    def check_separation(self, ghosts: Optional[Sequence[Tuple[str, Tuple[float, float, float]]]] = None
+                         ) -> List[Dict[str, Any]]:
+        """
+        機体間距離を1回チェックし、回避速度の更新とイベント生成を行う
+        
+        ニアミス距離内のペアには距離に比例した反発速度を与え、衝突距離内に入ったペアは
+        両機に衝突を通知する（各機のシミュレーションスレッドが次の更新で処理する）。
+        イベントはペアの状態が悪化したときだけ生成する。
+        
+        Args:
+            ghosts: 他の担当領域に属する境界付近のドローン (ID, 位置)。反発と衝突の相手としてのみ
+                使い、状態は変更しない。ゴーストとのペアのイベントは ID が小さい側の担当が生成する
+            
+        Returns:
+            List[Dict[str, Any]]: 今回生成されたイベント
+        """
+        started = time.perf_counter()
+        ghosts = list(ghosts or [])
+        drones = [drone for drone in list(self.drones.values())
+                  if drone.is_running and drone.current_state.state in AIRBORNE_STATES]
+        local_count = len(drones)
+        ids = [drone.drone_id for drone in drones] + [ghost_id for ghost_id, _ in ghosts]
+        positions = np.array([drone.current_state.position.to_tuple() for drone in drones]
+                             + [tuple(position) for _, position in ghosts],
+                             dtype=np.float64).reshape(-1, 3)
+        i_index, j_index, distances = find_close_pairs(positions, self.near_miss_distance)
+        if ghosts and len(distances):
+            # ゴースト同士のペアは担当外
+            local = i_index < local_count
+            i_index, j_index, distances = i_index[local], j_index[local], distances[local]
+        
+        # 反発速度（ペアごとの寄与を合算）
+        velocities = np.zeros_like(positions)
+        if len(distances):
+            direction = (positions[i_index] - positions[j_index]) / np.where(distances > 0, distances, 1.0)[:, None]
+            # 同一位置のペアは x 方向に分離する
+            direction[distances == 0] = (1.0, 0.0, 0.0)
+            strength = self.max_separation_speed * (1.0 - distances / self.near_miss_distance)
+            push = direction * strength[:, None]
+            np.add.at(velocities, i_index, push)
+            np.add.at(velocities, j_index, -push)
+            speed = np.linalg.norm(velocities, axis=1)
+            too_fast = speed > self.max_separation_speed
+            velocities[too_fast] *= (self.max_separation_speed / speed[too_fast])[:, None]
+        
+        for drone in self.drones.values():
+            drone.separation_velocity = Vector3D()
+        for drone, velocity in zip(drones, velocities[:local_count].tolist()):
+            if velocity[0] or velocity[1] or velocity[2]:
+                drone.separation_velocity = Vector3D(*velocity)
+        
+        # ペアの状態遷移からイベントを生成
+        events = []
+        current_pairs: Dict[Tuple[str, str], str] = {}
+        now = time.time()
+        for i, j, distance in zip(i_index.tolist(), j_index.tolist(), distances.tolist()):
+            pair = tuple(sorted((ids[i], ids[j])))
+            level = "collision" if distance <= self.collision_distance else "near_miss"
+            previous = self._active_pairs.get(pair)
+            # 衝突後は離れるまで衝突状態を維持
+            current_pairs[pair] = "collision" if previous == "collision" else level
+            if previous == level or previous == "collision":
+                continue
+            
+            if level == "collision":
+                for own, other in ((i, j), (j, i)):
+                    if own < local_count:
+                        drones[own].report_collision(f"drone:{ids[other]}")
+            
+            # ゴーストとのペアは両方の担当で検出されるため、片側だけがイベントを生成
+            if j >= local_count and ids[i] > ids[j]:
+                continue
+            midpoint = (positions[i] + positions[j]) / 2
+            events.append({
+                "type": level,
+                "drone_ids": list(pair),
+                "distance": distance,
+                "position": tuple(midpoint.tolist()),
+                "timestamp": now
+            })
+            if level == "collision":
+                self.drone_collision_count += 1
+            else:
+                self.near_miss_count += 1
+        self._active_pairs = current_pairs
+        
+        if events:
+            with self._events_lock:
+                self.proximity_events.extend(events)
+                self._pending_events.extend(events)
+        
+        self.separation_ticks += 1
+        self.last_separation_ms = (time.perf_counter() - started) * 1000
+        self.max_separation_ms = max(self.max_separation_ms, self.last_separation_ms)
+        return events
+    
+    def start_separation_monitor(self) -> None:
+        """機体間距離の監視スレッドを開始（起動済みなら何もしない）"""
+        if self._separation_running:
+            return
+        self._separation_running = True
+        self._separation_thread = threading.Thread(target=self._separation_loop, daemon=True)
+        self._separation_thread.start()
+        logger.info("機体間距離監視開始")
+    
+    def stop_separation_monitor(self) -> None:
+        """機体間距離の監視スレッドを停止"""
+        if not self._separation_running:
+            return
+        self._separation_running = False
+        if self._separation_thread:
+            self._separation_thread.join(timeout=1.0)
+        self._separation_thread = None
+        logger.info("機体間距離監視停止")
+    
+    def _separation_loop(self) -> None:
+        """機体間距離の監視ループ"""
+        while self._separation_running:
+            started = time.monotonic()
+            try:
+                self.check_separation()
+            except Exception as e:
+                logger.error(f"機体間距離チェックエラー: {e}")
+            time.sleep(max(0.0, self.separation_interval - (time.monotonic() - started)))
+    
+    def drain_proximity_events(self) -> List[Dict[str, Any]]:
+        """未処理の近接イベントを取り出す"""
+        with self._events_lock:
+            events, self._pending_events = self._pending_events, []
+        return events
+    
+    def get_proximity_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """近接イベント履歴を取得"""
+        with self._events_lock:
+            return list(self.proximity_events)[-limit:]
+    
+    def get_separation_statistics(self) -> Dict[str, Any]:
+        """機体間距離監視の統計情報を取得"""
+        return {
+            "monitor_running": self._separation_running,
+            "ticks": self.separation_ticks,
+            "last_tick_ms": round(self.last_separation_ms, 3),
+            "max_tick_ms": round(self.max_separation_ms, 3),
+            "active_pairs": len(self._active_pairs),
+            "near_misses": self.near_miss_count,
+            "collisions": self.drone_collision_count
+        }
+    
     def get_all_statistics(self) -> Dict[str, Dict[str, Any]]:
         """全ドローンの統計情報を取得"""
         return {drone_id: drone.get_statistics() for drone_id, drone in self.drones.items()}
\ No newline at end of file
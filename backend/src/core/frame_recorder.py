@@ -0,0 +1,314 @@
+"""
+フレーム記録・再生モジュール
+ビジョンベンチマークを再現可能にするためのメモリマップド・フレームコンテナ実装
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# コンテナ内のファイル名
+FRAMES_FILENAME = "frames.bin"
+INDEX_FILENAME = "index.bin"
+META_FILENAME = "meta.json"
+
+# インデックスは1フレームにつき1つのタイムスタンプ（float64, 秒）
+INDEX_DTYPE = np.dtype("<f8")
+
+
+class FrameRecorder:
+    """
+    フレームレコーダー
+
+    同一形状の生フレームを追記専用ファイルに書き込み、タイムスタンプ索引を
+    別ファイルに記録する。再生側は両ファイルを np.memmap で開くため、
+    フレームはコピーなしで参照できる。
+    """
+
+    def __init__(self, path: str, frame_shape: Optional[Tuple[int, ...]] = None,
+                 dtype: str = "uint8", source: str = "unknown"):
+        """
+        初期化
+
+        Args:
+            path: 記録先ディレクトリ
+            frame_shape: フレーム形状（未指定時は最初のフレームから決定）
+            dtype: フレームのデータ型
+            source: 記録元の説明（メタデータ用）
+        """
+        self.path = path
+        self.frame_shape = tuple(frame_shape) if frame_shape else None
+        self.dtype = np.dtype(dtype)
+        self.source = source
+
+        self.frame_count = 0
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+        self._frames_file = None
+        self._index_file = None
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILENAME)):
+            raise ValueError(f"Recording already exists at {path}")
+
+        self._frames_file = open(os.path.join(path, FRAMES_FILENAME), "wb")
+        self._index_file = open(os.path.join(path, INDEX_FILENAME), "wb")
+
+        logger.info(f"フレーム記録開始: {path}")
+
+    @property
+    def is_open(self) -> bool:
+        """記録中かどうか"""
+        return self._frames_file is not None
+
+    def append(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        フレームを追記
+
+        Args:
+            frame: 生フレーム
+            timestamp: 取得時刻（未指定時は現在時刻）
+
+        Returns:
+            int: 追記したフレームのインデックス
+        """
+        if not self.is_open:
+            raise ValueError("Recorder is closed")
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            if self.frame_shape is None:
+                self.frame_shape = tuple(frame.shape)
+            if tuple(frame.shape) != self.frame_shape:
+                raise ValueError(
+                    f"Frame shape {tuple(frame.shape)} does not match recording shape {self.frame_shape}"
+                )
+            if frame.dtype != self.dtype:
+                frame = frame.astype(self.dtype)
+
+            self._frames_file.write(np.ascontiguousarray(frame).tobytes())
+            self._index_file.write(np.array([timestamp], dtype=INDEX_DTYPE).tobytes())
+
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+            index = self.frame_count
+            self.frame_count += 1
+            return index
+
+    def record_from_source(self, source: Any, num_frames: int, interval: float = 0.0) -> int:
+        """
+        get_frame() を持つフレームソースから記録
+
+        Args:
+            source: VirtualCameraStream 等のフレームソース
+            num_frames: 記録するフレーム数
+            interval: 取得間隔（秒）
+
+        Returns:
+            int: 実際に記録したフレーム数
+        """
+        recorded = 0
+        attempts = 0
+        max_attempts = num_frames * 10
+
+        while recorded < num_frames and attempts < max_attempts:
+            attempts += 1
+            frame = source.get_frame()
+            if frame is not None:
+                self.append(frame)
+                recorded += 1
+            if interval > 0:
+                time.sleep(interval)
+
+        return recorded
+
+    def close(self) -> Dict[str, Any]:
+        """記録を終了してメタデータを書き込む"""
+        with self._lock:
+            if not self.is_open:
+                return self._build_metadata()
+
+            self._frames_file.close()
+            self._index_file.close()
+            self._frames_file = None
+            self._index_file = None
+
+            metadata = self._build_metadata()
+            with open(os.path.join(self.path, META_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=2)
+
+        logger.info(f"フレーム記録終了: {self.path} ({self.frame_count} frames)")
+        return metadata
+
+    def _build_metadata(self) -> Dict[str, Any]:
+        """メタデータを構築"""
+        return {
+            "version": 1,
+            "frame_count": self.frame_count,
+            "frame_shape": list(self.frame_shape) if self.frame_shape else None,
+            "dtype": self.dtype.str,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "source": self.source
+        }
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class FrameReplaySource:
+    """
+    記録済みフレームの再生ソース
+
+    VirtualCameraStream と同じ get_frame() インターフェースを提供し、
+    追跡ループにそのまま差し込める。realtime=True の場合は記録時の
+    タイミングで、False の場合は呼び出しごとに次のフレームを返す（最大速度）。
+    返却されるフレームは読み取り専用のメモリマップビューである。
+    """
+
+    def __init__(self, path: str, realtime: bool = True, loop: bool = True):
+        """
+        初期化
+
+        Args:
+            path: 記録ディレクトリ
+            realtime: 記録時の速度で再生するか
+            loop: 末尾到達時に先頭へ戻るか
+        """
+        meta_path = os.path.join(path, META_FILENAME)
+        if not os.path.exists(meta_path):
+            raise ValueError(f"No recording found at {path}")
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.frame_count = int(self.metadata["frame_count"])
+        if self.frame_count == 0:
+            raise ValueError(f"Recording at {path} contains no frames")
+
+        self.frame_shape = tuple(self.metadata["frame_shape"])
+        self.height, self.width = self.frame_shape[0], self.frame_shape[1]
+
+        self.frames = np.memmap(
+            os.path.join(path, FRAMES_FILENAME),
+            dtype=np.dtype(self.metadata["dtype"]),
+            mode="r",
+            shape=(self.frame_count,) + self.frame_shape
+        )
+        self.timestamps = np.memmap(
+            os.path.join(path, INDEX_FILENAME),
+            dtype=INDEX_DTYPE,
+            mode="r",
+            shape=(self.frame_count,)
+        )
+        # 先頭フレームを基準とした相対時刻
+        self.offsets = np.asarray(self.timestamps) - float(self.timestamps[0])
+        self.duration = float(self.offsets[-1])
+        self.fps = (self.frame_count - 1) / self.duration if self.duration > 0 else 0.0
+
+        self.is_streaming = False
+        self._position = 0
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+        # 統計情報
+        self.frames_served = 0
+        self.loops_completed = 0
+
+        logger.info(f"フレーム再生ソース初期化: {path} ({self.frame_count} frames)")
+
+    def start_stream(self) -> None:
+        """再生開始（再生位置を先頭に戻す）"""
+        self.rewind()
+        self.is_streaming = True
+
+    def stop_stream(self) -> None:
+        """再生停止"""
+        self.is_streaming = False
+
+    def rewind(self) -> None:
+        """再生位置を先頭に戻す"""
+        with self._lock:
+            self._position = 0
+            self._start_time = time.perf_counter()
+            self.loops_completed = 0
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.frames[index]
+
+    def _realtime_index(self) -> Optional[int]:
+        """経過時間に対応するフレームインデックスを求める"""
+        elapsed = time.perf_counter() - self._start_time
+        if self.duration > 0 and elapsed > self.duration:
+            if not self.loop:
+                return None
+            self.loops_completed = int(elapsed // self.duration)
+            elapsed = elapsed % self.duration
+        index = int(np.searchsorted(self.offsets, elapsed, side="right")) - 1
+        return max(0, min(index, self.frame_count - 1))
+
+    def get_frame_with_timestamp(self) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """現在のフレームとその記録時刻を取得"""
+        with self._lock:
+            if self.realtime:
+                index = self._realtime_index()
+            else:
+                if self._position >= self.frame_count:
+                    if not self.loop:
+                        return None, None
+                    self._position = 0
+                    self.loops_completed += 1
+                index = self._position
+                self._position += 1
+
+            if index is None:
+                return None, None
+
+            self.frames_served += 1
+            return self.frames[index], float(self.timestamps[index])
+
+    def get_frame(self) -> Optional[np.ndarray]:
+        """現在のフレームを取得（ゼロコピーの読み取り専用ビュー）"""
+        frame, _ = self.get_frame_with_timestamp()
+        return frame
+
+    def iter_frames(self) -> Iterator[Tuple[np.ndarray, float]]:
+        """全フレームを記録順に列挙（ベンチマーク用）"""
+        for index in range(self.frame_count):
+            yield self.frames[index], float(self.timestamps[index])
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        return {
+            "path": self.path,
+            "frame_count": self.frame_count,
+            "frame_shape": list(self.frame_shape),
+            "recorded_fps": self.fps,
+            "duration": self.duration,
+            "realtime": self.realtime,
+            "frames_served": self.frames_served,
+            "loops_completed": self.loops_completed,
+            "source": self.metadata.get("source")
+        }
@@ -0,0 +1,360 @@
+"""
+経路計画モジュール
+Virtual3DSpace の障害物をボクセル占有グリッドに変換し、衝突のないウェイポイント列を求める
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .drone_simulator import Virtual3DSpace
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int, int]
+Point3 = Tuple[float, float, float]
+
+# 26近傍のオフセット
+NEIGHBOR_OFFSETS: List[Cell] = [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) != (0, 0, 0)
+]
+
+
+class VoxelGrid:
+    """
+    ボクセル占有グリッド
+
+    障害物の AABB をドローン半径だけ膨張させてラスタライズする（セルに少しでも
+    掛かれば占有）。外周に占有セルを1層付けているため、探索時の範囲チェックは不要。
+    """
+
+    def __init__(self, bounds: Point3, resolution: float = 0.25):
+        """
+        初期化
+
+        Args:
+            bounds: 空間の境界 (幅, 奥行き, 高さ) メートル（x, y は中心対称、z は 0 から）
+            resolution: セルの一辺（メートル）
+        """
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.bounds = bounds
+        self.resolution = resolution
+        self.origin = (-bounds[0] / 2, -bounds[1] / 2, 0.0)
+        self.size = tuple(max(1, int(math.ceil(b / resolution))) for b in bounds)
+
+        # 外周1セル分のパディング付き
+        self.shape = tuple(n + 2 for n in self.size)
+        self.occupancy = np.zeros(self.shape, dtype=bool)
+        self.occupancy[0, :, :] = self.occupancy[-1, :, :] = True
+        self.occupancy[:, 0, :] = self.occupancy[:, -1, :] = True
+        self.occupancy[:, :, 0] = self.occupancy[:, :, -1] = True
+
+    @classmethod
+    def from_space(cls, space: Virtual3DSpace, resolution: float = 0.25,
+                   drone_radius: float = 0.2) -> "VoxelGrid":
+        """仮想空間の障害物からグリッドを作成"""
+        grid = cls(space.bounds.to_tuple(), resolution)
+        for obstacle in space.obstacles.values():
+            low, high = obstacle.get_bounding_box()
+            grid.fill_box(
+                (low.x - drone_radius, low.y - drone_radius, low.z - drone_radius),
+                (high.x + drone_radius, high.y + drone_radius, high.z + drone_radius)
+            )
+        return grid
+
+    def fill_box(self, low: Point3, high: Point3) -> None:
+        """AABB に掛かるセルを占有にする"""
+        slices = []
+        for axis in range(3):
+            start = int(math.floor((low[axis] - self.origin[axis]) / self.resolution)) + 1
+            stop = int(math.ceil((high[axis] - self.origin[axis]) / self.resolution)) + 1
+            start = max(start, 1)
+            stop = min(stop, self.shape[axis] - 1)
+            if start >= stop:
+                return
+            slices.append(slice(start, stop))
+        self.occupancy[tuple(slices)] = True
+
+    def to_cell(self, point: Point3) -> Cell:
+        """座標をセルに変換（範囲外は外周セルに丸める）"""
+        return tuple(
+            min(max(int(math.floor((point[axis] - self.origin[axis]) / self.resolution)) + 1, 0), self.shape[axis] - 1)
+            for axis in range(3)
+        )
+
+    def to_point(self, cell: Cell) -> Point3:
+        """セル中心の座標"""
+        return tuple(self.origin[axis] + (cell[axis] - 0.5) * self.resolution for axis in range(3))
+
+    def is_free(self, cell: Cell) -> bool:
+        """セルが空きか"""
+        return not self.occupancy[cell]
+
+    @property
+    def occupied_ratio(self) -> float:
+        """内部セルの占有率"""
+        inner = self.occupancy[1:-1, 1:-1, 1:-1]
+        return float(inner.mean())
+
+
+@dataclass
+class PlannedPath:
+    """経路計画の結果"""
+    waypoints: List[Point3]
+    length: float
+    expanded_nodes: int
+    compute_ms: float
+    cached: bool = False
+    cells: List[Cell] = field(default_factory=list, repr=False)
+
+
+class PathPlanner:
+    """
+    ボクセルグリッド上の経路計画
+
+    目標セルからの波面展開（26近傍・単位コストの幅優先探索）を NumPy のビット演算で
+    一括計算して距離場を作り、開始セルから距離が減る方向へ辿る。距離場は正確な残り
+    距離なので、完全なヒューリスティックを持つ A* と同じく余分な探索をせずに経路が
+    得られる。最後に視線が通る中間点を飛ばして任意角度の最小ウェイポイント列にする。
+
+    距離場は (目標セル, 空間のバージョン)、計画結果は (開始セル, 目標セル, 空間のバージョン)
+    で LRU キャッシュする。
+    """
+
+    def __init__(self, space: Virtual3DSpace, resolution: float = 0.25, drone_radius: float = 0.2,
+                 cache_size: int = 256, field_cache_size: int = 16):
+        """
+        初期化
+
+        Args:
+            space: 仮想空間
+            resolution: グリッド解像度（メートル）
+            drone_radius: 障害物の膨張量（メートル）
+            cache_size: キャッシュする経路数
+            field_cache_size: キャッシュする距離場の数（1つあたりセル数×2バイト）
+        """
+        self.space = space
+        self.resolution = resolution
+        self.drone_radius = drone_radius
+        self.cache_size = cache_size
+        self.field_cache_size = field_cache_size
+
+        self._lock = threading.Lock()
+        self._grid: Optional[VoxelGrid] = None
+        self._grid_version: Optional[int] = None
+        self._cache: "OrderedDict[Tuple[Cell, Cell, int], PlannedPath]" = OrderedDict()
+        self._fields: "OrderedDict[Cell, np.ndarray]" = OrderedDict()
+
+        # 統計情報
+        self.plans_computed = 0
+        self.cache_hits = 0
+        self.fields_computed = 0
+        self.grid_builds = 0
+        self.last_grid_build_ms = 0.0
+
+    @property
+    def grid(self) -> VoxelGrid:
+        """空間のバージョンに対応するグリッド（変更があれば再構築）"""
+        version = getattr(self.space, "version", 0)
+        if self._grid is None or self._grid_version != version:
+            started = time.perf_counter()
+            self._grid = VoxelGrid.from_space(self.space, self.resolution, self.drone_radius)
+            self._grid_version = version
+            self._cache.clear()
+            self._fields.clear()
+            self.grid_builds += 1
+            self.last_grid_build_ms = (time.perf_counter() - started) * 1000
+        return self._grid
+
+    def plan(self, start: Point3, goal: Point3) -> PlannedPath:
+        """
+        開始位置から目標位置までの経路を計画
+
+        Returns:
+            PlannedPath: waypoints は開始位置を含まず、最後が目標位置
+
+        Raises:
+            ValueError: 目標位置が障害物内・範囲外、または経路が存在しない
+        """
+        with self._lock:
+            grid = self.grid
+            goal_cell = grid.to_cell(goal)
+            if not grid.is_free(goal_cell):
+                raise ValueError(f"Goal position is blocked: {goal}")
+
+            start_cell = grid.to_cell(start)
+            key = (start_cell, goal_cell, self._grid_version)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return PlannedPath(
+                    waypoints=cached.waypoints[:-1] + [tuple(goal)], length=cached.length,
+                    expanded_nodes=0, compute_ms=0.0, cached=True, cells=cached.cells
+                )
+
+            started = time.perf_counter()
+            distance = self._distance_field(grid, goal_cell)
+
+            # 開始セルが膨張領域内（床付近など）の場合は最寄りの到達可能セルから辿る
+            search_start = start_cell if distance[start_cell] >= 0 else self._nearest_reachable(distance, start_cell)
+            if search_start is None:
+                raise ValueError(f"No collision-free path from {start} to {goal}")
+
+            cells = self._descend(distance, search_start)
+            if search_start != start_cell:
+                cells.insert(0, start_cell)
+
+            smoothed = self._smooth(grid, cells)
+            waypoints = [grid.to_point(cell) for cell in smoothed[1:-1]] + [tuple(goal)]
+            points = [tuple(start)] + waypoints
+            length = sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+            path = PlannedPath(
+                waypoints=waypoints, length=length, expanded_nodes=len(cells),
+                compute_ms=(time.perf_counter() - started) * 1000, cells=smoothed
+            )
+            self._cache[key] = path
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.plans_computed += 1
+            return path
+
+    def _distance_field(self, grid: VoxelGrid, goal: Cell) -> np.ndarray:
+        """
+        目標セルからの距離場（26近傍ステップ数、到達不能は -1）
+
+        各ステップで波面を 3x3x3 に膨張させる（軸ごとの分離シフトで6回の OR）。
+        演算範囲は到達済み領域の外接直方体に限定する。
+        """
+        cached = self._fields.get(goal)
+        if cached is not None:
+            self._fields.move_to_end(goal)
+            return cached
+
+        shape = grid.shape
+        distance = np.full(shape, -1, dtype=np.int16)
+        available = ~grid.occupancy
+        frontier = np.zeros(shape, dtype=bool)
+        grown = np.empty(shape, dtype=bool)
+        scratch = np.empty(shape, dtype=bool)
+
+        frontier[goal] = True
+        available[goal] = False
+        distance[goal] = 0
+        low = list(goal)
+        high = [axis + 1 for axis in goal]
+
+        step = 0
+        while True:
+            step += 1
+            low = [max(value - 1, 0) for value in low]
+            high = [min(value + 1, limit) for value, limit in zip(high, shape)]
+            region = tuple(slice(lo, hi) for lo, hi in zip(low, high))
+            f, a, b = frontier[region], grown[region], scratch[region]
+
+            np.copyto(a, f)
+            a[1:] |= f[:-1]
+            a[:-1] |= f[1:]
+            np.copyto(b, a)
+            b[:, 1:] |= a[:, :-1]
+            b[:, :-1] |= a[:, 1:]
+            np.copyto(a, b)
+            a[:, :, 1:] |= b[:, :, :-1]
+            a[:, :, :-1] |= b[:, :, 1:]
+
+            reachable = available[region]
+            np.logical_and(a, reachable, out=a)
+            if not a.any():
+                break
+            np.copyto(distance[region], step, where=a)
+            np.logical_xor(reachable, a, out=reachable)
+            frontier[region] = a
+
+        self._fields[goal] = distance
+        if len(self._fields) > self.field_cache_size:
+            self._fields.popitem(last=False)
+        self.fields_computed += 1
+        return distance
+
+    @staticmethod
+    def _nearest_reachable(distance: np.ndarray, cell: Cell, max_radius: int = 4) -> Optional[Cell]:
+        """到達可能な最寄りセル（上方向を優先）"""
+        for radius in range(1, max_radius + 1):
+            for dz in range(radius, -radius - 1, -1):
+                for dx in range(-radius, radius + 1):
+                    for dy in range(-radius, radius + 1):
+                        if max(abs(dx), abs(dy), abs(dz)) != radius:
+                            continue
+                        candidate = (cell[0] + dx, cell[1] + dy, cell[2] + dz)
+                        if (all(0 <= candidate[axis] < distance.shape[axis] for axis in range(3))
+                                and distance[candidate] >= 0):
+                            return candidate
+        return None
+
+    @staticmethod
+    def _descend(distance: np.ndarray, start: Cell) -> List[Cell]:
+        """距離が1ずつ減る隣接セルを辿って目標までのセル列を作る（直進方向を優先）"""
+        cells = [start]
+        current = start
+        remaining = int(distance[start])
+        offsets = sorted(NEIGHBOR_OFFSETS, key=lambda offset: sum(abs(value) for value in offset))
+        while remaining > 0:
+            for dx, dy, dz in offsets:
+                neighbor = (current[0] + dx, current[1] + dy, current[2] + dz)
+                if distance[neighbor] == remaining - 1:
+                    current = neighbor
+                    break
+            cells.append(current)
+            remaining -= 1
+        return cells
+
+    @staticmethod
+    def line_of_sight(grid: VoxelGrid, a: Cell, b: Cell) -> bool:
+        """2セル間の線分が空きセルのみを通るか（1/4セル刻みでサンプリング）"""
+        steps = int(max(abs(b[axis] - a[axis]) for axis in range(3)) * 4) + 1
+        t = np.linspace(0.0, 1.0, steps + 1)
+        samples = np.rint(np.outer(t, np.subtract(b, a)) + a).astype(np.intp)
+        return not grid.occupancy[samples[:, 0], samples[:, 1], samples[:, 2]].any()
+
+    def _smooth(self, grid: VoxelGrid, cells: List[Cell]) -> List[Cell]:
+        """視線が通る限り中間セルを飛ばす"""
+        if len(cells) <= 2:
+            return list(cells)
+        smoothed = [cells[0]]
+        anchor = 0
+        while anchor < len(cells) - 1:
+            # 視線が途切れる直前のセルまで進める
+            next_index = anchor + 1
+            while next_index + 1 < len(cells) and self.line_of_sight(grid, cells[anchor], cells[next_index + 1]):
+                next_index += 1
+            smoothed.append(cells[next_index])
+            anchor = next_index
+        return smoothed
+
+    def get_statistics(self) -> Dict[str, float]:
+        """統計情報を取得"""
+        grid = self._grid
+        return {
+            "world_version": self._grid_version,
+            "resolution": self.resolution,
+            "drone_radius": self.drone_radius,
+            "grid_shape": list(grid.size) if grid else None,
+            "occupied_ratio": round(grid.occupied_ratio, 4) if grid else None,
+            "grid_builds": self.grid_builds,
+            "last_grid_build_ms": round(self.last_grid_build_ms, 3),
+            "plans_computed": self.plans_computed,
+            "fields_computed": self.fields_computed,
+            "cache_hits": self.cache_hits,
+            "cached_plans": len(self._cache),
+            "cached_fields": len(self._fields)
+        }
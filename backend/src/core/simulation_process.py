@@ -0,0 +1,998 @@
+"""
+シミュレーションプロセスモジュール
+物理シミュレーションを専用プロセスで実行し、ドローン状態を共有メモリに書き出す。
+API プロセスは共有メモリから状態を直接読み（シリアライズなし）、コマンドは共有メモリ上の
+ロックなしリングバッファで送るため、API 側の負荷と物理演算のタイミングが干渉しない。
+ワーカーを複数起動すると空間を x 方向の領域に分割し、各領域を1プロセスが担当する。
+"""
+
+import itertools
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .drone_simulator import (
+    AIRBORNE_STATES, DroneSimulator, DroneState, DroneState3D, MultiDroneSimulator, Obstacle, ObstacleType, Vector3D
+)
+
+logger = logging.getLogger(__name__)
+
+# 状態テーブルの列（1行 = 1ドローン）
+STATE_FIELDS: Tuple[str, ...] = (
+    "active", "owner", "running",
+    "x", "y", "z", "vx", "vy", "vz", "ax", "ay", "az",
+    "pitch", "roll", "yaw", "wx", "wy", "wz",
+    "battery", "state", "timestamp",
+    "has_target", "tx", "ty", "tz",
+    "flight_time", "distance", "collisions",
+)
+FIELD: Dict[str, int] = {name: index for index, name in enumerate(STATE_FIELDS)}
+
+# state 列は DroneState の並び順のインデックスで保持
+STATE_CODES: List[DroneState] = list(DroneState)
+STATE_INDEX: Dict[DroneState, int] = {state: index for index, state in enumerate(STATE_CODES)}
+
+# ワーカーごとのヘッダー列
+HEADER_FIELDS: Tuple[str, ...] = (
+    "ticks", "overruns", "last_tick_us", "max_tick_us", "drones", "obstacles", "heartbeat_ns", "dropped_replies",
+    "migrated_out", "migrated_in", "ghosts",
+)
+HEADER: Dict[str, int] = {name: index for index, name in enumerate(HEADER_FIELDS)}
+
+# ドローンIDの最大バイト数（UTF-8）
+NAME_BYTES = 32
+
+
+class SimulationProcessError(ValueError):
+    """シミュレーションプロセスとの通信エラー"""
+
+
+class SharedStateBlock:
+    """
+    ドローン状態テーブルの共有メモリブロック
+
+    行ごとのシーケンス番号（seqlock）で書き込み中の行を検出するため、読み手はロックを
+    取らずに一貫した行を読める。書き込み中はシーケンスが奇数になる。行の書き手は owner 列の
+    ワーカーのみで、担当の移管は新しい owner を書き込むことで行う。
+    """
+
+    def __init__(self, capacity: int = 64, workers: int = 1, name: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            capacity: 最大ドローン数
+            workers: ヘッダーを持つワーカー数
+            name: 既存ブロックに接続する場合の共有メモリ名（None なら新規作成）
+        """
+        self.capacity = capacity
+        self.workers = workers
+        header_bytes = workers * len(HEADER_FIELDS) * 8
+        sequence_bytes = capacity * 8
+        table_bytes = capacity * len(STATE_FIELDS) * 8
+        name_bytes = capacity * NAME_BYTES
+
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=header_bytes + sequence_bytes + table_bytes + name_bytes
+        )
+        buffer = self.shm.buf
+        self.header = np.ndarray((workers, len(HEADER_FIELDS)), dtype=np.int64, buffer=buffer)
+        self.sequence = np.ndarray((capacity,), dtype=np.int64, buffer=buffer, offset=header_bytes)
+        self.table = np.ndarray((capacity, len(STATE_FIELDS)), dtype=np.float64, buffer=buffer,
+                                offset=header_bytes + sequence_bytes)
+        self.names = np.ndarray((capacity, NAME_BYTES), dtype=np.uint8, buffer=buffer,
+                                offset=header_bytes + sequence_bytes + table_bytes)
+        if self.owner:
+            self.header[:] = 0
+            self.sequence[:] = 0
+            self.table[:] = 0.0
+            self.names[:] = 0
+
+    @property
+    def name(self) -> str:
+        """共有メモリ名"""
+        return self.shm.name
+
+    def write_rows(self, slots: Sequence[int], rows: np.ndarray) -> None:
+        """複数行をまとめて書き込む（書き込み側は行ごとに1プロセスのみ）"""
+        if len(slots) == 0:
+            return
+        index = np.asarray(slots, dtype=np.intp)
+        self.sequence[index] += 1
+        self.table[index] = rows
+        self.sequence[index] += 1
+
+    def read_row(self, slot: int, max_retries: int = 10000) -> np.ndarray:
+        """1行を一貫した状態で読み出す（コピーを返す）"""
+        sequence = self.sequence
+        for _ in range(max_retries):
+            before = int(sequence[slot])
+            if before & 1:
+                continue
+            row = self.table[slot].copy()
+            if int(sequence[slot]) == before:
+                return row
+        raise SimulationProcessError(f"State slot {slot} is being rewritten continuously")
+
+    def write_name(self, slot: int, drone_id: str) -> None:
+        """スロットのドローンIDを書き込む（ドローン追加前に API プロセスが書く）"""
+        encoded = drone_id.encode("utf-8")
+        if len(encoded) > NAME_BYTES:
+            raise ValueError(f"Drone ID too long for shared state: {drone_id}")
+        self.names[slot] = 0
+        self.names[slot, :len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+
+    def read_name(self, slot: int) -> str:
+        """スロットのドローンIDを読む"""
+        return self.names[slot].tobytes().rstrip(b"\x00").decode("utf-8")
+
+    def read_header(self, worker: int = 0) -> Dict[str, int]:
+        """ワーカーのヘッダーを取得"""
+        return {name: int(value) for name, value in zip(HEADER_FIELDS, self.header[worker])}
+
+    def close(self) -> None:
+        """共有メモリを切り離す（作成側は削除も行う）"""
+        # ndarray のビューが残っていると close できないため先に解放
+        self.header = self.sequence = self.table = self.names = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedCommandRing:
+    """
+    共有メモリ上の単一生産者・単一消費者リングバッファ
+
+    生産者は tail、消費者は head だけを更新する。スロットにペイロードを書いてから
+    tail を進めるため、消費者は公開済みのスロットのみを読む。メッセージは JSON。
+    """
+
+    _INDEX_STRIDE = 64  # head と tail を別キャッシュラインに置く
+
+    def __init__(self, slots: int = 256, slot_size: int = 512, name: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            slots: スロット数
+            slot_size: 1メッセージの最大バイト数
+            name: 既存リングに接続する場合の共有メモリ名（None なら新規作成）
+        """
+        self.slots = slots
+        self.slot_size = slot_size
+        index_bytes = self._INDEX_STRIDE * 2
+        length_bytes = slots * 4
+
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=index_bytes + length_bytes + slots * slot_size
+        )
+        buffer = self.shm.buf
+        self._head = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=0)
+        self._tail = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=self._INDEX_STRIDE)
+        self._lengths = np.ndarray((slots,), dtype=np.int32, buffer=buffer, offset=index_bytes)
+        self._data = np.ndarray((slots, slot_size), dtype=np.uint8, buffer=buffer,
+                                offset=index_bytes + length_bytes)
+        if self.owner:
+            self._head[0] = 0
+            self._tail[0] = 0
+
+    @property
+    def name(self) -> str:
+        """共有メモリ名"""
+        return self.shm.name
+
+    def __len__(self) -> int:
+        return int(self._tail[0]) - int(self._head[0])
+
+    def push(self, message: Dict[str, Any]) -> bool:
+        """
+        メッセージを追加
+
+        Returns:
+            bool: 追加できたか（満杯なら False）
+
+        Raises:
+            ValueError: メッセージがスロットより大きい
+        """
+        payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.slot_size:
+            raise ValueError(f"Message too large for ring slot: {len(payload)} > {self.slot_size}")
+
+        tail = int(self._tail[0])
+        if tail - int(self._head[0]) >= self.slots:
+            return False
+        index = tail % self.slots
+        self._data[index, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        self._lengths[index] = len(payload)
+        # ペイロードを書き終えてから公開
+        self._tail[0] = tail + 1
+        return True
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        """先頭のメッセージを取り出す（空なら None）"""
+        head = int(self._head[0])
+        if head == int(self._tail[0]):
+            return None
+        index = head % self.slots
+        payload = self._data[index, :int(self._lengths[index])].tobytes()
+        self._head[0] = head + 1
+        return json.loads(payload)
+
+    def drain(self, max_items: int = 1024) -> List[Dict[str, Any]]:
+        """溜まっているメッセージをまとめて取り出す"""
+        messages = []
+        while len(messages) < max_items:
+            message = self.pop()
+            if message is None:
+                break
+            messages.append(message)
+        return messages
+
+    def close(self) -> None:
+        """共有メモリを切り離す（作成側は削除も行う）"""
+        self._head = self._tail = self._lengths = self._data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def pack_drone_state(drone: DroneSimulator, worker: int = 0) -> np.ndarray:
+    """ドローン状態を状態テーブルの1行に変換"""
+    state = drone.current_state
+    target = drone.target_position
+    return np.array([
+        1.0, float(worker), 1.0 if drone.is_running else 0.0,
+        state.position.x, state.position.y, state.position.z,
+        state.velocity.x, state.velocity.y, state.velocity.z,
+        state.acceleration.x, state.acceleration.y, state.acceleration.z,
+        state.rotation.x, state.rotation.y, state.rotation.z,
+        state.angular_velocity.x, state.angular_velocity.y, state.angular_velocity.z,
+        state.battery_level, float(STATE_INDEX[state.state]), state.timestamp,
+        0.0 if target is None else 1.0,
+        0.0 if target is None else target.x,
+        0.0 if target is None else target.y,
+        0.0 if target is None else target.z,
+        drone.total_flight_time, drone.total_distance_traveled, float(drone.collision_count),
+    ], dtype=np.float64)
+
+
+def unpack_drone_state(row: np.ndarray) -> DroneState3D:
+    """状態テーブルの1行を DroneState3D に変換"""
+    f = FIELD
+    return DroneState3D(
+        position=Vector3D(row[f["x"]], row[f["y"]], row[f["z"]]),
+        velocity=Vector3D(row[f["vx"]], row[f["vy"]], row[f["vz"]]),
+        acceleration=Vector3D(row[f["ax"]], row[f["ay"]], row[f["az"]]),
+        rotation=Vector3D(row[f["pitch"]], row[f["roll"]], row[f["yaw"]]),
+        angular_velocity=Vector3D(row[f["wx"]], row[f["wy"]], row[f["wz"]]),
+        battery_level=row[f["battery"]],
+        state=STATE_CODES[int(row[f["state"]])],
+        timestamp=row[f["timestamp"]]
+    )
+
+
+def restore_drone_state(drone: DroneSimulator, row: np.ndarray) -> None:
+    """状態テーブルの1行からドローンの状態（目標位置・統計を含む）を復元"""
+    f = FIELD
+    drone.current_state = unpack_drone_state(row)
+    drone.is_running = bool(row[f["running"]])
+    drone.target_position = (
+        Vector3D(row[f["tx"]], row[f["ty"]], row[f["tz"]]) if row[f["has_target"]] else None
+    )
+    drone.total_flight_time = float(row[f["flight_time"]])
+    drone.total_distance_traveled = float(row[f["distance"]])
+    drone.collision_count = int(row[f["collisions"]])
+
+
+def obstacle_to_dict(obstacle: Obstacle) -> Dict[str, Any]:
+    """障害物をコマンド用の辞書に変換"""
+    return {
+        "id": obstacle.id,
+        "type": obstacle.obstacle_type.value,
+        "position": obstacle.position.to_tuple(),
+        "size": obstacle.size.to_tuple(),
+        "is_static": obstacle.is_static
+    }
+
+
+def obstacle_from_dict(data: Dict[str, Any]) -> Obstacle:
+    """コマンド用の辞書から障害物を復元"""
+    return Obstacle(
+        id=data["id"],
+        obstacle_type=ObstacleType(data["type"]),
+        position=Vector3D(*data["position"]),
+        size=Vector3D(*data["size"]),
+        is_static=data.get("is_static", True)
+    )
+
+
+def partition_regions(space_bounds: Tuple[float, float, float], workers: int) -> List[Tuple[float, float]]:
+    """空間を x 方向に等幅で分割した担当領域 [lo, hi)（両端は空間外まで延長）"""
+    width = space_bounds[0]
+    edges = [-width / 2 + width * index / workers for index in range(workers + 1)]
+    edges[0], edges[-1] = -float("inf"), float("inf")
+    return [(edges[index], edges[index + 1]) for index in range(workers)]
+
+
+class SimulationWorker:
+    """
+    ワーカープロセス側のシミュレーションループ
+
+    固定周期でコマンドを処理し、担当ドローンの物理を1ステップ進め、機体間距離を
+    チェックしてから状態テーブルへ書き出す。ドローンごとのスレッドは使わない。
+
+    複数ワーカー構成では、担当領域を出たドローンの行に移管先の owner を書いて手放し、
+    自分宛てに移管された行を読み込んで引き継ぐ。領域境界から ghost_width 以内にいる
+    他ワーカーのドローンは状態テーブルから読み、ゴーストとして機体間距離チェックに加える。
+    障害物は全ワーカーが同じものを保持する。
+    """
+
+    def __init__(self, state: SharedStateBlock, commands: SharedCommandRing, replies: SharedCommandRing,
+                 space_bounds: Tuple[float, float, float] = (20.0, 20.0, 10.0), physics_hz: float = 100.0,
+                 worker_index: int = 0, regions: Optional[List[Tuple[float, float]]] = None,
+                 ghost_width: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            state: 状態テーブル
+            commands: API プロセスからのコマンドリング
+            replies: API プロセスへの応答リング（近接イベントも送る）
+            space_bounds: シミュレーション空間の境界
+            physics_hz: 物理演算の周期（Hz）
+            worker_index: ワーカー番号（owner 列の値）
+            regions: 全ワーカーの担当領域（x 方向 [lo, hi)）。None なら全空間を担当
+            ghost_width: ゴーストを読み込む境界からの距離（省略時はニアミス距離）
+        """
+        self.state = state
+        self.commands = commands
+        self.replies = replies
+        self.physics_dt = 1.0 / physics_hz
+        self.worker_index = worker_index
+        self.simulator = MultiDroneSimulator(space_bounds)
+        self.regions = regions or [(-float("inf"), float("inf"))]
+        self.region = self.regions[worker_index]
+        self._lower_edges = np.array([lo for lo, _ in self.regions[1:]])
+        self.ghost_width = self.simulator.near_miss_distance if ghost_width is None else ghost_width
+        self.slots: Dict[int, DroneSimulator] = {}
+        self.running = False
+
+    def owner_of(self, x: float) -> int:
+        """x 座標を担当するワーカー番号"""
+        return int(np.searchsorted(self._lower_edges, x, side="right"))
+
+    def handle(self, message: Dict[str, Any]) -> Any:
+        """
+        コマンドを実行
+
+        Raises:
+            ValueError: 不明なコマンド・スロット
+        """
+        op = message["op"]
+        if op == "stop":
+            self.running = False
+            return True
+        if op == "add_obstacle":
+            self.simulator.shared_virtual_world.add_obstacle(obstacle_from_dict(message["obstacle"]))
+            return True
+        if op == "remove_obstacle":
+            return self.simulator.shared_virtual_world.remove_obstacle(message["obstacle_id"])
+        if op == "add_drone":
+            drone = self.simulator.add_drone(message["drone_id"], tuple(message["position"]))
+            self.slots[message["slot"]] = drone
+            self._publish([message["slot"]])
+            return True
+
+        slot = message.get("slot")
+        drone = self.slots.get(slot)
+        if drone is None:
+            raise ValueError(f"Unknown drone slot: {slot}")
+        args = message.get("args", [])
+        if op == "remove_drone":
+            self._release(slot)
+            self.state.write_rows([slot], np.zeros((1, len(STATE_FIELDS))))
+            return True
+        if op == "start":
+            # 物理はこのループで進めるため、スレッドは起動せず実行中フラグのみ立てる
+            drone.is_running = True
+            drone.last_update_time = time.time()
+            return True
+        if op == "stop_drone":
+            drone.is_running = False
+            return True
+        if op == "emergency_land":
+            drone.emergency_land()
+            return True
+        if op in ("takeoff", "land", "move_to_position", "rotate_to_yaw"):
+            return bool(getattr(drone, op)(*args))
+        raise ValueError(f"Unknown simulation command: {op}")
+
+    def _adopt(self, slot: Optional[int]) -> bool:
+        """自分宛てに移管された行を引き継ぐ（引き継いだ場合 True）"""
+        if slot is None or slot in self.slots or not 0 <= slot < self.state.capacity:
+            return False
+        row = self.state.read_row(slot)
+        if not row[FIELD["active"]] or int(row[FIELD["owner"]]) != self.worker_index:
+            return False
+        drone_id = self.state.read_name(slot)
+        drone = self.simulator.add_drone(drone_id, (row[FIELD["x"]], row[FIELD["y"]], row[FIELD["z"]]))
+        restore_drone_state(drone, row)
+        self.slots[slot] = drone
+        return True
+
+    def _release(self, slot: int) -> DroneSimulator:
+        """スロットのドローンを手放す"""
+        drone = self.slots.pop(slot)
+        self.simulator.drones.pop(drone.drone_id, None)
+        return drone
+
+    def _is_moved(self, slot: Optional[int]) -> bool:
+        """スロットが他ワーカーへ移管済みか"""
+        if slot is None or slot in self.slots or not 0 <= slot < self.state.capacity:
+            return False
+        row = self.state.read_row(slot)
+        return bool(row[FIELD["active"]]) and int(row[FIELD["owner"]]) != self.worker_index
+
+    def _reply(self, message: Dict[str, Any]) -> None:
+        if not self.replies.push(message):
+            self.state.header[self.worker_index, HEADER["dropped_replies"]] += 1
+
+    def process_commands(self) -> int:
+        """溜まっているコマンドを処理して応答を返す"""
+        messages = self.commands.drain()
+        for message in messages:
+            slot = message.get("slot")
+            if message["op"] != "add_drone" and self._adopt(slot):
+                # 移管先として行を引き継ぐ前に再送コマンドが届いた場合は、先に引き継ぐ
+                self.state.header[self.worker_index, HEADER["migrated_in"]] += 1
+            if self._is_moved(slot):
+                # 移管と行き違ったコマンドは API 側が新しい担当へ再送する
+                self._reply({"id": message.get("id"), "moved": True})
+                continue
+            try:
+                reply = {"id": message.get("id"), "result": self.handle(message)}
+            except Exception as e:
+                reply = {"id": message.get("id"), "error": str(e)}
+            if slot in self.slots:
+                # 応答を受け取った側が共有メモリから結果の状態を読めるよう、先に書き出す
+                self._publish([slot])
+            self._reply(reply)
+        return len(messages)
+
+    def migrate(self) -> Tuple[int, int]:
+        """
+        担当領域をまたいだドローンを移管し、自分宛ての移管を引き継ぐ
+
+        Returns:
+            Tuple[int, int]: (手放した数, 引き継いだ数)
+        """
+        if len(self.regions) == 1:
+            return 0, 0
+        header = self.state.header[self.worker_index]
+
+        outgoing = 0
+        for slot, drone in list(self.slots.items()):
+            owner = self.owner_of(drone.current_state.position.x)
+            if owner != self.worker_index:
+                # 最新状態と新しい owner を書いた時点で書き手が移る
+                self.state.write_rows([slot], pack_drone_state(drone, owner)[None, :])
+                self._release(slot)
+                outgoing += 1
+
+        incoming = 0
+        table = self.state.table
+        candidates = np.flatnonzero(
+            (table[:, FIELD["active"]] == 1.0) & (table[:, FIELD["owner"]] == self.worker_index)
+        )
+        for slot in candidates.tolist():
+            if self._adopt(slot):
+                incoming += 1
+
+        header[HEADER["migrated_out"]] += outgoing
+        header[HEADER["migrated_in"]] += incoming
+        return outgoing, incoming
+
+    def collect_ghosts(self) -> List[Tuple[str, Tuple[float, float, float]]]:
+        """担当領域の境界付近にいる他ワーカーのドローン"""
+        if len(self.regions) == 1:
+            return []
+        table = self.state.table
+        x = table[:, FIELD["x"]]
+        lo, hi = self.region
+        mask = ((table[:, FIELD["active"]] == 1.0) & (table[:, FIELD["running"]] == 1.0)
+                & (table[:, FIELD["owner"]] != self.worker_index)
+                & (x >= lo - self.ghost_width) & (x < hi + self.ghost_width))
+        ghosts = []
+        for slot in np.flatnonzero(mask).tolist():
+            row = self.state.read_row(slot)
+            if STATE_CODES[int(row[FIELD["state"]])] not in AIRBORNE_STATES:
+                continue
+            ghosts.append((self.state.read_name(slot), (row[FIELD["x"]], row[FIELD["y"]], row[FIELD["z"]])))
+        self.state.header[self.worker_index, HEADER["ghosts"]] = len(ghosts)
+        return ghosts
+
+    def step(self, dt: Optional[float] = None) -> None:
+        """1周期分の処理（コマンド処理、物理更新、移管、機体間距離チェック、状態の書き出し）"""
+        dt = self.physics_dt if dt is None else dt
+        self.process_commands()
+        for drone in list(self.slots.values()):
+            if drone.is_running:
+                drone._update_simulation(dt)
+        self.migrate()
+        for event in self.simulator.check_separation(self.collect_ghosts()):
+            self._reply({"id": None, "event": event})
+        self._publish(list(self.slots))
+
+    def _publish(self, slots: List[int]) -> None:
+        """状態テーブルへ書き出す"""
+        if slots:
+            rows = np.stack([pack_drone_state(self.slots[slot], self.worker_index) for slot in slots])
+            self.state.write_rows(slots, rows)
+        header = self.state.header[self.worker_index]
+        header[HEADER["drones"]] = len(self.slots)
+        header[HEADER["obstacles"]] = len(self.simulator.shared_virtual_world.obstacles)
+
+    def run(self) -> None:
+        """固定周期でループ（stop コマンドまで）"""
+        self.running = True
+        header = self.state.header[self.worker_index]
+        next_tick = time.perf_counter()
+        while self.running:
+            started = time.perf_counter()
+            self.step()
+            elapsed_us = int((time.perf_counter() - started) * 1e6)
+            header[HEADER["ticks"]] += 1
+            header[HEADER["last_tick_us"]] = elapsed_us
+            header[HEADER["max_tick_us"]] = max(int(header[HEADER["max_tick_us"]]), elapsed_us)
+            header[HEADER["heartbeat_ns"]] = time.time_ns()
+
+            next_tick += self.physics_dt
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 周期を超過した場合は遅れを持ち越さない
+                header[HEADER["overruns"]] += 1
+                next_tick = time.perf_counter()
+
+
+def run_simulation_worker(state_name: str, command_name: str, reply_name: str,
+                          config: Dict[str, Any]) -> None:
+    """ワーカープロセスのエントリーポイント"""
+    state = SharedStateBlock(config["capacity"], config.get("workers", 1), name=state_name)
+    commands = SharedCommandRing(config["ring_slots"], config["ring_slot_size"], name=command_name)
+    replies = SharedCommandRing(config["ring_slots"], config["ring_slot_size"], name=reply_name)
+    try:
+        regions = [tuple(region) for region in config["regions"]] if config.get("regions") else None
+        worker = SimulationWorker(state, commands, replies, tuple(config["space_bounds"]),
+                                  config["physics_hz"], config.get("worker_index", 0), regions,
+                                  config.get("ghost_width"))
+        for obstacle in config.get("obstacles", []):
+            worker.simulator.shared_virtual_world.add_obstacle(obstacle_from_dict(obstacle))
+        worker.run()
+    finally:
+        replies.close()
+        commands.close()
+        state.close()
+
+
+class SimulationProcess:
+    """
+    シミュレーションワーカープロセスの API プロセス側クライアント
+
+    状態は共有メモリから直接読み、コマンドは担当ワーカーのリングに書いて応答リングを
+    ポーリングする。複数スレッドから呼び出せるよう、送信と応答の取り出しはプロセス内の
+    ロックで直列化する（プロセス間はロックなし）。workers > 1 で空間を領域分割する。
+    """
+
+    def __init__(self, space_bounds: Tuple[float, float, float] = (20.0, 20.0, 10.0), capacity: int = 64,
+                 physics_hz: float = 100.0, command_timeout: float = 2.0, startup_timeout: float = 30.0,
+                 ring_slots: int = 256, ring_slot_size: int = 512, start_method: str = "spawn",
+                 workers: int = 1, ghost_width: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            space_bounds: シミュレーション空間の境界
+            capacity: 最大ドローン数
+            physics_hz: 物理演算の周期（Hz）
+            command_timeout: コマンド応答の待ち時間（秒）
+            startup_timeout: ワーカー起動の待ち時間（秒）
+            ring_slots: コマンドリングのスロット数
+            ring_slot_size: コマンド1件の最大バイト数
+            start_method: multiprocessing の開始方式（スレッドを持つ API プロセスでは spawn）
+            workers: ワーカープロセス数（空間を x 方向に同数の領域へ分割）
+            ghost_width: 領域境界のゴースト幅（省略時はニアミス距離）
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.space_bounds = tuple(space_bounds)
+        self.capacity = capacity
+        self.physics_hz = physics_hz
+        self.command_timeout = command_timeout
+        self.startup_timeout = startup_timeout
+        self.ring_slots = ring_slots
+        self.ring_slot_size = ring_slot_size
+        self.start_method = start_method
+        self.workers = workers
+        self.ghost_width = ghost_width
+        self.regions = partition_regions(self.space_bounds, workers)
+
+        self.state: Optional[SharedStateBlock] = None
+        self.commands: List[SharedCommandRing] = []
+        self.replies: List[SharedCommandRing] = []
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+
+        self.drone_slots: Dict[str, int] = {}
+        # 起動・停止と、スロットの割り当て（to_thread から並行に呼ばれる）を直列化する
+        self._lifecycle_lock = threading.RLock()
+        self._slots_lock = threading.Lock()
+        self.pending_obstacles: List[Dict[str, Any]] = []
+        self.proximity_events: deque = deque(maxlen=1000)
+        self._ids = itertools.count(1)
+        self._send_locks: List[threading.Lock] = []
+        self._reply_lock = threading.Lock()
+        self._replies: Dict[int, Dict[str, Any]] = {}
+        # 応答待ちのコマンドID（タイムアウト後に届いた応答は保持しない）
+        self._awaiting: Set[int] = set()
+
+        # 統計情報
+        self.commands_sent = 0
+        self.command_timeouts = 0
+        self.command_retries = 0
+        self.stale_replies = 0
+
+    @property
+    def is_alive(self) -> bool:
+        """全ワーカープロセスが稼働中か"""
+        return bool(self.processes) and all(process.is_alive() for process in self.processes)
+
+    def start(self) -> None:
+        """
+        ワーカープロセスを起動し、各ワーカーの最初の周期が完了するまで待機
+
+        Raises:
+            SimulationProcessError: 起動に失敗した
+        """
+        with self._lifecycle_lock:
+            if self.is_alive:
+                return
+            self._spawn_workers()
+
+    def _spawn_workers(self) -> None:
+        """共有メモリを作成してワーカープロセスを起動（_lifecycle_lock を保持して呼ぶ）"""
+        self.state = SharedStateBlock(self.capacity, self.workers)
+        self.commands = [SharedCommandRing(self.ring_slots, self.ring_slot_size) for _ in range(self.workers)]
+        self.replies = [SharedCommandRing(self.ring_slots, self.ring_slot_size) for _ in range(self.workers)]
+        self._send_locks = [threading.Lock() for _ in range(self.workers)]
+        context = multiprocessing.get_context(self.start_method)
+        for index in range(self.workers):
+            config = {
+                "space_bounds": self.space_bounds,
+                "capacity": self.capacity,
+                "workers": self.workers,
+                "worker_index": index,
+                "regions": self.regions if self.workers > 1 else None,
+                "ghost_width": self.ghost_width,
+                "physics_hz": self.physics_hz,
+                "ring_slots": self.ring_slots,
+                "ring_slot_size": self.ring_slot_size,
+                "obstacles": self.pending_obstacles,
+            }
+            process = context.Process(
+                target=run_simulation_worker,
+                args=(self.state.name, self.commands[index].name, self.replies[index].name, config),
+                name=f"drone-simulation-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        deadline = time.monotonic() + self.startup_timeout
+        while (self.state.header[:, HEADER["ticks"]] == 0).any():
+            if not self.is_alive or time.monotonic() > deadline:
+                self.close()
+                raise SimulationProcessError("Simulation worker failed to start")
+            time.sleep(0.01)
+        logger.info(f"Simulation workers started ({self.workers} x {self.physics_hz}Hz, "
+                    f"pids={[process.pid for process in self.processes]})")
+
+    def _collect_replies(self) -> None:
+        """全ワーカーの応答リングを取り出す（近接イベントは履歴へ、応答待ちでない応答は破棄）"""
+        for ring in self.replies:
+            for reply in ring.drain():
+                if "event" in reply:
+                    self.proximity_events.append(reply["event"])
+                elif reply.get("id") in self._awaiting:
+                    self._replies[reply["id"]] = reply
+                else:
+                    self.stale_replies += 1
+
+    def _send(self, worker: int, op: str, deadline: float, params: Dict[str, Any]) -> Dict[str, Any]:
+        """1ワーカーにコマンドを送り応答を待つ"""
+        message_id = next(self._ids)
+        message = dict(params, id=message_id, op=op)
+        with self._reply_lock:
+            self._awaiting.add(message_id)
+        try:
+            with self._send_locks[worker]:
+                while not self.commands[worker].push(message):
+                    if time.monotonic() > deadline:
+                        self.command_timeouts += 1
+                        raise SimulationProcessError(f"Simulation command queue full: {op}")
+                    time.sleep(0.0005)
+                self.commands_sent += 1
+
+            while True:
+                with self._reply_lock:
+                    self._collect_replies()
+                    reply = self._replies.pop(message_id, None)
+                if reply is not None:
+                    return reply
+                if time.monotonic() > deadline or not self.processes[worker].is_alive():
+                    self.command_timeouts += 1
+                    raise SimulationProcessError(f"Simulation command timed out: {op}")
+                time.sleep(0.0005)
+        finally:
+            with self._reply_lock:
+                self._awaiting.discard(message_id)
+                self._replies.pop(message_id, None)
+
+    def request(self, op: str, timeout: Optional[float] = None, **params: Any) -> Any:
+        """
+        コマンドを送信して応答を待つ
+
+        slot を指定したコマンドは担当ワーカーへ送り（移管と行き違った場合は再送）、
+        それ以外は全ワーカーへ送る。
+
+        Raises:
+            SimulationProcessError: ワーカー未起動・タイムアウト・コマンド失敗
+        """
+        if not self.is_alive:
+            raise SimulationProcessError("Simulation worker is not running")
+        timeout = self.command_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        if params.get("slot") is not None:
+            while True:
+                worker = int(self.state.read_row(params["slot"])[FIELD["owner"]])
+                reply = self._send(worker, op, deadline, params)
+                if not reply.get("moved"):
+                    break
+                self.command_retries += 1
+            replies = [reply]
+        else:
+            replies = [self._send(worker, op, deadline, params) for worker in range(self.workers)]
+
+        for reply in replies:
+            if "error" in reply:
+                raise SimulationProcessError(reply["error"])
+        return replies[0]["result"]
+
+    def add_drone(self, drone_id: str,
+                  initial_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)) -> "SimulatedDroneProxy":
+        """初期位置を担当するワーカーにドローンを追加してプロキシを返す"""
+        with self._slots_lock:
+            if drone_id in self.drone_slots:
+                return SimulatedDroneProxy(self, drone_id, self.drone_slots[drone_id])
+            if not self.is_alive:
+                raise SimulationProcessError("Simulation worker is not running")
+            used = set(self.drone_slots.values())
+            slot = next((index for index in range(self.capacity) if index not in used), None)
+            if slot is None:
+                raise SimulationProcessError(f"Simulation capacity exceeded ({self.capacity} drones)")
+            # 応答を待つ間に他のスレッドが同じスロットを選ばないよう先に確保する
+            self.drone_slots[drone_id] = slot
+
+        try:
+            self.state.write_name(slot, drone_id)
+            worker = next(index for index, (lo, hi) in enumerate(self.regions) if lo <= initial_position[0] < hi)
+            reply = self._send(worker, "add_drone", time.monotonic() + self.command_timeout,
+                               {"drone_id": drone_id, "slot": slot, "position": list(initial_position)})
+            if "error" in reply:
+                raise SimulationProcessError(reply["error"])
+        except Exception:
+            with self._slots_lock:
+                if self.drone_slots.get(drone_id) == slot:
+                    del self.drone_slots[drone_id]
+            raise
+        return SimulatedDroneProxy(self, drone_id, slot)
+
+    def remove_drone(self, drone_id: str) -> bool:
+        """ワーカーからドローンを削除"""
+        with self._slots_lock:
+            slot = self.drone_slots.pop(drone_id, None)
+        if slot is None:
+            return False
+        if self.is_alive:
+            self.request("remove_drone", slot=slot)
+        return True
+
+    def add_obstacle(self, obstacle: Obstacle) -> None:
+        """障害物を追加（起動前なら起動時に渡す）"""
+        data = obstacle_to_dict(obstacle)
+        if self.is_alive:
+            self.request("add_obstacle", obstacle=data)
+        else:
+            self.pending_obstacles.append(data)
+
+    def read_state(self, slot: int) -> np.ndarray:
+        """状態テーブルの1行を読む"""
+        if self.state is None:
+            raise SimulationProcessError("Simulation worker is not running")
+        return self.state.read_row(slot)
+
+    def get_proximity_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """ワーカーから届いた近接イベント履歴を取得"""
+        with self._reply_lock:
+            self._collect_replies()
+            return list(self.proximity_events)[-limit:]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        headers = [self.state.read_header(index) for index in range(self.workers)] if self.state is not None else []
+        return {
+            "alive": self.is_alive,
+            "pids": [process.pid for process in self.processes],
+            "workers": self.workers,
+            "physics_hz": self.physics_hz,
+            "drones": len(self.drone_slots),
+            "commands_sent": self.commands_sent,
+            "command_timeouts": self.command_timeouts,
+            "command_retries": self.command_retries,
+            "stale_replies": self.stale_replies,
+            "pending_commands": sum(len(ring) for ring in self.commands),
+            "ticks": min((header["ticks"] for header in headers), default=0),
+            "overruns": sum(header["overruns"] for header in headers),
+            "last_tick_ms": max((header["last_tick_us"] for header in headers), default=0) / 1000,
+            "max_tick_ms": max((header["max_tick_us"] for header in headers), default=0) / 1000,
+            "dropped_replies": sum(header["dropped_replies"] for header in headers),
+            "migrations": sum(header["migrated_out"] for header in headers),
+            "per_worker": [
+                {
+                    "region": region,
+                    "drones": header["drones"],
+                    "ghosts": header["ghosts"],
+                    "last_tick_ms": header["last_tick_us"] / 1000,
+                    "overruns": header["overruns"]
+                }
+                for region, header in zip(self.regions, headers)
+            ]
+        }
+
+    def close(self, timeout: float = 2.0) -> None:
+        """ワーカーを停止し共有メモリを解放"""
+        with self._lifecycle_lock:
+            self._stop_workers(timeout)
+
+    def _stop_workers(self, timeout: float) -> None:
+        """ワーカープロセスを停止し共有メモリを解放（_lifecycle_lock を保持して呼ぶ）"""
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                try:
+                    self._send(index, "stop", time.monotonic() + timeout, {})
+                except SimulationProcessError:
+                    pass
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Simulation worker {process.name} did not stop, terminating")
+                process.terminate()
+                process.join(timeout)
+        self.processes = []
+        for block in self.replies + self.commands + ([self.state] if self.state is not None else []):
+            block.close()
+        self.state = None
+        self.commands, self.replies = [], []
+        self.drone_slots.clear()
+        self._replies.clear()
+        self._awaiting.clear()
+
+
+class SimulatedDroneProxy:
+    """
+    ワーカープロセス上のドローンのプロキシ
+
+    DroneSimulator と同じ制御・状態取得メソッドを持ち、状態は共有メモリから読み、
+    制御はコマンドとしてワーカーへ送る。
+    """
+
+    def __init__(self, process: SimulationProcess, drone_id: str, slot: int):
+        self.process = process
+        self.drone_id = drone_id
+        self.slot = slot
+
+    def _row(self) -> np.ndarray:
+        return self.process.read_state(self.slot)
+
+    def _command(self, op: str, *args: Any) -> Any:
+        return self.process.request(op, slot=self.slot, args=list(args))
+
+    @property
+    def is_running(self) -> bool:
+        """ワーカー上で物理演算が実行中か"""
+        return self.process.is_alive and bool(self._row()[FIELD["running"]])
+
+    @property
+    def current_state(self) -> DroneState3D:
+        """現在の状態（共有メモリのスナップショット）"""
+        return unpack_drone_state(self._row())
+
+    def start_simulation(self) -> None:
+        """シミュレーション開始"""
+        self._command("start")
+
+    def stop_simulation(self) -> None:
+        """シミュレーション停止"""
+        if self.process.is_alive:
+            self._command("stop_drone")
+
+    def takeoff(self) -> bool:
+        """離陸"""
+        return self._command("takeoff")
+
+    def land(self) -> bool:
+        """着陸"""
+        return self._command("land")
+
+    def emergency_land(self) -> None:
+        """緊急着陸"""
+        self._command("emergency_land")
+
+    def move_to_position(self, x: float, y: float, z: float) -> bool:
+        """指定座標に移動"""
+        return self._command("move_to_position", x, y, z)
+
+    def rotate_to_yaw(self, yaw_degrees: float) -> bool:
+        """指定角度に回転"""
+        return self._command("rotate_to_yaw", yaw_degrees)
+
+    def get_current_position(self) -> Tuple[float, float, float]:
+        """現在位置を取得"""
+        row = self._row()
+        return (row[FIELD["x"]], row[FIELD["y"]], row[FIELD["z"]])
+
+    def get_current_velocity(self) -> Tuple[float, float, float]:
+        """現在速度を取得"""
+        row = self._row()
+        return (row[FIELD["vx"]], row[FIELD["vy"]], row[FIELD["vz"]])
+
+    def get_battery_level(self) -> float:
+        """バッテリー残量を取得"""
+        return float(self._row()[FIELD["battery"]])
+
+    def get_flight_state(self) -> str:
+        """飛行状態を取得"""
+        return STATE_CODES[int(self._row()[FIELD["state"]])].value
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        row = self._row()
+        f = FIELD
+        header = self.process.state.read_header(int(row[f["owner"]])) if self.process.state is not None else {}
+        return {
+            "drone_id": self.drone_id,
+            "current_position": (row[f["x"]], row[f["y"]], row[f["z"]]),
+            "current_velocity": (row[f["vx"]], row[f["vy"]], row[f["vz"]]),
+            "battery_level": float(row[f["battery"]]),
+            "flight_state": STATE_CODES[int(row[f["state"]])].value,
+            "total_flight_time": float(row[f["flight_time"]]),
+            "total_distance_traveled": float(row[f["distance"]]),
+            "collision_count": int(row[f["collisions"]]),
+            "obstacle_count": header.get("obstacles", 0)
+        }
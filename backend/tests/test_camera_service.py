@@ -4,6 +4,7 @@ Tests for camera streaming and photo capture functionality
 """
 
 import asyncio
+import time
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 import numpy as np
@@ -46,8 +47,8 @@ class TestCameraService:
     @pytest.mark.asyncio
     async def test_start_camera_stream_success(self, camera_service, mock_virtual_camera_stream):
         """カメラストリーミング開始成功テスト"""
-        with patch.object(camera_service.camera_manager, 'create_stream') as mock_create:
-            mock_create.return_value = mock_virtual_camera_stream
+        with patch.object(camera_service.stream_pool, 'acquire') as mock_acquire:
+            mock_acquire.return_value = (mock_virtual_camera_stream, True)
             
             result = await camera_service.start_camera_stream("drone_001")
             
@@ -57,13 +58,10 @@ class TestCameraService:
             assert result["resolution"] == "640x480"
             assert result["fps"] == 30
             
-            mock_create.assert_called_once_with(
-                name="drone_001",
-                width=640,
-                height=480,
-                fps=30
+            mock_acquire.assert_called_once_with("drone_001", 640, 480, 30)
+            mock_virtual_camera_stream.add_consumer.assert_called_once_with(
+                CameraService.STREAM_CONSUMER_ID, 30
             )
-            mock_virtual_camera_stream.start_stream.assert_called_once()
             assert camera_service.active_streams["drone_001"] == mock_virtual_camera_stream
     
     @pytest.mark.asyncio
@@ -82,15 +80,16 @@ class TestCameraService:
         """カメラストリーミング停止成功テスト"""
         camera_service.active_streams["drone_001"] = mock_virtual_camera_stream
         
-        with patch.object(camera_service.camera_manager, 'remove_stream') as mock_remove:
+        with patch.object(camera_service.stream_pool, 'release') as mock_release:
             result = await camera_service.stop_camera_stream("drone_001")
             
             assert result["success"] is True
             assert "drone_001" in result["message"]
             assert result["stream_id"] == "drone_001"
             
-            mock_virtual_camera_stream.stop_stream.assert_called_once()
-            mock_remove.assert_called_once_with("drone_001")
+            # ストリームは停止せず待機プールへ戻される
+            mock_virtual_camera_stream.stop_stream.assert_not_called()
+            mock_release.assert_called_once_with("drone_001")
             assert "drone_001" not in camera_service.active_streams
     
     @pytest.mark.asyncio
@@ -133,17 +132,16 @@ class TestCameraService:
     
     @pytest.mark.asyncio
     async def test_capture_photo_without_active_stream(self, camera_service, mock_virtual_camera_stream):
-        """アクティブでないストリームでの写真撮影テスト（一時ストリーム作成）"""
+        """アクティブでないストリームでの写真撮影テスト（待機プールから借用）"""
         test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        mock_virtual_camera_stream.get_frame.return_value = test_frame
+        mock_virtual_camera_stream.get_frame.return_value = None
+        mock_virtual_camera_stream.render_frame.return_value = test_frame
         
-        with patch.object(camera_service, 'start_camera_stream') as mock_start, \
-             patch.object(camera_service, 'stop_camera_stream') as mock_stop, \
+        with patch.object(camera_service.stream_pool, 'acquire') as mock_acquire, \
+             patch.object(camera_service.stream_pool, 'release') as mock_release, \
              patch('cv2.imencode') as mock_imencode:
             
-            mock_start.return_value = {"success": True}
-            mock_stop.return_value = {"success": True}
-            camera_service.active_streams["drone_001"] = mock_virtual_camera_stream
+            mock_acquire.return_value = (mock_virtual_camera_stream, False)
             
             mock_buffer = np.array([1, 2, 3], dtype=np.uint8)
             mock_imencode.return_value = (True, mock_buffer)
@@ -153,13 +151,33 @@ class TestCameraService:
             assert isinstance(photo, Photo)
             assert photo.drone_id == "drone_001"
             
-            mock_start.assert_called_once_with("drone_001")
-            mock_stop.assert_called_once_with("drone_001")
+            mock_acquire.assert_called_once()
+            mock_virtual_camera_stream.render_frame.assert_called_once()
+            mock_release.assert_called_once_with("drone_001")
+            assert "drone_001" not in camera_service.active_streams
+    
+    @pytest.mark.asyncio
+    async def test_capture_photo_renders_fresh_frame(self, camera_service):
+        """一時停止中のストリームでも保持している古いフレームではなく新しいフレームを撮影するテスト"""
+        stream, _ = camera_service.stream_pool.acquire("drone_001", 160, 120, 30)
+        camera_service.active_streams["drone_001"] = stream
+        try:
+            stale = stream.render_frame()
+            time.sleep(0.05)
+            with patch('cv2.imencode') as mock_imencode:
+                mock_imencode.return_value = (True, np.array([1, 2, 3], dtype=np.uint8))
+                await camera_service.capture_photo("drone_001")
+                captured = mock_imencode.call_args[0][1]
+            assert stream.rendered_frames == 2
+            assert captured is not stale
+        finally:
+            await camera_service.shutdown()
     
     @pytest.mark.asyncio
     async def test_capture_photo_no_frame_available(self, camera_service, mock_virtual_camera_stream):
         """フレーム取得不可時の写真撮影テスト"""
         mock_virtual_camera_stream.get_frame.return_value = None
+        mock_virtual_camera_stream.render_frame.return_value = None
         camera_service.active_streams["drone_001"] = mock_virtual_camera_stream
         
         with pytest.raises(ValueError, match="Unable to capture frame"):
@@ -282,6 +300,46 @@ class TestCameraService:
         with pytest.raises(ValueError, match="No active camera stream"):
             await camera_service.clear_tracking_objects("drone_001")
     
+    @pytest.mark.asyncio
+    async def test_effective_fps_follows_remaining_consumers(self, camera_service):
+        """ライブストリーム終了後は低レートの追跡ループのみに合わせて描画レートが下がるテスト"""
+        try:
+            await camera_service.start_camera_stream("drone_001", fps=30)
+            stream = camera_service.active_streams["drone_001"]
+            camera_service.register_frame_consumer("drone_001", "vision_tracking:t1", 10)
+            assert stream.effective_fps == 30.0
+            
+            assert camera_service.unregister_frame_consumer("drone_001", CameraService.STREAM_CONSUMER_ID)
+            assert stream.effective_fps == 10.0
+            
+            assert camera_service.unregister_frame_consumer("drone_001", "vision_tracking:t1")
+            assert stream.effective_fps == 0.0
+        finally:
+            await camera_service.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_vision_tracking_loop_registers_consumer(self, camera_service):
+        """追跡ループが実際の処理レートでコンシューマー登録され、終了時に解除されるテスト"""
+        from backend.api_server.core.vision_service import VisionService
+        
+        vision_service = VisionService()
+        vision_service.camera_service = camera_service
+        vision_service.drone_camera_streams = {"drone_001": True}
+        try:
+            await camera_service.start_camera_stream("drone_001", fps=30)
+            stream = camera_service.active_streams["drone_001"]
+            camera_service.unregister_frame_consumer("drone_001", CameraService.STREAM_CONSUMER_ID)
+            
+            await vision_service.start_tracking_with_drone_camera("yolo_v8_general", "drone_001")
+            await asyncio.sleep(0.05)
+            assert stream.effective_fps == VisionService.TRACKING_FPS
+            
+            await vision_service.stop_tracking()
+            await asyncio.sleep(0.2)
+            assert stream.effective_fps == 0.0
+        finally:
+            await camera_service.shutdown()
+    
     @pytest.mark.asyncio
     async def test_shutdown(self, camera_service, mock_virtual_camera_stream):
         """シャットダウンテスト"""
@@ -289,14 +347,14 @@ class TestCameraService:
         camera_service.active_streams["drone_002"] = mock_virtual_camera_stream
         
         with patch.object(camera_service, 'stop_camera_stream') as mock_stop, \
-             patch.object(camera_service.camera_manager, 'stop_all_streams') as mock_stop_all:
+             patch.object(camera_service.stream_pool, 'shutdown') as mock_pool_shutdown:
             
             mock_stop.return_value = {"success": True}
             
             await camera_service.shutdown()
             
             assert mock_stop.call_count == 2
-            mock_stop_all.assert_called_once()
+            mock_pool_shutdown.assert_called_once()
 
 
 @pytest.mark.asyncio
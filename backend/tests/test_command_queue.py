@@ -0,0 +1,168 @@
+"""
+Drone Command Queue Tests
+Tests for per-drone command actors with coalescing mailboxes
+"""
+
+import asyncio
+import pytest
+
+from backend.api_server.core.command_queue import (
+    DroneCommandActor, DroneCommandDispatcher, MOVE_COMMAND
+)
+
+
+class SlowDrone:
+    """実行に時間がかかるダミードローン"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.moves = []
+        self.rotations = []
+
+    async def move(self, drone_id, dx_cm, dy_cm, dz_cm):
+        await asyncio.sleep(self.delay)
+        self.moves.append((drone_id, dx_cm, dy_cm, dz_cm))
+
+    async def rotate(self, drone_id, angle):
+        await asyncio.sleep(self.delay)
+        self.rotations.append((drone_id, angle))
+
+    async def fail(self, drone_id):
+        raise ValueError("boom")
+
+
+class TestDroneCommandActor:
+    """DroneCommandActor のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_pending_moves_are_merged(self):
+        """保留中の移動が1コマンドに統合されるテスト"""
+        drone = SlowDrone()
+        actor = DroneCommandActor("drone_001", {MOVE_COMMAND: drone.move})
+
+        actor.submit_move(20, 0, 0)
+        await asyncio.sleep(0.01)  # 1件目の実行開始
+        for _ in range(10):
+            actor.submit_move(20, 0, -20)
+
+        assert actor.queue_depth == 1
+        await asyncio.sleep(0.2)
+
+        assert drone.moves == [("drone_001", 20, 0, 0), ("drone_001", 200, 0, -200)]
+        stats = actor.get_statistics()
+        assert stats["submitted"] == 11
+        assert stats["executed"] == 2
+        assert stats["superseded"] == 9
+        assert stats["max_queue_depth"] == 1
+        await actor.stop()
+
+    @pytest.mark.asyncio
+    async def test_merged_move_is_clamped(self):
+        """統合後の移動量上限テスト"""
+        drone = SlowDrone(delay=0.0)
+        actor = DroneCommandActor("drone_001", {MOVE_COMMAND: drone.move}, max_move_cm=100)
+
+        for _ in range(10):
+            actor.submit_move(50, -50, 0)
+        await asyncio.sleep(0.05)
+
+        assert drone.moves == [("drone_001", 100, -100, 0)]
+        await actor.stop()
+
+    @pytest.mark.asyncio
+    async def test_tracking_moves_replace_pending_correction(self):
+        """追跡の補正移動が累積せず最新の1件で置き換わり、利用者の移動とは別に実行されるテスト"""
+        drone = SlowDrone()
+        actor = DroneCommandActor("drone_001", {MOVE_COMMAND: drone.move})
+
+        actor.submit_tracking_move(20, 0, 0)
+        await asyncio.sleep(0.01)  # 1件目の実行開始
+        actor.submit_move(30, 0, 0)
+        for _ in range(10):
+            actor.submit_tracking_move(20, 0, -20)
+        actor.submit_tracking_move(-20, 0, 0)
+
+        assert actor.queue_depth == 2
+        await asyncio.sleep(0.25)
+
+        assert drone.moves == [
+            ("drone_001", 20, 0, 0), ("drone_001", 30, 0, 0), ("drone_001", -20, 0, 0)
+        ]
+        assert actor.get_statistics()["superseded"] == 10
+        await actor.stop()
+
+    @pytest.mark.asyncio
+    async def test_latest_wins_for_named_commands(self):
+        """同名コマンドの latest-wins テスト"""
+        drone = SlowDrone()
+        actor = DroneCommandActor("drone_001", {"rotate": drone.rotate})
+
+        actor.submit("rotate", angle=10)
+        await asyncio.sleep(0.01)
+        actor.submit("rotate", angle=20)
+        actor.submit("rotate", angle=30)
+        await asyncio.sleep(0.2)
+
+        assert drone.rotations == [("drone_001", 10), ("drone_001", 30)]
+        await actor.stop()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        """実行失敗の記録テスト"""
+        drone = SlowDrone()
+        actor = DroneCommandActor("drone_001", {"fail": drone.fail})
+
+        actor.submit("fail")
+        await asyncio.sleep(0.01)
+
+        stats = actor.get_statistics()
+        assert stats["failed"] == 1
+        assert stats["last_error"] == "boom"
+        await actor.stop()
+
+    @pytest.mark.asyncio
+    async def test_unknown_command_rejected(self):
+        """未知コマンドの拒否テスト"""
+        actor = DroneCommandActor("drone_001", {})
+        with pytest.raises(ValueError, match="Unknown command"):
+            actor.submit("flip")
+
+    @pytest.mark.asyncio
+    async def test_queue_latency_stays_bounded(self):
+        """投入頻度が実行速度を超えても遅延が有界であるテスト"""
+        drone = SlowDrone(delay=0.03)
+        actor = DroneCommandActor("drone_001", {MOVE_COMMAND: drone.move})
+
+        # 10ms ごとに投入（実行は30ms/件）
+        for _ in range(30):
+            actor.submit_move(20, 0, 0)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        latency = actor.get_statistics()["queue_latency"]
+        assert latency["max_ms"] < 100
+        assert len(drone.moves) < 30
+        assert sum(m[1] for m in drone.moves) == 600
+        await actor.stop()
+
+
+class TestDroneCommandDispatcher:
+    """DroneCommandDispatcher のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_actors_are_independent_per_drone(self):
+        """ドローンごとのアクター独立性テスト"""
+        drone = SlowDrone(delay=0.0)
+        dispatcher = DroneCommandDispatcher({MOVE_COMMAND: drone.move})
+
+        dispatcher.submit_move("drone_001", 20, 0, 0)
+        dispatcher.submit_move("drone_002", 0, 20, 0)
+        await asyncio.sleep(0.05)
+
+        assert sorted(drone.moves) == [("drone_001", 20, 0, 0), ("drone_002", 0, 20, 0)]
+        stats = dispatcher.get_statistics()
+        assert stats["total_actors"] == 2
+        assert stats["total_queue_depth"] == 0
+
+        await dispatcher.shutdown()
+        assert dispatcher.actors == {}
@@ -0,0 +1,145 @@
+"""
+需要駆動型カメラストリームテストスイート
+コンシューマー駆動の描画とウォームプールのテスト
+"""
+
+import pytest
+import time
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.demand_camera import DemandDrivenCameraStream, CameraStreamPool
+
+
+@pytest.fixture
+def stream():
+    """テスト用ストリーム"""
+    stream = DemandDrivenCameraStream(width=160, height=120, fps=30)
+    stream.start_stream()
+    yield stream
+    stream.stop_stream()
+
+
+class TestDemandDrivenCameraStream:
+    """DemandDrivenCameraStreamのテスト"""
+
+    def test_paused_without_consumers(self, stream):
+        """コンシューマー不在時は描画しないテスト"""
+        time.sleep(0.2)
+        assert stream.is_paused
+        assert stream.rendered_frames == 0
+        assert stream.get_frame() is None
+
+    def test_renders_while_consumed(self, stream):
+        """コンシューマー登録中の描画テスト"""
+        stream.add_consumer("viewer", fps=30)
+        time.sleep(0.3)
+        assert not stream.is_paused
+        assert stream.rendered_frames > 0
+        assert stream.get_frame().shape == (120, 160, 3)
+
+        stream.remove_consumer("viewer")
+        time.sleep(0.1)
+        rendered = stream.rendered_frames
+        time.sleep(0.2)
+        assert stream.is_paused
+        assert stream.rendered_frames == rendered
+
+    def test_effective_fps_follows_fastest_consumer(self, stream):
+        """最速コンシューマーへの追従テスト"""
+        assert stream.effective_fps == 0.0
+        stream.add_consumer("overview", fps=1)
+        stream.add_consumer("control", fps=20)
+        assert stream.effective_fps == 20.0
+        stream.add_consumer("greedy", fps=120)
+        assert stream.effective_fps == 30.0  # ストリームのfpsが上限
+        stream.remove_consumer("greedy")
+        stream.remove_consumer("control")
+        assert stream.effective_fps == 1.0
+
+    def test_render_frame_while_paused(self, stream):
+        """一時停止中の同期描画テスト"""
+        frame = stream.render_frame()
+        assert frame.shape == (120, 160, 3)
+        assert stream.get_frame() is not None
+        assert stream.is_paused
+
+
+class TestCameraStreamPool:
+    """CameraStreamPoolのテスト"""
+
+    def test_release_keeps_stream_warm(self):
+        """解放後のウォーム保持テスト"""
+        pool = CameraStreamPool(max_warm=2)
+        try:
+            stream, created = pool.acquire("drone_001", 160, 120, 30)
+            assert created
+            pool.release("drone_001")
+            assert stream.is_streaming
+            assert stream.is_paused
+
+            reused, created = pool.acquire("drone_002", 160, 120, 30)
+            assert reused is stream
+            assert not created
+            assert pool.get_statistics()["warm_hits"] == 1
+        finally:
+            pool.shutdown()
+
+    def test_resolution_mismatch_creates_new_stream(self):
+        """解像度不一致時の新規作成テスト"""
+        pool = CameraStreamPool(max_warm=2)
+        try:
+            first, _ = pool.acquire("drone_001", 160, 120, 30)
+            pool.release("drone_001")
+            second, created = pool.acquire("drone_001", 320, 240, 30)
+            assert created
+            assert second is not first
+        finally:
+            pool.shutdown()
+
+    def test_warm_pool_is_bounded(self):
+        """待機プール上限テスト"""
+        pool = CameraStreamPool(max_warm=1)
+        try:
+            first, _ = pool.acquire("a", 160, 120, 30)
+            second, _ = pool.acquire("b", 160, 120, 30)
+            pool.release("a")
+            pool.release("b")
+
+            stats = pool.get_statistics()
+            assert stats["warm_streams"] == 1
+            assert stats["evictions"] == 1
+            assert not first.is_streaming
+            assert second.is_streaming
+        finally:
+            pool.shutdown()
+
+    def test_acquire_active_returns_same_stream(self):
+        """アクティブストリームの重複取得テスト"""
+        pool = CameraStreamPool()
+        try:
+            stream, _ = pool.acquire("drone_001", 160, 120, 30)
+            again, created = pool.acquire("drone_001", 160, 120, 30)
+            assert again is stream
+            assert not created
+        finally:
+            pool.shutdown()
+
+    def test_reused_stream_is_rebound_without_old_frame(self):
+        """別ドローンへ再利用されたストリームが付け替えられ、前の利用者のフレームを返さないテスト"""
+        pool = CameraStreamPool(max_warm=2)
+        try:
+            stream, _ = pool.acquire("drone_001", 160, 120, 30)
+            stream.render_frame()
+            assert stream.owner == "drone_001"
+            pool.release("drone_001")
+
+            reused, created = pool.acquire("drone_002", 160, 120, 30)
+            assert reused is stream and not created
+            assert reused.owner == "drone_002"
+            assert reused.get_frame() is None
+        finally:
+            pool.shutdown()
+
@@ -0,0 +1,145 @@
+"""
+Drone Separation Tests
+Tests for the hash-grid neighbor search and inter-drone separation in MultiDroneSimulator
+"""
+
+import time
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import cdist
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.drone_simulator import DroneState, MultiDroneSimulator, Vector3D, find_close_pairs
+
+
+def _airborne(multi_sim, drone_id, position):
+    """空中にいるドローンを追加（シミュレーションスレッドは起動しない）"""
+    drone = multi_sim.add_drone(drone_id, position)
+    drone.current_state.state = DroneState.FLYING
+    drone.is_running = True
+    return drone
+
+
+class TestFindClosePairs:
+    """find_close_pairs のテスト"""
+
+    def test_matches_brute_force(self):
+        """総当たりと同じペアが得られるテスト"""
+        rng = np.random.default_rng(1)
+        positions = rng.uniform((-10, -10, 0), (10, 10, 5), size=(300, 3))
+        i_index, j_index, distances = find_close_pairs(positions, 1.0)
+
+        brute = cdist(positions, positions)
+        expected = {(i, j) for i, j in zip(*np.nonzero(np.triu(brute <= 1.0, k=1)))}
+        assert set(zip(i_index.tolist(), j_index.tolist())) == expected
+        assert np.allclose(distances, brute[i_index, j_index])
+
+    def test_negative_coordinates_and_cell_edges(self):
+        """負の座標やセル境界をまたぐペアのテスト"""
+        positions = [(-0.05, 0.0, 1.0), (0.05, 0.0, 1.0), (3.0, 3.0, 1.0)]
+        i_index, j_index, _ = find_close_pairs(positions, 0.5)
+        assert list(zip(i_index.tolist(), j_index.tolist())) == [(0, 1)]
+
+
+class TestMultiDroneSeparation:
+    """MultiDroneSimulator の機体間距離監視のテスト"""
+
+    def test_near_miss_pushes_apart(self):
+        """ニアミスでイベントが生成され反発速度が設定されるテスト"""
+        multi_sim = MultiDroneSimulator((20.0, 20.0, 10.0))
+        a = _airborne(multi_sim, "a", (0.0, 0.0, 2.0))
+        b = _airborne(multi_sim, "b", (0.6, 0.0, 2.0))
+        c = _airborne(multi_sim, "c", (5.0, 5.0, 2.0))
+
+        events = multi_sim.check_separation()
+        assert [event["type"] for event in events] == ["near_miss"]
+        assert events[0]["drone_ids"] == ["a", "b"]
+        assert a.separation_velocity.x < 0 < b.separation_velocity.x
+        assert c.separation_velocity == Vector3D()
+
+        # 状態が変わらなければ再通知しない
+        assert multi_sim.check_separation() == []
+        assert multi_sim.drain_proximity_events() == events
+        assert multi_sim.drain_proximity_events() == []
+
+    def test_collision_triggers_emergency(self):
+        """衝突距離内で両機が衝突処理されるテスト"""
+        multi_sim = MultiDroneSimulator((20.0, 20.0, 10.0))
+        a = _airborne(multi_sim, "a", (0.0, 0.0, 2.0))
+        b = _airborne(multi_sim, "b", (0.1, 0.1, 2.0))
+
+        events = multi_sim.check_separation()
+        assert [event["type"] for event in events] == ["collision"]
+        # 衝突処理は各機の更新ステップで行われる
+        assert a.collision_count == 0 and a.current_state.state == DroneState.FLYING
+        for drone in (a, b):
+            drone._update_simulation(0.01)
+        assert a.collision_count == 1 and b.collision_count == 1
+        assert a.current_state.state == DroneState.EMERGENCY
+        assert multi_sim.check_separation() == []
+        assert multi_sim.get_separation_statistics()["collisions"] == 1
+
+    def test_collision_applied_by_running_simulation(self):
+        """監視スレッドからの衝突通知がシミュレーションスレッドで処理されるテスト"""
+        multi_sim = MultiDroneSimulator((20.0, 20.0, 10.0))
+        a = multi_sim.add_drone("a", (0.0, 0.0, 0.0))
+        b = multi_sim.add_drone("b", (0.1, 0.1, 0.0))
+        multi_sim.start_all_simulations()
+        try:
+            for drone in (a, b):
+                drone.takeoff()
+            deadline = time.monotonic() + 3.0
+            while min(a.collision_count, b.collision_count) == 0 and time.monotonic() < deadline:
+                multi_sim.check_separation()
+                time.sleep(0.01)
+        finally:
+            multi_sim.stop_all_simulations()
+
+        # 緊急着陸後に地面との衝突が加算されることがあるため下限のみ確認
+        assert a.collision_count >= 1 and b.collision_count >= 1
+        assert multi_sim.get_separation_statistics()["collisions"] == 1
+        assert a._pending_collision is None and b._pending_collision is None
+
+    def test_grounded_drones_ignored(self):
+        """地上のドローンが判定対象外であるテスト"""
+        multi_sim = MultiDroneSimulator((20.0, 20.0, 10.0))
+        multi_sim.add_drone("a", (0.0, 0.0, 0.0))
+        multi_sim.add_drone("b", (0.0, 0.0, 0.0))
+        assert multi_sim.check_separation() == []
+
+    def test_swarm_tick_real_time(self):
+        """200機のスウォームで1周期が監視間隔より十分短いテスト"""
+        multi_sim = MultiDroneSimulator((30.0, 30.0, 15.0))
+        rng = np.random.default_rng(2)
+        for index, position in enumerate(rng.uniform((-14, -14, 1), (14, 14, 14), size=(200, 3))):
+            _airborne(multi_sim, f"drone_{index:03d}", tuple(position))
+
+        multi_sim.check_separation()
+        started = time.perf_counter()
+        for _ in range(10):
+            multi_sim.check_separation()
+        per_tick_ms = (time.perf_counter() - started) * 100
+
+        assert per_tick_ms < multi_sim.separation_interval * 1000
+        assert multi_sim.get_separation_statistics()["ticks"] == 11
+
+    def test_monitor_thread_separates_drones(self):
+        """監視スレッドとシミュレーションで接近した2機が離れるテスト"""
+        multi_sim = MultiDroneSimulator((20.0, 20.0, 10.0), near_miss_distance=1.0, collision_distance=0.2)
+        a = multi_sim.add_drone("a", (0.0, 0.0, 2.0))
+        b = multi_sim.add_drone("b", (0.5, 0.0, 2.0))
+        for drone in (a, b):
+            drone.current_state.state = DroneState.FLYING
+        multi_sim.start_all_simulations()
+        try:
+            time.sleep(0.5)
+        finally:
+            multi_sim.stop_all_simulations()
+
+        gap = abs(b.current_state.position.x - a.current_state.position.x)
+        assert gap > 0.5
+        assert multi_sim.get_separation_statistics()["near_misses"] >= 1
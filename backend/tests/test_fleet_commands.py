@@ -0,0 +1,182 @@
+"""
+Fleet Command Tests
+Tests for concurrent bulk command fan-out with per-drone timeouts
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.api_server.core.fleet_commands import (
+    dispatch_fleet_command, get_unfinished_command_count, resolve_fleet_targets, validate_fleet_command
+)
+
+
+DRONE_INFO = {
+    "drone_001": SimpleNamespace(type="dummy"),
+    "drone_002": SimpleNamespace(type="dummy"),
+    "tello_001": SimpleNamespace(type="real"),
+}
+
+
+class FakeFleet:
+    """遅延・失敗を注入できるダミー機体群"""
+
+    def __init__(self, delay: float = 0.05, hang=(), fail=()):
+        self.delay = delay
+        self.hang = set(hang)
+        self.fail = set(fail)
+        self.calls = []
+
+    async def takeoff(self, drone_id, params):
+        if drone_id in self.hang:
+            await asyncio.sleep(10)
+        await asyncio.sleep(self.delay)
+        if drone_id in self.fail:
+            raise ValueError("バッテリー残量不足です")
+        self.calls.append((drone_id, params))
+        return SimpleNamespace(message=f"ドローン {drone_id} の離陸を開始しました")
+
+    @property
+    def handlers(self):
+        return {"takeoff": self.takeoff, "move": self.takeoff}
+
+
+class TestResolveFleetTargets:
+    """対象ドローン解決のテスト"""
+
+    def test_explicit_ids_deduplicated(self):
+        """明示指定IDの重複除去テスト"""
+        targets = resolve_fleet_targets(DRONE_INFO, [], ["drone_002", "drone_001", "drone_002"])
+        assert targets == ["drone_002", "drone_001"]
+
+    def test_selectors(self):
+        """セレクタによる選択テスト"""
+        connected = ["drone_001", "tello_001"]
+        assert resolve_fleet_targets(DRONE_INFO, connected, selector="all") == list(DRONE_INFO)
+        assert resolve_fleet_targets(DRONE_INFO, connected, selector="connected") == connected
+        assert resolve_fleet_targets(DRONE_INFO, connected, selector="disconnected") == ["drone_002"]
+        assert resolve_fleet_targets(DRONE_INFO, connected, selector="real") == ["tello_001"]
+
+    def test_invalid_target(self):
+        """対象未指定・不正セレクタのテスト"""
+        with pytest.raises(ValueError, match="Invalid target"):
+            resolve_fleet_targets(DRONE_INFO, [])
+        with pytest.raises(ValueError, match="Invalid selector"):
+            resolve_fleet_targets(DRONE_INFO, [], selector="flying")
+
+
+class TestDispatchFleetCommand:
+    """一括コマンド実行のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_is_concurrent(self):
+        """10台への送信が並行に行われるテスト"""
+        fleet = FakeFleet(delay=0.1)
+        drone_ids = [f"drone_{i:03d}" for i in range(10)]
+
+        started = time.perf_counter()
+        result = await dispatch_fleet_command(fleet.handlers, "takeoff", drone_ids)
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.5
+        assert result["total"] == 10
+        assert result["succeeded"] == 10
+        assert [r["drone_id"] for r in result["results"]] == drone_ids
+        assert result["results"][0]["message"] == "ドローン drone_000 の離陸を開始しました"
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_are_isolated(self):
+        """1台の失敗・タイムアウトが他に影響しないテスト"""
+        fleet = FakeFleet(delay=0.01, hang=["drone_002"], fail=["drone_003"])
+        result = await dispatch_fleet_command(
+            fleet.handlers, "takeoff", ["drone_001", "drone_002", "drone_003"], timeout=0.2
+        )
+
+        by_id = {r["drone_id"]: r for r in result["results"]}
+        assert by_id["drone_001"]["success"]
+        assert by_id["drone_002"]["timed_out"]
+        assert not by_id["drone_002"]["success"]
+        assert by_id["drone_003"]["error"] == "バッテリー残量不足です"
+        assert result["succeeded"] == 1
+        assert result["failed"] == 2
+        assert result["timed_out"] == 1
+        assert result["elapsed_ms"] < 1000
+
+    @pytest.mark.asyncio
+    async def test_timed_out_command_is_not_cancelled(self):
+        """タイムアウトしたコマンドがキャンセルされずに完了し、二重実行されないテスト"""
+        connected = []
+
+        async def connect(drone_id, params):
+            if drone_id in connected:
+                raise ValueError("already connected")
+            await asyncio.sleep(0.2)
+            connected.append(drone_id)
+
+        result = await dispatch_fleet_command({"connect": connect}, "connect", ["drone_001"], timeout=0.05)
+        assert result["timed_out"] == 1
+        assert get_unfinished_command_count() == 1
+
+        await asyncio.sleep(0.3)
+        assert connected == ["drone_001"]
+        assert get_unfinished_command_count() == 0
+
+        retry = await dispatch_fleet_command({"connect": connect}, "connect", ["drone_001"], timeout=0.05)
+        assert retry["results"][0]["error"] == "already connected"
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency(self):
+        """同時実行数上限のテスト"""
+        fleet = FakeFleet(delay=0.05)
+        started = time.perf_counter()
+        await dispatch_fleet_command(
+            fleet.handlers, "takeoff", ["a", "b", "c", "d"], max_concurrency=2
+        )
+        assert time.perf_counter() - started >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_params_validated_before_dispatch(self):
+        """パラメータ不足時は送信しないテスト"""
+        fleet = FakeFleet()
+        with pytest.raises(ValueError, match="missing distance"):
+            await dispatch_fleet_command(fleet.handlers, "move", ["drone_001"], {"direction": "up"})
+        assert fleet.calls == []
+
+        with pytest.raises(ValueError, match="Invalid fleet command"):
+            validate_fleet_command("flip", None)
+
+    @pytest.mark.asyncio
+    async def test_param_ranges_validated_before_dispatch(self):
+        """範囲外の距離・角度や不正な方向は送信しないテスト"""
+        fleet = FakeFleet()
+        for command, params in [
+            ("move", {"direction": "up", "distance": 5000}),
+            ("move", {"direction": "sideways", "distance": 50}),
+            ("rotate", {"direction": "clockwise", "angle": 720}),
+        ]:
+            with pytest.raises(ValueError, match=f"Invalid parameters for {command}"):
+                await dispatch_fleet_command(fleet.handlers, command, ["drone_001"], params)
+        assert fleet.calls == []
+        assert validate_fleet_command("rotate", {"direction": "clockwise", "angle": "90"})["angle"] == 90
+
+
+class TestBulkCommandRequest:
+    """一括コマンドリクエストの検証のテスト"""
+
+    def test_invalid_params_rejected(self):
+        """不正なパラメータのリクエストが 422 となる検証エラーになるテスト"""
+        from pydantic import ValidationError
+        from backend.api_server.models.drone_models import BulkCommandRequest
+
+        with pytest.raises(ValidationError, match="distance"):
+            BulkCommandRequest(command="move", selector="all", params={"direction": "up", "distance": 10})
+        with pytest.raises(ValidationError, match="direction"):
+            BulkCommandRequest(command="rotate", selector="all", params={"direction": "left", "angle": 90})
+
+        request = BulkCommandRequest(command="move", selector="all", params={"direction": "up", "distance": 50})
+        assert request.params == {"direction": "up", "distance": 50}
+        assert BulkCommandRequest(command="takeoff", selector="all").params is None
+
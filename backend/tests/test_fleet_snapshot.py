@@ -0,0 +1,133 @@
+"""
+Fleet Status Snapshot Tests
+Tests for the tick-level cached fleet status shared by all readers
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from backend.api_server.core.fleet_snapshot import FleetStatusSnapshotter
+from backend.api_server.models.drone_models import DroneStatus
+
+
+class FakeDroneManager:
+    """get_drone_status の呼び出し回数を数えるダミーマネージャー"""
+
+    def __init__(self, drone_ids=("drone_001", "drone_002")):
+        self.drone_info = {drone_id: SimpleNamespace(type="dummy") for drone_id in drone_ids}
+        self.connected = set()
+        self.status_calls = 0
+        self.battery = 90
+
+    async def get_drone_status(self, drone_id):
+        self.status_calls += 1
+        if drone_id == "broken":
+            raise RuntimeError("sensor failure")
+        return DroneStatus(
+            drone_id=drone_id,
+            connection_status="connected" if drone_id in self.connected else "disconnected",
+            flight_status="landed",
+            battery_level=self.battery,
+            last_updated=datetime.now()
+        )
+
+    def get_drone_type_info(self, drone_id):
+        return {"drone_id": drone_id, "is_real_drone": drone_id.startswith("tello")}
+
+
+class TestFleetStatusSnapshotter:
+    """FleetStatusSnapshotter のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_readers_share_one_build(self):
+        """複数の読み手が1回の構築を共有するテスト"""
+        drone_manager = FakeDroneManager()
+        snapshotter = FleetStatusSnapshotter(drone_manager, interval=60.0)
+
+        for _ in range(20):
+            await snapshotter.get_status("drone_001")
+            await snapshotter.get_snapshot()
+
+        assert snapshotter.builds == 1
+        assert drone_manager.status_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_rebuild(self):
+        """無効化後の再構築テスト"""
+        drone_manager = FakeDroneManager()
+        snapshotter = FleetStatusSnapshotter(drone_manager, interval=60.0)
+
+        first = await snapshotter.get_snapshot()
+        assert first.connected_count == 0
+
+        drone_manager.connected.add("drone_002")
+        assert (await snapshotter.get_snapshot()) is first
+        snapshotter.invalidate()
+        second = await snapshotter.get_snapshot()
+
+        assert second.tick == first.tick + 1
+        assert second.connected_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_readers_wait_for_one_rebuild(self):
+        """無効化後に同時に読んだ読み手が1回の再構築を共有するテスト"""
+        drone_manager = FakeDroneManager()
+        snapshotter = FleetStatusSnapshotter(drone_manager, interval=60.0)
+        first = await snapshotter.get_snapshot()
+
+        snapshotter.invalidate()
+        snapshots = await asyncio.gather(*(snapshotter.get_snapshot() for _ in range(10)))
+
+        assert snapshotter.builds == 2
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+        assert snapshots[0].tick == first.tick + 1
+
+    @pytest.mark.asyncio
+    async def test_messages_serialized_once(self):
+        """配信メッセージが構築時にシリアライズ済みであるテスト"""
+        drone_manager = FakeDroneManager(("drone_001", "tello_001"))
+        snapshot = await FleetStatusSnapshotter(drone_manager).refresh()
+
+        message = json.loads(snapshot.status_messages["drone_001"])
+        assert message["type"] == "drone_status_update"
+        assert message["status"]["battery_level"] == 90
+        assert "real_drone_info" not in message
+        assert json.loads(snapshot.status_messages["tello_001"])["real_drone_info"]["is_real_drone"]
+
+    @pytest.mark.asyncio
+    async def test_failed_drone_falls_back_to_disconnected(self):
+        """状態取得に失敗したドローンのフォールバックテスト"""
+        drone_manager = FakeDroneManager(("drone_001", "broken"))
+        snapshot = await FleetStatusSnapshotter(drone_manager).refresh()
+
+        assert snapshot.statuses["broken"].connection_status == "disconnected"
+        assert snapshot.statuses["drone_001"].battery_level == 90
+
+    @pytest.mark.asyncio
+    async def test_unknown_drone(self):
+        """存在しないドローンのテスト"""
+        snapshotter = FleetStatusSnapshotter(FakeDroneManager())
+        with pytest.raises(ValueError, match="not found"):
+            await snapshotter.get_status("drone_999")
+
+    @pytest.mark.asyncio
+    async def test_background_loop_publishes_ticks(self):
+        """定期構築ループと tick 待機のテスト"""
+        drone_manager = FakeDroneManager()
+        snapshotter = FleetStatusSnapshotter(drone_manager, interval=0.05)
+        snapshotter.start()
+        try:
+            first = await snapshotter.wait_for_tick(0, timeout=1.0)
+            drone_manager.battery = 50
+            second = await snapshotter.wait_for_tick(first.tick, timeout=1.0)
+
+            assert second.tick > first.tick
+            assert second.statuses["drone_001"].battery_level == 50
+            assert snapshotter.get_statistics()["running"]
+        finally:
+            await snapshotter.stop()
+        assert not snapshotter.is_running
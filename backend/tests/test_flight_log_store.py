@@ -0,0 +1,139 @@
+"""
+Flight Log Store Tests
+Tests for the ring buffer, segmented JSONL persistence and indexed queries
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.api_server.core.flight_log_store import FlightLogStore
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _fill(store, drone_id="drone_001", count=10):
+    """1秒間隔で takeoff / move を交互に追記"""
+    for i in range(count):
+        event_type = "takeoff" if i % 2 == 0 else "move"
+        store.append(drone_id, event_type, {"index": i}, timestamp=BASE_TIME + timedelta(seconds=i))
+
+
+class TestFlightLogStore:
+    """FlightLogStore のテスト"""
+
+    def test_ring_keeps_latest(self, tmp_path):
+        """リングが直近のログのみ保持するテスト"""
+        store = FlightLogStore(str(tmp_path), ring_capacity=5)
+        _fill(store, count=12)
+        recent = store.recent("drone_001", 3)
+        assert [entry["data"]["index"] for entry in recent] == [9, 10, 11]
+        assert len(store.recent("drone_001", 100)) == 5
+        assert store.recent("drone_999") == []
+
+    def test_query_time_range_and_event_type(self, tmp_path):
+        """時刻範囲とイベント種別での検索テスト"""
+        store = FlightLogStore(str(tmp_path))
+        _fill(store, count=10)
+        store.append("drone_002", "move", {"index": 99}, timestamp=BASE_TIME + timedelta(seconds=3))
+
+        result = store.query("drone_001", start=BASE_TIME + timedelta(seconds=2),
+                             end=BASE_TIME + timedelta(seconds=8), event_types=["move"])
+        assert [entry["data"]["index"] for entry in result["entries"]] == [3, 5, 7]
+        assert result["next_cursor"] is None
+
+        both = store.query("drone_001", event_types=["move", "takeoff"], limit=4)
+        assert [entry["data"]["index"] for entry in both["entries"]] == [0, 1, 2, 3]
+
+    def test_cursor_pagination(self, tmp_path):
+        """カーソルで全件を重複なく取得できるテスト"""
+        store = FlightLogStore(str(tmp_path))
+        _fill(store, count=25)
+        store.flush()
+
+        seen, cursor = [], None
+        while True:
+            page = store.query("drone_001", limit=7, cursor=cursor)
+            seen.extend(entry["data"]["index"] for entry in page["entries"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == list(range(25))
+
+        with pytest.raises(ValueError):
+            store.query("drone_001", cursor="bogus")
+
+    def test_history_survives_restart(self, tmp_path):
+        """再起動後もセグメントから履歴と索引が復元されるテスト"""
+        store = FlightLogStore(str(tmp_path), segment_max_bytes=300)
+        _fill(store, count=20)
+        store.flush()
+        assert store.get_statistics()["segments"] > 1
+
+        reopened = FlightLogStore(str(tmp_path), segment_max_bytes=300)
+        takeoffs = reopened.query("drone_001", event_types=["takeoff"], limit=100)["entries"]
+        assert [entry["data"]["index"] for entry in takeoffs] == list(range(0, 20, 2))
+        assert reopened.recent("drone_001", 1)[0]["data"]["index"] == 19
+        assert reopened.append("drone_001", "land", {}) == 21
+
+    def test_truncated_line_skipped(self, tmp_path):
+        """書き込み途中の行が読み飛ばされるテスト"""
+        store = FlightLogStore(str(tmp_path))
+        _fill(store, count=3)
+        store.flush()
+        segment = os.path.join(str(tmp_path), sorted(os.listdir(str(tmp_path)))[0])
+        with open(segment, "ab") as f:
+            f.write(b'{"seq": 4, "drone_id": "drone_0')
+
+        reopened = FlightLogStore(str(tmp_path))
+        assert reopened.get_statistics()["corrupt_lines"] == 1
+        assert len(reopened.query("drone_001")["entries"]) == 3
+
+        # 再起動後の追記は壊れた行に連結されない
+        reopened.append("drone_001", "land", {"index": 3})
+        reopened.flush()
+        assert len(FlightLogStore(str(tmp_path)).query("drone_001")["entries"]) == 4
+
+    def test_old_segments_removed(self, tmp_path):
+        """保持数を超えたセグメントと索引が削除されるテスト"""
+        store = FlightLogStore(str(tmp_path), segment_max_bytes=200, max_segments=2)
+        _fill(store, count=30)
+        store.flush()
+
+        stats = store.get_statistics()
+        assert stats["segments"] == 2
+        assert stats["segments_removed"] > 0
+        entries = store.query("drone_001", limit=100)["entries"]
+        assert entries and entries[-1]["data"]["index"] == 29
+        assert len(entries) == stats["records_indexed"]
+
+    def test_memory_only_without_log_root(self, tmp_path, monkeypatch):
+        """保存先を指定しない場合にディスクへ書き込まず、リングの範囲で検索できるテスト"""
+        monkeypatch.chdir(tmp_path)
+        store = FlightLogStore(ring_capacity=5)
+        _fill(store, count=12)
+        assert store.flush() == 0
+
+        entries = store.query("drone_001", limit=100)["entries"]
+        assert [entry["data"]["index"] for entry in entries] == [7, 8, 9, 10, 11]
+        takeoffs = store.query("drone_001", event_types=["takeoff"])["entries"]
+        assert [entry["data"]["index"] for entry in takeoffs] == [8, 10]
+        stats = store.get_statistics()
+        assert stats["persistent"] is False
+        assert stats["records_indexed"] == 5 and stats["segments"] == 0
+        assert os.listdir(str(tmp_path)) == []
+
+    @pytest.mark.asyncio
+    async def test_writes_batched_off_loop(self, tmp_path):
+        """イベントループ上の追記がバッチでまとめて書き込まれるテスト"""
+        store = FlightLogStore(str(tmp_path), flush_interval=0.05)
+        _fill(store, count=50)
+        assert store.records_written == 0
+
+        await asyncio.sleep(0.2)
+        stats = store.get_statistics()
+        assert stats["records_written"] == 50
+        assert stats["batches_written"] == 1
+        await store.close()
@@ -0,0 +1,131 @@
+"""
+フレーム記録・再生テストスイート
+メモリマップド・フレームコンテナの記録と再生のテスト
+"""
+
+import pytest
+import time
+import numpy as np
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.frame_recorder import FrameRecorder, FrameReplaySource
+
+
+def _make_frame(value: int, shape=(48, 64, 3)) -> np.ndarray:
+    """テスト用フレームを生成"""
+    return np.full(shape, value % 256, dtype=np.uint8)
+
+
+class _ListSource:
+    """get_frame() を持つ簡易フレームソース"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def get_frame(self):
+        return self.frames.pop(0) if self.frames else None
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """10フレームの記録を作成"""
+    path = str(tmp_path / "rec")
+    with FrameRecorder(path, source="test") as recorder:
+        for i in range(10):
+            recorder.append(_make_frame(i), timestamp=100.0 + i * 0.05)
+    return path
+
+
+class TestFrameRecorder:
+    """FrameRecorderのテスト"""
+
+    def test_append_and_metadata(self, tmp_path):
+        """追記とメタデータのテスト"""
+        path = str(tmp_path / "rec")
+        recorder = FrameRecorder(path)
+        assert recorder.append(_make_frame(1)) == 0
+        assert recorder.append(_make_frame(2)) == 1
+        metadata = recorder.close()
+
+        assert metadata["frame_count"] == 2
+        assert metadata["frame_shape"] == [48, 64, 3]
+        assert not recorder.is_open
+        assert os.path.getsize(os.path.join(path, "frames.bin")) == 2 * 48 * 64 * 3
+
+    def test_shape_mismatch_rejected(self, tmp_path):
+        """形状不一致フレームの拒否テスト"""
+        recorder = FrameRecorder(str(tmp_path / "rec"))
+        recorder.append(_make_frame(1))
+        with pytest.raises(ValueError):
+            recorder.append(_make_frame(1, shape=(10, 10, 3)))
+        recorder.close()
+
+    def test_existing_recording_not_overwritten(self, recording):
+        """既存記録の上書き防止テスト"""
+        with pytest.raises(ValueError):
+            FrameRecorder(recording)
+
+    def test_record_from_source(self, tmp_path):
+        """フレームソースからの記録テスト"""
+        source = _ListSource([_make_frame(i) for i in range(5)])
+        with FrameRecorder(str(tmp_path / "rec")) as recorder:
+            assert recorder.record_from_source(source, num_frames=3) == 3
+            assert recorder.frame_count == 3
+
+
+class TestFrameReplaySource:
+    """FrameReplaySourceのテスト"""
+
+    def test_max_speed_replay_order(self, recording):
+        """最大速度再生のフレーム順テスト"""
+        replay = FrameReplaySource(recording, realtime=False, loop=False)
+        values = []
+        while True:
+            frame = replay.get_frame()
+            if frame is None:
+                break
+            values.append(int(frame[0, 0, 0]))
+        assert values == list(range(10))
+
+    def test_max_speed_replay_loops(self, recording):
+        """ループ再生テスト"""
+        replay = FrameReplaySource(recording, realtime=False, loop=True)
+        for _ in range(10):
+            replay.get_frame()
+        assert int(replay.get_frame()[0, 0, 0]) == 0
+        assert replay.loops_completed == 1
+
+    def test_frames_are_zero_copy_views(self, recording):
+        """ゼロコピー参照テスト"""
+        replay = FrameReplaySource(recording, realtime=False)
+        frame = replay.get_frame()
+        assert isinstance(frame, np.memmap) or isinstance(frame.base, np.memmap)
+        assert not frame.flags.writeable
+
+    def test_realtime_replay_follows_timestamps(self, recording):
+        """記録時刻に沿った再生テスト"""
+        replay = FrameReplaySource(recording, realtime=True, loop=False)
+        replay.start_stream()
+        assert int(replay.get_frame()[0, 0, 0]) == 0
+        time.sleep(0.12)
+        assert int(replay.get_frame()[0, 0, 0]) >= 2
+        time.sleep(0.5)
+        assert replay.get_frame() is None
+
+    def test_statistics(self, recording):
+        """統計情報テスト"""
+        replay = FrameReplaySource(recording, realtime=False)
+        replay.get_frame()
+        stats = replay.get_statistics()
+        assert stats["frame_count"] == 10
+        assert stats["frames_served"] == 1
+        assert stats["recorded_fps"] == pytest.approx(20.0)
+        assert stats["source"] == "test"
+
+    def test_missing_recording(self, tmp_path):
+        """存在しない記録の読み込みテスト"""
+        with pytest.raises(ValueError):
+            FrameReplaySource(str(tmp_path / "missing"))
@@ -0,0 +1,165 @@
+"""
+LRU Cache Tests
+Tests for the bounded LRU cache with heap-ordered TTL expiry, size estimation and single-flight loading
+"""
+
+import asyncio
+
+import pytest
+
+from backend.api_server.core.lru_cache import LRUCache, estimate_size
+from backend.api_server.core.performance_service import PerformanceService
+
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """LRUCache のテスト"""
+
+    def test_evicts_least_recently_used(self):
+        """件数の上限を超えると最も長く使われていないエントリが追い出されるテスト"""
+        cache = LRUCache(max_entries=3)
+        for key in ("a:1", "a:2", "b:1"):
+            cache.set(key, key)
+        assert cache.get("a:1") == "a:1"
+        cache.set("b:2", "b:2")
+
+        assert cache.get("a:2") is None
+        assert list(cache.cache) == ["b:1", "a:1", "b:2"]
+        stats = cache.get_stats()["namespaces"]
+        assert stats["a"]["evictions"] == 1 and stats["a"]["entries"] == 1
+        assert stats["a"]["hits"] == 1 and stats["a"]["misses"] == 1
+        assert stats["b"]["entries"] == 2
+
+    def test_evicts_by_size(self):
+        """合計サイズの上限で追い出し、単体で上限を超える値は登録しないテスト"""
+        cache = LRUCache(max_bytes=1000)
+        cache.set("k:1", b"x" * 400)
+        cache.set("k:2", b"x" * 400)
+        cache.set("k:3", b"x" * 400)
+        assert list(cache.cache) == ["k:2", "k:3"]
+        assert cache.total_bytes == 800
+
+        assert cache.set("k:big", b"x" * 2000) is False
+        assert "k:big" not in cache.cache and cache.get_stats()["rejected"] == 1
+
+    def test_heap_ordered_expiry(self):
+        """期限切れの削除が期限順に行われ、上書き前の期限は無視されるテスト"""
+        clock = FakeClock()
+        cache = LRUCache(default_ttl=10, clock=clock)
+        cache.set("t:short", 1, ttl=1)
+        cache.set("t:long", 2, ttl=100)
+        cache.set("t:renewed", 3, ttl=1)
+        cache.set("t:renewed", 4, ttl=50)
+
+        clock.now = 5
+        assert cache.cleanup_expired() == 1
+        assert cache.get("t:renewed") == 4
+        clock.now = 60
+        assert cache.get("t:renewed") is None
+        assert cache.cleanup_expired() == 0
+        assert list(cache.cache) == ["t:long"]
+        assert cache.namespaces["t"].expirations == 2
+
+    def test_expired_entries_freed_before_eviction(self):
+        """上限に達したときは生きているエントリより先に期限切れが削除されるテスト"""
+        clock = FakeClock()
+        cache = LRUCache(max_entries=2, clock=clock)
+        cache.set("a", 1, ttl=1)
+        cache.set("b", 2, ttl=100)
+        clock.now = 2
+        cache.set("c", 3)
+        assert list(cache.cache) == ["b", "c"]
+        assert cache.namespaces["default"].evictions == 0
+
+    def test_size_estimate_without_serialising(self):
+        """大きなコンテナのサイズを標本から近似するテスト"""
+        class Unprintable:
+            def __init__(self):
+                self.payload = b"x" * 64
+
+            def __repr__(self):
+                raise AssertionError("value must not be stringified")
+
+        rows = [{"drone_id": f"drone_{index:04d}", "frame": Unprintable()} for index in range(10000)]
+        assert estimate_size(rows) == pytest.approx(10 * estimate_size(rows[:1000]), rel=0.01)
+        assert estimate_size(rows) > 10000 * 64
+        assert estimate_size(b"x" * 100) == 100
+
+
+class TestSingleFlight:
+    """同時読み込みの集約のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        """同じキーへの同時アクセスで読み込みが1回だけ行われるテスト"""
+        cache = LRUCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(cache.get_or_load("ns:key", loader) for _ in range(10)))
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert cache.namespaces["ns"].coalesced == 9
+        assert await cache.get_or_load("ns:key", loader) == {"value": 42} and len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_load_not_cached_and_survives_cancellation(self):
+        """失敗は全員に伝わって登録されず、呼び出し元のキャンセルで読み込みが止まらないテスト"""
+        cache = LRUCache()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        waiters = [asyncio.ensure_future(cache.get_or_load("ns:fail", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        for waiter in waiters:
+            with pytest.raises(RuntimeError):
+                await waiter
+        assert cache.get("ns:fail") is None and cache.namespaces["ns"].load_errors == 1
+
+        release.clear()
+
+        async def slow():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(cache.get_or_load("ns:slow", slow))
+        second = asyncio.ensure_future(cache.get_or_load("ns:slow", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "done"
+        assert cache.get("ns:slow") == "done"
+
+    @pytest.mark.asyncio
+    async def test_cached_call_deduplicates_async_calls(self):
+        """PerformanceService.cached_call の同時呼び出しが1回の実行にまとめられるテスト"""
+        service = PerformanceService(cache_max_entries=16)
+        calls = []
+
+        @service.cached_call("fleet_summary")
+        async def summary(fleet):
+            calls.append(fleet)
+            await asyncio.sleep(0.01)
+            return {"fleet": fleet}
+
+        results = await asyncio.gather(*(summary("a") for _ in range(5)))
+        assert calls == ["a"] and results[0] == {"fleet": "a"}
+        assert service.cache_misses == 5
+        assert service.cache.get_stats()["namespaces"]["fleet_summary"]["coalesced"] == 4
@@ -0,0 +1,141 @@
+"""
+Metrics Registry Tests
+Tests for the labelled counter/gauge/histogram registry, the pre-rendered Prometheus exposition and its collectors
+"""
+
+import asyncio
+
+import pytest
+
+from backend.api_server.core.camera_service import CameraService
+from backend.api_server.core.metrics_registry import GAUGE, MetricFamily, MetricsRegistry
+from backend.api_server.core.performance_service import PerformanceService
+from backend.api_server.core.request_metrics import RequestMetrics
+
+
+def _samples(text):
+    """描画結果をサンプル行 -> 値 の辞書に変換"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestMetricsRegistry:
+    """MetricsRegistry のテスト"""
+
+    def test_counter_gauge_histogram_exposition(self):
+        """カウンター・ゲージ・ヒストグラムが Prometheus テキスト形式で描画されるテスト"""
+        registry = MetricsRegistry()
+        commands = registry.counter("commands_total", "Commands", ("command",))
+        temperature = registry.gauge("temperature_celsius", "Temperature")
+        latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+        commands.labels("takeoff").inc()
+        commands.labels(command="takeoff").inc(2)
+        temperature.set(21.5)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.labels('/a"b').observe(value)
+
+        text = registry.render()
+        assert "# TYPE commands_total counter" in text
+        assert "# TYPE latency_seconds histogram" in text
+        samples = _samples(text)
+        assert samples['commands_total{command="takeoff"}'] == 3
+        assert samples["temperature_celsius"] == 21.5
+        assert samples['latency_seconds_bucket{route="/a\\"b",le="0.1"}'] == 2
+        assert samples['latency_seconds_bucket{route="/a\\"b",le="1"}'] == 3
+        assert samples['latency_seconds_bucket{route="/a\\"b",le="+Inf"}'] == 4
+        assert samples['latency_seconds_count{route="/a\\"b"}'] == 4
+        assert samples['latency_seconds_sum{route="/a\\"b"}'] == pytest.approx(3.65)
+
+    def test_registration_and_label_validation(self):
+        """同名の再登録は既存を返し、不一致や不正なラベル・減算はエラーになるテスト"""
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events", ("kind",))
+        assert registry.counter("events_total", "Events", ("kind",)) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("events_total", "Events", ("kind",))
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+        with pytest.raises(ValueError):
+            counter.labels("a").inc(-1)
+        with pytest.raises(ValueError):
+            registry.histogram("bad_seconds", "Bad", ("le",))
+
+    def test_buffer_refreshed_off_request_path(self):
+        """exposition はバッファを返すだけで、コレクターは refresh 時にだけ呼ばれるテスト"""
+        registry = MetricsRegistry()
+        calls = []
+
+        def collector():
+            calls.append(1)
+            return [MetricFamily("queue_depth", GAUGE, "Depth").add(len(calls))]
+
+        def broken():
+            raise RuntimeError("unavailable")
+
+        registry.add_collector("queue", collector)
+        registry.add_collector("broken", broken)
+        first = registry.exposition()
+        assert registry.exposition() is first and len(calls) == 1
+        assert b"queue_depth 1\n" in first
+
+        registry.refresh()
+        assert b"queue_depth 2\n" in registry.exposition()
+        assert registry.get_statistics()["collector_errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_background_refresh(self):
+        """バックグラウンドタスクが定期的にバッファを更新するテスト"""
+        registry = MetricsRegistry(refresh_interval=0.01)
+        gauge = registry.gauge("value", "Value")
+        gauge.set(1)
+        await registry.start()
+        try:
+            await asyncio.sleep(0.02)
+            gauge.set(2)
+            await asyncio.sleep(0.05)
+            assert b"value 2\n" in registry.exposition()
+        finally:
+            await registry.stop()
+        assert registry.refreshes >= 2
+
+
+class TestCollectors:
+    """各サービスのコレクターのテスト"""
+
+    def test_http_request_metrics(self):
+        """ステータスコードごとのリクエスト数と、累積バケットのレイテンシが出力されるテスト"""
+        metrics = RequestMetrics()
+        for duration in (0.002, 0.004, 0.2):
+            metrics.record("GET", "/api/drones", 200, duration)
+        metrics.record("GET", "/api/drones", 401, 0.001)
+        metrics.record("GET", "/api/drones", 404, 0.001)
+
+        registry = MetricsRegistry()
+        registry.add_collector("http", metrics.collect_metrics)
+        samples = _samples(registry.render())
+        assert samples['http_requests_total{method="GET",route="/api/drones",status="200"}'] == 3
+        assert samples['http_requests_total{method="GET",route="/api/drones",status="401"}'] == 1
+        prefix = 'http_request_duration_seconds_bucket{method="GET",route="/api/drones",status_class="2xx"'
+        assert samples[prefix + ',le="0.005"}'] == 2
+        assert samples[prefix + ',le="0.25"}'] == 3
+        assert samples[prefix + ',le="+Inf"}'] == 3
+        assert samples['http_request_duration_seconds_count{method="GET",route="/api/drones",status_class="4xx"}'] == 2
+
+    def test_cache_and_camera_metrics(self):
+        """キャッシュのヒット率と、ストリームのないドローンのカメラ状態が出力されるテスト"""
+        service = PerformanceService()
+        service.cache_hits, service.cache_misses = 3, 1
+        camera = CameraService()
+
+        registry = MetricsRegistry()
+        registry.add_collector("cache", service.collect_metrics)
+        registry.add_collector("camera", lambda: camera.collect_metrics(["drone_001"]))
+        samples = _samples(registry.render())
+        assert samples['cache_hit_ratio{cache="performance"}'] == 0.75
+        assert samples['cache_requests_total{cache="performance",result="miss"}'] == 1
+        assert samples['camera_stream_active{drone_id="drone_001"}'] == 0
@@ -0,0 +1,158 @@
+"""
+Path Planner Tests
+Tests for the voxel occupancy grid, wavefront search, smoothing and plan caching
+"""
+
+import math
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.drone_simulator import Obstacle, ObstacleType, Vector3D, Virtual3DSpace
+from core.path_planner import PathPlanner, VoxelGrid
+
+
+def _wall(space, obstacle_id, x, y, size_y, height=4.0):
+    """x 方向に薄い壁を追加"""
+    space.add_obstacle(Obstacle(obstacle_id, ObstacleType.WALL, Vector3D(x, y, height / 2),
+                                Vector3D(0.4, size_y, height)))
+
+
+def _warehouse():
+    """棚が交互にずれて並ぶ蛇行レイアウト"""
+    space = Virtual3DSpace((20.0, 20.0, 10.0))
+    for i, x in enumerate([-6, -3, 0, 3, 6]):
+        space.add_obstacle(Obstacle(f"shelf_{i}", ObstacleType.WALL, Vector3D(x, 1 if i % 2 else -1, 4.0),
+                                    Vector3D(0.8, 16.0, 8.0)))
+    return space
+
+
+def _assert_collision_free(space, start, waypoints, step=0.05):
+    """経路上を細かくサンプリングして衝突がないことを確認"""
+    points = [start] + waypoints
+    for a, b in zip(points, points[1:]):
+        samples = max(1, int(math.dist(a, b) / step))
+        for i in range(samples + 1):
+            t = i / samples
+            position = Vector3D(*(a[axis] + (b[axis] - a[axis]) * t for axis in range(3)))
+            assert space.is_position_valid(position), f"collision at {position.to_tuple()}"
+
+
+class TestVoxelGrid:
+    """VoxelGrid のテスト"""
+
+    def test_obstacles_inflated_by_radius(self):
+        """障害物がドローン半径分膨張してラスタライズされるテスト"""
+        space = Virtual3DSpace((10.0, 10.0, 5.0))
+        _wall(space, "wall", 0.0, 0.0, 2.0)
+        grid = VoxelGrid.from_space(space, resolution=0.25, drone_radius=0.3)
+
+        assert not grid.is_free(grid.to_cell((0.0, 0.0, 1.0)))
+        assert not grid.is_free(grid.to_cell((0.4, 0.0, 1.0)))
+        assert grid.is_free(grid.to_cell((0.8, 0.0, 1.0)))
+        assert not grid.is_free(grid.to_cell((50.0, 0.0, 1.0)))
+
+
+class TestPathPlanner:
+    """PathPlanner のテスト"""
+
+    def test_free_space_is_straight(self):
+        """障害物がなければ目標のみの経路になるテスト"""
+        planner = PathPlanner(Virtual3DSpace((10.0, 10.0, 5.0)))
+        path = planner.plan((-3.0, -3.0, 1.0), (3.0, 2.0, 2.0))
+        assert path.waypoints == [(3.0, 2.0, 2.0)]
+        assert path.length == pytest.approx(math.dist((-3.0, -3.0, 1.0), (3.0, 2.0, 2.0)))
+
+    def test_routes_around_wall(self):
+        """壁を迂回する衝突のない経路のテスト"""
+        space = Virtual3DSpace((10.0, 10.0, 5.0))
+        _wall(space, "wall", 0.0, 0.0, 6.0, height=5.0)
+        planner = PathPlanner(space)
+
+        start, goal = (-2.0, 0.0, 1.0), (2.0, 0.0, 1.0)
+        path = planner.plan(start, goal)
+        assert len(path.waypoints) > 1
+        assert path.waypoints[-1] == goal
+        assert path.length > 6.0
+        _assert_collision_free(space, start, path.waypoints)
+
+    def test_blocked_goal_rejected(self):
+        """障害物内や範囲外の目標が拒否されるテスト"""
+        space = Virtual3DSpace((10.0, 10.0, 5.0))
+        _wall(space, "wall", 0.0, 0.0, 2.0)
+        planner = PathPlanner(space)
+        with pytest.raises(ValueError):
+            planner.plan((-2.0, 0.0, 1.0), (0.0, 0.0, 1.0))
+        with pytest.raises(ValueError):
+            planner.plan((-2.0, 0.0, 1.0), (0.0, 0.0, 50.0))
+
+    def test_enclosed_goal_unreachable(self):
+        """囲まれた目標に経路がないと報告されるテスト"""
+        space = Virtual3DSpace((10.0, 10.0, 3.0))
+        _wall(space, "west", -1.0, 0.0, 2.4, height=3.0)
+        _wall(space, "east", 1.0, 0.0, 2.4, height=3.0)
+        space.add_obstacle(Obstacle("north", ObstacleType.WALL, Vector3D(0.0, 1.0, 1.5), Vector3D(2.4, 0.4, 3.0)))
+        space.add_obstacle(Obstacle("south", ObstacleType.WALL, Vector3D(0.0, -1.0, 1.5), Vector3D(2.4, 0.4, 3.0)))
+        planner = PathPlanner(space)
+        with pytest.raises(ValueError):
+            planner.plan((-4.0, 0.0, 1.0), (0.0, 0.0, 1.0))
+
+    def test_cache_invalidated_by_world_change(self):
+        """計画がキャッシュされ、障害物の追加で無効化されるテスト"""
+        space = Virtual3DSpace((10.0, 10.0, 5.0))
+        planner = PathPlanner(space)
+        first = planner.plan((-3.0, 0.0, 1.0), (3.0, 0.0, 1.0))
+        again = planner.plan((-3.0, 0.0, 1.0), (3.0, 0.0, 1.0))
+        assert again.cached and again.waypoints == first.waypoints
+        assert planner.get_statistics()["cache_hits"] == 1
+
+        _wall(space, "wall", 0.0, 0.0, 6.0, height=5.0)
+        replanned = planner.plan((-3.0, 0.0, 1.0), (3.0, 0.0, 1.0))
+        assert not replanned.cached
+        assert len(replanned.waypoints) > 1
+        _assert_collision_free(space, (-3.0, 0.0, 1.0), replanned.waypoints)
+
+    def test_start_on_floor(self):
+        """床面（膨張領域内）からの経路計画テスト"""
+        space = Virtual3DSpace((10.0, 10.0, 5.0))
+        space.add_obstacle(Obstacle("floor", ObstacleType.WALL, Vector3D(0.0, 0.0, -0.05), Vector3D(10.0, 10.0, 0.1)))
+        planner = PathPlanner(space)
+        path = planner.plan((0.0, 0.0, 0.0), (2.0, 0.0, 1.5))
+        assert path.waypoints[-1] == (2.0, 0.0, 1.5)
+
+    def test_warehouse_plans_in_milliseconds(self):
+        """倉庫レイアウトの経路が短時間で計画されるテスト"""
+        space = _warehouse()
+        planner = PathPlanner(space)
+        start, goal = (-8.5, -8.5, 1.5), (8.5, 8.5, 1.5)
+        path = planner.plan(start, goal)
+
+        assert path.compute_ms < 500
+        assert 6 <= len(path.waypoints) <= 12
+        _assert_collision_free(space, start, path.waypoints)
+
+        # 同じ目標への別の開始位置は距離場を再利用する
+        other = planner.plan((-8.5, 8.5, 3.0), goal)
+        assert planner.get_statistics()["fields_computed"] == 1
+        _assert_collision_free(space, (-8.5, 8.5, 3.0), other.waypoints)
+
+
+class TestPathPlanRequest:
+    """経路計画リクエストの検証のテスト"""
+
+    def test_malformed_points_rejected(self):
+        """座標数や型が不正なリクエストが 422 となる検証エラーになるテスト"""
+        from pydantic import ValidationError
+        from backend.api_server.models.drone_models import PathPlanRequest
+
+        for body in ({}, {"goal": [1.0, 2.0]}, {"goal": [1.0, 2.0, "up"]},
+                     {"goal": [1.0, 2.0, 3.0], "start": [0.0, 0.0, 1.0, 2.0]}):
+            with pytest.raises(ValidationError):
+                PathPlanRequest(**body)
+
+        request = PathPlanRequest(goal=[5, 3, 2])
+        assert request.goal == (5.0, 3.0, 2.0)
+        assert request.start is None
@@ -205,8 +205,12 @@ class TestWebSocketPerformance:
         for i in range(50):
             mock_ws = Mock()
             mock_ws.send_text = AsyncMock()
-            manager.active_connections.add(mock_ws)
+            mock_ws.accept = AsyncMock()
+            await manager.connect(mock_ws)
             mock_connections.append(mock_ws)
+        await asyncio.sleep(0.01)
+        for mock_ws in mock_connections:
+            mock_ws.send_text.reset_mock()
         
         # ブロードキャストパフォーマンステスト
         message = {"type": "test_broadcast", "data": "performance test"}
@@ -0,0 +1,164 @@
+"""
+Request Metrics Tests
+Tests for log-linear latency histograms, sliding-window percentiles and the request timing middleware
+"""
+
+import random
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from backend.api_server.core.performance_service import PerformanceService
+from backend.api_server.core.request_metrics import (
+    BUCKET_COUNT, MAX_TRACKABLE_US, OVERFLOW_ROUTE, UNMATCHED_ROUTE, LatencyHistogram, RequestMetrics,
+    RequestTimingMiddleware, bucket_bounds, bucket_index
+)
+
+
+async def _get(app, path):
+    """ASGI アプリに GET リクエストを送り、ステータスコードを返す"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)}
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+class TestLatencyHistogram:
+    """LatencyHistogram のテスト"""
+
+    def test_bucket_layout(self):
+        """値が必ず自分のバケットの範囲に入り、相対誤差が有界なテスト"""
+        rng = random.Random(0)
+        for value in list(range(200)) + [rng.randint(0, MAX_TRACKABLE_US) for _ in range(20000)]:
+            lower, upper = bucket_bounds(bucket_index(value))
+            assert lower <= value < upper
+            assert upper - lower <= max(1, lower // 16)
+        assert bucket_index(MAX_TRACKABLE_US * 10) == BUCKET_COUNT - 1
+
+    def test_percentiles_close_to_exact(self):
+        """パーセンタイルが実測値と数%以内で一致するテスト"""
+        samples = np.random.default_rng(1).lognormal(-4.0, 1.0, 20000)
+        metrics = RequestMetrics()
+        for duration in samples:
+            metrics.record("GET", "/api/drones", 200, float(duration), now=0.0)
+
+        summary = metrics.summary("/api/drones", now=1.0)
+        for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            exact_ms = float(np.quantile(samples, quantile)) * 1000
+            assert summary["percentiles_ms"][name] == pytest.approx(exact_ms, rel=0.05)
+        assert summary["call_count"] == 20000
+        assert summary["max_duration_ms"] == pytest.approx(samples.max() * 1000, abs=0.01)
+
+    def test_sliding_windows(self):
+        """古いスロットが集計窓から外れ、累計には残るテスト"""
+        histogram = LatencyHistogram(slots=15, slot_seconds=20.0, now=0.0)
+        for _ in range(100):
+            histogram.record(1000, now=5.0)
+        for _ in range(10):
+            histogram.record(50000, now=250.0)
+
+        recent, span = histogram.window_counts(60.0, now=255.0)
+        assert int(recent.sum()) == 10
+        assert span == pytest.approx(55.0)
+        assert int(histogram.window_counts(300.0, now=255.0)[0].sum()) == 110
+
+        # 5分を過ぎたスロットは累計にだけ残る
+        assert int(histogram.window_counts(300.0, now=400.0)[0].sum()) == 10
+        assert int(histogram.total_counts().sum()) == 110
+        assert histogram.ring.nbytes == 15 * BUCKET_COUNT * 4
+
+
+class TestRequestMetrics:
+    """RequestMetrics のテスト"""
+
+    def test_series_by_route_method_and_status(self):
+        """ルート・メソッド・ステータス分類ごとの集計とスループットのテスト"""
+        metrics = RequestMetrics(now=0.0)
+        for second in range(60):
+            metrics.record("GET", "/api/drones/{drone_id}", 200, 0.002, now=float(second))
+        metrics.record("GET", "/api/drones/{drone_id}", 404, 0.001, now=30.0)
+        metrics.record("POST", "/api/drones/{drone_id}/takeoff", 503, 0.5, now=30.0)
+
+        drone = metrics.summary("/api/drones/{drone_id}", now=60.0)
+        assert drone["call_count"] == 61
+        assert drone["total_errors"] == 0
+        assert drone["windows"]["1m"]["throughput_rps"] == pytest.approx(61 / 60, rel=0.01)
+
+        overall = metrics.summary(now=60.0)
+        assert overall["total_errors"] == 1
+        assert overall["success_rate"] == round(61 / 62 * 100, 2)
+
+        rows = metrics.breakdown(now=60.0)
+        assert [(row["method"], row["status_class"]) for row in rows] == [
+            ("GET", "2xx"), ("GET", "4xx"), ("POST", "5xx")]
+        assert metrics.summary("/missing")["call_count"] == 0
+
+    def test_throughput_of_first_request(self):
+        """起動直後の1件目のスループットが1スロット分の時間で割られるテスト"""
+        metrics = RequestMetrics(now=120.0)
+        metrics.record("GET", "/api/drones", 200, 0.001, now=120.5)
+        window = metrics.summary(now=120.50001)["windows"]["1m"]
+        assert window["count"] == 1
+        assert window["throughput_rps"] == pytest.approx(1 / 20.0)
+
+        # 経過時間が窓より短い間は経過時間で割る
+        window = metrics.summary(now=150.0)["windows"]["1m"]
+        assert window["throughput_rps"] == pytest.approx(1 / 30.0, abs=1e-3)
+
+    def test_series_limit(self):
+        """系列数の上限を超えたルートがまとめられるテスト"""
+        metrics = RequestMetrics(max_series=2)
+        for index in range(5):
+            metrics.record("GET", f"/route/{index}", 200, 0.001)
+        assert len(metrics.series) == 3
+        assert metrics.summary(OVERFLOW_ROUTE)["call_count"] == 3
+
+
+class TestRequestTimingMiddleware:
+    """RequestTimingMiddleware のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_records_route_template_and_status(self):
+        """ルートテンプレート・ステータスで記録され、未一致のパスがまとめられるテスト"""
+        app = FastAPI()
+        metrics = RequestMetrics()
+        app.add_middleware(RequestTimingMiddleware, metrics=metrics)
+
+        @app.get("/api/drones/{drone_id}")
+        async def get_drone(drone_id: str):
+            if drone_id == "missing":
+                raise HTTPException(status_code=404)
+            return {"drone_id": drone_id}
+
+        statuses = [await _get(app, f"/api/drones/{drone_id}") for drone_id in ("drone_001", "drone_002", "missing")]
+        assert statuses == [200, 200, 404]
+        assert await _get(app, "/no/such/path") == 404
+
+        assert metrics.routes() == ["/api/drones/{drone_id}", UNMATCHED_ROUTE]
+        rows = {(row["route"], row["status_class"]): row["call_count"] for row in metrics.breakdown()}
+        assert rows == {("/api/drones/{drone_id}", "2xx"): 2, ("/api/drones/{drone_id}", "4xx"): 1,
+                        (UNMATCHED_ROUTE, "4xx"): 1}
+
+    def test_performance_service_reads_histograms(self):
+        """PerformanceService.get_api_performance がヒストグラムから統計を返すテスト"""
+        metrics = RequestMetrics()
+        service = PerformanceService(request_metrics=metrics)
+        metrics.record("GET", "/api/drones", 200, 0.010)
+        service.record_api_call("/api/drones", 0.030, False)
+
+        performance = service.get_api_performance("/api/drones", include_routes=True)
+        assert performance["call_count"] == 2
+        assert performance["total_errors"] == 1
+        assert performance["avg_duration_ms"] == 20.0
+        assert set(performance["windows"]) == {"1m", "5m"}
+        assert len(performance["routes"]) == 2
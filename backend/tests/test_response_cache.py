@@ -0,0 +1,161 @@
+"""
+Response Cache Tests
+Tests for versioned response caching with strong ETags and If-None-Match revalidation
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+
+from backend.api_server.api import models as models_api
+from backend.api_server.core.dataset_service import DatasetService
+from backend.api_server.core.model_service import ModelService
+from backend.api_server.core.response_cache import VersionedResponseCache, etag_matches
+
+
+async def _get(app, path, headers=None):
+    """ASGI アプリに GET リクエストを送り、(ステータス, ヘッダー, 本文) を返す"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": raw_headers, "client": ("127.0.0.1", 1234), "server": ("testserver", 80)}
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body
+
+
+class TestVersionedResponseCache:
+    """VersionedResponseCache のテスト"""
+
+    def test_etag_matching(self):
+        """If-None-Match のリスト・弱い ETag・* の比較テスト"""
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches("*", '"b"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"b"')
+
+    @pytest.mark.asyncio
+    async def test_not_modified_without_rebuilding(self):
+        """一致する If-None-Match には構築せずに 304 を返し、バージョンが変わると新しい ETag になるテスト"""
+        cache = VersionedResponseCache()
+        state = {"version": 1, "items": ["a"], "builds": 0}
+        app = FastAPI()
+
+        @app.get("/items")
+        async def items(request: Request):
+            async def build():
+                state["builds"] += 1
+                return {"items": list(state["items"])}
+            return await cache.respond(request, "items", state["version"], build)
+
+        status, headers, body = await _get(app, "/items")
+        assert status == 200 and json.loads(body) == {"items": ["a"]}
+        etag = headers["etag"]
+        assert etag.startswith('"') and headers["cache-control"] == "no-cache"
+
+        status, headers, body = await _get(app, "/items", {"If-None-Match": etag})
+        assert status == 304 and body == b"" and headers["etag"] == etag
+        status, _, body = await _get(app, "/items")
+        assert status == 200 and json.loads(body) == {"items": ["a"]}
+        assert state["builds"] == 1
+
+        state["version"], state["items"] = 2, ["a", "b"]
+        status, headers, body = await _get(app, "/items", {"If-None-Match": etag})
+        assert status == 200 and headers["etag"] != etag
+        assert json.loads(body) == {"items": ["a", "b"]}
+        assert state["builds"] == 2
+        assert cache.get_statistics()["not_modified"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_build_once(self):
+        """同じバージョンへの同時リクエストで構築が1回だけ行われるテスト"""
+        cache = VersionedResponseCache()
+        builds = []
+        app = FastAPI()
+
+        @app.get("/slow")
+        async def slow(request: Request):
+            async def build():
+                builds.append(1)
+                await asyncio.sleep(0.01)
+                return [1, 2, 3]
+            return await cache.respond(request, "slow", 1, build)
+
+        results = await asyncio.gather(*(_get(app, "/slow") for _ in range(5)))
+        assert [status for status, _, _ in results] == [200] * 5
+        assert len({headers["etag"] for _, headers, _ in results}) == 1
+        assert len(builds) == 1
+
+
+class TestResourceVersions:
+    """サービスのバージョンと一覧エンドポイントのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_dataset_version_bumps_on_mutation(self, tmp_path):
+        """データセットの作成・画像追加・削除でバージョンが進むテスト"""
+        from backend.api_server.models.vision_models import CreateDatasetRequest
+
+        service = DatasetService(data_root=str(tmp_path))
+        versions = [service.version]
+        dataset = await service.create_dataset(CreateDatasetRequest(name="test", description="d"))
+        versions.append(service.version)
+        await service.get_datasets()
+        assert service.version == versions[-1]
+        await service.add_image_to_dataset(dataset.id, b"\x89PNG", "a.png", "person")
+        versions.append(service.version)
+        await service.delete_dataset(dataset.id)
+        versions.append(service.version)
+        assert versions == sorted(set(versions))
+
+    @pytest.mark.asyncio
+    async def test_models_endpoint_revalidates(self):
+        """/models が ETag を返し、モデル削除後は 304 にならないテスト"""
+        service = ModelService()
+        app = FastAPI()
+        app.include_router(models_api.router)
+        models_api.model_service = service
+        try:
+            status, headers, body = await _get(app, "/models")
+            assert status == 200 and len(json.loads(body)) == len(service.models)
+            etag = headers["etag"]
+            assert (await _get(app, "/models", {"If-None-Match": etag}))[0] == 304
+
+            await service.delete_model(next(iter(service.models)))
+            status, headers, body = await _get(app, "/models", {"If-None-Match": etag})
+            assert status == 200 and headers["etag"] != etag
+            assert len(json.loads(body)) == len(service.models)
+        finally:
+            models_api.model_service = None
+
+    @pytest.mark.asyncio
+    async def test_new_service_instance_not_served_old_body(self):
+        """サービスを作り直すと、同じバージョン番号でも前のインスタンスの応答を返さないテスト"""
+        app = FastAPI()
+        app.include_router(models_api.router)
+        first, second = ModelService(), ModelService()
+        # バージョンを進めずに内容だけ変える（どちらもバージョン 0）
+        second.models.pop(next(iter(second.models)))
+        assert first.version == second.version
+        try:
+            models_api.model_service = first
+            status, headers, body = await _get(app, "/models")
+            assert status == 200 and len(json.loads(body)) == len(first.models)
+            etag = headers["etag"]
+
+            models_api.model_service = second
+            status, headers, body = await _get(app, "/models", {"If-None-Match": etag})
+            assert status == 200 and headers["etag"] != etag
+            assert len(json.loads(body)) == len(second.models)
+        finally:
+            models_api.model_service = None
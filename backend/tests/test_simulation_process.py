@@ -0,0 +1,298 @@
+"""
+Simulation Process Tests
+Tests for the shared-memory state block, command rings and the simulation worker process
+"""
+
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.drone_simulator import DroneState, Obstacle, ObstacleType, Vector3D
+from core.simulation_process import (
+    FIELD, STATE_FIELDS, SharedCommandRing, SharedStateBlock, SimulationProcess, SimulationProcessError,
+    SimulationWorker, partition_regions
+)
+
+
+@pytest.fixture
+def worker_blocks():
+    """インプロセスで使う共有メモリブロック一式"""
+    state = SharedStateBlock(capacity=8)
+    commands = SharedCommandRing(slots=16)
+    replies = SharedCommandRing(slots=16)
+    yield state, commands, replies
+    for block in (replies, commands, state):
+        block.close()
+
+
+class TestSharedBlocks:
+    """共有メモリブロックのテスト"""
+
+    def test_ring_fifo_and_capacity(self):
+        """リングの FIFO 順序と満杯時の挙動テスト"""
+        ring = SharedCommandRing(slots=4, slot_size=64)
+        try:
+            assert all(ring.push({"id": i}) for i in range(4))
+            assert ring.push({"id": 4}) is False
+            assert [message["id"] for message in ring.drain()] == [0, 1, 2, 3]
+            assert ring.pop() is None
+
+            # 折り返し後も順序を保つ
+            for i in range(6):
+                ring.push({"id": i})
+                assert ring.pop() == {"id": i}
+            with pytest.raises(ValueError):
+                ring.push({"payload": "x" * 100})
+        finally:
+            ring.close()
+
+    def test_attach_by_name_sees_writes(self):
+        """名前で接続した別インスタンスから書き込みが見えるテスト"""
+        state = SharedStateBlock(capacity=4)
+        reader = SharedStateBlock(capacity=4, name=state.name)
+        try:
+            row = np.arange(len(STATE_FIELDS), dtype=np.float64)
+            state.write_rows([2], row[None, :])
+            assert np.array_equal(reader.read_row(2), row)
+            assert reader.sequence[2] % 2 == 0
+        finally:
+            reader.close()
+            state.close()
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=state.name)
+
+
+class TestSimulationWorker:
+    """SimulationWorker のテスト（インプロセス）"""
+
+    def test_commands_and_published_state(self, worker_blocks):
+        """コマンドの処理と状態テーブルへの書き出しテスト"""
+        state, commands, replies = worker_blocks
+        worker = SimulationWorker(state, commands, replies, (20.0, 20.0, 10.0))
+
+        commands.push({"id": 1, "op": "add_drone", "drone_id": "sim_1", "slot": 3, "position": [2.0, 3.0, 1.5]})
+        commands.push({"id": 2, "op": "start", "slot": 3})
+        commands.push({"id": 3, "op": "move_to_position", "slot": 3, "args": [1.0, 1.0, 1.0]})
+        commands.push({"id": 4, "op": "takeoff", "slot": 9})
+        worker.step()
+
+        results = {reply["id"]: reply for reply in replies.drain()}
+        assert results[1]["result"] is True
+        assert results[3]["result"] is False  # 飛行中でないため失敗
+        assert "error" in results[4]
+
+        row = state.read_row(3)
+        assert row[FIELD["active"]] == 1.0 and row[FIELD["running"]] == 1.0
+        assert tuple(row[[FIELD["x"], FIELD["y"]]]) == (2.0, 3.0)
+        assert state.read_header(0)["drones"] == 1
+
+
+@pytest.fixture
+def partitioned_workers():
+    """2領域を担当するインプロセスのワーカー2つ"""
+    bounds = (20.0, 20.0, 10.0)
+    regions = partition_regions(bounds, 2)
+    state = SharedStateBlock(capacity=8, workers=2)
+    rings = [SharedCommandRing(slots=16) for _ in range(4)]
+    workers = [SimulationWorker(state, rings[index * 2], rings[index * 2 + 1], bounds, worker_index=index,
+                                regions=regions) for index in range(2)]
+    yield state, workers
+    for block in rings + [state]:
+        block.close()
+
+
+def _add_flying_drone(state, worker, slot, drone_id, position):
+    """状態テーブルに名前を書いてからドローンを追加し、飛行中にする"""
+    state.write_name(slot, drone_id)
+    worker.commands.push({"id": slot, "op": "add_drone", "drone_id": drone_id, "slot": slot,
+                          "position": list(position)})
+    worker.commands.push({"id": slot + 100, "op": "start", "slot": slot})
+    worker.process_commands()
+    drone = worker.slots[slot]
+    drone.current_state.state = DroneState.FLYING
+    drone.current_state.velocity = Vector3D(0.0, 0.0, 0.0)
+    drone.current_state.acceleration = Vector3D(0.0, 0.0, 0.0)
+    return drone
+
+
+class TestPartitionedSimulation:
+    """空間分割したワーカーのテスト（インプロセス）"""
+
+    def test_partition_regions_cover_space(self):
+        """領域が空間を隙間なく分割し両端が外側まで延びるテスト"""
+        regions = partition_regions((20.0, 20.0, 10.0), 4)
+        assert [hi for _, hi in regions[:-1]] == [-5.0, 0.0, 5.0]
+        assert regions[0][0] == -float("inf") and regions[-1][1] == float("inf")
+        assert all(regions[i][1] == regions[i + 1][0] for i in range(3))
+
+    def test_drone_migrates_across_boundary(self, partitioned_workers):
+        """領域境界を越えたドローンが状態を保ったまま隣のワーカーへ移るテスト"""
+        state, (left, right) = partitioned_workers
+        drone = _add_flying_drone(state, left, 2, "sim_cross", (-0.5, 0.0, 2.0))
+        drone.current_state.position = Vector3D(0.4, 0.0, 2.0)
+        drone.total_distance_traveled = 12.5
+
+        left.step()
+        assert 2 not in left.slots and "sim_cross" not in left.simulator.drones
+        assert state.read_row(2)[FIELD["owner"]] == 1.0
+
+        right.step()
+        adopted = right.slots[2]
+        assert adopted.drone_id == "sim_cross"
+        assert adopted.is_running and adopted.current_state.state == DroneState.FLYING
+        assert adopted.total_distance_traveled == pytest.approx(12.5, abs=0.01)
+        assert state.read_header(0)["migrated_out"] == 1 and state.read_header(1)["migrated_in"] == 1
+
+        # 移管前のワーカーに届いたコマンドは再送を促す
+        left.commands.push({"id": 7, "op": "land", "slot": 2})
+        left.process_commands()
+        assert left.replies.drain()[-1] == {"id": 7, "moved": True}
+
+    def test_resent_command_adopts_pending_handover(self, partitioned_workers):
+        """移管先が行を引き継ぐ前に再送コマンドが届いても、引き継いでから処理するテスト"""
+        state, (left, right) = partitioned_workers
+        drone = _add_flying_drone(state, left, 2, "sim_cross", (-0.5, 0.0, 2.0))
+        drone.current_state.position = Vector3D(0.4, 0.0, 2.0)
+        left.step()
+
+        # 移管先の step より先に再送コマンドを処理する
+        right.commands.push({"id": 8, "op": "emergency_land", "slot": 2})
+        right.process_commands()
+
+        assert right.replies.drain()[-1] == {"id": 8, "result": True}
+        assert right.slots[2].drone_id == "sim_cross"
+        assert state.read_header(1)["migrated_in"] == 1
+        right.step()
+        assert state.read_header(1)["migrated_in"] == 1
+
+    def test_ghosts_detect_cross_boundary_near_miss(self, partitioned_workers):
+        """境界をはさんだ接近をゴーストで検出し、イベントは片側のみが出すテスト"""
+        state, (left, right) = partitioned_workers
+        _add_flying_drone(state, left, 0, "sim_a", (-0.3, 0.0, 2.0))
+        _add_flying_drone(state, right, 1, "sim_b", (0.3, 0.0, 2.0))
+        _add_flying_drone(state, right, 3, "sim_far", (8.0, 0.0, 2.0))
+        left.replies.drain()
+        right.replies.drain()
+        for worker in (left, right):
+            worker._publish(list(worker.slots))
+
+        ghosts = left.collect_ghosts()
+        assert [drone_id for drone_id, _ in ghosts] == ["sim_b"]
+
+        left.step()
+        right.step()
+        events = [reply["event"] for reply in left.replies.drain() + right.replies.drain() if "event" in reply]
+        assert len(events) == 1
+        assert events[0]["drone_ids"] == ["sim_a", "sim_b"]
+
+        # 分離速度は各ワーカーが自分の担当機にのみかける
+        assert left.slots[0].separation_velocity.x < 0
+        assert right.slots[1].separation_velocity.x > 0
+
+
+class TestSimulationProcess:
+    """SimulationProcess のテスト（ワーカープロセス）"""
+
+    def test_round_trip_through_worker_process(self):
+        """ワーカープロセスへのコマンドと共有メモリからの状態取得テスト"""
+        process = SimulationProcess((20.0, 20.0, 10.0), physics_hz=200.0, start_method="fork")
+        process.add_obstacle(Obstacle("box", ObstacleType.COLUMN, Vector3D(5.0, 5.0, 1.0), Vector3D(1.0, 1.0, 2.0)))
+        process.start()
+        try:
+            drone = process.add_drone("sim_1", (1.0, -2.0, 3.0))
+            assert drone.get_current_position() == (1.0, -2.0, 3.0)
+            assert drone.is_running is False
+
+            drone.start_simulation()
+            assert drone.is_running is True
+            assert drone.takeoff() is True
+            assert drone.current_state.state != DroneState.IDLE
+            assert drone.get_statistics()["obstacle_count"] == 7
+
+            ticks = process.get_statistics()["ticks"]
+            time.sleep(0.1)
+            assert process.get_statistics()["ticks"] > ticks
+
+            with pytest.raises(SimulationProcessError):
+                process.request("bogus")
+            assert process.remove_drone("sim_1") is True
+        finally:
+            process.close()
+
+        assert process.is_alive is False
+        with pytest.raises(SimulationProcessError):
+            process.request("stop")
+
+    def test_partitioned_worker_processes(self):
+        """複数ワーカープロセスで領域ごとにドローンを担当し、統計を集約するテスト"""
+        process = SimulationProcess((20.0, 20.0, 10.0), physics_hz=100.0, start_method="fork", workers=2)
+        process.start()
+        try:
+            west = process.add_drone("sim_west", (-5.0, 0.0, 0.0))
+            east = process.add_drone("sim_east", (5.0, 0.0, 0.0))
+            assert process.read_state(west.slot)[FIELD["owner"]] == 0.0
+            assert process.read_state(east.slot)[FIELD["owner"]] == 1.0
+
+            east.start_simulation()
+            assert east.is_running is True and west.is_running is False
+
+            stats = process.get_statistics()
+            assert stats["workers"] == 2 and len(stats["pids"]) == 2
+            assert [worker["drones"] for worker in stats["per_worker"]] == [1, 1]
+            assert process.remove_drone("sim_east") is True
+        finally:
+            process.close()
+
+    def test_replies_not_awaited_are_dropped(self):
+        """タイムアウト後に届いた応答が保持されずに破棄されるテスト"""
+        process = SimulationProcess((20.0, 20.0, 10.0), physics_hz=200.0, start_method="fork")
+        process.start()
+        try:
+            assert process.replies[0].push({"id": 10 ** 6, "result": True})
+            process.get_proximity_events()
+            assert process.get_statistics()["stale_replies"] == 1
+            assert process._replies == {}
+
+            process.add_drone("sim_1", (0.0, 0.0, 0.0))
+            assert process._awaiting == set() and process._replies == {}
+        finally:
+            process.close()
+
+    def test_concurrent_start_and_add_drone(self):
+        """並行な起動とドローン追加でワーカーが1組だけ起動し、スロットが重複しないテスト"""
+        process = SimulationProcess((20.0, 20.0, 10.0), physics_hz=200.0, start_method="fork")
+        errors = []
+
+        def run(target, *args):
+            try:
+                target(*args)
+            except Exception as e:
+                errors.append(e)
+
+        try:
+            threads = [threading.Thread(target=run, args=(process.start,)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(process.processes) == 1
+
+            threads = [threading.Thread(target=run, args=(process.add_drone, f"sim_{i}", (float(i), 0.0, 0.0)))
+                       for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+            assert sorted(process.drone_slots.values()) == list(range(6))
+            for drone_id, slot in process.drone_slots.items():
+                assert process.state.read_name(slot) == drone_id
+        finally:
+            process.close()
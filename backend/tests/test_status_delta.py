@@ -0,0 +1,115 @@
+"""
+Status Delta Tests
+Tests for delta-encoded fleet status streaming
+"""
+
+import copy
+import json
+
+import pytest
+
+from backend.api_server.core.status_delta import (
+    StatusDeltaEncoder, apply_delta, diff_fields, group_subscribers
+)
+
+
+def _status(drone_id, battery=90, height=0, yaw=0.0, updated="2024-01-01T00:00:00"):
+    """テスト用の状態辞書"""
+    return {
+        "drone_id": drone_id,
+        "connection_status": "connected",
+        "flight_status": "flying",
+        "battery_level": battery,
+        "height": height,
+        "speed": 0.0,
+        "attitude": {"pitch": 0.0, "roll": 0.0, "yaw": yaw},
+        "last_updated": updated
+    }
+
+
+def _fleet(count, **overrides):
+    """count 台分の状態"""
+    return {f"drone_{i:03d}": _status(f"drone_{i:03d}", **overrides) for i in range(count)}
+
+
+class TestDiffFields:
+    """diff_fields のテスト"""
+
+    def test_only_changed_fields(self):
+        """変化したフィールドのみ返すテスト"""
+        changes = diff_fields(_status("a"), _status("a", battery=80, yaw=15.0, updated="later"),
+                              ignored=("last_updated",))
+        assert changes == {"battery_level": 80, "attitude": {"yaw": 15.0}}
+
+    def test_new_drone_is_full(self):
+        """新規ドローンは全フィールドを返すテスト"""
+        assert diff_fields({}, _status("a"), ignored=("last_updated",))["drone_id"] == "a"
+
+
+class TestStatusDeltaEncoder:
+    """StatusDeltaEncoder のテスト"""
+
+    def test_seq_advances_only_on_change(self):
+        """変化がない tick では seq が進まないテスト"""
+        encoder = StatusDeltaEncoder()
+        assert encoder.update(_fleet(2)).seq == 1
+        assert encoder.update(_fleet(2, updated="later")) is None
+        delta = encoder.update(_fleet(2, battery=89))
+        assert delta.seq == 2
+        assert delta.changes == {"drone_000": {"battery_level": 89}, "drone_001": {"battery_level": 89}}
+
+    def test_removed_drones(self):
+        """削除されたドローンのテスト"""
+        encoder = StatusDeltaEncoder()
+        encoder.update(_fleet(3))
+        delta = encoder.update(_fleet(2))
+        assert delta.removed == ["drone_002"]
+        assert delta.changes == {}
+
+    def test_client_reconstructs_state(self):
+        """全体スナップショット + 差分でクライアント状態が一致するテスト"""
+        encoder = StatusDeltaEncoder()
+        encoder.update(_fleet(3))
+
+        full = json.loads(json.dumps(encoder.full_message()))
+        client_state, client_seq = full["drones"], full["seq"]
+
+        for tick in range(1, 6):
+            current = _fleet(3, battery=90 - tick, height=tick * 10, yaw=float(tick))
+            message = json.loads(json.dumps(encoder.update(current).to_message()))
+            assert message["seq"] == client_seq + 1
+            client_seq = message["seq"]
+            apply_delta(client_state, message)
+
+        expected = copy.deepcopy(encoder.state)
+        assert client_state == expected
+
+    def test_filtered_message(self):
+        """対象ドローンで絞り込んだ差分のテスト"""
+        encoder = StatusDeltaEncoder()
+        delta = encoder.update(_fleet(3))
+        message = delta.to_message(frozenset({"drone_001"}))
+        assert list(message["changes"]) == ["drone_001"]
+        assert message["seq"] == delta.seq
+        assert list(encoder.full_message(frozenset({"drone_002"}))["drones"]) == ["drone_002"]
+
+    def test_bandwidth_reduction(self):
+        """50台で1フィールドずつ変化した場合の送信量削減テスト"""
+        encoder = StatusDeltaEncoder()
+        encoder.update(_fleet(50))
+
+        current = _fleet(50, updated="later")
+        current["drone_007"] = _status("drone_007", battery=42, updated="later")
+        delta_bytes = len(json.dumps(encoder.update(current).to_message()))
+        full_bytes = sum(
+            len(json.dumps({"type": "drone_status_update", "drone_id": drone_id, "status": status}))
+            for drone_id, status in current.items()
+        )
+        assert delta_bytes * 10 < full_bytes
+
+
+def test_group_subscribers():
+    """同じ対象集合の購読者がまとめられるテスト"""
+    target = frozenset({"drone_001"})
+    groups = dict(group_subscribers({"ws1": None, "ws2": target, "ws3": None}))
+    assert groups == {None: ["ws1", "ws3"], target: ["ws2"]}
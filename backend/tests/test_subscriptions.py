@@ -0,0 +1,100 @@
+"""
+Subscription Registry Tests
+Tests for per-subscription topics, rate limits and field masks
+"""
+
+import pytest
+
+from backend.api_server.core.subscriptions import (
+    MAX_RATE_HZ, SubscriptionRegistry, apply_field_mask
+)
+
+STATUS = {
+    "drone_id": "drone_001",
+    "battery_level": 80,
+    "height": 120,
+    "attitude": {"pitch": 1.0, "roll": 2.0, "yaw": 3.0}
+}
+
+
+class TestFieldMask:
+    """apply_field_mask のテスト"""
+
+    def test_top_level_and_nested_fields(self):
+        """トップレベルとドット区切りのネスト指定のテスト"""
+        masked = apply_field_mask(STATUS, ["battery_level", "attitude.yaw", "missing", "height.cm"])
+        assert masked == {"battery_level": 80, "attitude": {"yaw": 3.0}}
+        assert apply_field_mask(STATUS, None) is STATUS
+
+
+class TestSubscriptionRegistry:
+    """SubscriptionRegistry のテスト"""
+
+    def test_topics_and_validation(self):
+        """トピック別の購読者取得と不正な設定の拒否テスト"""
+        registry = SubscriptionRegistry()
+        registry.subscribe("ws1", "drone_001")
+        registry.subscribe("ws2", "drone_001", topics=["telemetry", "alerts"], max_rate_hz=500)
+
+        assert [s.connection for s in registry.subscribers("drone_001", "status")] == ["ws1"]
+        assert registry.drones_for("telemetry") == ["drone_001"]
+        assert registry.connections_for("alerts") == {"ws2"}
+        assert registry.get("ws2", "drone_001").max_rate_hz == MAX_RATE_HZ
+
+        for options in ({"topics": ["video"]}, {"topics": []}, {"max_rate_hz": 0}, {"fields": "height"}):
+            with pytest.raises(ValueError):
+                registry.subscribe("ws3", "drone_001", **options)
+
+        # 再購読は設定を置き換える
+        registry.subscribe("ws1", "drone_001", topics=["telemetry"])
+        assert registry.subscribers("drone_001", "status") == []
+        assert registry.remove_connection("ws1") == 1
+        assert registry.unsubscribe("ws1", "drone_001") is False
+
+    def test_rate_limit_per_subscription(self):
+        """購読ごとのレート上限で間引かれるテスト"""
+        registry = SubscriptionRegistry()
+        registry.subscribe("control", "drone_001", topics=["telemetry"], max_rate_hz=20)
+        registry.subscribe("tile", "drone_001", topics=["telemetry"], max_rate_hz=0.2)
+        assert registry.max_rate("telemetry") == 20
+        assert registry.max_rate("detections") is None
+
+        received = {"control": 0, "tile": 0}
+        for tick in range(80):  # 20Hz で4秒分
+            for connections in registry.collect_due("drone_001", "telemetry", now=tick * 0.05).values():
+                for connection in connections:
+                    received[connection] += 1
+        assert received == {"control": 80, "tile": 1}
+        assert registry.get_statistics()["skipped_by_rate"] == 79
+
+        registry.subscribe("raw", "drone_001", topics=["telemetry"])
+        assert registry.max_rate("telemetry") == float("inf")
+
+    def test_demand_per_drone(self):
+        """ドローンごとの要求レート集計のテスト"""
+        registry = SubscriptionRegistry()
+        registry.subscribe("a", "drone_001", topics=["telemetry"], max_rate_hz=5)
+        registry.subscribe("b", "drone_001", topics=["telemetry"], max_rate_hz=20)
+        registry.subscribe("c", "drone_002", topics=["telemetry", "status"])
+        assert registry.demand("telemetry") == {"drone_001": 20.0, "drone_002": float("inf")}
+        assert registry.demand("status") == {"drone_002": float("inf")}
+        assert registry.demand("alerts") == {}
+
+    def test_alerts_not_rate_limited(self):
+        """イベント系トピック（alerts）は間引かれないテスト"""
+        registry = SubscriptionRegistry()
+        registry.subscribe("ws", "drone_001", topics=["status", "alerts"], max_rate_hz=0.2)
+        assert registry.collect_due("drone_001", "alerts", now=0.0) == {None: ["ws"]}
+        assert registry.collect_due("drone_001", "alerts", now=0.1) == {None: ["ws"]}
+        assert registry.collect_due("drone_001", "status", now=0.0) == {None: ["ws"]}
+        assert registry.collect_due("drone_001", "status", now=0.1) == {}
+
+    def test_groups_by_field_mask(self):
+        """同じフィールドマスクの購読がまとめられるテスト"""
+        registry = SubscriptionRegistry()
+        registry.subscribe("a", "drone_001", fields=["height", "battery_level"])
+        registry.subscribe("b", "drone_001", fields=["battery_level", "height"])
+        registry.subscribe("c", "drone_001")
+
+        groups = registry.collect_due("drone_001", "status", now=0.0)
+        assert groups == {("battery_level", "height"): ["a", "b"], None: ["c"]}
@@ -0,0 +1,93 @@
+"""
+Swept Collision Tests
+Tests for vectorized swept-AABB segment checks in Virtual3DSpace and DroneSimulator
+"""
+
+import numpy as np
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.drone_simulator import (
+    DroneSimulator, DroneState, Obstacle, ObstacleType, Vector3D, Virtual3DSpace
+)
+
+
+def _space_with_column():
+    """中央に柱がある空間"""
+    space = Virtual3DSpace((10.0, 10.0, 5.0))
+    space.add_obstacle(Obstacle("column", ObstacleType.COLUMN, Vector3D(0.0, 0.0, 2.5), Vector3D(0.5, 0.5, 5.0)))
+    return space
+
+
+class TestSweepSegments:
+    """Virtual3DSpace.sweep_segments のテスト"""
+
+    def test_segment_through_column(self):
+        """柱を貫通する線分の衝突時刻テスト"""
+        space = _space_with_column()
+        times, ids = space.sweep_segments([(-2.0, 0.0, 1.0), (2.0, 0.0, 1.0), (2.0, 2.0, 1.0)])
+
+        # 膨張後の柱の手前 x = -0.35 に到達する時刻
+        assert times[0] == pytest.approx((2.0 - 0.35) / 4.0)
+        assert ids == ["column", None]
+        assert np.isinf(times[1])
+
+    def test_endpoints_clear_but_path_blocked(self):
+        """端点が有効でも経路上の衝突が検出されるテスト"""
+        space = _space_with_column()
+        path = [(-2.0, 0.0, 1.0), (2.0, 0.0, 1.0)]
+        assert all(space.is_position_valid(Vector3D(*point)) for point in path)
+
+        collision = space.find_path_collision(path)
+        assert collision["segment_index"] == 0
+        assert collision["obstacle_id"] == "column"
+        assert collision["position"][0] == pytest.approx(-0.35)
+
+    def test_start_contact_ignored(self):
+        """開始点で接触中の床から離れる線分が許可されるテスト"""
+        space = _space_with_column()
+        assert space.find_path_collision([(2.0, 2.0, 0.0), (2.0, 2.0, 1.5)]) is None
+        assert space.find_path_collision([(2.0, 2.0, 1.5), (2.0, 2.0, 0.0)])["obstacle_id"] == "floor"
+
+    def test_axis_parallel_and_zero_length(self):
+        """軸に平行な線分と長さ0の線分のテスト"""
+        space = _space_with_column()
+        times, ids = space.sweep_segments([(0.0, -2.0, 1.0), (0.0, 2.0, 1.0), (0.0, 2.0, 1.0)])
+        assert ids[0] == "column" and times[0] == pytest.approx((2.0 - 0.35) / 4.0)
+        assert ids[1] is None
+
+    def test_long_plan_chunked(self):
+        """500ウェイポイントの計画を分割して検証しても一括の結果と一致するテスト"""
+        space = _space_with_column()
+        for i in range(40):
+            space.add_obstacle(Obstacle(f"box_{i}", ObstacleType.COLUMN, Vector3D(-4.0 + (i % 8), -4.0 + (i // 8) * 2, 0.3),
+                                        Vector3D(0.3, 0.3, 0.6)))
+        rng = np.random.default_rng(0)
+        path = rng.uniform((-4.5, -4.5, 1.0), (4.5, 4.5, 4.5), size=(501, 3))
+
+        whole_times, whole_ids = space.sweep_segments(path)
+        times, ids = space.sweep_segments(path, chunk_elements=4096)
+
+        assert len(times) == 500
+        assert np.isfinite(times).any()
+        np.testing.assert_array_equal(times, whole_times)
+        assert list(ids) == list(whole_ids)
+
+
+class TestMoveToPosition:
+    """DroneSimulator.move_to_position の経路チェックのテスト"""
+
+    def test_move_through_column_rejected(self):
+        """柱を貫通する移動が拒否されるテスト"""
+        simulator = DroneSimulator("sweep_drone", (10.0, 10.0, 5.0))
+        simulator.virtual_world.add_obstacle(
+            Obstacle("column", ObstacleType.COLUMN, Vector3D(0.0, 0.0, 2.5), Vector3D(0.5, 0.5, 5.0))
+        )
+        simulator.current_state.position = Vector3D(-2.0, 0.0, 1.0)
+        simulator.current_state.state = DroneState.FLYING
+
+        assert simulator.move_to_position(2.0, 0.0, 1.0) is False
+        assert simulator.move_to_position(-2.0, 2.0, 1.0) is True
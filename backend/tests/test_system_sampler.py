@@ -0,0 +1,108 @@
+"""
+System Sampler Tests
+Tests for background system metrics sampling and snapshot reads from the status services
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend.api_server.core.alert_service import AlertService
+from backend.api_server.core.performance_service import PerformanceService
+from backend.api_server.core.system_sampler import SystemMetricsSampler, sample_interval_from_env
+from backend.api_server.core.system_service import SystemService
+
+
+class TestSystemMetricsSampler:
+    """SystemMetricsSampler のテスト"""
+
+    def test_cpu_percent_never_blocks(self):
+        """CPU 使用率を interval=None の差分で読み、待ち時間が発生しないテスト"""
+        sampler = SystemMetricsSampler()
+        with patch("psutil.cpu_percent", wraps=__import__("psutil").cpu_percent) as cpu_percent:
+            snapshot = sampler.sample()
+        assert cpu_percent.call_count == 2
+        assert all(call.kwargs.get("interval") is None for call in cpu_percent.call_args_list)
+        assert snapshot.sequence == 1 and snapshot.cpu_count
+        assert snapshot.sample_ms < 500
+
+    @pytest.mark.asyncio
+    async def test_latest_reads_snapshot_while_running(self):
+        """サンプリング中は latest() が psutil を呼ばずに同じスナップショットを返すテスト"""
+        sampler = SystemMetricsSampler(interval=60)
+        await sampler.start()
+        try:
+            first = sampler.latest()
+            with patch("psutil.virtual_memory", side_effect=AssertionError("psutil must not be read")):
+                for _ in range(100):
+                    assert sampler.latest() is first
+            assert sampler.samples == 1 and sampler.on_demand_samples == 0
+            assert not sampler.is_stale()
+        finally:
+            await sampler.stop()
+        assert not sampler.running
+        assert sampler.latest().sequence == 2
+
+    @pytest.mark.asyncio
+    async def test_background_loop_refreshes_snapshot(self):
+        """一定間隔でスナップショットが更新され、ネットワーク速度が差分から求まるテスト"""
+        sampler = SystemMetricsSampler(interval=0.02)
+        await sampler.start()
+        try:
+            await asyncio.sleep(0.15)
+            snapshot = sampler.latest()
+            assert snapshot.sequence >= 3
+            assert snapshot.network_rates["sent"] >= 0 and snapshot.network_rates["recv"] >= 0
+            names = {family.name for family in sampler.collect_metrics()}
+            assert {"system_cpu_usage_percent", "system_memory_usage_percent"} <= names
+        finally:
+            await sampler.stop()
+        assert sampler.get_statistics()["errors"] == 0
+
+    def test_interval_from_env(self, monkeypatch):
+        """SYSTEM_METRICS_INTERVAL の読み取りと不正値の扱いのテスト"""
+        monkeypatch.setenv("SYSTEM_METRICS_INTERVAL", "2.5")
+        assert sample_interval_from_env() == 2.5
+        monkeypatch.setenv("SYSTEM_METRICS_INTERVAL", "fast")
+        assert sample_interval_from_env() == 5.0
+        monkeypatch.setenv("SYSTEM_METRICS_INTERVAL", "0")
+        assert sample_interval_from_env() == 5.0
+
+
+class TestSnapshotReaders:
+    """スナップショットを参照するサービスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_services_share_one_snapshot(self):
+        """各サービスが同じスナップショットを参照し、psutil を呼ばないテスト"""
+        sampler = SystemMetricsSampler(interval=60)
+        await sampler.start()
+        try:
+            snapshot = sampler.latest()
+            performance = PerformanceService(sampler=sampler)
+            system = SystemService(sampler=sampler)
+            with patch("psutil.cpu_percent", side_effect=AssertionError("psutil must not be read")):
+                perf = performance.get_system_performance()
+                metrics = await system.get_performance_metrics()
+                status = await system.get_system_status(None, None, None)
+            assert perf["cpu"]["usage_percent"] == round(snapshot.cpu_percent, 1)
+            assert metrics["memory"]["usage_percent"] == round(snapshot.memory.percent, 1)
+            assert status.disk_usage == round(snapshot.disk.percent, 1)
+        finally:
+            await sampler.stop()
+
+    @pytest.mark.asyncio
+    async def test_alert_loop_reads_snapshot(self):
+        """アラート監視ループがスナップショットの値でルールを評価するテスト"""
+        sampler = SystemMetricsSampler(interval=60)
+        await sampler.start()
+        try:
+            sampler.latest().cpu_percent = 97.0
+            service = AlertService(sampler=sampler)
+            await service.start_monitoring(interval_seconds=0.05)
+            await asyncio.sleep(0.1)
+            await service.stop_monitoring()
+        finally:
+            await sampler.stop()
+        assert any("CPU" in alert.message for alert in service.alerts)
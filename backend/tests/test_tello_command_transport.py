@@ -0,0 +1,171 @@
+"""
+Tello Command Transport Tests
+Tests for the asyncio UDP command client against local mock Tello servers
+"""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from backend.api_server.core import tello_edu_controller
+from backend.api_server.core.tello_command_transport import (
+    MockTelloServer, TelloCommandClient, TelloCommandError, TelloCommandTransport, is_idempotent
+)
+
+
+@pytest_asyncio.fixture
+async def transport():
+    """ループバックで送信するコマンドトランスポート"""
+    transport = TelloCommandTransport(local_host="127.0.0.1", timeout=0.5)
+    await transport.start()
+    yield transport
+    transport.close()
+
+
+@pytest_asyncio.fixture
+async def drones():
+    """2台分の模擬Tello（127.0.0.2 / 127.0.0.3）"""
+    servers = [MockTelloServer("127.0.0.2"), MockTelloServer("127.0.0.3")]
+    for server in servers:
+        await server.start()
+    yield servers
+    for server in servers:
+        await server.stop()
+
+
+def _client(transport, server):
+    return TelloCommandClient(transport, server.host, port=server.port)
+
+
+def test_is_idempotent():
+    """再送安全なコマンド判定のテスト"""
+    assert is_idempotent("battery?")
+    assert is_idempotent("command")
+    assert is_idempotent("speed 50")
+    assert not is_idempotent("takeoff")
+    assert not is_idempotent("forward 100")
+
+
+class TestTelloCommandTransport:
+    """TelloCommandTransport のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_ok_and_query_responses(self, transport, drones):
+        """ok 応答と問い合わせ応答のテスト"""
+        client = _client(transport, drones[0])
+        await client.enter_sdk_mode()
+        await client.takeoff()
+        assert await client.get_battery() == 90
+        assert drones[0].received == ["command", "takeoff", "battery?"]
+        assert transport.get_statistics()["responses_ok"] == 3
+
+    @pytest.mark.asyncio
+    async def test_error_response_raises(self, transport, drones):
+        """error 応答で例外になるテスト"""
+        drones[0].error_commands["takeoff"] = "error Not joystick"
+        with pytest.raises(TelloCommandError):
+            await _client(transport, drones[0]).takeoff()
+        assert transport.responses_error == 1
+
+    @pytest.mark.asyncio
+    async def test_drones_commanded_in_parallel(self, transport, drones):
+        """複数ドローンへの並行送信テスト"""
+        for server in drones:
+            server.delay = 0.2
+        clients = [_client(transport, server) for server in drones]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client.move("forward", 100) for client in clients))
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.35
+        assert [server.received for server in drones] == [["forward 100"], ["forward 100"]]
+
+    @pytest.mark.asyncio
+    async def test_commands_sequenced_per_drone(self, transport, drones):
+        """同一ドローンへのコマンドが1つずつ順に送られるテスト"""
+        server = drones[0]
+        server.delay = 0.05
+        client = _client(transport, server)
+
+        await asyncio.gather(*(client.move("up", 20 + i) for i in range(5)))
+
+        assert server.max_active == 1
+        assert server.received == [f"up {20 + i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_timeout_retries_idempotent_only(self, transport, drones):
+        """タイムアウト時に再送安全なコマンドだけ再送するテスト"""
+        server = drones[0]
+        client = _client(transport, server)
+
+        server.drop_next = 1
+        assert await client.get_battery() == 90
+        assert server.received == ["battery?", "battery?"]
+        assert transport.retransmissions == 1
+
+        server.drop_next = 1
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send("takeoff", timeout=0.1)
+        assert server.received[-1] == "takeoff"
+        assert server.received.count("takeoff") == 1
+
+    @pytest.mark.asyncio
+    async def test_late_response_not_matched_to_next_command(self, transport, drones):
+        """遅れて届いた応答が次のコマンドに誤って対応付けられないテスト"""
+        server = drones[0]
+        server.delay = 0.15
+        client = _client(transport, server)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send("land", timeout=0.05, retries=0)
+        await asyncio.sleep(0.15)
+        assert transport.unexpected_responses == 1
+        assert transport.get_in_flight() == []
+
+    @pytest.mark.asyncio
+    async def test_late_response_discarded_before_next_command(self, transport, drones):
+        """タイムアウト直後のコマンドが遅延応答を取り違えず、自分の応答を受け取るテスト"""
+        server = drones[0]
+        server.delay = 0.2
+        client = _client(transport, server)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send("takeoff", timeout=0.05, retries=0)
+        assert await client.send("battery?", timeout=1.0) == "90"
+        assert transport.stray_responses == 1
+        assert transport.stray_waits == 1
+        assert transport.get_statistics()["pending_strays"] == {}
+
+    @pytest.mark.asyncio
+    async def test_lost_response_mark_expires(self, transport, drones):
+        """応答が届かなかった場合も未回収の記録が期限切れで解除されるテスト"""
+        server = drones[0]
+        client = _client(transport, server)
+
+        server.drop_next = 1
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send("takeoff", timeout=0.05, retries=0)
+        assert await client.get_battery() == 90
+        assert transport.stray_waits == 1
+        assert transport.stray_responses == 0
+        assert transport.get_statistics()["pending_strays"] == {}
+
+    @pytest.mark.asyncio
+    async def test_controller_async_commands(self, transport, drones, monkeypatch):
+        """コントローラーの非同期コマンドがトランスポート経由で送られるテスト"""
+        monkeypatch.setattr(tello_edu_controller, "Tello", object)
+        server = drones[0]
+        controller = tello_edu_controller.TelloEDUController("tello_001", server.host, command_transport=transport)
+        controller.command_client.port = server.port
+        controller._connection_established = True
+
+        assert await controller.takeoff_async()
+        assert await controller.move_to_position_async(0.5, 1.0, 1.5)
+        assert await controller.rotate_to_yaw_async(-90)
+        assert await controller.land_async()
+
+        assert server.received == ["takeoff", "right 50", "forward 100", "ccw 90", "land"]
+        assert controller.get_current_position() == (0.5, 1.0, 0.0)
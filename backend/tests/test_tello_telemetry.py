@@ -0,0 +1,195 @@
+"""
+Tello Telemetry Tests
+Tests for the shared UDP state listener using a local fake Tello emitter
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from backend.api_server.core import tello_edu_controller
+from backend.api_server.core.tello_telemetry import (
+    DjitellopyStateBridge, FakeTelloStateEmitter, TelloTelemetryListener, format_tello_state, parse_tello_state
+)
+
+
+async def _wait_for(predicate, timeout: float = 1.0):
+    """条件が満たされるまで待機"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def listener():
+    """ループバックの空きポートで待ち受ける受信器"""
+    listener = TelloTelemetryListener(host="127.0.0.1", port=0)
+    await listener.start()
+    yield listener
+    listener.stop()
+
+
+class TestParseTelloState:
+    """状態パケット解析のテスト"""
+
+    def test_parse_sdk_packet(self):
+        """SDK形式パケットの解析テスト"""
+        data = b"mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:2;roll:-1;yaw:45;vgx:5;vgy:0;vgz:0;" \
+               b"templ:60;temph:63;tof:10;h:120;bat:87;baro:12.34;time:15;agx:1.0;agy:0.0;agz:-998.0;\r\n"
+        values = parse_tello_state(data)
+        assert values["yaw"] == 45
+        assert values["bat"] == 87
+        assert values["baro"] == pytest.approx(12.34)
+        assert values["mpry"] == "0,0,0"
+
+    def test_roundtrip(self):
+        """フォーマットと解析の往復テスト"""
+        values = {"pitch": 1, "roll": 2, "yaw": -30, "h": 80, "bat": 55}
+        assert parse_tello_state(format_tello_state(values)) == values
+
+    def test_malformed_packet(self):
+        """不正パケットのテスト"""
+        with pytest.raises(ValueError):
+            parse_tello_state(b"garbage")
+        with pytest.raises(ValueError):
+            parse_tello_state(b"\r\n")
+
+
+class TestTelloTelemetryListener:
+    """TelloTelemetryListener のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_demultiplexes_by_source_ip(self, listener):
+        """送信元IPごとの振り分けテスト"""
+        target = listener.local_address
+        first = FakeTelloStateEmitter(target, source_ip="127.0.0.2")
+        second = FakeTelloStateEmitter(target, source_ip="127.0.0.3")
+        try:
+            await first.send(bat=80, h=100, yaw=10)
+            await second.send(bat=40, h=250, yaw=-90)
+            await _wait_for(lambda: listener.packets_received == 2)
+
+            listener.register_drone("tello_001", "127.0.0.2")
+            assert listener.get_state("tello_001").battery == 80
+            assert listener.get_state("127.0.0.3").height_cm == 250
+            assert listener.get_state("127.0.0.3").attitude["yaw"] == -90
+            assert sorted(listener.get_sources()) == ["127.0.0.2", "127.0.0.3"]
+        finally:
+            await first.stop()
+            await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_periodic_stream_updates_latest_state(self, listener):
+        """定期送信で最新状態が更新されるテスト"""
+        emitter = FakeTelloStateEmitter(listener.local_address, rate_hz=50)
+        try:
+            await emitter.start()
+            await _wait_for(lambda: listener.packets_received >= 5)
+            emitter.state["bat"] = 12
+            await _wait_for(lambda: listener.get_state("127.0.0.1").battery == 12)
+        finally:
+            await emitter.stop()
+
+    @pytest.mark.asyncio
+    async def test_invalid_packets_counted(self, listener):
+        """不正パケットの計上テスト"""
+        emitter = FakeTelloStateEmitter(listener.local_address)
+        try:
+            await emitter.send_raw(b"not-a-state-packet")
+            await emitter.send(bat=90)
+            await _wait_for(lambda: listener.packets_received == 1)
+            assert listener.parse_errors == 1
+        finally:
+            await emitter.stop()
+
+    @pytest.mark.asyncio
+    async def test_stale_state_hidden(self, listener):
+        """古い状態が返されないテスト"""
+        listener.stale_after = 0.05
+        emitter = FakeTelloStateEmitter(listener.local_address)
+        try:
+            await emitter.send(bat=70)
+            await _wait_for(lambda: listener.get_state("127.0.0.1") is not None)
+            await asyncio.sleep(0.1)
+            assert listener.get_state("127.0.0.1") is None
+            assert listener.get_state("127.0.0.1", include_stale=True).battery == 70
+            assert listener.get_statistics()["stale_sources"] == ["127.0.0.1"]
+        finally:
+            await emitter.stop()
+
+    @pytest.mark.asyncio
+    async def test_controller_reads_pushed_state(self, listener, monkeypatch):
+        """コントローラーがポーリングせずにプッシュ状態を参照するテスト"""
+        monkeypatch.setattr(tello_edu_controller, "Tello", object)
+        controller = tello_edu_controller.TelloEDUController("tello_001", "127.0.0.2", telemetry=listener)
+        controller.start_simulation()
+        emitter = FakeTelloStateEmitter(listener.local_address, source_ip="127.0.0.2")
+        try:
+            assert controller._state_update_thread is None
+            await emitter.send(bat=66, h=150, vgx=10, pitch=3)
+            await _wait_for(lambda: controller.get_battery_level() == 66)
+
+            assert controller.get_current_position()[2] == pytest.approx(1.5)
+            assert controller.get_current_velocity() == pytest.approx((1.0, 0.0, 0.0))
+            info = controller.get_real_drone_info()
+            assert info["attitude"]["pitch"] == 3
+            assert info["height"] == 150
+        finally:
+            controller.stop_simulation()
+            await emitter.stop()
+        assert listener.get_state("tello_001") is None
+
+
+def _fake_djitellopy():
+    """djitellopy.tello と同じ構造（モジュール変数 drones / threads_initialized）の代替"""
+    bound = []
+
+    class Tello:
+        @staticmethod
+        def udp_state_receiver():
+            bound.append(8890)
+
+    return SimpleNamespace(Tello=Tello, drones={}, threads_initialized=False), bound
+
+
+class TestDjitellopyStateBridge:
+    """DjitellopyStateBridge のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_listener_feeds_djitellopy_state(self, listener):
+        """djitellopy の受信スレッドがポートを使わず、受信器の状態が djitellopy に渡るテスト"""
+        module, bound = _fake_djitellopy()
+        bridge = DjitellopyStateBridge(listener, module=module)
+        assert bridge.install()
+
+        # Tello 生成時に起動される受信スレッドはポートをバインドしない
+        module.Tello.udp_state_receiver()
+        assert bound == []
+
+        module.drones["127.0.0.2"] = {"responses": [], "state": {}}
+        emitter = FakeTelloStateEmitter(listener.local_address, source_ip="127.0.0.2")
+        other = FakeTelloStateEmitter(listener.local_address, source_ip="127.0.0.3")
+        try:
+            await other.send(bat=10)
+            await emitter.send(bat=55, h=120)
+            await _wait_for(lambda: module.drones["127.0.0.2"]["state"].get("bat") == 55)
+            assert module.drones["127.0.0.2"]["state"]["h"] == 120
+            assert "127.0.0.3" not in module.drones
+        finally:
+            await emitter.stop()
+            await other.stop()
+
+        bridge.uninstall()
+        module.Tello.udp_state_receiver()
+        assert bound == [8890]
+
+    def test_not_installed_after_receiver_started(self):
+        """djitellopy の受信スレッドが起動済みの場合は置き換えないテスト"""
+        module, _ = _fake_djitellopy()
+        module.threads_initialized = True
+        assert not DjitellopyStateBridge(TelloTelemetryListener(), module=module).install()
+
@@ -0,0 +1,221 @@
+"""
+Tello Video Tests
+Tests for the H.264 NAL reassembly, frame ring and loopback UDP replay pipeline
+"""
+
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from backend.api_server.core.tello_video import (
+    FrameRing, H264NalAssembler, TelloVideoStream, VCL_NAL_TYPES, get_video_receivers, nal_unit_type,
+    replay_h264_file
+)
+
+FRAME_SHAPE = (72, 96, 3)
+
+
+def _nal(nal_type: int, size: int, long_start_code: bool = False) -> bytes:
+    """テスト用の NAL ユニット（ペイロードに開始コードを含まない）"""
+    start = b"\x00\x00\x00\x01" if long_start_code else b"\x00\x00\x01"
+    return start + bytes([0x60 | nal_type]) + bytes((i % 200) + 1 for i in range(size))
+
+
+def _synthetic_stream(frames: int = 12) -> list:
+    """SPS/PPS/IDR + Pスライスの NAL 列"""
+    units = [_nal(7, 10, True), _nal(8, 4, True), _nal(5, 4000, True)]
+    units += [_nal(1, 900 + i * 37) for i in range(frames - 1)]
+    return units
+
+
+class FakeDecoder:
+    """映像スライス1つにつき1フレームを返すデコーダー"""
+
+    def __init__(self):
+        self.count = 0
+
+    def decode(self, nal: bytes):
+        if nal_unit_type(nal) not in VCL_NAL_TYPES:
+            return []
+        self.count += 1
+        return [np.full(FRAME_SHAPE, self.count % 256, dtype=np.uint8)]
+
+
+def _free_port() -> int:
+    """空いているUDPポート"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(predicate, timeout: float = 2.0):
+    """条件が満たされるまで待機"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestH264NalAssembler:
+    """H264NalAssembler のテスト"""
+
+    @pytest.mark.parametrize("packet_size", [1, 7, 1460])
+    def test_reassembles_across_packet_boundaries(self, packet_size):
+        """パケット境界をまたぐ NAL ユニットの再構成テスト"""
+        units = _synthetic_stream()
+        data = b"".join(units)
+        assembler = H264NalAssembler()
+
+        received = []
+        for offset in range(0, len(data), packet_size):
+            received.extend(assembler.feed(data[offset:offset + packet_size]))
+        received.append(assembler.flush())
+
+        assert received == units
+        assert [nal_unit_type(unit) for unit in received[:3]] == [7, 8, 5]
+
+    def test_leading_fragment_discarded(self):
+        """途中から受信した断片が破棄されるテスト"""
+        assembler = H264NalAssembler()
+        units = assembler.feed(b"\x12\x34\x56" + _nal(7, 5) + _nal(8, 3))
+        assert units == [_nal(7, 5)]
+        assert assembler.discarded_bytes == 3
+
+
+class TestFrameRing:
+    """FrameRing のテスト"""
+
+    def test_preallocated_slots_reused(self):
+        """スロットが再確保されずに再利用されるテスト"""
+        ring = FrameRing(capacity=4)
+        for value in range(10):
+            ring.push(np.full(FRAME_SHAPE, value, dtype=np.uint8))
+        frame, _, seq = ring.latest()
+        assert ring.allocations == 1
+        assert seq == 9 and frame[0, 0, 0] == 9
+
+    def test_since_reports_overwritten_frames(self):
+        """上書きされたフレーム数が報告されるテスト"""
+        ring = FrameRing(capacity=3)
+        for value in range(6):
+            ring.push(np.full(FRAME_SHAPE, value, dtype=np.uint8))
+        frames, missed = ring.since(1)
+        assert [seq for seq, _, _ in frames] == [3, 4, 5]
+        assert missed == 1
+
+    def test_latest_is_copy(self):
+        """取得したフレームがリングと独立しているテスト"""
+        ring = FrameRing(capacity=2)
+        ring.push(np.zeros(FRAME_SHAPE, dtype=np.uint8))
+        frame, _, _ = ring.latest()
+        frame[:] = 255
+        assert ring.latest()[0].max() == 0
+
+
+class TestTelloVideoStream:
+    """TelloVideoStream のテスト（ループバックUDPでファイルを再生）"""
+
+    def test_replay_decodes_all_frames(self, tmp_path):
+        """.h264 ファイルの再生で全フレームがデコードされるテスト"""
+        path = tmp_path / "flight.h264"
+        path.write_bytes(b"".join(_synthetic_stream(12)))
+
+        stream = TelloVideoStream("tello_001", host="127.0.0.1", port=0, source_ip="127.0.0.2",
+                                  decoder_factory=FakeDecoder)
+        stream.start_stream()
+        try:
+            packets = replay_h264_file(str(path), stream.local_address, source_ip="127.0.0.2")
+            _wait_for(lambda: stream.packets_received == packets)
+        finally:
+            stream.stop_stream()
+
+        stats = stream.get_statistics()
+        assert stats["frame_count"] == 12
+        assert stats["decode_errors"] == 0
+        assert stats["nal_units"] == 14
+        assert stats["avg_decode_latency_ms"] >= 0.0
+        assert stream.get_frame().shape == FRAME_SHAPE
+        assert (stream.width, stream.height) == (96, 72)
+
+    def test_other_sources_ignored(self, tmp_path):
+        """他の送信元のパケットが無視されるテスト"""
+        path = tmp_path / "other.h264"
+        path.write_bytes(b"".join(_synthetic_stream(3)))
+
+        stream = TelloVideoStream("tello_001", host="127.0.0.1", port=0, source_ip="127.0.0.2",
+                                  decoder_factory=FakeDecoder)
+        stream.start_stream()
+        try:
+            packets = replay_h264_file(str(path), stream.local_address, source_ip="127.0.0.3")
+            _wait_for(lambda: stream.packets_ignored == packets)
+            assert stream.get_frame() is None
+        finally:
+            stream.stop_stream()
+
+    def test_drones_share_video_port(self, tmp_path):
+        """同じ映像ポートを使う複数ドローンのパケットが送信元IPで振り分けられるテスト"""
+        path = tmp_path / "shared.h264"
+        path.write_bytes(b"".join(_synthetic_stream(6)))
+        port = _free_port()
+
+        streams = [
+            TelloVideoStream(f"tello_00{i}", host="127.0.0.1", port=port, source_ip=f"127.0.0.{i + 1}",
+                             decoder_factory=FakeDecoder)
+            for i in (1, 2)
+        ]
+        for stream in streams:
+            stream.start_stream()
+        try:
+            assert streams[0].local_address == streams[1].local_address == ("127.0.0.1", port)
+            with pytest.raises(ValueError):
+                TelloVideoStream("tello_003", host="127.0.0.1", port=port, source_ip="127.0.0.2",
+                                 decoder_factory=FakeDecoder).start_stream()
+            counts = [replay_h264_file(str(path), ("127.0.0.1", port), source_ip=s.source_ip) for s in streams]
+            for stream, packets in zip(streams, counts):
+                _wait_for(lambda: stream.packets_received == packets)
+        finally:
+            for stream in streams:
+                stream.stop_stream()
+
+        assert [stream.frames_decoded for stream in streams] == [6, 6]
+        assert [stream.packets_ignored for stream in streams] == [0, 0]
+        assert get_video_receivers() == []
+
+    def test_skipped_frames_counted_as_dropped(self):
+        """読み出されなかったフレームがドロップとして計上されるテスト"""
+        stream = TelloVideoStream("tello_001", decoder_factory=FakeDecoder)
+        stream.ring.push(np.zeros(FRAME_SHAPE, dtype=np.uint8))
+        stream.get_frame()
+        for _ in range(4):
+            stream.ring.push(np.zeros(FRAME_SHAPE, dtype=np.uint8))
+        stream.get_frame()
+        assert stream.get_statistics()["frames_dropped"] == 3
+
+    def test_pyav_decode(self, tmp_path):
+        """PyAV で実際の H.264 をデコードするテスト"""
+        av = pytest.importorskip("av")
+
+        path = tmp_path / "encoded.h264"
+        with av.open(str(path), "w", format="h264") as container:
+            video = container.add_stream("libx264", rate=30)
+            video.width, video.height, video.pix_fmt = 320, 240, "yuv420p"
+            for i in range(15):
+                image = np.full((240, 320, 3), i * 10, dtype=np.uint8)
+                for packet in video.encode(av.VideoFrame.from_ndarray(image, format="bgr24")):
+                    container.mux(packet)
+            for packet in video.encode():
+                container.mux(packet)
+
+        stream = TelloVideoStream("tello_001", host="127.0.0.1", port=0)
+        stream.start_stream()
+        try:
+            packets = replay_h264_file(str(path), stream.local_address)
+            _wait_for(lambda: stream.packets_received == packets)
+            _wait_for(lambda: stream.frames_decoded >= 10)
+        finally:
+            stream.stop_stream()
+
+        assert stream.get_frame().shape == (240, 320, 3)
@@ -11,11 +11,20 @@ from fastapi.testclient import TestClient
 from unittest.mock import Mock, AsyncMock, patch
 
 from backend.api_server.main import app
-from backend.api_server.api.websocket import ConnectionManager, WebSocketHandler
+from backend.api_server.api.websocket import ConnectionManager, WebSocketHandler, start_status_broadcaster
 from backend.api_server.core.drone_manager import DroneManager
+from backend.api_server.core.fleet_snapshot import FleetStatusSnapshotter
 from backend.api_server.models.drone_models import DroneStatus, Attitude
 
 
+async def _connect(manager, ws):
+    """接続を登録し、接続確立メッセージの送信記録を消す"""
+    ws.accept = AsyncMock()
+    await manager.connect(ws)
+    await asyncio.sleep(0.01)
+    ws.send_text.reset_mock()
+
+
 class TestConnectionManager:
     """ConnectionManager のテスト"""
     
@@ -59,6 +68,7 @@ class TestConnectionManager:
     async def test_send_personal_message(self, manager, mock_websocket):
         """個人メッセージ送信テスト"""
         message = {"type": "test", "data": "test data"}
+        await _connect(manager, mock_websocket)
         
         await manager.send_personal_message(mock_websocket, message)
         
@@ -66,6 +76,19 @@ class TestConnectionManager:
         sent_data = mock_websocket.send_text.call_args[0][0]
         assert json.loads(sent_data) == message
     
+    @pytest.mark.asyncio
+    async def test_disconnected_socket_not_sent_to(self, manager, mock_websocket):
+        """切断済みの接続には送信せず、送信キューも作り直さないテスト"""
+        await _connect(manager, mock_websocket)
+        manager.drone_subscriptions["drone_001"] = {mock_websocket}
+        manager.disconnect(mock_websocket)
+        
+        assert manager.enqueue_message([mock_websocket], {"type": "test"}) == 0
+        await manager.send_personal_message(mock_websocket, {"type": "test"})
+        
+        assert mock_websocket not in manager.senders
+        mock_websocket.send_text.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_broadcast(self, manager):
         """ブロードキャストテスト"""
@@ -74,8 +97,8 @@ class TestConnectionManager:
         ws2 = Mock()
         ws2.send_text = AsyncMock()
         
-        manager.active_connections.add(ws1)
-        manager.active_connections.add(ws2)
+        await _connect(manager, ws1)
+        await _connect(manager, ws2)
         
         message = {"type": "broadcast", "data": "broadcast data"}
         await manager.broadcast(message)
@@ -91,6 +114,8 @@ class TestConnectionManager:
         ws1.send_text = AsyncMock()
         ws2 = Mock()
         ws2.send_text = AsyncMock()
+        await _connect(manager, ws1)
+        await _connect(manager, ws2)
         
         manager.drone_subscriptions["drone_001"] = {ws1, ws2}
         
@@ -125,6 +150,7 @@ class TestWebSocketHandler:
         """モックDroneManagerインスタンス"""
         manager = Mock(spec=DroneManager)
         manager.get_drone_status = AsyncMock()
+        manager.get_cached_drone_status = AsyncMock()
         manager.get_available_drones = AsyncMock()
         return manager
     
@@ -158,7 +184,7 @@ class TestWebSocketHandler:
             battery_level=85,
             last_updated=datetime.now()
         )
-        mock_drone_manager.get_drone_status.return_value = mock_status
+        mock_drone_manager.get_cached_drone_status.return_value = mock_status
         
         message = {
             "type": "subscribe_drone",
@@ -172,7 +198,7 @@ class TestWebSocketHandler:
             await handler.handle_message(mock_websocket, message)
             
             mock_manager.subscribe_to_drone.assert_called_once_with(mock_websocket, "drone_001")
-            mock_drone_manager.get_drone_status.assert_called_once_with("drone_001")
+            mock_drone_manager.get_cached_drone_status.assert_called_once_with("drone_001")
             
             # 状態メッセージが送信されることを確認
             mock_manager.send_personal_message.assert_called()
@@ -212,7 +238,7 @@ class TestWebSocketHandler:
             battery_level=85,
             last_updated=datetime.now()
         )
-        mock_drone_manager.get_drone_status.return_value = mock_status
+        mock_drone_manager.get_cached_drone_status.return_value = mock_status
         
         message = {
             "type": "get_drone_status",
@@ -224,7 +250,7 @@ class TestWebSocketHandler:
             
             await handler.handle_message(mock_websocket, message)
             
-            mock_drone_manager.get_drone_status.assert_called_once_with("drone_001")
+            mock_drone_manager.get_cached_drone_status.assert_called_once_with("drone_001")
             
             # 状態メッセージが送信されることを確認
             mock_manager.send_personal_message.assert_called()
@@ -292,13 +318,18 @@ async def test_status_broadcaster():
         last_updated=datetime.now()
     )
     mock_drone_manager.get_drone_status = AsyncMock(return_value=mock_status)
+    mock_drone_manager.drone_info = {"drone_001": Mock()}
+    mock_drone_manager.get_drone_type_info = Mock(return_value={})
+    mock_drone_manager.status_snapshot = FleetStatusSnapshotter(mock_drone_manager, interval=0.02)
     
     mock_manager = Mock()
+    mock_manager.broker.is_primary = True
     mock_manager.drone_subscriptions = {"drone_001": {Mock()}}
-    mock_manager.send_to_drone_subscribers = AsyncMock()
+    mock_manager.publish_status_snapshot = AsyncMock()
     
     with patch('backend.api_server.api.websocket.manager', mock_manager):
-        # ブロードキャスターをテスト用に短時間実行
+        # スナップショットの定期構築ループとブロードキャスターをテスト用に短時間実行
+        mock_drone_manager.status_snapshot.start()
         broadcaster_task = asyncio.create_task(
             start_status_broadcaster(mock_drone_manager)
         )
@@ -311,9 +342,18 @@ async def test_status_broadcaster():
             await broadcaster_task
         except asyncio.CancelledError:
             pass
+        await mock_drone_manager.status_snapshot.stop()
+        
+        # スナップショットの状態が配信されることを確認
+        assert mock_manager.publish_status_snapshot.called
+        snapshot = mock_manager.publish_status_snapshot.call_args[0][0]
+        assert snapshot.statuses["drone_001"] == mock_status
+        assert json.loads(snapshot.status_messages["drone_001"])["status"]["battery_level"] == 85
         
-        # 状態更新が送信されることを確認
-        assert mock_manager.send_to_drone_subscribers.called
+        # tick ごとに1回だけ配信され、状態取得はスナップショット構築時のみ行われる
+        ticks = [call.args[0].tick for call in mock_manager.publish_status_snapshot.call_args_list]
+        assert ticks == sorted(set(ticks))
+        assert mock_drone_manager.get_drone_status.await_count == mock_drone_manager.status_snapshot.builds
 
 
 class TestWebSocketIntegration:
@@ -0,0 +1,144 @@
+"""
+WebSocket Sender Tests
+Tests for per-connection send queues, drop/coalesce policies and lag statistics
+"""
+
+import asyncio
+
+import pytest
+
+from backend.api_server.core.websocket_sender import (
+    ConnectionSender, SendPolicy, coalesce_key, policy_for
+)
+
+
+class FakeWebSocket:
+    """送信を記録し、gate が閉じている間は送信をブロックする WebSocket"""
+
+    def __init__(self, blocked=False, fail=False):
+        self.sent = []
+        self.fail = fail
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(text)
+
+
+async def _settle():
+    """書き込みタスクに実行機会を渡す"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestConnectionSender:
+    """ConnectionSender のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_others(self):
+        """遅いクライアントが他の接続の送信を遅らせないテスト"""
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        senders = [ConnectionSender(ws) for ws in (slow, fast)]
+        for sender in senders:
+            sender.start()
+
+        for i in range(3):
+            for sender in senders:
+                assert sender.enqueue(f"m{i}") is True
+        await _settle()
+        assert fast.sent == ["m0", "m1", "m2"]
+        assert slow.sent == []
+        assert senders[0].get_statistics()["queue_depth"] == 2
+
+        slow.gate.set()
+        await _settle()
+        assert slow.sent == ["m0", "m1", "m2"]
+        for sender in senders:
+            sender.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_reliable(self):
+        """満杯時に破棄可能な最古のメッセージだけが捨てられるテスト"""
+        ws = FakeWebSocket(blocked=True)
+        sender = ConnectionSender(ws, max_queue=3)
+        sender.enqueue("reply", SendPolicy.RELIABLE)
+        for i in range(4):
+            sender.enqueue(f"delta{i}")
+
+        assert [entry[2] for entry in sender.queue] == ["reply", "delta2", "delta3"]
+        assert sender.dropped == 2
+
+        sender.start()
+        ws.gate.set()
+        await _settle()
+        assert ws.sent == ["reply", "delta2", "delta3"]
+        sender.close()
+
+    @pytest.mark.asyncio
+    async def test_coalesce_replaces_pending_in_place(self):
+        """同じキーの未送信メッセージが順序を保って最新の内容に置き換わるテスト"""
+        ws = FakeWebSocket(blocked=True)
+        sender = ConnectionSender(ws)
+        sender.enqueue("drone_1:v1", SendPolicy.COALESCE, "drone_status:drone_1")
+        sender.enqueue("event", SendPolicy.RELIABLE)
+        sender.enqueue("drone_1:v2", SendPolicy.COALESCE, "drone_status:drone_1")
+        sender.enqueue("drone_2:v1", SendPolicy.COALESCE, "drone_status:drone_2")
+        assert sender.coalesced == 1
+
+        sender.start()
+        ws.gate.set()
+        await _settle()
+        assert ws.sent == ["drone_1:v2", "event", "drone_2:v1"]
+
+        # 送信済みのキーは再び新規メッセージとして積まれる
+        sender.enqueue("drone_1:v3", SendPolicy.COALESCE, "drone_status:drone_1")
+        await _settle()
+        assert ws.sent[-1] == "drone_1:v3"
+        sender.close()
+
+    @pytest.mark.asyncio
+    async def test_reliable_overflow_and_send_error_close_connection(self):
+        """破棄できないメッセージの溢れと送信失敗で接続が閉じられるテスト"""
+        closed = []
+        sender = ConnectionSender(FakeWebSocket(blocked=True), max_queue=2, on_error=closed.append)
+        assert sender.enqueue("a", SendPolicy.RELIABLE) and sender.enqueue("b", SendPolicy.RELIABLE)
+        assert sender.enqueue("c", SendPolicy.RELIABLE) is False
+        assert sender.closed and closed == [sender.websocket]
+        assert sender.enqueue("d") is False
+
+        failing = FakeWebSocket(fail=True)
+        sender = ConnectionSender(failing, on_error=closed.append)
+        sender.start()
+        sender.enqueue("x")
+        await _settle()
+        assert closed[-1] is failing and sender.closed
+        assert sender.task.done()
+
+    @pytest.mark.asyncio
+    async def test_lag_statistics(self):
+        """キュー滞留時間が遅延として記録されるテスト"""
+        ws = FakeWebSocket(blocked=True)
+        sender = ConnectionSender(ws)
+        sender.start()
+        sender.enqueue("late")
+        await asyncio.sleep(0.05)
+        assert sender.get_statistics()["oldest_pending_ms"] >= 40
+
+        ws.gate.set()
+        await _settle()
+        stats = sender.get_statistics()
+        assert stats["sent"] == 1 and stats["queue_depth"] == 0
+        assert stats["max_lag_ms"] >= 40
+        sender.close()
+
+    def test_policy_lookup(self):
+        """メッセージ種別ごとのポリシーと置き換えキーのテスト"""
+        assert policy_for({"type": "drone_status"}) == SendPolicy.COALESCE
+        assert policy_for({"type": "real_drone_detected"}) == SendPolicy.RELIABLE
+        assert policy_for({"type": "something_else"}) == SendPolicy.DROP_OLDEST
+        assert coalesce_key({"type": "drone_status", "drone_id": "d1"}) == "drone_status:d1"
+        assert coalesce_key({"type": "network_status_update"}) == "network_status_update"
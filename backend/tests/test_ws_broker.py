@@ -0,0 +1,168 @@
+"""
+WebSocket Broker Tests
+Tests for the in-process and Unix-domain-socket pub/sub backends used to fan out across API workers
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from backend.api_server.core.ws_broker import (
+    PEER_LEFT_CHANNEL, InProcessBroker, UnixSocketBroker, create_broker, encode_frame, read_frame
+)
+
+
+@pytest.fixture
+def socket_path():
+    """短いパスのソケット（AF_UNIX のパス長制限のため tmp_path は使わない）"""
+    directory = tempfile.mkdtemp(prefix="wsb")
+    yield os.path.join(directory, "broker.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class Inbox:
+    """受信メッセージを記録するハンドラー"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, channel, data, origin):
+        self.messages.append((channel, data, origin))
+
+    def channel(self, channel):
+        return [data for received, data, _ in self.messages if received == channel]
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def _publish_from_child(path, ready):
+    """子プロセスでブローカーに接続して1件配信"""
+    async def run():
+        broker = UnixSocketBroker(path)
+        await broker.start(Inbox().__call__)
+        broker.publish("drone_topic", {"drone_id": "drone_001", "pid": os.getpid()})
+        await asyncio.sleep(0.2)
+        await broker.stop()
+    ready.wait(5)
+    asyncio.run(run())
+
+
+class TestFraming:
+    """フレームのエンコードのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_frame_round_trip(self):
+        """長さ付きフレームの読み書きテスト"""
+        reader = asyncio.StreamReader()
+        reader.feed_data(encode_frame("w1", "alert", {"level": "high"}) + encode_frame("w1", "x", None))
+        reader.feed_eof()
+        assert b'"alert"' in await read_frame(reader)
+        assert b'"x"' in await read_frame(reader)
+        with pytest.raises(asyncio.IncompleteReadError):
+            await read_frame(reader)
+
+
+class TestBrokers:
+    """ブローカーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_inprocess_broker(self):
+        """既定のプロセス内ブローカーは他プロセスに送らずプライマリとして振る舞うテスト"""
+        connected = []
+        broker = create_broker("inprocess")
+        assert isinstance(broker, InProcessBroker)
+        await broker.start(Inbox(), on_connect=lambda: connected.append(True))
+        assert broker.is_primary and connected == [True]
+        assert broker.publish("alert", {}) is False
+        with pytest.raises(ValueError):
+            create_broker("redis")
+
+    @pytest.mark.asyncio
+    async def test_fan_out_between_workers(self, socket_path):
+        """1ワーカーの配信が他の全ワーカーに届き、送信元には戻らないテスト"""
+        inboxes = [Inbox() for _ in range(3)]
+        brokers = [UnixSocketBroker(socket_path) for _ in range(3)]
+        try:
+            for broker, inbox in zip(brokers, inboxes):
+                await broker.start(inbox)
+            assert [broker.is_primary for broker in brokers] == [True, False, False]
+
+            assert brokers[1].publish("drone_topic", {"drone_id": "drone_001", "seq": 1})
+            brokers[0].publish("alert", {"id": "a1"})
+            await _wait_for(lambda: len(inboxes[0].messages) == 1 and len(inboxes[2].messages) == 2)
+
+            assert inboxes[0].messages == [("drone_topic", {"drone_id": "drone_001", "seq": 1}, brokers[1].origin)]
+            assert inboxes[2].channel("alert") == [{"id": "a1"}]
+            assert inboxes[1].messages == [("alert", {"id": "a1"}, brokers[0].origin)]
+            assert brokers[0].get_statistics()["server"]["clients"] == 3
+        finally:
+            for broker in brokers:
+                await broker.stop()
+
+    @pytest.mark.asyncio
+    async def test_primary_failover(self, socket_path):
+        """プライマリ停止時に他のワーカーが引き継ぎ、離脱が通知されるテスト"""
+        inboxes = [Inbox() for _ in range(3)]
+        reconnected = []
+        brokers = [UnixSocketBroker(socket_path, reconnect_interval=0.05) for _ in range(3)]
+        try:
+            await brokers[0].start(inboxes[0])
+            await brokers[1].start(inboxes[1], on_connect=lambda: reconnected.append(1))
+            await brokers[2].start(inboxes[2])
+            await asyncio.sleep(0.05)
+            brokers[2].publish("interest", {"telemetry": {}})
+            await _wait_for(lambda: inboxes[0].channel("interest"))
+
+            await brokers[0].stop()
+            await _wait_for(lambda: brokers[1].is_primary or brokers[2].is_primary)
+            await _wait_for(lambda: brokers[1].connected and brokers[2].connected)
+            assert len(reconnected) == 2
+
+            brokers[2].publish("alert", {"id": "after-failover"})
+            await _wait_for(lambda: inboxes[1].channel("alert"))
+            assert inboxes[1].channel("alert") == [{"id": "after-failover"}]
+        finally:
+            for broker in brokers:
+                await broker.stop()
+
+        # ワーカーの離脱は残りのワーカーに通知される
+        survivor = Inbox()
+        first, second = UnixSocketBroker(socket_path), UnixSocketBroker(socket_path)
+        try:
+            await first.start(survivor)
+            await second.start(Inbox())
+            await asyncio.sleep(0.05)
+            await second.stop()
+            await _wait_for(lambda: (PEER_LEFT_CHANNEL, None, second.origin) in survivor.messages)
+        finally:
+            await first.stop()
+            await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_publish_from_another_process(self, socket_path):
+        """別プロセスのワーカーからの配信が届くテスト"""
+        inbox = Inbox()
+        primary = UnixSocketBroker(socket_path)
+        context = multiprocessing.get_context("fork")
+        ready = context.Event()
+        child = context.Process(target=_publish_from_child, args=(socket_path, ready))
+        try:
+            await primary.start(inbox)
+            child.start()
+            ready.set()
+            await _wait_for(lambda: inbox.channel("drone_topic"), timeout=5.0)
+            assert inbox.channel("drone_topic")[0]["pid"] == child.pid
+            await _wait_for(lambda: inbox.channel(PEER_LEFT_CHANNEL), timeout=5.0)
+        finally:
+            child.join(5)
+            await primary.stop()
@@ -0,0 +1,100 @@
+"""
+WebSocket Codec Tests
+Tests for encoding negotiation and the compact MessagePack message form
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.api_server.core import ws_codec
+from backend.api_server.core.ws_codec import (
+    JSON, MSGPACK, TELEMETRY_FIELDS, compact_message, decode_message, encode_message,
+    negotiate_subprotocol, resolve_encoding
+)
+
+TIMESTAMP = "2024-01-01T12:00:00"
+
+
+def _telemetry_message(**telemetry_overrides):
+    """テスト用テレメトリメッセージ"""
+    telemetry = {
+        "position": [1.0, 2.0, 3.0],
+        "velocity": [0.1, 0.2, 0.3],
+        "battery_level": 80.0,
+        "flight_state": "flying",
+        "attitude": {"pitch": 0.0, "roll": 1.0, "yaw": 90.0}
+    }
+    telemetry.update(telemetry_overrides)
+    return {"type": "drone_telemetry", "drone_id": "drone_001", "telemetry": telemetry, "timestamp": TIMESTAMP}
+
+
+class TestCompactMessage:
+    """compact_message のテスト"""
+
+    def test_timestamps_become_numbers(self):
+        """ネストした時刻フィールドが UNIX 秒になるテスト"""
+        message = {"type": "drone_status_update", "timestamp": TIMESTAMP,
+                   "status": {"battery_level": 80, "last_updated": TIMESTAMP}}
+        compact = compact_message(message)
+        expected = datetime.fromisoformat(TIMESTAMP).timestamp()
+        assert compact["timestamp"] == expected
+        assert compact["status"]["last_updated"] == expected
+        assert message["timestamp"] == TIMESTAMP  # 元のメッセージは変更しない
+
+    def test_telemetry_positional_array(self):
+        """テレメトリが TELEMETRY_FIELDS 順の配列になるテスト"""
+        compact = compact_message(_telemetry_message())
+        assert compact["telemetry"] == [1.0, 2.0, 3.0, 0.1, 0.2, 0.3, 80.0, "flying", 0.0, 1.0, 90.0]
+        assert len(compact["telemetry"]) == len(TELEMETRY_FIELDS)
+
+        # フィールドマスクで位置・速度を含まない場合は辞書のまま
+        masked = {"type": "drone_telemetry", "telemetry": {"battery_level": 80.0}, "timestamp": TIMESTAMP}
+        assert compact_message(masked)["telemetry"] == {"battery_level": 80.0}
+
+    def test_detections_positional_arrays(self):
+        """検出結果が配列のリストになるテスト"""
+        message = {"type": "drone_detections", "drone_id": "drone_001", "timestamp": TIMESTAMP, "detections": {
+            "model_id": "yolo",
+            "detections": [{"label": "person", "confidence": 0.9,
+                            "bbox": {"x": 1.0, "y": 2.0, "width": 3.0, "height": 4.0}}]
+        }}
+        compact = compact_message(message)
+        assert compact["detections"]["detections"] == [["person", 0.9, 1.0, 2.0, 3.0, 4.0]]
+        assert compact["detections"]["model_id"] == "yolo"
+
+
+class TestNegotiation:
+    """エンコーディングの決定とエンコード・デコードのテスト"""
+
+    def test_json_is_default(self):
+        """指定がない・不明な場合は JSON になるテスト"""
+        assert resolve_encoding(None) == JSON
+        assert resolve_encoding(None, "xml") == JSON
+        assert negotiate_subprotocol(["graphql-ws"]) is None
+        message = _telemetry_message()
+        assert encode_message(message) == json.dumps(message)
+        assert decode_message(json.dumps({"type": "ping"})) == {"type": "ping"}
+        with pytest.raises(ValueError):
+            decode_message("[1, 2]")
+
+    def test_msgpack_falls_back_without_library(self, monkeypatch):
+        """msgpack がない環境では MessagePack 要求が JSON になるテスト"""
+        monkeypatch.setattr(ws_codec, "msgpack", None)
+        assert negotiate_subprotocol(["msgpack", "json"]) == "json"
+        assert resolve_encoding(None, "msgpack") == JSON
+        with pytest.raises(ValueError):
+            decode_message(b"\x81")
+
+    def test_msgpack_round_trip_is_smaller(self):
+        """MessagePack で往復でき JSON より小さいテスト"""
+        pytest.importorskip("msgpack")
+        assert negotiate_subprotocol(["msgpack"]) == "msgpack"
+        assert resolve_encoding("msgpack") == MSGPACK
+
+        message = _telemetry_message()
+        packed = encode_message(message, MSGPACK)
+        assert isinstance(packed, bytes)
+        assert len(packed) < len(encode_message(message, JSON)) / 2
+        assert decode_message(packed) == compact_message(message)
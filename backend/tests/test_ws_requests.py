@@ -0,0 +1,101 @@
+"""
+WebSocket Request Dispatcher Tests
+Tests for concurrent per-connection request handling, correlation IDs and cancellation
+"""
+
+import asyncio
+
+import pytest
+
+from backend.api_server.core.ws_requests import RequestDispatcher, current_request_id, with_request_id
+
+
+class RecordingHandler:
+    """応答を記録するハンドラー（scan は release されるまで待つ）"""
+
+    def __init__(self):
+        self.replies = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, message):
+        if message["type"] == "scan":
+            await self.release.wait()
+        elif message["type"] == "fail":
+            raise RuntimeError("boom")
+        self.replies.append(with_request_id({"type": f"{message['type']}_done"}))
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestRequestDispatcher:
+    """RequestDispatcher のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_long_request_does_not_block_later_messages(self):
+        """時間のかかるリクエスト中も後続のメッセージが処理され、応答に request_id が付くテスト"""
+        handler = RecordingHandler()
+        dispatcher = RequestDispatcher(handler)
+        assert dispatcher.submit({"type": "scan", "request_id": "r1"})
+        assert dispatcher.submit({"type": "ping", "request_id": "r2"})
+        assert dispatcher.submit({"type": "status"})
+        await _settle()
+
+        assert handler.replies == [{"type": "ping_done", "request_id": "r2"}, {"type": "status_done"}]
+        assert dispatcher.active == 1
+
+        handler.release.set()
+        await _settle()
+        assert handler.replies[-1] == {"type": "scan_done", "request_id": "r1"}
+        assert dispatcher.get_statistics()["completed"] == 3
+        assert current_request_id.get() is None
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """同時実行数の上限を超えたリクエストが拒否され、軽量メッセージは受け付けるテスト"""
+        handler = RecordingHandler()
+        dispatcher = RequestDispatcher(handler, max_concurrency=2)
+        assert dispatcher.submit({"type": "scan"}) and dispatcher.submit({"type": "scan"})
+        assert dispatcher.submit({"type": "scan"}) is False
+        assert dispatcher.submit({"type": "ping"}) is True
+        assert dispatcher.rejected == 1
+
+        handler.release.set()
+        await _settle()
+        assert dispatcher.submit({"type": "scan"}) is True
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_cancel_by_id_and_on_disconnect(self):
+        """ID 指定のキャンセルと切断時の一括キャンセルのテスト"""
+        handler = RecordingHandler()
+        dispatcher = RequestDispatcher(handler)
+        dispatcher.submit({"type": "scan", "request_id": "a"})
+        dispatcher.submit({"type": "scan", "request_id": "b"})
+        dispatcher.submit({"type": "scan", "request_id": "c"})
+        await _settle()
+
+        assert dispatcher.cancel("a") is True
+        assert dispatcher.cancel("missing") is False
+        await _settle()
+        assert dispatcher.active == 2
+
+        assert dispatcher.cancel_all() == 2
+        await _settle()
+        assert dispatcher.active == 0
+        assert dispatcher.get_statistics()["cancelled"] == 3
+        assert dispatcher.submit({"type": "ping"}) is False
+        assert handler.replies == []
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_are_contained(self):
+        """ハンドラーの例外が他のリクエストに影響しないテスト"""
+        handler = RecordingHandler()
+        dispatcher = RequestDispatcher(handler)
+        dispatcher.submit({"type": "fail"})
+        dispatcher.submit({"type": "ping"})
+        await _settle()
+        assert dispatcher.failed == 1
+        assert handler.replies == [{"type": "ping_done"}]